@@ -0,0 +1,444 @@
+"""
+API HTTP JSON del motor de búsqueda (sin Streamlit).
+
+Endpoints:
+    GET /api/salud
+    GET /api/buscar?q=<término>&modo=local|dbpedia|hibrido&tipo=nombre|texto&limite=10
+    GET /api/sugerencias?q=<prefijo>&limite=10&tipos=individuo,clase,propiedad,dbpedia
+    GET /api/estadisticas
+    GET /api/clases
+    GET /api/clases/<clase>/instancias
+    GET /api/dbpedia/tipo?tipo=<dbo:tipo>&limite=20
+    GET /api/dbpedia/detalles?uri=<uri>
+    GET /api/dbpedia/explorar?tipos=t1,t2&limite=15
+    GET /api/facetas?faceta.<propiedad>=v1,v2&operador=AND|OR&q=<término>&tipo=nombre|texto&limite=50
+    GET /api/facetas/valores
+    GET /api/enriquecer?nombre=<individuo>
+    GET /api/numericas
+    GET /api/rango?propiedad=<propiedad>&min=<número>&max=<número>&limite=50
+    GET /api/top?propiedad=<propiedad>&n=10&orden=desc|asc
+    GET /api/sparql?q=<SELECT ...>&limite=1000                          (NDJSON en streaming)
+    GET /api/sparql/plantilla?nombre=<plantilla>&parametros=p1,p2&limite=1000  (NDJSON en streaming)
+    GET /api/grafo/propiedades
+    GET /api/grafo/vecindario?nodo=<individuo>&k=2&propiedades=p1,p2&direccion=salida|entrada|ambas
+    GET /api/grafo/camino?origen=<individuo>&destino=<individuo>&propiedades=p1,p2&direccion=salida
+
+Uso:
+    python api_busqueda.py --owl criptomonedas.owl --puerto 8000
+    python api_busqueda.py --indice indices/criptomonedas.bsidx --trabajadores 4
+
+Cada proceso es independiente (sin estado compartido), así que se pueden
+levantar varios detrás de un balanceador para escalar horizontalmente. Con
+--indice, los trabajadores comparten el puerto y el mismo índice mapeado en
+memoria (indice_mmap.py) en lugar de cargar cada uno la ontología. La
+app de Streamlit usa el API en lugar del motor local si se define
+BUSCADOR_API_URL (ver ClienteBusqueda).
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import multiprocessing
+import socket
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+import requests
+
+from busqueda_local import cargar_ontologia_archivo
+from dbpedia_connector import DBpediaConnector
+from indice_mmap import IndiceMmap
+from limitador_salida import prioridad
+from motor_busqueda import ErrorBusqueda, MotorBusqueda
+
+logger = logging.getLogger(__name__)
+
+
+def _entero(parametros: Dict, nombre: str, por_defecto: int) -> int:
+    try:
+        return int(parametros.get(nombre, por_defecto))
+    except (TypeError, ValueError):
+        raise ErrorBusqueda(f"El parámetro '{nombre}' debe ser un entero")
+
+
+def _lista(parametros: Dict, nombre: str) -> Optional[List[str]]:
+    valor = parametros.get(nombre, "")
+    return [v for v in valor.split(",") if v] or None
+
+
+def _numero(parametros: Dict, nombre: str) -> Optional[float]:
+    if parametros.get(nombre, "") == "":
+        return None
+    try:
+        return float(parametros[nombre])
+    except ValueError:
+        raise ErrorBusqueda(f"El parámetro '{nombre}' debe ser un número")
+
+
+class FlujoNDJSON:
+    """Respuesta que se envía línea a línea (JSON por línea) a medida que se produce"""
+
+    def __init__(self, lineas: Iterator):
+        self.lineas = lineas
+
+
+def _flujo_sparql(columnas: List[str], filas: Iterator[List]) -> FlujoNDJSON:
+    # Primera línea: columnas; luego una línea por fila
+    return FlujoNDJSON(itertools.chain([{"columnas": columnas}], filas))
+
+
+def crear_manejador(motor: MotorBusqueda):
+    """Crea la clase manejadora HTTP ligada a un motor de búsqueda"""
+
+    class ManejadorAPI(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, formato, *args):
+            logger.debug("%s - %s", self.address_string(), formato % args)
+
+        def _responder(self, estado: int, datos):
+            cuerpo = json.dumps(datos, ensure_ascii=False).encode("utf-8")
+            self.send_response(estado)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def _responder_flujo(self, flujo: FlujoNDJSON):
+            """Envía el flujo con codificación chunked (un fragmento por línea)"""
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for linea in flujo.lineas:
+                    datos = json.dumps(linea, ensure_ascii=False).encode("utf-8") + b"\n"
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(datos), datos))
+            except Exception:
+                # Ya se enviaron las cabeceras: se corta la respuesta sin el fragmento final
+                logger.exception("Error enviando %s", self.path)
+                self.close_connection = True
+                return
+            self.wfile.write(b"0\r\n\r\n")
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            parametros = {k: v[0] for k, v in parse_qs(url.query).items()}
+            partes = [unquote(p) for p in url.path.strip("/").split("/")]
+
+            try:
+                with prioridad("interactiva"):
+                    datos = self._despachar(partes, parametros)
+            except ErrorBusqueda as e:
+                self._responder(400, {"error": str(e)})
+                return
+            except Exception as e:  # pragma: no cover - error inesperado del motor
+                logger.exception("Error atendiendo %s", self.path)
+                self._responder(500, {"error": str(e)})
+                return
+
+            if datos is None:
+                self._responder(404, {"error": f"Ruta no encontrada: {url.path}"})
+            elif isinstance(datos, FlujoNDJSON):
+                self._responder_flujo(datos)
+            else:
+                self._responder(200, datos)
+
+        def _despachar(self, partes: List[str], parametros: Dict):
+            if partes[:1] != ["api"]:
+                return None
+            ruta = partes[1:]
+
+            if ruta == ["salud"]:
+                return {"estado": "ok", "version": motor.version}
+
+            if ruta == ["buscar"]:
+                return motor.buscar(
+                    parametros.get("q", ""),
+                    modo=parametros.get("modo", "hibrido"),
+                    tipo=parametros.get("tipo", "nombre"),
+                    limite=_entero(parametros, "limite", 10),
+                )
+
+            if ruta == ["sugerencias"]:
+                prefijo = parametros.get("q", "")
+                return {"prefijo": prefijo, "sugerencias": motor.sugerir(
+                    prefijo, _entero(parametros, "limite", 10), _lista(parametros, "tipos")
+                )}
+
+            if ruta == ["estadisticas"]:
+                return motor.estadisticas()
+
+            if ruta == ["clases"]:
+                return {"clases": motor.listar_clases()}
+
+            if len(ruta) == 3 and ruta[0] == "clases" and ruta[2] == "instancias":
+                return {"clase": ruta[1], "instancias": motor.buscar_por_clase(ruta[1])}
+
+            if ruta == ["dbpedia", "tipo"]:
+                entidades, error = motor.buscar_dbpedia_por_tipo(
+                    parametros.get("tipo", "Cryptocurrency"), _entero(parametros, "limite", 20)
+                )
+                return {"entidades": entidades, "error": error}
+
+            if ruta == ["dbpedia", "explorar"]:
+                return {"categorias": motor.explorar_dbpedia(_lista(parametros, "tipos"),
+                                                             _entero(parametros, "limite", 15))}
+
+            if ruta == ["dbpedia", "detalles"]:
+                if not parametros.get("uri"):
+                    raise ErrorBusqueda("Falta el parámetro 'uri'")
+                detalles, error = motor.detalles_dbpedia(parametros["uri"])
+                return {"detalles": detalles, "error": error}
+
+            if ruta == ["facetas"]:
+                selecciones = {
+                    nombre[len("faceta."):]: _lista(parametros, nombre)
+                    for nombre in parametros if nombre.startswith("faceta.")
+                }
+                return motor.buscar_facetado(
+                    selecciones, parametros.get("operador", "AND"), parametros.get("q", ""),
+                    parametros.get("tipo", "nombre"), _entero(parametros, "limite", 50)
+                )
+
+            if ruta == ["facetas", "valores"]:
+                return {"facetas": motor.facetas_disponibles()}
+
+            if ruta == ["enriquecer"]:
+                return {"datos": motor.enriquecer(parametros.get("nombre", ""))}
+
+            if ruta == ["numericas"]:
+                return {"propiedades": motor.propiedades_numericas()}
+
+            if ruta == ["rango"]:
+                return motor.buscar_por_rango(
+                    parametros.get("propiedad", ""), _numero(parametros, "min"), _numero(parametros, "max"),
+                    _entero(parametros, "limite", 50)
+                )
+
+            if ruta == ["top"]:
+                return {"resultados": motor.top_numerico(
+                    parametros.get("propiedad", ""), _entero(parametros, "n", 10),
+                    parametros.get("orden", "desc") != "asc"
+                )}
+
+            if ruta == ["sparql"]:
+                return _flujo_sparql(*motor.consultar_sparql(
+                    parametros.get("q", ""), _entero(parametros, "limite", 1000)
+                ))
+
+            if ruta == ["sparql", "plantilla"]:
+                return _flujo_sparql(*motor.plantilla_sparql(
+                    parametros.get("nombre", ""), _lista(parametros, "parametros") or [],
+                    _entero(parametros, "limite", 1000)
+                ))
+
+            if ruta == ["grafo", "propiedades"]:
+                return {"propiedades": motor.propiedades_grafo()}
+
+            if ruta == ["grafo", "vecindario"]:
+                return {"vecindario": motor.vecindario(
+                    parametros.get("nodo", ""), _entero(parametros, "k", 2),
+                    _lista(parametros, "propiedades"), parametros.get("direccion", "salida")
+                )}
+
+            if ruta == ["grafo", "camino"]:
+                return {"camino": motor.camino(
+                    parametros.get("origen", ""), parametros.get("destino", ""),
+                    _lista(parametros, "propiedades"), parametros.get("direccion", "salida")
+                )}
+
+            return None
+
+    return ManejadorAPI
+
+
+def crear_servidor(motor: MotorBusqueda, host: str = "127.0.0.1", puerto: int = 8000) -> ThreadingHTTPServer:
+    """Crea (sin arrancar) el servidor HTTP del API"""
+    servidor = ThreadingHTTPServer((host, puerto), crear_manejador(motor))
+    servidor.daemon_threads = True
+    return servidor
+
+
+def _servir_trabajador(escucha: socket.socket, ruta_indice: str):
+    """Proceso trabajador: abre el índice por mmap y atiende el socket compartido"""
+    motor = MotorBusqueda(None, DBpediaConnector(), indice=IndiceMmap(ruta_indice))
+    servidor = ThreadingHTTPServer(escucha.getsockname()[:2], crear_manejador(motor), bind_and_activate=False)
+    servidor.socket.close()
+    servidor.socket = escucha
+    servidor.daemon_threads = True
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def servir_trabajadores(ruta_indice: str, host: str = "127.0.0.1", puerto: int = 8000,
+                        trabajadores: int = 2) -> Tuple[List[multiprocessing.Process], int]:
+    """
+    Arranca varios procesos que atienden el mismo puerto sobre un índice mmap
+
+    El socket se abre en el proceso principal y lo heredan los trabajadores
+    (fork), así que el sistema operativo reparte las conexiones entre ellos.
+
+    Args:
+        ruta_indice: Archivo de índice construido con indice_mmap.py
+        host: Dirección de escucha
+        puerto: Puerto de escucha (0 = uno libre)
+        trabajadores: Número de procesos
+
+    Returns:
+        (procesos iniciados, puerto real de escucha)
+    """
+    contexto = multiprocessing.get_context("fork")
+    escucha = socket.create_server((host, puerto), backlog=128)
+    puerto = escucha.getsockname()[1]
+    procesos = []
+    for i in range(trabajadores):
+        proceso = contexto.Process(
+            target=_servir_trabajador, args=(escucha, ruta_indice), name=f"trabajador-{i}", daemon=True
+        )
+        proceso.start()
+        procesos.append(proceso)
+    escucha.close()  # Los trabajadores conservan su copia
+    return procesos, puerto
+
+
+class ClienteBusqueda:
+    """Cliente del API con la misma interfaz de búsqueda que MotorBusqueda"""
+
+    def __init__(self, url_base: str, timeout: float = 30):
+        self.url_base = url_base.rstrip("/")
+        self.timeout = timeout
+        self.sesion = requests.Session()
+
+    def _get(self, ruta: str, **parametros) -> Dict:
+        respuesta = self.sesion.get(f"{self.url_base}{ruta}", params=parametros, timeout=self.timeout)
+        datos = respuesta.json()
+        if respuesta.status_code == 400:
+            raise ErrorBusqueda(datos.get("error", "Solicitud inválida"))
+        respuesta.raise_for_status()
+        return datos
+
+    @property
+    def version(self) -> int:
+        return self._get("/api/salud")["version"]
+
+    def buscar(self, termino: str, modo: str = "hibrido", tipo: str = "nombre", limite: int = 10) -> Dict:
+        return self._get("/api/buscar", q=termino, modo=modo, tipo=tipo, limite=limite)
+
+    def sugerir(self, prefijo: str, limite: int = 10, tipos: Optional[List[str]] = None) -> List[Dict]:
+        return self._get("/api/sugerencias", q=prefijo, limite=limite, tipos=",".join(tipos or []))["sugerencias"]
+
+    def estadisticas(self) -> Dict:
+        return self._get("/api/estadisticas")
+
+    def listar_clases(self) -> List[str]:
+        return self._get("/api/clases")["clases"]
+
+    def buscar_por_clase(self, nombre_clase: str) -> List[Dict]:
+        return self._get(f"/api/clases/{quote(nombre_clase)}/instancias")["instancias"]
+
+    def buscar_dbpedia_por_tipo(self, tipo: str, limite: int = 20) -> Tuple[List[Dict], Optional[str]]:
+        datos = self._get("/api/dbpedia/tipo", tipo=tipo, limite=limite)
+        return datos["entidades"], datos["error"]
+
+    def explorar_dbpedia(self, tipos: Optional[List[str]] = None, limite: int = 15) -> Dict[str, Dict]:
+        parametros = {"tipos": ",".join(tipos)} if tipos else {}
+        return self._get("/api/dbpedia/explorar", limite=limite, **parametros)["categorias"]
+
+    def detalles_dbpedia(self, uri: str) -> Tuple[Optional[Dict], Optional[str]]:
+        datos = self._get("/api/dbpedia/detalles", uri=uri)
+        return datos["detalles"], datos["error"]
+
+    def buscar_facetado(self, selecciones: Dict[str, List[str]], operador: str = "AND",
+                        termino: str = "", tipo: str = "nombre", limite: Optional[int] = 50) -> Dict:
+        filtros = {f"faceta.{faceta}": ",".join(valores) for faceta, valores in selecciones.items() if valores}
+        return self._get("/api/facetas", operador=operador, q=termino, tipo=tipo,
+                         limite=limite if limite is not None else 1_000_000, **filtros)
+
+    def facetas_disponibles(self) -> Dict[str, Dict[str, int]]:
+        return self._get("/api/facetas/valores")["facetas"]
+
+    def enriquecer(self, nombre: str) -> Optional[Dict]:
+        return self._get("/api/enriquecer", nombre=nombre)["datos"]
+
+    def propiedades_numericas(self) -> Dict[str, Dict]:
+        return self._get("/api/numericas")["propiedades"]
+
+    def buscar_por_rango(self, propiedad: str, minimo: Optional[float] = None,
+                         maximo: Optional[float] = None, limite: Optional[int] = 50) -> Dict:
+        return self._get("/api/rango", propiedad=propiedad, min="" if minimo is None else minimo,
+                         max="" if maximo is None else maximo,
+                         limite=limite if limite is not None else 1_000_000)
+
+    def top_numerico(self, propiedad: str, n: int = 10, descendente: bool = True) -> List[Dict]:
+        return self._get("/api/top", propiedad=propiedad, n=n,
+                         orden="desc" if descendente else "asc")["resultados"]
+
+    def consultar_sparql(self, consulta: str, limite: Optional[int] = 1000) -> Tuple[List[str], Iterator[List]]:
+        return self._flujo("/api/sparql", q=consulta, limite=limite if limite is not None else 1_000_000)
+
+    def plantilla_sparql(self, nombre: str, parametros: List[str] = (),
+                         limite: Optional[int] = 1000) -> Tuple[List[str], Iterator[List]]:
+        return self._flujo("/api/sparql/plantilla", nombre=nombre, parametros=",".join(parametros),
+                           limite=limite if limite is not None else 1_000_000)
+
+    def _flujo(self, ruta: str, **parametros) -> Tuple[List[str], Iterator[List]]:
+        """Lee una respuesta NDJSON: (columnas, generador de filas)"""
+        respuesta = self.sesion.get(f"{self.url_base}{ruta}", params=parametros,
+                                    timeout=self.timeout, stream=True)
+        if respuesta.status_code == 400:
+            raise ErrorBusqueda(respuesta.json().get("error", "Solicitud inválida"))
+        respuesta.raise_for_status()
+        lineas = (json.loads(linea) for linea in respuesta.iter_lines() if linea)
+        return next(lineas)["columnas"], lineas
+
+    def propiedades_grafo(self) -> List[str]:
+        return self._get("/api/grafo/propiedades")["propiedades"]
+
+    def vecindario(self, nombre: str, k: int = 2, propiedades: Optional[List[str]] = None,
+                   direccion: str = "salida") -> List[Dict]:
+        return self._get("/api/grafo/vecindario", nodo=nombre, k=k,
+                         propiedades=",".join(propiedades or []), direccion=direccion)["vecindario"]
+
+    def camino(self, origen: str, destino: str, propiedades: Optional[List[str]] = None,
+               direccion: str = "salida") -> Optional[List[Dict]]:
+        return self._get("/api/grafo/camino", origen=origen, destino=destino,
+                         propiedades=",".join(propiedades or []), direccion=direccion)["camino"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API JSON del buscador semántico")
+    parser.add_argument("--owl", default="criptomonedas.owl", help="Archivo OWL a cargar")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8000)
+    parser.add_argument("--indice", help="Índice mmap (indice_mmap.py); sin él se carga el OWL")
+    parser.add_argument("--trabajadores", type=int, default=1, help="Procesos que comparten el índice")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.indice:
+        procesos, puerto = servir_trabajadores(args.indice, args.host, args.puerto, args.trabajadores)
+        logger.info("%s trabajadores escuchando en http://%s:%s/api", len(procesos), args.host, puerto)
+        try:
+            for proceso in procesos:
+                proceso.join()
+        except KeyboardInterrupt:
+            for proceso in procesos:
+                proceso.terminate()
+        return
+
+    motor = MotorBusqueda(cargar_ontologia_archivo(args.owl), DBpediaConnector())
+    servidor = crear_servidor(motor, args.host, args.puerto)
+    logger.info("API de búsqueda escuchando en http://%s:%s/api", args.host, args.puerto)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
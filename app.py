@@ -1,21 +1,19 @@
 import streamlit as st
 from owlready2 import *
+import io
 import os
-from dbpedia_connector import DBpediaConnector, DBpediaOffline
-
-try:
-    import requests
-    REQUESTS_AVAILABLE = True
-except ImportError:
-    requests = None
-    REQUESTS_AVAILABLE = False
-
-try:
-    from SPARQLWrapper import SPARQLWrapper, JSON
-    SPARQL_AVAILABLE = True
-except ImportError:
-    SPARQLWrapper = None
-    SPARQL_AVAILABLE = False
+import tempfile
+import time
+import zipfile
+from dbpedia_connector import CATEGORIAS_EXPLORAR, DBpediaConnector, DBpediaOffline
+from metricas import metricas, iniciar_exportador_desde_entorno
+from perfilado import Perfilador, perfilado_activo
+from busqueda_local import cargar_ontologia_archivo, individuo_a_dict
+from motor_busqueda import MotorBusqueda, ErrorBusqueda, MODO_LOCAL, MODO_DBPEDIA, MODO_HIBRIDO
+from api_busqueda import ClienteBusqueda
+from sparql_local import CONSULTA_EJEMPLO, PLANTILLAS
+from recarga_ontologia import VigilanteOntologia
+from limitador_salida import fijar_prioridad
 
 from urllib.parse import quote
 
@@ -26,6 +24,17 @@ st.set_page_config(
     layout="wide"
 )
 
+# Tiempo total del rerun (se registra al final del script)
+inicio_rerun = time.perf_counter()
+
+# Todo lo que consulta la interfaz lo espera un usuario: pasa delante de los lotes en el limitador
+fijar_prioridad("interactiva")
+
+# Perfilado opcional del rerun completo (variable de entorno o casilla de la barra lateral)
+perfilador_rerun = None
+if st.session_state.get("perfilar_reruns", perfilado_activo()):
+    perfilador_rerun = Perfilador().iniciar()
+
 # ==================== ESTILOS CSS ====================
 st.markdown("""
     <style>
@@ -70,11 +79,22 @@ def inicializar_cache():
     """Inicializa el cache offline"""
     return DBpediaOffline()
 
+@st.cache_resource
+def inicializar_metricas():
+    """Inicia (una vez por proceso) el exportador Prometheus si está configurado"""
+    return iniciar_exportador_desde_entorno()
+
 dbpedia = inicializar_dbpedia()
 cache_offline = inicializar_cache()
+ruta_metricas_prom = inicializar_metricas()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def verificar_conexion():
+    """Estado de DBpedia; se reutiliza un minuto en lugar de consultarse en cada rerun"""
+    return dbpedia.is_online()
 
 # Verificar conexión
-conexion_online = dbpedia.is_online()
+conexion_online = verificar_conexion()
 
 # ==================== FUNCIONES ====================
 
@@ -82,140 +102,92 @@ conexion_online = dbpedia.is_online()
 def cargar_ontologia(archivo):
     """Cargar la ontología OWL"""
     try:
-        ruta_completa = os.path.abspath(archivo)
-        onto = get_ontology(f"file://{ruta_completa}").load()
-        return onto, None
+        return cargar_ontologia_archivo(archivo), None
     except Exception as e:
         return None, str(e)
 
-def mostrar_info_individuo(individuo, enriquecer_dbpedia=False):
-    """Mostrar información detallada de un individuo"""
-    st.markdown(f"### 📄 {individuo.name}")
-
-    # Mostrar tipos/clases
-    tipos = [cls.name for cls in individuo.is_a if hasattr(cls, 'name')]
-    if tipos:
-        st.write(f"**🏷️ Tipo:** {', '.join(tipos)}")
-
-    # Mostrar propiedades
-    propiedades_encontradas = False
-    for prop in individuo.get_properties():
-        valores = prop[individuo]
-        if valores:
-            propiedades_encontradas = True
-            if isinstance(valores, list):
-                valores_str = ", ".join([str(v) for v in valores])
-            else:
-                valores_str = str(valores)
-            st.write(f"**{prop.name}:** {valores_str}")
-
-    if not propiedades_encontradas:
-        st.info("No hay propiedades adicionales definidas")
-
-    st.markdown("---")
-
-def buscar_en_dbpedia(termino, limite=10):
-    """Buscar entidades en DBpedia usando SPARQL queries"""
-    if not SPARQL_AVAILABLE:
-        return [], "SPARQLWrapper no está instalado. Instala SPARQLWrapper para usar búsquedas en DBpedia."
-
-    try:
-        sparql = SPARQLWrapper("https://dbpedia.org/sparql")
-        sparql.setReturnFormat(JSON)
-
-        # Query to search for entities with label matching the term
-        query = f"""
-        PREFIX dbo: <http://dbpedia.org/ontology/>
-        PREFIX dbr: <http://dbpedia.org/resource/>
-        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-
-        SELECT DISTINCT ?entity ?label ?comment ?thumbnail
-        WHERE {{
-            ?entity rdfs:label ?label .
-            OPTIONAL {{ ?entity rdfs:comment ?comment . FILTER(LANG(?comment) = "en") }}
-            OPTIONAL {{ ?entity dbo:thumbnail ?thumbnail }}
-            FILTER(LANG(?label) = "en")
-            FILTER(REGEX(?label, "{termino}", "i"))
-        }}
-        ORDER BY ?label
-        LIMIT {limite}
-        """
-
-        sparql.setQuery(query)
-        results = sparql.query().convert()
-
-        # Debug print to see what DBpedia SPARQL returns
-        print("DBpedia SPARQL response (explore):", results)
-
-        entidades = []
-        for result in results["results"]["bindings"]:
-            comment_value = result.get('comment', {}).get('value', 'No description available')
-            entidad = {
-                'uri': result['entity']['value'],
-                'label': result['label']['value'],
-                'comment': comment_value[:300] + "..." if len(comment_value) > 300 else comment_value,
-                'thumbnail': result.get('thumbnail', {}).get('value', None),
-                'founding_date': None,  # SPARQL query doesn't include founding date
-                'website': None  # SPARQL query doesn't include website
-            }
-            entidades.append(entidad)
-
-        return entidades, None
+@st.cache_resource
+def inicializar_motor(_onto, archivo):
+    """
+    Motor de búsqueda de la app: el API remoto si BUSCADOR_API_URL está
+    definido, si no el motor local sobre la ontología cargada
+    """
+    url_api = os.environ.get("BUSCADOR_API_URL")
+    if url_api:
+        return ClienteBusqueda(url_api)
+    return MotorBusqueda(_onto, dbpedia, offline=cache_offline)
+
+ICONOS_SUGERENCIA = {"individuo": "🔹", "clase": "📂", "propiedad": "🔗", "dbpedia": "🌐"}
+
+def elegir_sugerencia(texto):
+    """Callback de una sugerencia: completa el término y lanza la búsqueda"""
+    st.session_state["busqueda_nombre"] = texto
+    st.session_state["buscar_sugerencia"] = True
+
+def mostrar_sugerencias(termino):
+    """Sugerencias de autocompletado para el término escrito"""
+    if len(termino.strip()) < 2:
+        return
+    sugerencias = [s for s in motor.sugerir(termino, limite=6) if s["texto"] != termino]
+    if not sugerencias:
+        return
+    st.caption("Sugerencias:")
+    columnas = st.columns(len(sugerencias))
+    for i, (columna, sugerencia) in enumerate(zip(columnas, sugerencias)):
+        with columna:
+            st.button(
+                f"{ICONOS_SUGERENCIA[sugerencia['tipo']]} {sugerencia['texto']}",
+                key=f"sugerencia_{i}", help=f"{sugerencia['tipo']}: {sugerencia['valor']}",
+                on_click=elegir_sugerencia, args=(sugerencia["texto"],)
+            )
 
-    except Exception as e:
-        return [], f"Error connecting to DBpedia: {str(e)}"
+@st.cache_resource
+def inicializar_vigilante(_motor, archivo):
+    """Observa el archivo OWL y aplica sus cambios al motor sin recargar la app"""
+    return VigilanteOntologia(_motor, archivo).iniciar()
 
-def obtener_detalles_dbpedia(uri):
-    """Obtener detalles completos de una entidad DBpedia usando SPARQL"""
-    if not SPARQL_AVAILABLE:
-        return None, "SPARQLWrapper no está instalado. Instala SPARQLWrapper para obtener detalles de DBpedia."
+def mostrar_info_individuo(individuo, enriquecer_dbpedia=False):
+    """Mostrar información detallada de un individuo (objeto de owlready2 o diccionario del motor)"""
+    with metricas.medir("render", "individuo"):
+        if not isinstance(individuo, dict):
+            individuo = motor.describir(individuo) if isinstance(motor, MotorBusqueda) else individuo_a_dict(individuo)
+
+        st.markdown(f"### 📄 {individuo['nombre']}")
+
+        # Mostrar tipos/clases
+        if individuo['tipos']:
+            st.write(f"**🏷️ Tipo:** {', '.join(individuo['tipos'])}")
+
+        # Mostrar propiedades
+        propiedades_encontradas = False
+        for nombre_prop, valores in individuo['propiedades'].items():
+            if valores:
+                propiedades_encontradas = True
+                st.write(f"**{nombre_prop}:** {', '.join(valores)}")
+
+        if not propiedades_encontradas:
+            st.info("No hay propiedades adicionales definidas")
+
+        # Inferencias materializadas al cargar (razonador.py)
+        if individuo.get('tipos_inferidos'):
+            st.write(f"**🧠 Tipos inferidos:** {', '.join(individuo['tipos_inferidos'])}")
+        for nombre_prop, valores in individuo.get('relaciones_inferidas', {}).items():
+            st.write(f"**🧠 {nombre_prop} (inferido):** {', '.join(valores)}")
+
+        if individuo.get('dbpedia_uri'):
+            st.write(f"**🔗 owl:sameAs:** [{individuo['dbpedia_uri']}]({individuo['dbpedia_uri']})")
+        if enriquecer_dbpedia:
+            mostrar_enriquecimiento_dbpedia(individuo['nombre'])
 
-    try:
-        sparql = SPARQLWrapper("https://dbpedia.org/sparql")
-        sparql.setReturnFormat(JSON)
-
-        # Query to get details for a specific entity
-        query = f"""
-        PREFIX dbo: <http://dbpedia.org/ontology/>
-        PREFIX dbr: <http://dbpedia.org/resource/>
-        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-        PREFIX foaf: <http://xmlns.com/foaf/0.1/>
-
-        SELECT ?label ?comment ?thumbnail ?foundingDate ?website
-        WHERE {{
-            <{uri}> rdfs:label ?label .
-            OPTIONAL {{ <{uri}> rdfs:comment ?comment . FILTER(LANG(?comment) = "en") }}
-            OPTIONAL {{ <{uri}> dbo:thumbnail ?thumbnail }}
-            OPTIONAL {{ <{uri}> dbo:foundingDate ?foundingDate }}
-            OPTIONAL {{ <{uri}> foaf:homepage ?website }}
-            FILTER(LANG(?label) = "en")
-        }}
-        LIMIT 1
-        """
-
-        sparql.setQuery(query)
-        results = sparql.query().convert()
-
-        # Debug print to see what DBpedia SPARQL returns
-        print("DBpedia SPARQL response (details):", results)
-
-        if results["results"]["bindings"]:
-            result = results["results"]["bindings"][0]
-            return {
-                'label': result['label']['value'],
-                'comment': result.get('comment', {}).get('value', 'No description available'),
-                'thumbnail': result.get('thumbnail', {}).get('value', None),
-                'founding_date': result.get('foundingDate', {}).get('value', None),
-                'website': result.get('website', {}).get('value', None),
-                'types': []  # SPARQL query doesn't include types in this simple query
-            }, None
-        else:
-            return None, "No se encontraron detalles para esta entidad"
-    except Exception as e:
-        return None, f"Error al obtener detalles de DBpedia: {str(e)}"
+        st.markdown("---")
 
 def importar_entidad_dbpedia(onto, entidad, archivo_owl):
-    """Importar una entidad DBpedia como instancia en la ontología"""
+    """
+    Importar una entidad DBpedia como instancia en la ontología local de la app
+
+    Solo cuando el motor es el API remoto; con el motor local se usa
+    MotorBusqueda.importar_entidad, que hace todo con la ontología bloqueada.
+    """
     try:
         # Determinar la clase apropiada (por simplicidad, usar Criptomoneda para entidades relacionadas)
         if hasattr(onto, 'Criptomoneda'):
@@ -229,8 +201,8 @@ def importar_entidad_dbpedia(onto, entidad, archivo_owl):
         nombre_instancia = entidad['label'].replace(' ', '_').replace('-', '_').lower()
 
         # Verificar si ya existe
-        if hasattr(onto, nombre_instancia):
-            return False, f"La instancia '{nombre_instancia}' ya existe en la ontología"
+        if getattr(onto, nombre_instancia, None) is not None:  # owlready2 devuelve None si no existe
+            return False, f"La instancia '{nombre_instancia}' ya existe en la ontología", None
 
         # Crear la instancia
         instancia = clase(nombre_instancia)
@@ -253,9 +225,9 @@ def importar_entidad_dbpedia(onto, entidad, archivo_owl):
         ruta_completa = os.path.abspath(archivo_owl)
         onto.save(file=ruta_completa)
 
-        return True, f"Entidad '{entidad['label']}' importada exitosamente como instancia de {clase.name}"
+        return True, f"Entidad '{entidad['label']}' importada exitosamente como instancia de {clase.name}", instancia
     except Exception as e:
-        return False, f"Error al importar entidad: {str(e)}"
+        return False, f"Error al importar entidad: {str(e)}", None
 
 def mostrar_info_dbpedia(entidad, onto=None, archivo_owl=None):
     """Mostrar información detallada de una entidad DBpedia"""
@@ -287,31 +259,47 @@ def mostrar_info_dbpedia(entidad, onto=None, archivo_owl=None):
     if onto and archivo_owl:
         if st.button("💾 Importar a Ontología", key=f"import_{entidad['uri'].split('/')[-1]}"):
             with st.spinner("Importando entidad..."):
-                exito, mensaje = importar_entidad_dbpedia(onto, entidad, archivo_owl)
-                if exito:
-                    st.success(mensaje)
-                    st.cache_resource.clear()  # Limpiar cache para recargar ontología
+                if isinstance(motor, MotorBusqueda):
+                    # Creación, inferencias, owl:sameAs y guardado con la ontología bloqueada
+                    # (el vigilante de recarga no la ve a medio modificar)
+                    try:
+                        importada = motor.importar_entidad(entidad, archivo_owl)
+                        st.success(f"Entidad '{entidad['label']}' importada exitosamente como instancia de "
+                                   f"{importada['clase']}")
+                    except ErrorBusqueda as e:
+                        st.error(str(e))
+                    except Exception as e:
+                        st.error(f"Error al importar entidad: {str(e)}")
                 else:
-                    st.error(mensaje)
+                    exito, mensaje, _ = importar_entidad_dbpedia(onto, entidad, archivo_owl)
+                    if exito:
+                        st.success(mensaje)
+                        # Solo se recargan la ontología y el motor; el conector y la caché de DBpedia siguen
+                        cargar_ontologia.clear()
+                        inicializar_motor.clear()
+                    else:
+                        st.error(mensaje)
 
     st.markdown("---")
 
-def mostrar_info_dbpedia(nombre_cripto):
+def mostrar_enriquecimiento_dbpedia(nombre_cripto):
     """Muestra información enriquecida desde DBpedia"""
     
     if conexion_online:
         with st.spinner(f"🔍 Buscando '{nombre_cripto}' en DBpedia..."):
-            # Intentar con API REST primero (más rápida)
-            resultados = dbpedia.buscar_con_api_rest(nombre_cripto)
+            # Con la tabla de enlaces es una consulta directa por URI o un acierto de caché
+            datos = motor.enriquecer(nombre_cripto)
             
-            if resultados:
-                datos = resultados[0]  # Tomar el primer resultado
-                
-                # Guardar en cache
-                cache_offline.agregar_al_cache(nombre_cripto, datos)
+            if datos:
+                # Guardar en cache (el motor local ya lo guarda en la caché offline)
+                if datos.get("fuente") != "cache" and not isinstance(motor, MotorBusqueda):
+                    cache_offline.agregar_al_cache(nombre_cripto, datos)
                 
+                fuentes = {"cache": "Caché (enlace conocido)", "uri": "Online - consulta por URI",
+                           "busqueda": "Online - API REST"}
                 st.markdown('<div class="dbpedia-box">', unsafe_allow_html=True)
-                st.markdown("**🔗 Fuente:** DBpedia (Online - API REST)")
+                st.markdown(f"**🔗 Fuente:** DBpedia ({fuentes.get(datos.get('fuente'), 'Online')}, "
+                            f"confianza {datos.get('confianza', 0):.0%})")
                 
                 st.write(f"**{datos.get('label', nombre_cripto)}**")
                 
@@ -327,6 +315,8 @@ def mostrar_info_dbpedia(nombre_cripto):
                 
                 st.markdown('</div>', unsafe_allow_html=True)
             else:
+                if dbpedia.ultimo_error:
+                    st.warning(f"⚠️ {dbpedia.ultimo_error}")
                 st.info("ℹ️ No se encontró información adicional en DBpedia")
     else:
         # Modo offline: buscar en cache
@@ -347,6 +337,150 @@ def mostrar_info_dbpedia(nombre_cripto):
         else:
             st.info("ℹ️ Sin datos en cache para este término")
 
+@st.fragment
+def panel_busqueda_nombre(termino, modo, enriquecer_dbpedia):
+    """
+    Resultados de la búsqueda por nombre en un fragmento: sus botones solo
+    vuelven a ejecutar este panel, y el motor reutiliza el resultado guardado
+    """
+    with st.spinner("Buscando..."):
+        resultado = motor.buscar(termino, modo=modo)
+    resultados_locales = resultado["locales"]
+    resultados_dbpedia = resultado["dbpedia"]
+    if resultado["error_dbpedia"]:
+        st.warning(f"⚠️ Error al buscar en DBpedia: {resultado['error_dbpedia']}")
+
+    # Mostrar resultados
+    total_resultados = len(resultados_locales) + len(resultados_dbpedia)
+
+    if total_resultados > 0:
+        st.success(f"✅ Se encontraron **{total_resultados}** resultados para '{termino}':")
+        st.markdown("---")
+
+        # Resultados locales
+        if resultados_locales:
+            st.markdown("### 🏠 Resultados de la Ontología Local")
+            for ind in resultados_locales:
+                with st.container():
+                    mostrar_info_individuo(ind, enriquecer_dbpedia)
+
+        # Resultados DBpedia
+        if resultados_dbpedia:
+            st.markdown("### 🌐 Resultados de DBpedia")
+            for entidad in resultados_dbpedia:
+                with st.container():
+                    mostrar_info_dbpedia(entidad, onto, archivo_owl)
+
+    else:
+        st.warning(f"⚠️ No se encontraron resultados para '{termino}'")
+        if modo == MODO_LOCAL:
+            st.info("💡 Intenta con otro término o explora la ontología para ver qué hay disponible")
+        elif modo == MODO_DBPEDIA:
+            st.info("💡 Intenta con términos relacionados con criptomonedas, blockchain o finanzas")
+        else:
+            st.info("💡 Intenta con otro término en ambos orígenes de datos")
+
+@st.fragment
+def panel_instancias_clase(clase_seleccionada):
+    """Instancias de una clase local en un fragmento independiente"""
+    with st.spinner(f"Buscando instancias de {clase_seleccionada}..."):
+        try:
+            instancias = motor.buscar_por_clase(clase_seleccionada)
+
+            if instancias:
+                st.success(f"✅ Se encontraron **{len(instancias)}** instancias de la clase '{clase_seleccionada}':")
+                st.markdown("---")
+
+                # Mostrar en columnas si hay muchas
+                if len(instancias) > 3:
+                    cols = st.columns(2)
+                    for idx, inst in enumerate(instancias):
+                        with cols[idx % 2]:
+                            with st.container():
+                                mostrar_info_individuo(inst)
+                else:
+                    for inst in instancias:
+                        mostrar_info_individuo(inst)
+            else:
+                st.info(f"ℹ️ No hay instancias definidas para la clase '{clase_seleccionada}'")
+                st.markdown("""
+                **Esto puede significar:**
+                - La clase existe pero aún no tiene individuos
+                - Necesitas poblar tu ontología con más datos
+                """)
+
+        except Exception as e:
+            st.error(f"❌ Error al buscar instancias: {e}")
+
+@st.fragment
+def panel_entidades_tipo(tipo_seleccionado):
+    """Entidades de DBpedia de un tipo en un fragmento independiente (con botones de importación)"""
+    with st.spinner(f"Buscando entidades de tipo '{tipo_seleccionado}' en DBpedia..."):
+        entidades, error_tipo = motor.buscar_dbpedia_por_tipo(tipo_seleccionado)
+
+        if error_tipo:
+            st.error(f"❌ {error_tipo}")
+        elif entidades:
+            st.success(f"✅ Se encontraron **{len(entidades)}** entidades de tipo '{tipo_seleccionado}' en DBpedia:")
+            st.markdown("---")
+
+            for entidad in entidades:
+                with st.container():
+                    mostrar_info_dbpedia(entidad, onto, archivo_owl)
+        else:
+            st.info(f"ℹ️ No se encontraron entidades de tipo '{tipo_seleccionado}' en DBpedia")
+
+@st.fragment
+def panel_facetas():
+    """
+    Filtros y resultados de la búsqueda facetada en un fragmento: elegir un
+    valor solo vuelve a ejecutar este panel, no la app completa
+    """
+    st.caption("Los valores de una misma faceta se combinan con OR; entre facetas, con el operador elegido")
+
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        termino_facetas = st.text_input(
+            "Restringir a un término (opcional):",
+            placeholder="Ejemplo: token, bitcoin...",
+            key="facetas_termino"
+        )
+    with col2:
+        operador_facetas = st.radio("Operador entre facetas:", ["AND", "OR"], horizontal=True, key="facetas_operador")
+
+    # Los valores de cada faceta salen de las estadísticas; los conteos, de la selección actual
+    facetas_disponibles = motor.facetas_disponibles()
+    selecciones = {
+        faceta: st.session_state.get(f"faceta_{faceta}", [])
+        for faceta, valores in facetas_disponibles.items() if valores
+    }
+    resultado_facetas = motor.buscar_facetado(
+        selecciones, operador_facetas, termino_facetas, limite=50
+    )
+    conteos = resultado_facetas["conteos"]
+
+    columnas_facetas = st.columns(3)
+    for k, faceta in enumerate(selecciones):
+        with columnas_facetas[k % 3]:
+            st.multiselect(
+                faceta,
+                sorted(facetas_disponibles[faceta]),
+                key=f"faceta_{faceta}",
+                format_func=lambda valor, faceta=faceta: f"{valor} ({conteos[faceta].get(valor, 0)})"
+            )
+
+    st.markdown("---")
+    total_facetas = resultado_facetas["total"]
+    if total_facetas:
+        st.success(f"✅ **{total_facetas}** individuos cumplen los filtros")
+        if total_facetas > len(resultado_facetas["resultados"]):
+            st.caption(f"Mostrando los primeros {len(resultado_facetas['resultados'])}")
+        for ind in resultado_facetas["resultados"]:
+            with st.container():
+                mostrar_info_individuo(ind)
+    else:
+        st.warning("⚠️ Ningún individuo cumple los filtros seleccionados")
+
 # ==================== SIDEBAR ====================
 st.sidebar.header("⚙️ Configuración")
 
@@ -371,8 +505,7 @@ enriquecer = st.sidebar.checkbox(
 )
 
 # Botón para recargar
-if st.sidebar.button("🔄 Recargar Ontología"):
-    st.cache_resource.clear()
+recargar_ontologia = st.sidebar.button("🔄 Recargar Ontología")
 
 # Intentar cargar
 onto, error = cargar_ontologia(archivo_owl)
@@ -392,18 +525,65 @@ if error:
     st.stop()
 else:
     st.sidebar.success("✅ Ontología cargada correctamente")
-    
-    # Estadísticas
-    num_clases = len(list(onto.classes()))
-    num_propiedades = len(list(onto.properties()))
-    num_individuos = len(list(onto.individuals()))
-    
-    st.sidebar.markdown("### 📊 Estadísticas")
-    st.sidebar.metric("Clases", num_clases)
-    st.sidebar.metric("Propiedades", num_propiedades)
-    st.sidebar.metric("Individuos", num_individuos)
 
-# Modo de búsqueda
+    motor = inicializar_motor(onto, archivo_owl)
+    if isinstance(motor, MotorBusqueda):
+        vigilante = inicializar_vigilante(motor, archivo_owl)
+        if recargar_ontologia:
+            # Solo se aplican las tripletas que cambiaron; las cachés de DBpedia se conservan
+            resumen_recarga = vigilante.recargar()
+            if resumen_recarga is None:
+                st.sidebar.error(f"❌ No se pudo recargar: {vigilante.ultimo_error}")
+            elif resumen_recarga["cambios"]:
+                st.sidebar.info(
+                    f"🔄 +{resumen_recarga['tripletas_agregadas']} / -{resumen_recarga['tripletas_eliminadas']} tripletas"
+                )
+            else:
+                st.sidebar.info("🔄 Sin cambios en el archivo")
+        elif vigilante.ultimo_resumen and vigilante.ultimo_resumen["cambios"]:
+            st.sidebar.caption(
+                f"🔄 Recargada automáticamente (versión {motor.version}): "
+                f"+{vigilante.ultimo_resumen['tripletas_agregadas']} / "
+                f"-{vigilante.ultimo_resumen['tripletas_eliminadas']} tripletas"
+            )
+        # Tras una recarga completa (cambios de esquema) la ontología vive en otro World
+        onto = motor.onto
+    elif recargar_ontologia:
+        cargar_ontologia.clear()
+        inicializar_motor.clear()
+        st.rerun()
+
+    # Estadísticas: el motor las calcula una vez por versión de la ontología
+    estadisticas = motor.estadisticas()
+
+    st.sidebar.markdown("### 📊 Estadísticas")
+    st.sidebar.metric("Clases", estadisticas["clases"])
+    st.sidebar.metric("Propiedades", estadisticas["propiedades"])
+    st.sidebar.metric("Individuos", estadisticas["individuos"])
+
+if isinstance(motor, MotorBusqueda):
+    st.sidebar.metric("Hechos inferidos", motor.materializacion().resumen()["total_inferidos"])
+    with st.sidebar.expander("🧊 Exportar tablas"):
+        st.caption("Individuos, datos, relaciones y caché de DBpedia para pandas, DuckDB o Spark")
+        formato_tablas = st.radio("Formato", ["parquet", "arrow"], horizontal=True, key="formato_tablas")
+        if st.button("Preparar exportación"):
+            with tempfile.TemporaryDirectory() as directorio_tablas:
+                exportadas = motor.exportar_tablas(directorio_tablas, formato_tablas)
+                memoria_zip = io.BytesIO()
+                with zipfile.ZipFile(memoria_zip, "w") as archivo_zip:
+                    for ruta_tabla in exportadas["rutas"].values():
+                        archivo_zip.write(ruta_tabla, os.path.basename(ruta_tabla))
+            st.caption(f"{exportadas['individuos']} individuos, {exportadas['datos']} valores, "
+                       f"{exportadas['relaciones']} relaciones")
+            st.download_button("⬇️ Descargar", memoria_zip.getvalue(), f"ontologia_{formato_tablas}.zip",
+                               "application/zip")
+
+# Modo de búsqueda (etiqueta de la interfaz -> modo del motor)
+MODOS_INTERFAZ = {
+    "🏠 Local (Ontología)": MODO_LOCAL,
+    "🌐 DBpedia": MODO_DBPEDIA,
+    "🔄 Híbrido (Local + DBpedia)": MODO_HIBRIDO,
+}
 st.sidebar.markdown("---")
 modo_busqueda = st.sidebar.radio(
     "🔍 Modo de búsqueda:",
@@ -415,8 +595,11 @@ st.sidebar.markdown("---")
 st.sidebar.markdown("### 💡 Ayuda")
 st.sidebar.info("""
 **Tipos de búsqueda:**
-- **Por nombre:** Busca individuos que contengan el término
+- **Por nombre:** Busca individuos que contengan el término (con sugerencias al escribir)
 - **Por clase:** Lista todos los individuos de una clase específica
+- **Facetada:** Filtra por valores de propiedades (riesgo, consenso, tipo de token...)
+- **Por rango:** Filtra u ordena por propiedades numéricas (montos, años...)
+- **SPARQL local:** Consultas SELECT sobre la ontología (prefijo `cripto:`)
 - **DBpedia:** Búsqueda extendida en DBpedia
 - **Explorar:** Navega por toda la ontología
 
@@ -429,26 +612,23 @@ st.sidebar.info("""
 # Test de conexión
 if st.sidebar.button("🧪 Probar DBpedia"):
     with st.sidebar:
-        with st.spinner("Probando API REST..."):
-            test_results = dbpedia.buscar_con_api_rest("Bitcoin")
-            if test_results:
-                st.success(f"✅ API REST: {len(test_results)} resultados")
-                st.write(f"Encontrado: {test_results[0].get('label', 'N/A')}")
-            else:
-                st.warning("⚠️ API REST no responde")
-                
-                # Intentar SPARQL como fallback
-                with st.spinner("Probando SPARQL..."):
-                    test_sparql = dbpedia.buscar_simple("Bitcoin")
-                    if test_sparql:
-                        st.success(f"✅ SPARQL: {len(test_sparql)} resultados")
-                    else:
-                        st.error("❌ Ambos métodos fallaron")
+        with st.spinner("Probando Lookup API y SPARQL..."):
+            inicio_prueba = time.perf_counter()
+            test_results, fuente = dbpedia.buscar_cubierta("Bitcoin")
+            ms_prueba = (time.perf_counter() - inicio_prueba) * 1000.0
+        if test_results:
+            nombre_fuente = "API REST" if fuente == "lookup" else "SPARQL"
+            st.success(f"✅ {nombre_fuente}: {len(test_results)} resultados ({ms_prueba:.0f} ms)")
+            st.write(f"Encontrado: {test_results[0].get('label', 'N/A')}")
+        else:
+            st.error("❌ Ambos métodos fallaron")
+            if dbpedia.ultimo_error:
+                st.caption(dbpedia.ultimo_error)
 
 # ==================== TIPO DE BÚSQUEDA ====================
 tipo_busqueda = st.radio(
     "🔎 Selecciona el tipo de búsqueda:",
-    ["🔤 Búsqueda por nombre", "📂 Búsqueda por clase", "🌐 Búsqueda en DBpedia", "🗂️ Explorar ontología"],
+    ["🔤 Búsqueda por nombre", "📂 Búsqueda por clase", "🏷️ Búsqueda facetada", "📏 Búsqueda por rango", "🧾 SPARQL local", "🌐 Búsqueda en DBpedia", "🗂️ Explorar ontología"],
     horizontal=True
 )
 
@@ -470,53 +650,16 @@ if tipo_busqueda == "🔤 Búsqueda por nombre":
         st.write("")
         buscar_btn = st.button("🔍 Buscar", type="primary", use_container_width=True)
 
-    if buscar_btn and termino:
-        with st.spinner("Buscando..."):
-            resultados_locales = []
-            resultados_dbpedia = []
-
-            # Búsqueda local (si no es modo DBpedia-only)
-            if modo_busqueda != "🌐 DBpedia":
-                for individuo in onto.individuals():
-                    if termino.lower() in individuo.name.lower():
-                        resultados_locales.append(individuo)
-
-            # Búsqueda en DBpedia (si no es modo local-only)
-            if modo_busqueda != "🏠 Local (Ontología)":
-                entidades_dbpedia, error_dbpedia = buscar_en_dbpedia(termino)
-                if error_dbpedia:
-                    st.warning(f"⚠️ Error al buscar en DBpedia: {error_dbpedia}")
-                resultados_dbpedia = entidades_dbpedia
-
-            # Mostrar resultados
-            total_resultados = len(resultados_locales) + len(resultados_dbpedia)
-
-            if total_resultados > 0:
-                st.success(f"✅ Se encontraron **{total_resultados}** resultados para '{termino}':")
-                st.markdown("---")
-
-                # Resultados locales
-                if resultados_locales:
-                    st.markdown("### 🏠 Resultados de la Ontología Local")
-                    for ind in resultados_locales:
-                        with st.container():
-                            mostrar_info_individuo(ind)
+    # Al elegir una sugerencia se busca directamente la entidad exacta
+    buscar_btn = st.session_state.pop("buscar_sugerencia", False) or buscar_btn
+    if not buscar_btn:
+        mostrar_sugerencias(termino)
 
-                # Resultados DBpedia
-                if resultados_dbpedia:
-                    st.markdown("### 🌐 Resultados de DBpedia")
-                    for entidad in resultados_dbpedia:
-                        with st.container():
-                            mostrar_info_dbpedia(entidad, onto, archivo_owl)
-
-            else:
-                st.warning(f"⚠️ No se encontraron resultados para '{termino}'")
-                if modo_busqueda == "🏠 Local (Ontología)":
-                    st.info("💡 Intenta con otro término o explora la ontología para ver qué hay disponible")
-                elif modo_busqueda == "🌐 DBpedia":
-                    st.info("💡 Intenta con términos relacionados con criptomonedas, blockchain o finanzas")
-                else:
-                    st.info("💡 Intenta con otro término en ambos orígenes de datos")
+    if buscar_btn and termino:
+        # La búsqueda sigue visible en los reruns siguientes (botones de sus resultados, barra lateral)
+        st.session_state["busqueda_activa"] = (termino, MODOS_INTERFAZ[modo_busqueda])
+    if st.session_state.get("busqueda_activa"):
+        panel_busqueda_nombre(*st.session_state["busqueda_activa"], enriquecer)
 
 # ==================== BÚSQUEDA POR CLASE ====================
 elif tipo_busqueda == "📂 Búsqueda por clase":
@@ -524,7 +667,7 @@ elif tipo_busqueda == "📂 Búsqueda por clase":
 
     if modo_busqueda == "🏠 Local (Ontología)" or modo_busqueda == "🔄 Híbrido (Local + DBpedia)":
         # Obtener lista de clases locales
-        clases = sorted([cls.name for cls in onto.classes() if hasattr(cls, 'name')])
+        clases = motor.listar_clases()
 
         if not clases:
             st.warning("No se encontraron clases en la ontología local")
@@ -544,57 +687,16 @@ elif tipo_busqueda == "📂 Búsqueda por clase":
             buscar_clase_btn = st.button("📋 Listar instancias", type="primary", use_container_width=True)
 
         if buscar_clase_btn and clase_seleccionada:
-            with st.spinner(f"Buscando instancias de {clase_seleccionada}..."):
-                try:
-                    clase = onto.search_one(iri=f"*{clase_seleccionada}")
-                    if clase is None:
-                        clase = onto.search_one(label=clase_seleccionada)
-                    if clase is None:
-                        for c in onto.classes():
-                            if c.name == clase_seleccionada:
-                                clase = c
-                                break
-
-                    if clase:
-                        instancias = list(clase.instances())
-                    else:
-                        st.error(f"No se pudo encontrar la clase '{clase_seleccionada}'")
-                        instancias = []
-
-                    if instancias:
-                        st.success(f"✅ Se encontraron **{len(instancias)}** instancias de la clase '{clase_seleccionada}':")
-                        st.markdown("---")
-
-                        # Mostrar en columnas si hay muchas
-                        if len(instancias) > 3:
-                            cols = st.columns(2)
-                            for idx, inst in enumerate(instancias):
-                                with cols[idx % 2]:
-                                    with st.container():
-                                        mostrar_info_individuo(inst)
-                        else:
-                            for inst in instancias:
-                                mostrar_info_individuo(inst)
-                    else:
-                        st.info(f"ℹ️ No hay instancias definidas para la clase '{clase_seleccionada}'")
-                        st.markdown("""
-                        **Esto puede significar:**
-                        - La clase existe pero aún no tiene individuos
-                        - Necesitas poblar tu ontología con más datos
-                        """)
-
-                except Exception as e:
-                    st.error(f"❌ Error al buscar instancias: {e}")
+            st.session_state["clase_activa"] = clase_seleccionada
+        if st.session_state.get("clase_activa"):
+            panel_instancias_clase(st.session_state["clase_activa"])
 
     if modo_busqueda == "🌐 DBpedia" or modo_busqueda == "🔄 Híbrido (Local + DBpedia)":
         if modo_busqueda == "🌐 DBpedia":
             st.markdown("---")
 
         # Búsqueda por tipo en DBpedia
-        tipos_dbpedia = [
-            "Cryptocurrency", "Blockchain", "Digital_currency",
-            "Cryptocurrency_exchange", "Financial_service", "Company"
-        ]
+        tipos_dbpedia = list(CATEGORIAS_EXPLORAR)
 
         col1, col2 = st.columns([3, 1])
         with col1:
@@ -609,67 +711,111 @@ elif tipo_busqueda == "📂 Búsqueda por clase":
             buscar_tipo_btn = st.button("🌐 Buscar en DBpedia", type="primary", use_container_width=True)
 
         if buscar_tipo_btn and tipo_seleccionado:
-            if not SPARQL_AVAILABLE:
-                st.error("SPARQLWrapper no está instalado. Instala SPARQLWrapper para buscar en DBpedia.")
+            st.session_state["tipo_dbpedia_activo"] = tipo_seleccionado
+        if st.session_state.get("tipo_dbpedia_activo"):
+            panel_entidades_tipo(st.session_state["tipo_dbpedia_activo"])
+
+# ==================== BÚSQUEDA FACETADA ====================
+elif tipo_busqueda == "🏷️ Búsqueda facetada":
+    st.subheader("🏷️ Búsqueda facetada")
+    panel_facetas()
+
+# ==================== BÚSQUEDA POR RANGO ====================
+elif tipo_busqueda == "📏 Búsqueda por rango":
+    st.subheader("📏 Búsqueda por rango")
+
+    estadisticas_numericas = {
+        propiedad: datos for propiedad, datos in motor.propiedades_numericas().items() if datos["cantidad"]
+    }
+    if not estadisticas_numericas:
+        st.info("ℹ️ La ontología no tiene valores numéricos indexados")
+    else:
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            propiedad_numerica = st.selectbox(
+                "Propiedad numérica:",
+                list(estadisticas_numericas),
+                format_func=lambda p: f"{p} ({estadisticas_numericas[p]['cantidad']} valores)",
+                key="rango_propiedad"
+            )
+        with col2:
+            consulta_numerica = st.radio("Consulta:", ["Rango", "Top N"], horizontal=True, key="rango_consulta")
+
+        datos = estadisticas_numericas[propiedad_numerica]
+        st.caption(f"Valores entre {datos['minimo']:,.2f} y {datos['maximo']:,.2f}")
+
+        if consulta_numerica == "Rango":
+            col1, col2 = st.columns(2)
+            with col1:
+                minimo = st.number_input("Mínimo:", value=datos["minimo"], key=f"rango_min_{propiedad_numerica}")
+            with col2:
+                maximo = st.number_input("Máximo:", value=datos["maximo"], key=f"rango_max_{propiedad_numerica}")
+            resultado_rango = motor.buscar_por_rango(propiedad_numerica, minimo, maximo, limite=50)
+            total_rango = resultado_rango["total"]
+            resultados_numericos = resultado_rango["resultados"]
+        else:
+            col1, col2 = st.columns(2)
+            with col1:
+                cantidad_top = st.slider("N:", 1, 50, 10, key="rango_n")
+            with col2:
+                descendente = st.radio("Orden:", ["Mayor primero", "Menor primero"], key="rango_orden") == "Mayor primero"
+            resultados_numericos = motor.top_numerico(propiedad_numerica, cantidad_top, descendente)
+            total_rango = len(resultados_numericos)
+
+        st.markdown("---")
+        if resultados_numericos:
+            st.success(f"✅ **{total_rango}** individuos")
+            st.dataframe(
+                [{"Individuo": r["nombre"], propiedad_numerica: r["valor"]} for r in resultados_numericos],
+                use_container_width=True, hide_index=True
+            )
+            for ind in resultados_numericos:
+                with st.container():
+                    mostrar_info_individuo(ind)
+        else:
+            st.warning("⚠️ Ningún individuo tiene valores en ese rango")
+
+# ==================== SPARQL LOCAL ====================
+elif tipo_busqueda == "🧾 SPARQL local":
+    st.subheader("🧾 SPARQL local")
+
+    plantilla = st.selectbox("Consulta:", ["Libre"] + list(PLANTILLAS), key="sparql_plantilla")
+    if plantilla == "Libre":
+        consulta_sparql = st.text_area(
+            "SELECT sobre la ontología (prefijos rdf:, rdfs:, owl: y cripto: disponibles):",
+            value=CONSULTA_EJEMPLO, height=180, key="sparql_consulta"
+        )
+        parametros_sparql = []
+    else:
+        st.code(PLANTILLAS[plantilla][0].strip(), language="sparql")
+        parametros_sparql = [
+            st.text_input(f"Parámetro {i} ({tipo}):", key=f"sparql_parametro_{plantilla}_{i}")
+            for i, tipo in enumerate(PLANTILLAS[plantilla][1], start=1)
+        ]
+    limite_sparql = st.slider("Máximo de filas:", 10, 1000, 200, step=10, key="sparql_limite")
+
+    if st.button("▶️ Ejecutar", key="sparql_ejecutar"):
+        try:
+            if plantilla == "Libre":
+                columnas, filas = motor.consultar_sparql(consulta_sparql, limite_sparql)
             else:
-                with st.spinner(f"Buscando entidades de tipo '{tipo_seleccionado}' en DBpedia..."):
-                    try:
-                        # Usar SPARQL query para buscar por tipo
-                        sparql = SPARQLWrapper("https://dbpedia.org/sparql")
-                        sparql.setReturnFormat(JSON)
-
-                        query = f"""
-                        PREFIX dbo: <http://dbpedia.org/ontology/>
-                        PREFIX dbr: <http://dbpedia.org/resource/>
-                        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-                        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-
-                        SELECT DISTINCT ?entity ?label ?comment ?thumbnail
-                        WHERE {{
-                            ?entity rdf:type dbo:{tipo_seleccionado} .
-                            ?entity rdfs:label ?label .
-                            OPTIONAL {{ ?entity rdfs:comment ?comment . FILTER(LANG(?comment) = "en") }}
-                            OPTIONAL {{ ?entity dbo:thumbnail ?thumbnail }}
-                            FILTER(LANG(?label) = "en")
-                        }}
-                        ORDER BY ?label
-                        LIMIT 20
-                        """
-
-                        sparql.setQuery(query)
-                        results = sparql.query().convert()
-
-                        # Debug print to see what DBpedia SPARQL returns
-                        print("DBpedia SPARQL response:", results)
-
-                        entidades = []
-                        for result in results["results"]["bindings"]:
-                            comment_value = result.get('comment', {}).get('value', 'No description available')
-                            entidad = {
-                                'uri': result['entity']['value'],
-                                'label': result['label']['value'],
-                                'comment': comment_value[:300] + "..." if len(comment_value) > 300 else comment_value,
-                                'thumbnail': result.get('thumbnail', {}).get('value', None),
-                                'founding_date': None
-                            }
-                            entidades.append(entidad)
-
-                        if entidades:
-                            st.success(f"✅ Se encontraron **{len(entidades)}** entidades de tipo '{tipo_seleccionado}' en DBpedia:")
-                            st.markdown("---")
-
-                            for entidad in entidades:
-                                with st.container():
-                                    mostrar_info_dbpedia(entidad, onto, archivo_owl)
-                        else:
-                            st.info(f"ℹ️ No se encontraron entidades de tipo '{tipo_seleccionado}' en DBpedia")
-
-                    except requests.exceptions.Timeout:
-                        st.error("La consulta excedió el tiempo límite.")
-                    except requests.exceptions.RequestException as e:
-                        st.error(f"❌ Error de conexión con DBpedia: {str(e)}")
-                    except Exception as e:
-                        st.error(f"❌ Error al buscar en DBpedia: {e}")
+                columnas, filas = motor.plantilla_sparql(plantilla, parametros_sparql, limite_sparql)
+            # Las filas se muestran a medida que llegan
+            tabla = st.empty()
+            acumuladas = []
+            for fila in filas:
+                acumuladas.append(fila)
+                if len(acumuladas) % 50 == 0:
+                    tabla.dataframe([dict(zip(columnas, f)) for f in acumuladas],
+                                    use_container_width=True, hide_index=True)
+            if acumuladas:
+                tabla.dataframe([dict(zip(columnas, f)) for f in acumuladas],
+                                use_container_width=True, hide_index=True)
+                st.success(f"✅ **{len(acumuladas)}** filas")
+            else:
+                tabla.warning("⚠️ La consulta no devolvió filas")
+        except ErrorBusqueda as e:
+            st.error(f"❌ {e}")
 
 # ==================== EXPLORAR ONTOLOGÍA ====================
 else:  # Explorar ontología
@@ -677,69 +823,76 @@ else:  # Explorar ontología
 
     if modo_busqueda == "🏠 Local (Ontología)":
         # Tabs para organizar ontología local
-        tab1, tab2, tab3 = st.tabs(["📚 Clases", "🔗 Propiedades", "📄 Todos los individuos"])
+        tab1, tab2, tab3, tab4 = st.tabs(["📚 Clases", "🔗 Propiedades", "📄 Todos los individuos", "🕸️ Relaciones"])
 
         with tab1:
             st.markdown("### 📚 Clases disponibles en la ontología")
-            clases = sorted([cls.name for cls in onto.classes() if hasattr(cls, 'name')])
+            clases = estadisticas["lista_clases"]
+            instancias_por_clase = estadisticas["instancias_por_clase"]
 
             if clases:
                 # Mostrar en columnas
                 cols = st.columns(3)
                 for idx, cls_name in enumerate(clases):
                     with cols[idx % 3]:
-                        st.markdown(f"- **{cls_name}**")
+                        st.markdown(f"- **{cls_name}** ({instancias_por_clase.get(cls_name, 0)})")
             else:
                 st.info("No hay clases definidas")
 
         with tab2:
             st.markdown("### 🔗 Propiedades definidas")
 
-            data_props = [p.name for p in onto.data_properties() if hasattr(p, 'name')]
-            object_props = [p.name for p in onto.object_properties() if hasattr(p, 'name')]
+            data_props = estadisticas["propiedades_datos"]
+            object_props = estadisticas["propiedades_objeto"]
+            uso_propiedades = estadisticas["uso_propiedades"]
 
             col1, col2 = st.columns(2)
 
             with col1:
                 st.markdown("#### 📊 Data Properties")
                 if data_props:
-                    for prop in sorted(data_props):
-                        st.markdown(f"- {prop}")
+                    for prop in data_props:
+                        uso = uso_propiedades[prop]
+                        st.markdown(f"- {prop} · {uso['individuos']} individuos, {uso['valores_distintos']} valores")
                 else:
                     st.info("No hay data properties definidas")
 
             with col2:
                 st.markdown("#### 🔗 Object Properties")
                 if object_props:
-                    for prop in sorted(object_props):
-                        st.markdown(f"- {prop}")
+                    for prop in object_props:
+                        st.markdown(f"- {prop} · {uso_propiedades[prop]['aserciones']} relaciones")
                 else:
                     st.info("No hay object properties definidas")
 
         with tab3:
             st.markdown("### 📄 Todos los individuos")
-            individuos = list(onto.individuals())
-
-            if individuos:
-                st.info(f"Total de individuos: {len(individuos)}")
+            if estadisticas["individuos"]:
+                st.info(f"Total de individuos: {estadisticas['individuos']}")
+                # Se leen a través del motor (con la ontología bloqueada), no recorriendo el World
+                if isinstance(motor, MotorBusqueda):
+                    individuos = motor.listar_individuos()
+                else:
+                    individuos = sorted((individuo_a_dict(ind) for ind in onto.individuals()),
+                                        key=lambda ind: ind["nombre"])
 
                 # Búsqueda rápida dentro de individuos
                 filtro = st.text_input("🔍 Filtrar individuos:", placeholder="Escribe para filtrar...")
 
                 individuos_filtrados = individuos
                 if filtro:
-                    individuos_filtrados = [ind for ind in individuos if filtro.lower() in ind.name.lower()]
+                    individuos_filtrados = [ind for ind in individuos if filtro.lower() in ind["nombre"].lower()]
 
                 if individuos_filtrados:
                     # Mostrar en columnas
                     if len(individuos_filtrados) > 4:
                         cols = st.columns(2)
-                        for idx, ind in enumerate(sorted(individuos_filtrados, key=lambda x: x.name)):
+                        for idx, ind in enumerate(individuos_filtrados):
                             with cols[idx % 2]:
                                 with st.container():
                                     mostrar_info_individuo(ind)
                     else:
-                        for ind in sorted(individuos_filtrados, key=lambda x: x.name):
+                        for ind in individuos_filtrados:
                             mostrar_info_individuo(ind)
                 else:
                     st.warning("No se encontraron individuos con ese filtro")
@@ -755,92 +908,90 @@ else:  # Explorar ontología
                 3. **Opción 3:** Usar scripts para generar instancias automáticamente
                 """)
 
+        with tab4:
+            st.markdown("### 🕸️ Relaciones entre individuos")
+            st.caption("Recorre las propiedades de objeto (afirmadas e inferidas) con el índice CSR del grafo")
+
+            if isinstance(motor, MotorBusqueda):
+                nombres_individuos = motor.nombres_individuos()
+            else:
+                nombres_individuos = sorted(ind.name for ind in onto.individuals())
+            propiedades_grafo = motor.propiedades_grafo()
+            direcciones = {"➡️ Salientes": "salida", "⬅️ Entrantes": "entrada", "↔️ Ambas": "ambas"}
+
+            if not propiedades_grafo:
+                st.info("ℹ️ La ontología no tiene relaciones entre individuos todavía")
+            else:
+                col1, col2, col3 = st.columns([2, 1, 1])
+                with col1:
+                    nodo_origen = st.selectbox("Individuo de origen:", nombres_individuos, key="grafo_origen")
+                with col2:
+                    saltos = st.slider("Saltos (k):", 1, 5, 2, key="grafo_k")
+                with col3:
+                    direccion_grafo = direcciones[st.radio("Dirección:", list(direcciones), key="grafo_direccion")]
+                props_grafo = st.multiselect(
+                    "Propiedades a recorrer (vacío = todas):", propiedades_grafo, key="grafo_propiedades"
+                )
+
+                vecinos = motor.vecindario(nodo_origen, saltos, props_grafo, direccion_grafo)
+                if vecinos:
+                    st.success(f"✅ {len(vecinos)} individuos a {saltos} saltos o menos de '{nodo_origen}'")
+                    st.dataframe(vecinos, use_container_width=True, hide_index=True)
+                else:
+                    st.info(f"ℹ️ '{nodo_origen}' no tiene relaciones dentro de {saltos} saltos")
+
+                st.markdown("#### 🧭 Camino más corto")
+                nodo_destino = st.selectbox("Individuo de destino:", nombres_individuos, key="grafo_destino")
+                camino = motor.camino(nodo_origen, nodo_destino, props_grafo, direccion_grafo)
+                if camino is None:
+                    st.warning(f"⚠️ No hay camino de '{nodo_origen}' a '{nodo_destino}'")
+                elif camino:
+                    for paso in camino:
+                        flecha = "⬅️" if paso["invertida"] else "➡️"
+                        st.markdown(f"- **{paso['desde']}** {flecha} `{paso['propiedad']}` {flecha} **{paso['hasta']}**")
+
     elif modo_busqueda == "🌐 DBpedia":
         st.markdown("### 🌐 Explorar DBpedia - Entidades relacionadas con criptomonedas")
 
-        # Categorías para explorar
-        categorias = {
-            "Cryptocurrency": "Criptomonedas",
-            "Blockchain": "Tecnología Blockchain",
-            "Digital_currency": "Monedas digitales",
-            "Cryptocurrency_exchange": "Exchanges de Criptomonedas",
-            "Financial_service": "Servicios financieros",
-            "Company": "Empresas"
-        }
-
-        # Tabs para diferentes categorías
-        tabs = st.tabs(list(categorias.values()))
-
-        for idx, (tipo, nombre) in enumerate(categorias.items()):
-            with tabs[idx]:
-                st.markdown(f"### {nombre}")
-
-                if st.button(f"🔍 Explorar {nombre.lower()}", key=f"explore_{tipo}"):
-                    if not SPARQL_AVAILABLE:
-                        st.error("SPARQLWrapper no está instalado. Instala SPARQLWrapper para explorar DBpedia.")
+        # Todas las categorías se cargan juntas: una consulta por categoría en
+        # paralelo y los totales en una sola consulta (ver explorar_categorias).
+        # Solo el botón consulta; los demás reruns muestran lo ya obtenido
+        if st.button("🔍 Explorar todas las categorías", type="primary", key="explorar_categorias"):
+            with st.spinner("Buscando entidades de todas las categorías..."):
+                st.session_state["exploracion_dbpedia"] = motor.explorar_dbpedia(list(CATEGORIAS_EXPLORAR), limite=15)
+
+        exploracion = st.session_state.get("exploracion_dbpedia")
+        if exploracion:
+            tabs = st.tabs([
+                f"{nombre} ({exploracion[tipo]['total']})" if exploracion[tipo]["total"] is not None else nombre
+                for tipo, nombre in CATEGORIAS_EXPLORAR.items()
+            ])
+            for idx, (tipo, nombre) in enumerate(CATEGORIAS_EXPLORAR.items()):
+                with tabs[idx]:
+                    categoria = exploracion[tipo]
+                    st.markdown(f"### {nombre}")
+                    if categoria["total"] is not None:
+                        st.caption(f"{categoria['total']} entidades de tipo dbo:{tipo} en DBpedia")
+
+                    if categoria["error"]:
+                        st.error(f"❌ {categoria['error']}")
+                    elif categoria["entidades"]:
+                        for entidad in categoria["entidades"]:
+                            with st.container():
+                                st.markdown(f"**{entidad['label']}**")
+                                st.write(entidad['comment'])
+                                st.markdown(f"[🔗 Ver en DBpedia]({entidad['uri']})")
+                                st.markdown("---")
                     else:
-                        with st.spinner(f"Buscando entidades de tipo {nombre.lower()}..."):
-                            try:
-                                # Usar SPARQL query para explorar por tipo
-                                sparql = SPARQLWrapper("https://dbpedia.org/sparql")
-                                sparql.setReturnFormat(JSON)
-
-                                query = f"""
-                                PREFIX dbo: <http://dbpedia.org/ontology/>
-                                PREFIX dbr: <http://dbpedia.org/resource/>
-                                PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-                                PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-
-                                SELECT DISTINCT ?entity ?label ?comment
-                                WHERE {{
-                                    ?entity rdf:type dbo:{tipo} .
-                                    ?entity rdfs:label ?label .
-                                    OPTIONAL {{ ?entity rdfs:comment ?comment . FILTER(LANG(?comment) = "en") }}
-                                    FILTER(LANG(?label) = "en")
-                                }}
-                                ORDER BY ?label
-                                LIMIT 15
-                                """
-
-                                sparql.setQuery(query)
-                                results = sparql.query().convert()
-
-                                entidades = []
-                                for result in results["results"]["bindings"]:
-                                    comment_value = result.get('comment', {}).get('value', 'No description available')
-                                    entidad = {
-                                        'uri': result['entity']['value'],
-                                        'label': result['label']['value'],
-                                        'comment': comment_value[:200] + "..." if len(comment_value) > 200 else comment_value
-                                    }
-                                    entidades.append(entidad)
-
-                                if entidades:
-                                    for entidad in entidades:
-                                        with st.container():
-                                            st.markdown(f"**{entidad['label']}**")
-                                            st.write(entidad['comment'])
-                                            st.markdown(f"[🔗 Ver en DBpedia]({entidad['uri']})")
-                                            st.markdown("---")
-                                else:
-                                    st.info(f"No se encontraron entidades de tipo {nombre.lower()}")
-
-                            except requests.exceptions.Timeout:
-                                st.error("La consulta excedió el tiempo límite.")
-                            except requests.exceptions.RequestException as e:
-                                st.error(f"❌ Error de conexión con DBpedia: {str(e)}")
-                            except Exception as e:
-                                st.error(f"❌ Error al explorar DBpedia: {e}")
+                        st.info(f"No se encontraron entidades de tipo {nombre.lower()}")
 
     else:  # Híbrido
         col1, col2 = st.columns(2)
 
         with col1:
             st.markdown("### 🏠 Ontología Local")
-            num_clases = len(list(onto.classes()))
-            num_individuos = len(list(onto.individuals()))
-            st.metric("Clases", num_clases)
-            st.metric("Individuos", num_individuos)
+            st.metric("Clases", estadisticas["clases"])
+            st.metric("Individuos", estadisticas["individuos"])
 
         with col2:
             st.markdown("### 🌐 DBpedia")
@@ -850,6 +1001,53 @@ else:  # Explorar ontología
         st.markdown("---")
         st.info("💡 Usa los otros tipos de búsqueda para explorar datos específicos de ambos orígenes")
 
+# ==================== RENDIMIENTO ====================
+metricas.registrar("render", "rerun", time.perf_counter() - inicio_rerun)
+
+if perfilador_rerun is not None:
+    st.session_state["ultimo_perfil"] = perfilador_rerun.finalizar()
+
+with st.sidebar.expander("🔬 Perfilado"):
+    st.checkbox(
+        "Perfilar reruns",
+        value=perfilado_activo(),
+        key="perfilar_reruns",
+        help="Perfila cada rerun con cProfile y tracemalloc (BUSCADOR_PERFILADO=1)"
+    )
+    ultimo_perfil = st.session_state.get("ultimo_perfil")
+    if ultimo_perfil:
+        st.caption(f"Último rerun perfilado: {ultimo_perfil['duracion_ms']} ms")
+        st.caption(f"`{ultimo_perfil['archivo_prof']}`")
+        if ultimo_perfil["funciones_busqueda"]:
+            st.markdown("**Rutas de búsqueda**")
+            st.dataframe(ultimo_perfil["funciones_busqueda"], hide_index=True, use_container_width=True)
+        st.markdown("**Puntos calientes (tiempo acumulado)**")
+        st.dataframe(ultimo_perfil["hotspots"], hide_index=True, use_container_width=True)
+        if ultimo_perfil["memoria"]:
+            st.markdown("**Asignaciones de memoria**")
+            st.dataframe(ultimo_perfil["memoria"], hide_index=True, use_container_width=True)
+
+with st.sidebar.expander("📈 Rendimiento"):
+    filas_metricas = metricas.resumen()
+    if filas_metricas:
+        st.dataframe(filas_metricas, hide_index=True, use_container_width=True)
+    else:
+        st.caption("Aún no hay operaciones medidas")
+    if ruta_metricas_prom:
+        st.caption(f"Exportando métricas Prometheus a `{ruta_metricas_prom}`")
+    filas_latencias = dbpedia.latencias.resumen()
+    if filas_latencias:
+        st.caption(
+            "Latencias de DBpedia (tiempos límite adaptativos); alternativas lanzadas: "
+            f"{dbpedia.latencias.coberturas}, ganadas: {dbpedia.latencias.ganadas_alternativa}"
+        )
+        st.dataframe(filas_latencias, hide_index=True, use_container_width=True)
+    if dbpedia.transporte.limitador is not None:
+        st.caption("Limitador de salida: colas por tipo de solicitud y prioridad")
+        st.dataframe(dbpedia.transporte.limitador.resumen(), hide_index=True, use_container_width=True)
+    if st.button("🧹 Reiniciar métricas", key="reiniciar_metricas"):
+        metricas.reiniciar()
+
 # ==================== FOOTER ====================
 st.markdown("---")
 st.markdown("""
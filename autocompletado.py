@@ -0,0 +1,220 @@
+"""
+Autocompletado por prefijo con ponderación por popularidad.
+
+Los textos sugeribles (nombres de individuos, clases y propiedades de la
+ontología y etiquetas de la caché offline de DBpedia) se normalizan
+(camelCase separado, sin acentos, en minúsculas) y cada uno se indexa con
+varias claves: el texto completo, el texto sin espacios ("bitcoincash") y
+el texto desde cada palabra ("cash"). Las claves se guardan en una lista
+ordenada, así que las que empiezan por un prefijo forman un rango contiguo
+que se encuentra con dos búsquedas binarias (bisect); el orden del rango se
+resuelve con NumPy. Una sugerencia cuesta microsegundos aun con millones de
+claves.
+
+El puntaje de cada sugerencia combina el peso de su tipo, la frecuencia del
+texto en la ontología (instancias de una clase, usos de una propiedad,
+valores de un individuo) y las veces que se buscó; coincidir con el inicio
+del texto o con el texto completo suma además una bonificación.
+"""
+
+import math
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from enlaces_dbpedia import sin_html, normalizar
+from metricas import metricas
+
+TIPOS_SUGERENCIA = ("individuo", "clase", "propiedad", "dbpedia")
+# Las entidades locales se prefieren sobre las etiquetas de DBpedia
+PESO_TIPO = {"individuo": 3.0, "clase": 2.5, "propiedad": 1.5, "dbpedia": 1.0}
+BONO_INICIO = 10.0
+BONO_EXACTA = 20.0
+
+
+class IndiceAutocompletado:
+    """Lista ordenada de claves de prefijo con el puntaje de cada sugerencia"""
+
+    def __init__(self, entradas: Iterable[Tuple[str, str, str, int]],
+                 usos: Optional[Dict[str, int]] = None):
+        """
+        Args:
+            entradas: Tuplas (texto mostrado, tipo, valor, frecuencia); el valor
+                es el nombre de la entidad o la URI de DBpedia
+            usos: Veces que se buscó cada texto normalizado (se comparte y se
+                actualiza con registrar_uso)
+        """
+        with metricas.medir("autocompletado", "construir") as medicion:
+            self.usos = usos if usos is not None else {}
+            self.textos: List[str] = []
+            self.tipos: List[str] = []
+            self.valores: List[str] = []
+            self.normalizados: List[str] = []
+            frecuencias: List[float] = []
+            vistos: Dict[Tuple[str, str], int] = {}
+            for texto, tipo, valor, frecuencia in entradas:
+                if tipo not in PESO_TIPO:
+                    raise ValueError(f"Tipo de sugerencia desconocido: {tipo}")
+                normalizado = normalizar(texto)
+                if not normalizado:
+                    continue
+                # Un mismo texto y tipo se sugiere una vez (p. ej. "Bitcoin" y "bitcoin" en la caché)
+                existente = vistos.get((normalizado, tipo))
+                if existente is not None:
+                    frecuencias[existente] = max(frecuencias[existente], frecuencia)
+                    continue
+                vistos[(normalizado, tipo)] = len(self.textos)
+                self.textos.append(texto)
+                self.tipos.append(tipo)
+                self.valores.append(valor)
+                self.normalizados.append(normalizado)
+                frecuencias.append(frecuencia)
+
+            self._por_normalizado: Dict[str, List[int]] = {}
+            for i, normalizado in enumerate(self.normalizados):
+                self._por_normalizado.setdefault(normalizado, []).append(i)
+            self.codigos_tipo = np.array([TIPOS_SUGERENCIA.index(t) for t in self.tipos], dtype=np.int8)
+            self.pesos = np.array(
+                [PESO_TIPO[t] * (1.0 + math.log1p(f)) for t, f in zip(self.tipos, frecuencias)],
+                dtype=np.float64
+            )
+            for normalizado, veces in self.usos.items():
+                for i in self._por_normalizado.get(normalizado, ()):
+                    self.pesos[i] += veces
+
+            # (clave, id de la sugerencia, bonificación de la clave)
+            claves: List[Tuple[str, int, float]] = []
+            for i, normalizado in enumerate(self.normalizados):
+                palabras = normalizado.split(" ")
+                claves.append((normalizado, i, BONO_INICIO))
+                if len(palabras) > 1:
+                    claves.append(("".join(palabras), i, BONO_INICIO))
+                    for k in range(1, len(palabras)):
+                        claves.append((" ".join(palabras[k:]), i, 0.0))
+            claves.sort()
+            self.claves = [c for c, _, _ in claves]
+            self.ids = np.array([i for _, i, _ in claves], dtype=np.int64)
+            self.bonos = np.array([b for _, _, b in claves], dtype=np.float64)
+            medicion.filas = len(self.claves)
+
+    @classmethod
+    def desde_ontologia(cls, onto, cache_dbpedia: Optional[Dict] = None,
+                        usos: Optional[Dict[str, int]] = None) -> "IndiceAutocompletado":
+        """Sugerencias con las entidades de una ontología de owlready2 y la caché de DBpedia"""
+        entradas = []
+        for individuo in onto.individuals():
+            valores = sum(len(prop[individuo]) if isinstance(prop[individuo], list) else 1
+                          for prop in individuo.get_properties())
+            entradas.append((individuo.name, "individuo", individuo.name, valores))
+        for clase in onto.classes():
+            entradas.append((clase.name, "clase", clase.name, len(list(clase.instances()))))
+        for prop in list(onto.data_properties()) + list(onto.object_properties()):
+            entradas.append((prop.name, "propiedad", prop.name, sum(1 for _ in prop.get_relations())))
+        entradas.extend(_entradas_dbpedia(cache_dbpedia))
+        return cls(entradas, usos)
+
+    @classmethod
+    def desde_indice(cls, indice, cache_dbpedia: Optional[Dict] = None,
+                     usos: Optional[Dict[str, int]] = None) -> "IndiceAutocompletado":
+        """Sugerencias a partir de un índice mmap (indice_mmap.IndiceMmap)"""
+        entradas = []
+        usos_propiedad: Dict[str, int] = {}
+        for i in range(indice.cantidad_individuos):
+            ficha = indice.individuo(i)
+            valores = sum(len(v) for v in ficha["propiedades"].values())
+            entradas.append((ficha["nombre"], "individuo", ficha["nombre"], valores))
+            for propiedad, lista in ficha["propiedades"].items():
+                usos_propiedad[propiedad] = usos_propiedad.get(propiedad, 0) + len(lista)
+        for clase in indice.listar_clases():
+            entradas.append((clase, "clase", clase, len(indice.instancias_de_clase(clase))))
+        entradas.extend((p, "propiedad", p, n) for p, n in usos_propiedad.items())
+        entradas.extend(_entradas_dbpedia(cache_dbpedia))
+        return cls(entradas, usos)
+
+    def __len__(self) -> int:
+        return len(self.textos)
+
+    def sugerir(self, prefijo: str, limite: int = 10, tipos: Optional[Iterable[str]] = None) -> List[Dict]:
+        """
+        Sugerencias que empiezan por el prefijo (al inicio o en cualquier palabra)
+
+        Args:
+            prefijo: Texto escrito hasta el momento
+            limite: Máximo de sugerencias
+            tipos: Solo estos tipos (None = todos)
+
+        Returns:
+            Lista de {"texto", "tipo", "valor", "puntaje"} de mayor a menor puntaje
+        """
+        codigos = None
+        if tipos is not None:
+            tipos = set(tipos)
+            desconocidos = tipos - set(TIPOS_SUGERENCIA)
+            if desconocidos:
+                raise KeyError(f"Tipo de sugerencia desconocido: {', '.join(sorted(desconocidos))}")
+            codigos = [TIPOS_SUGERENCIA.index(t) for t in tipos]
+        with metricas.medir("autocompletado", "sugerir") as medicion:
+            clave = normalizar(prefijo)
+            sugerencias = []
+            if clave and limite > 0:
+                inicio = bisect_left(self.claves, clave)
+                fin = bisect_left(self.claves, clave + "\uffff", inicio)
+                ids, bonos = self.ids[inicio:fin], self.bonos[inicio:fin]
+                if codigos is not None:
+                    mascara = np.isin(self.codigos_tipo[ids], codigos)
+                    ids, bonos = ids[mascara], bonos[mascara]
+                puntajes = self.pesos[ids] + bonos
+                exactas = self._por_normalizado.get(clave)
+                if exactas:
+                    puntajes += np.isin(ids, exactas) * BONO_EXACTA
+                sugerencias = self._mejores(ids, puntajes, limite)
+            medicion.filas = len(sugerencias)
+        return sugerencias
+
+    def _mejores(self, ids: np.ndarray, puntajes: np.ndarray, limite: int) -> List[Dict]:
+        # Un id aparece a lo sumo una vez por palabra: basta ordenar unos pocos candidatos
+        candidatos = min(len(ids), 4 * limite)
+        if candidatos < len(ids):
+            seleccion = np.argpartition(-puntajes, candidatos - 1)[:candidatos]
+        else:
+            seleccion = np.arange(len(ids))
+        seleccion = seleccion[np.lexsort((ids[seleccion], -puntajes[seleccion]))]
+        sugerencias, vistos = [], set()
+        for posicion in seleccion.tolist():
+            i = int(ids[posicion])
+            if i in vistos:
+                continue
+            vistos.add(i)
+            sugerencias.append({
+                "texto": self.textos[i], "tipo": self.tipos[i], "valor": self.valores[i],
+                "puntaje": round(float(puntajes[posicion]), 3),
+            })
+            if len(sugerencias) == limite:
+                break
+        return sugerencias
+
+    def registrar_uso(self, texto: str) -> int:
+        """
+        Suma un uso a las sugerencias cuyo texto coincide exactamente
+
+        Returns:
+            Cantidad de sugerencias afectadas
+        """
+        normalizado = normalizar(texto)
+        self.usos[normalizado] = self.usos.get(normalizado, 0) + 1
+        afectadas = self._por_normalizado.get(normalizado, ())
+        for i in afectadas:
+            self.pesos[i] += 1
+        return len(afectadas)
+
+
+def _entradas_dbpedia(cache_dbpedia: Optional[Dict]) -> List[Tuple[str, str, str, int]]:
+    """Etiquetas de la caché offline de DBpedia (DBpediaOffline.cache)"""
+    entradas = []
+    for clave, datos in (cache_dbpedia or {}).items():
+        if not isinstance(datos, dict) or not datos.get("uri"):
+            continue
+        etiqueta = sin_html(datos.get("label") or clave)
+        entradas.append((etiqueta, "dbpedia", datos["uri"], len(datos.get("categories") or ())))
+    return entradas
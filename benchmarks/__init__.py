@@ -0,0 +1 @@
+"""Benchmarks offline del buscador semántico."""
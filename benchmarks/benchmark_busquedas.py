@@ -0,0 +1,212 @@
+"""
+Benchmark offline de todas las rutas de búsqueda.
+
+Levanta el servidor DBpedia simulado (con latencia inyectada configurable),
+ejecuta cada ruta de búsqueda varias veces y escribe un reporte JSON con
+latencias p50/p95/p99 y throughput, para comparar regresiones entre commits.
+
+Uso:
+    python -m benchmarks.benchmark_busquedas --iteraciones 50 --latencia-ms 20
+    python -m benchmarks.benchmark_busquedas --comparar reporte_anterior.json
+    python -m benchmarks.benchmark_busquedas --casete casetes/dbpedia.jsonl.gz
+"""
+
+import argparse
+import contextlib
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+from owlready2 import World  # noqa: E402
+
+from benchmarks.servidor_simulado import iniciar_servidor  # noqa: E402
+from busqueda_local import (  # noqa: E402
+    buscar_individuos_por_nombre, buscar_instancias_de_clase, cargar_ontologia_archivo
+)
+from dbpedia_connector import (  # noqa: E402
+    DBpediaConnector, buscar_en_dbpedia, obtener_detalles_dbpedia
+)
+from indice_compacto import IndiceCompacto  # noqa: E402
+
+ARCHIVO_OWL = os.path.join(RAIZ, "criptomonedas.owl")
+URI_EJEMPLO = "http://dbpedia.org/resource/Bitcoin"
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil por rango más cercano (valores ya ordenados)"""
+    if not valores:
+        return 0.0
+    indice = max(0, min(len(valores) - 1, math.ceil(p / 100.0 * len(valores)) - 1))
+    return valores[indice]
+
+
+def medir(funcion: Callable, iteraciones: int, calentamiento: int = 2) -> Dict:
+    """
+    Ejecuta una función repetidamente y calcula estadísticas de latencia
+
+    Args:
+        funcion: Función sin argumentos a medir
+        iteraciones: Número de ejecuciones medidas
+        calentamiento: Ejecuciones previas descartadas
+
+    Returns:
+        Diccionario con p50/p95/p99, media, máximo (ms) y throughput (ops/s)
+    """
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        for _ in range(calentamiento):
+            funcion()
+
+        tiempos = []
+        inicio_total = time.perf_counter()
+        for _ in range(iteraciones):
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append((time.perf_counter() - inicio) * 1000.0)
+        total = time.perf_counter() - inicio_total
+
+    tiempos.sort()
+    return {
+        "iteraciones": iteraciones,
+        "p50_ms": round(percentil(tiempos, 50), 3),
+        "p95_ms": round(percentil(tiempos, 95), 3),
+        "p99_ms": round(percentil(tiempos, 99), 3),
+        "media_ms": round(sum(tiempos) / len(tiempos), 3),
+        "max_ms": round(tiempos[-1], 3),
+        "throughput_ops": round(iteraciones / total, 2) if total > 0 else 0.0,
+    }
+
+
+def escenarios(servidor) -> Dict[str, Callable]:
+    """Define las rutas de búsqueda a medir, apuntando al servidor simulado"""
+    endpoint = servidor.endpoint_sparql
+    conector = DBpediaConnector(endpoint=endpoint, endpoint_lookup=servidor.endpoint_lookup)
+    onto = cargar_ontologia_archivo(ARCHIVO_OWL, World())
+    compacto = IndiceCompacto(onto)
+
+    return {
+        # Funciones de búsqueda usadas por app.py
+        "buscar_en_dbpedia": lambda: buscar_en_dbpedia("bitcoin", endpoint=endpoint),
+        "obtener_detalles_dbpedia": lambda: obtener_detalles_dbpedia(URI_EJEMPLO, endpoint=endpoint),
+        # Métodos de DBpediaConnector
+        "conector.is_online": conector.is_online,
+        "conector.buscar_criptomoneda": lambda: conector.buscar_criptomoneda("Bitcoin"),
+        "conector.buscar_relacionados": lambda: conector.buscar_relacionados("blockchain"),
+        "conector.obtener_propiedades": lambda: conector.obtener_propiedades(URI_EJEMPLO),
+        "conector.buscar_por_tipo": lambda: conector.buscar_por_tipo("Cryptocurrency"),
+        "conector.buscar_simple": lambda: conector.buscar_simple("Bitcoin"),
+        "conector.enriquecer_con_dbpedia": lambda: conector.enriquecer_con_dbpedia("Bitcoin", {"nombre": "bitcoin"}),
+        "conector.buscar_con_api_rest": lambda: conector.buscar_con_api_rest("Bitcoin"),
+        # Búsquedas locales
+        "local.buscar_por_nombre": lambda: buscar_individuos_por_nombre(onto, "bit"),
+        "local.buscar_por_clase": lambda: buscar_instancias_de_clase(onto, "Criptomoneda"),
+        "local.indice_compacto.por_nombre": lambda: compacto.buscar_por_nombre("bit"),
+        "local.indice_compacto.texto_completo": lambda: compacto.buscar_texto_completo("bit"),
+        "local.cargar_ontologia": lambda: cargar_ontologia_archivo(ARCHIVO_OWL, World()),
+    }
+
+
+def commit_actual() -> str:
+    """Hash del commit actual (o 'desconocido' fuera de git)"""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return "desconocido"
+
+
+def comparar(actual: Dict, anterior: Dict, umbral: float = 0.10) -> List[str]:
+    """
+    Compara dos reportes y lista las regresiones de p95
+
+    Args:
+        actual: Reporte recién generado
+        anterior: Reporte de referencia
+        umbral: Aumento relativo de p95 a partir del cual se reporta
+
+    Returns:
+        Lista de mensajes de regresión
+    """
+    regresiones = []
+    for nombre, metricas in actual["resultados"].items():
+        previo = anterior.get("resultados", {}).get(nombre)
+        if not previo or not previo.get("p95_ms"):
+            continue
+        cambio = (metricas["p95_ms"] - previo["p95_ms"]) / previo["p95_ms"]
+        if cambio > umbral:
+            regresiones.append(
+                f"{nombre}: p95 {previo['p95_ms']:.2f} ms -> {metricas['p95_ms']:.2f} ms (+{cambio:.0%})"
+            )
+    return regresiones
+
+
+def ejecutar(iteraciones: int = 30, latencia_ms: float = 0.0, variacion_ms: float = 0.0,
+             filtro: str = None, ruta_casete: str = None) -> Dict:
+    """Ejecuta el benchmark completo y devuelve el reporte"""
+    servidor = iniciar_servidor(latencia_ms=latencia_ms, variacion_ms=variacion_ms,
+                                ruta_casete=ruta_casete)
+    try:
+        resultados = {}
+        for nombre, funcion in escenarios(servidor).items():
+            if filtro and filtro not in nombre:
+                continue
+            resultados[nombre] = medir(funcion, iteraciones)
+            print(f"  {nombre:<36} p50={resultados[nombre]['p50_ms']:>9.2f} ms  "
+                  f"p95={resultados[nombre]['p95_ms']:>9.2f} ms  "
+                  f"{resultados[nombre]['throughput_ops']:>9.1f} ops/s")
+    finally:
+        servidor.detener()
+
+    return {
+        "commit": commit_actual(),
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "latencia_inyectada_ms": latencia_ms,
+        "variacion_ms": variacion_ms,
+        "casete": ruta_casete,
+        "resultados": resultados,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline de búsquedas")
+    parser.add_argument("--iteraciones", type=int, default=30)
+    parser.add_argument("--latencia-ms", type=float, default=0.0)
+    parser.add_argument("--variacion-ms", type=float, default=0.0)
+    parser.add_argument("--filtro", help="Solo escenarios cuyo nombre contenga este texto")
+    parser.add_argument("--salida", default="reporte_benchmark.json")
+    parser.add_argument("--casete", help="Casete grabado a reproducir desde el servidor simulado")
+    parser.add_argument("--comparar", help="Reporte JSON anterior para detectar regresiones")
+    args = parser.parse_args()
+
+    print(f"Benchmark ({args.iteraciones} iteraciones, latencia {args.latencia_ms} ms)")
+    reporte = ejecutar(args.iteraciones, args.latencia_ms, args.variacion_ms, args.filtro, args.casete)
+
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(reporte, f, indent=2, ensure_ascii=False)
+    print(f"Reporte guardado en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            anterior = json.load(f)
+        regresiones = comparar(reporte, anterior)
+        if regresiones:
+            print("Regresiones detectadas:")
+            for mensaje in regresiones:
+                print(f"  - {mensaje}")
+            sys.exit(1)
+        print("Sin regresiones respecto al reporte anterior")
+
+
+if __name__ == "__main__":
+    main()
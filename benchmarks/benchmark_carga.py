@@ -0,0 +1,120 @@
+"""
+Benchmark de la carga de las consultas a DBpedia por modo de consulta.
+
+Levanta el servidor DBpedia simulado con respuestas cuyos resúmenes y
+comentarios se alargan a varios KB (como los dbo:abstract reales) y ejecuta
+las mismas búsquedas en cuatro modos:
+
+    completo-json   consultas originales, resultados SPARQL JSON
+    compacto-json   SUBSTR en el servidor y solo los campos mostrados
+    compacto-tsv    lo mismo con resultados TSV
+    compacto-csv    lo mismo con resultados CSV
+
+Reporta bytes transferidos, tiempo de análisis de la respuesta y tiempo
+total por consulta, y verifica que todos los modos devuelvan lo mismo.
+
+Uso:
+    python -m benchmarks.benchmark_carga --repeticiones 50 --largo 3000
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import tempfile
+from typing import Dict
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+from benchmarks.servidor_simulado import RUTA_RESPUESTAS, iniciar_servidor  # noqa: E402
+from dbpedia_connector import DBpediaConnector, buscar_en_dbpedia, buscar_por_tipo_dbo  # noqa: E402
+from metricas import metricas  # noqa: E402
+
+MODOS = [
+    ("completo-json", False, "json"),
+    ("compacto-json", True, "json"),
+    ("compacto-tsv", True, "tsv"),
+    ("compacto-csv", True, "csv"),
+]
+TEXTOS_LARGOS = ("comment", "abstract")
+
+
+def respuestas_alargadas(largo: int) -> Dict:
+    """Respuestas grabadas con los textos largos repetidos hasta `largo` caracteres"""
+    with open(RUTA_RESPUESTAS, "r", encoding="utf-8") as f:
+        datos = json.load(f)
+    datos = copy.deepcopy(datos)
+    for regla in datos["sparql"]:
+        for fila in regla["respuesta"]["results"]["bindings"]:
+            for variable in TEXTOS_LARGOS:
+                if variable in fila and fila[variable]["value"]:
+                    texto = fila[variable]["value"]
+                    fila[variable]["value"] = (texto + " ") * (largo // (len(texto) + 1) + 1)
+    return datos
+
+
+def consultas(conector: DBpediaConnector):
+    """Las búsquedas medidas, cada una con el resultado que devuelve"""
+    endpoint = conector.endpoint_online
+    opciones = {"endpoint": endpoint, "compacto": conector.compacto, "formato": conector.formato}
+    return {
+        "buscar_en_dbpedia": lambda: buscar_en_dbpedia("bitcoin", **opciones)[0],
+        "buscar_por_tipo_dbo": lambda: buscar_por_tipo_dbo("Cryptocurrency", **opciones)[0],
+        "buscar_relacionados": lambda: conector.buscar_relacionados("bitcoin"),
+        "buscar_por_tipo": lambda: conector.buscar_por_tipo("Cryptocurrency"),
+    }
+
+
+def medir_modo(servidor, compacto: bool, formato: str, repeticiones: int) -> Dict:
+    conector = DBpediaConnector(servidor.endpoint_sparql, servidor.endpoint_lookup,
+                                compacto=compacto, formato=formato)
+    metricas.reiniciar()
+    resultados = {}
+    for nombre, consulta in consultas(conector).items():
+        for _ in range(repeticiones):
+            resultados[nombre] = consulta()
+    filas = metricas.resumen()
+    peticiones = [f for f in filas if f["categoria"] == "dbpedia"]
+    analisis = next(f for f in filas if f["categoria"] == "sparql_analisis")
+    llamadas = sum(f["llamadas"] for f in peticiones)
+    return {
+        "bytes_por_consulta": round(sum(f["bytes"] for f in peticiones) / llamadas),
+        "analisis_ms_por_consulta": round(analisis["total_ms"] / analisis["llamadas"], 3),
+        "total_ms_por_consulta": round(sum(f["total_ms"] for f in peticiones) / llamadas, 3),
+        "resultados": resultados,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de bytes y análisis por modo de consulta")
+    parser.add_argument("--repeticiones", type=int, default=30)
+    parser.add_argument("--largo", type=int, default=3000, help="Caracteres de cada resumen/comentario")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "respuestas.json")
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(respuestas_alargadas(args.largo), f)
+        servidor = iniciar_servidor(ruta_respuestas=ruta)
+        try:
+            reporte = {modo: medir_modo(servidor, compacto, formato, args.repeticiones)
+                       for modo, compacto, formato in MODOS}
+        finally:
+            servidor.detener()
+
+    referencia = reporte["completo-json"].pop("resultados")
+    for modo in list(reporte)[1:]:
+        reporte[modo]["mismos_resultados"] = reporte[modo].pop("resultados") == referencia
+
+    print(f"{'modo':<15} {'bytes/consulta':>15} {'análisis ms':>12} {'total ms':>10}")
+    for modo, datos in reporte.items():
+        print(f"{modo:<15} {datos['bytes_por_consulta']:>15} {datos['analisis_ms_por_consulta']:>12} "
+              f"{datos['total_ms_por_consulta']:>10}")
+    print(json.dumps(reporte, indent=2))
+
+
+if __name__ == "__main__":
+    main()
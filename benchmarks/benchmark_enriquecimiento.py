@@ -0,0 +1,91 @@
+"""
+Benchmark del enriquecimiento masivo: uno a uno frente a lotes VALUES.
+
+Contra el servidor DBpedia simulado con latencia inyectada, enriquece la
+misma lista de nombres llamando a DBpediaConnector.enriquecer_con_dbpedia
+por cada uno y con enriquecimiento_lotes.EnriquecedorLotes (lotes
+concurrentes), y reporta tiempo total, consultas y throughput.
+
+Uso:
+    python -m benchmarks.benchmark_enriquecimiento --individuos 2000 --latencia-ms 50
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+from benchmarks.servidor_simulado import iniciar_servidor  # noqa: E402
+from dbpedia_connector import DBpediaConnector  # noqa: E402
+from enriquecimiento_lotes import EnriquecedorLotes  # noqa: E402
+
+CONOCIDOS = ["bitcoin", "bitcoinCash", "ethereum", "litecoin", "monero", "coinbase", "binance"]
+
+
+def nombres_de_prueba(cantidad: int):
+    """Algunos nombres con recurso en el servidor simulado y el resto sintéticos"""
+    return (CONOCIDOS + [f"monedaSintetica{i}" for i in range(cantidad)])[:cantidad]
+
+
+def medir_individual(servidor, nombres) -> Dict:
+    conector = DBpediaConnector(servidor.endpoint_sparql, servidor.endpoint_lookup)
+    antes, inicio = servidor.solicitudes, time.perf_counter()
+    encontrados = sum(1 for n in nombres if conector.enriquecer_con_dbpedia(n, {})["fuente_enriquecida"])
+    return _reporte(time.perf_counter() - inicio, servidor.solicitudes - antes, len(nombres), encontrados)
+
+
+def medir_lotes(servidor, nombres, tamano_lote: int, hilos: int) -> Dict:
+    conector = DBpediaConnector(servidor.endpoint_sparql, servidor.endpoint_lookup)
+    enriquecedor = EnriquecedorLotes(conector, tamano_lote=tamano_lote, hilos=hilos)
+    with tempfile.TemporaryDirectory() as directorio:
+        antes, inicio = servidor.solicitudes, time.perf_counter()
+        resumen = enriquecedor.ejecutar(nombres, os.path.join(directorio, "enriquecimiento.parquet"))
+        return _reporte(time.perf_counter() - inicio, servidor.solicitudes - antes, len(nombres),
+                        resumen["encontrados"])
+
+
+def _reporte(segundos: float, consultas: int, individuos: int, encontrados: int) -> Dict:
+    return {
+        "segundos": round(segundos, 3),
+        "consultas": consultas,
+        "encontrados": encontrados,
+        "individuos_por_segundo": round(individuos / segundos, 1) if segundos else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de enriquecimiento uno a uno frente a lotes")
+    parser.add_argument("--individuos", type=int, default=500)
+    parser.add_argument("--latencia-ms", type=float, default=50.0)
+    parser.add_argument("--lote", type=int, default=50)
+    parser.add_argument("--hilos", type=int, default=4)
+    parser.add_argument("--sin-individual", action="store_true", help="Omitir la variante uno a uno (lenta)")
+    args = parser.parse_args()
+
+    nombres = nombres_de_prueba(args.individuos)
+    servidor = iniciar_servidor(latencia_ms=args.latencia_ms)
+    try:
+        reporte = {"individuos": len(nombres), "latencia_ms": args.latencia_ms, "resultados": {}}
+        if not args.sin_individual:
+            reporte["resultados"]["individual"] = medir_individual(servidor, nombres)
+        reporte["resultados"]["lotes"] = medir_lotes(servidor, nombres, args.lote, args.hilos)
+    finally:
+        servidor.detener()
+
+    print(f"{len(nombres)} individuos, latencia {args.latencia_ms} ms")
+    print(f"{'variante':<12} {'segundos':>9} {'consultas':>10} {'encontrados':>12} {'ind/s':>9}")
+    for variante, datos in reporte["resultados"].items():
+        print(f"{variante:<12} {datos['segundos']:>9} {datos['consultas']:>10} "
+              f"{datos['encontrados']:>12} {datos['individuos_por_segundo']:>9}")
+    print(json.dumps(reporte, indent=2))
+
+
+if __name__ == "__main__":
+    main()
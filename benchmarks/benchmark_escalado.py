@@ -0,0 +1,187 @@
+"""
+Benchmark de escalado con ontologías sintéticas de tamaño creciente.
+
+Para cada tamaño genera una ontología con el esquema de criptomonedas.owl
+(benchmarks/generador_ontologia.py). Luego, en un proceso nuevo por tamaño
+(la memoria de uno no se mezcla con la del siguiente), mide:
+
+    carga               cargar_ontologia_archivo en un World nuevo
+    memoria             RSS que añade la ontología cargada
+    buscar_por_nombre   buscar_individuos_por_nombre (término frecuente)
+    buscar_por_clase    buscar_instancias_de_clase
+    renderizado         individuo_a_dict de una página de resultados
+
+El resultado es una fila por tamaño (JSON y CSV) con la pendiente log-log
+de cada medida respecto del tamaño anterior: ~1 es lineal, ~0 constante.
+
+Uso:
+    python -m benchmarks.benchmark_escalado --tamanos 10000 100000 1000000
+    python -m benchmarks.benchmark_escalado --tamanos 10000 50000 --formato ntriples --directorio /tmp/escalado
+"""
+
+import argparse
+import csv
+import json
+import math
+import multiprocessing
+import os
+import queue
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+from owlready2 import World  # noqa: E402
+
+from benchmarks.benchmark_busquedas import medir  # noqa: E402
+from benchmarks.benchmark_trabajadores import memoria_proceso  # noqa: E402
+from benchmarks.generador_ontologia import FORMATOS, generar_ontologia  # noqa: E402
+from busqueda_local import (  # noqa: E402
+    buscar_individuos_por_nombre, buscar_instancias_de_clase, cargar_ontologia_archivo, individuo_a_dict
+)
+
+TERMINO = "bitcoin"
+CLASE = "Criptomoneda"
+PAGINA = 20  # individuos que muestra una página de resultados
+CURVAS = ("carga_s", "rss_extra_kib", "nombre_p50_ms", "clase_p50_ms", "renderizado_p50_ms")
+
+
+def medir_tamano(ruta: str, repeticiones: int) -> Dict:
+    """Carga la ontología y mide memoria, búsquedas y renderizado (en el proceso actual)"""
+    antes = memoria_proceso()
+    inicio = time.perf_counter()
+    onto = cargar_ontologia_archivo(ruta, mundo=World())
+    carga = time.perf_counter() - inicio
+    despues = memoria_proceso()
+
+    pagina = buscar_individuos_por_nombre(onto, TERMINO)[:PAGINA]
+    nombre = medir(lambda: buscar_individuos_por_nombre(onto, TERMINO), repeticiones, calentamiento=1)
+    clase = medir(lambda: buscar_instancias_de_clase(onto, CLASE), repeticiones, calentamiento=1)
+    renderizado = medir(lambda: [individuo_a_dict(individuo) for individuo in pagina], repeticiones,
+                        calentamiento=1)
+    return {
+        "carga_s": round(carga, 3),
+        "rss_extra_kib": despues["rss_kib"] - antes["rss_kib"],
+        "resultados_nombre": len(buscar_individuos_por_nombre(onto, TERMINO)),
+        "nombre_p50_ms": nombre["p50_ms"],
+        "nombre_p95_ms": nombre["p95_ms"],
+        "clase_p50_ms": clase["p50_ms"],
+        "clase_p95_ms": clase["p95_ms"],
+        "renderizado_p50_ms": renderizado["p50_ms"],
+        "renderizado_p95_ms": renderizado["p95_ms"],
+    }
+
+
+def _trabajador(ruta: str, repeticiones: int, salida):
+    try:
+        salida.put(medir_tamano(ruta, repeticiones))
+    except Exception as e:  # el proceso padre reporta el error en la fila
+        salida.put({"error": f"{type(e).__name__}: {e}"})
+
+
+def medir_en_proceso(ruta: str, repeticiones: int) -> Dict:
+    """
+    medir_tamano en un proceso aparte, para que la memoria de cada tamaño empiece de cero
+
+    Si el proceso muere sin responder (p. ej. lo mata el sistema por falta de
+    memoria), la fila lleva el error con su código de salida en lugar de
+    esperar para siempre.
+    """
+    contexto = multiprocessing.get_context("fork")
+    salida = contexto.Queue()
+    proceso = contexto.Process(target=_trabajador, args=(ruta, repeticiones, salida))
+    proceso.start()
+    try:
+        while True:
+            try:
+                return salida.get(timeout=1.0)
+            except queue.Empty:
+                if not proceso.is_alive():
+                    # Pudo responder justo antes de terminar
+                    try:
+                        return salida.get(timeout=1.0)
+                    except queue.Empty:
+                        return {"error": f"el proceso de medición terminó con código {proceso.exitcode}"}
+    finally:
+        proceso.join()
+
+
+def agregar_pendientes(filas: List[Dict]):
+    """Pendiente log-log de cada curva respecto de la fila anterior (exponente de crecimiento)"""
+    for anterior, fila in zip(filas, filas[1:]):
+        escala = math.log(fila["individuos"] / anterior["individuos"])
+        for curva in CURVAS:
+            if anterior.get(curva, 0) > 0 and fila.get(curva, 0) > 0 and escala > 0:
+                fila[f"pendiente_{curva}"] = round(math.log(fila[curva] / anterior[curva]) / escala, 2)
+
+
+def ejecutar(tamanos: List[int], formato: str = "rdfxml", directorio: str = None,
+             repeticiones: int = 10, en_proceso: bool = True) -> List[Dict]:
+    """
+    Genera y mide cada tamaño
+
+    Args:
+        tamanos: Cantidades de individuos, de menor a mayor
+        formato: Formato de las ontologías generadas ("rdfxml" o "ntriples")
+        directorio: Donde dejar las ontologías (por defecto, un temporal que se borra)
+        repeticiones: Ejecuciones medidas de cada búsqueda
+        en_proceso: Medir cada tamaño en un proceso aparte
+
+    Returns:
+        Una fila por tamaño con las medidas y sus pendientes
+    """
+    filas = []
+    with tempfile.TemporaryDirectory() as temporal:
+        directorio = directorio or temporal
+        extension = "owl" if formato == "rdfxml" else "nt"
+        for tamano in sorted(tamanos):
+            ruta = os.path.join(directorio, f"criptomonedas_{tamano}.{extension}")
+            inicio = time.perf_counter()
+            generada = generar_ontologia(tamano, ruta, formato=formato)
+            fila = {
+                "individuos": generada["individuos"],
+                "bytes": generada["bytes"],
+                "generar_s": round(time.perf_counter() - inicio, 3),
+            }
+            fila.update(medir_en_proceso(ruta, repeticiones) if en_proceso else medir_tamano(ruta, repeticiones))
+            print(f"  {tamano:>9} individuos  carga={fila.get('carga_s', '-')} s  "
+                  f"memoria={fila.get('rss_extra_kib', '-')} KiB  nombre p50={fila.get('nombre_p50_ms', '-')} ms")
+            if "error" in fila:
+                print(f"  {tamano:>9} individuos  error: {fila['error']}")
+            filas.append(fila)
+    agregar_pendientes(filas)
+    return filas
+
+
+def escribir_csv(filas: List[Dict], ruta: str):
+    columnas = list(dict.fromkeys(clave for fila in filas for clave in fila))
+    with open(ruta, "w", encoding="utf-8", newline="") as f:
+        escritor = csv.DictWriter(f, fieldnames=columnas)
+        escritor.writeheader()
+        escritor.writerows(filas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de escalado con ontologías sintéticas")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--formato", choices=FORMATOS, default="rdfxml")
+    parser.add_argument("--directorio", help="Conservar aquí las ontologías generadas")
+    parser.add_argument("--repeticiones", type=int, default=10)
+    parser.add_argument("--salida", default="reporte_escalado.json")
+    parser.add_argument("--csv", default="curvas_escalado.csv", help="Curvas en CSV (una fila por tamaño)")
+    args = parser.parse_args()
+
+    print(f"Escalado ({', '.join(str(t) for t in args.tamanos)} individuos, {args.formato})")
+    filas = ejecutar(args.tamanos, args.formato, args.directorio, args.repeticiones)
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump({"formato": args.formato, "filas": filas}, f, indent=2, ensure_ascii=False)
+    escribir_csv(filas, args.csv)
+    print(f"Reporte en {args.salida}, curvas en {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark del modo SPARQL local frente a las búsquedas en Python.
+
+Compara, sobre la misma ontología, las búsquedas de busqueda_local.py
+(bucles de Python sobre owlready2) con las plantillas SPARQL equivalentes
+de sparql_local.py, tanto con la consulta preparada en caché como
+preparándola en cada ejecución, y verifica que devuelvan los mismos
+individuos.
+
+Uso:
+    python -m benchmarks.benchmark_sparql_local --repeticiones 200
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, List
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+from owlready2 import World  # noqa: E402
+
+from busqueda_local import (  # noqa: E402
+    buscar_individuos_por_nombre, buscar_instancias_de_clase, cargar_ontologia_archivo
+)
+from sparql_local import PLANTILLAS, ConsultorSPARQL  # noqa: E402
+
+ARCHIVO_OWL = os.path.join(RAIZ, "criptomonedas.owl")
+TERMINOS = ["bit", "coin", "eth", "exchange", "chain", "a", "zzz", "wallet"]
+CLASES = ["Tipos_de_criptomonedas", "Criptomoneda", "Exchange", "Riesgos_y_seguridad"]
+
+
+def medir(funcion: Callable[[int], object], repeticiones: int) -> Dict:
+    """Latencias en ms de `repeticiones` llamadas (con el número de iteración)"""
+    tiempos = []
+    for i in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(i)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    return {
+        "p50_ms": round(statistics.median(tiempos), 3),
+        "p95_ms": round(tiempos[int(len(tiempos) * 0.95) - 1], 3),
+        "media_ms": round(statistics.fmean(tiempos), 3),
+    }
+
+
+def _sin_cache(onto) -> Callable[[str, list], List]:
+    """Ejecuta una plantilla parseándola de nuevo cada vez"""
+    consultor = ConsultorSPARQL(onto, capacidad=0)
+    # owlready2 guarda además su propia caché LRU de prepare_sparql: se evita
+    # para medir el costo real de preparar
+    preparar = type(onto.world)._prepare_sparql.__wrapped__
+    consultor.mundo = SimpleNamespace(prepare_sparql=lambda texto: preparar(onto.world, texto, True))
+    return lambda nombre, parametros: list(consultor.ejecutar_plantilla(nombre, *parametros))
+
+
+def ejecutar(repeticiones: int) -> Dict:
+    onto = cargar_ontologia_archivo(ARCHIVO_OWL, mundo=World())
+    consultor = ConsultorSPARQL(onto)
+    sin_cache = _sin_cache(onto)
+    clases = [c for c in CLASES if c in {cls.name for cls in onto.classes()}]
+
+    # Los dos caminos deben devolver los mismos individuos
+    for termino in TERMINOS:
+        esperado = sorted(ind.name for ind in buscar_individuos_por_nombre(onto, termino))
+        obtenido = sorted(f[0] for f in consultor.ejecutar_plantilla("individuos_por_nombre", termino))
+        assert esperado == obtenido, f"Resultados distintos para '{termino}'"
+    for clase in clases:
+        esperado = sorted(ind.name for ind in buscar_instancias_de_clase(onto, clase))
+        obtenido = sorted(f[0] for f in consultor.ejecutar_plantilla("instancias_de_clase", clase))
+        assert esperado == obtenido, f"Resultados distintos para la clase '{clase}'"
+
+    casos = {
+        "por_nombre": (
+            lambda i: [ind.name for ind in buscar_individuos_por_nombre(onto, TERMINOS[i % len(TERMINOS)])],
+            "individuos_por_nombre", lambda i: [TERMINOS[i % len(TERMINOS)]],
+        ),
+        "por_clase": (
+            lambda i: [ind.name for ind in buscar_instancias_de_clase(onto, clases[i % len(clases)])],
+            "instancias_de_clase", lambda i: [clases[i % len(clases)]],
+        ),
+    }
+    resultados = {}
+    for caso, (python, plantilla, parametros) in casos.items():
+        resultados[caso] = {
+            "python": medir(python, repeticiones),
+            "sparql_preparada": medir(
+                lambda i: list(consultor.ejecutar_plantilla(plantilla, *parametros(i))), repeticiones),
+            "sparql_sin_cache": medir(lambda i: sin_cache(plantilla, parametros(i)), repeticiones),
+        }
+    return {
+        "individuos": len(list(onto.individuals())),
+        "repeticiones": repeticiones,
+        "plantillas": sorted(PLANTILLAS),
+        "resultados": resultados,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SPARQL local frente a búsquedas en Python")
+    parser.add_argument("--repeticiones", type=int, default=200)
+    args = parser.parse_args()
+
+    reporte = ejecutar(args.repeticiones)
+    print(f"Ontología: {reporte['individuos']} individuos, {reporte['repeticiones']} repeticiones")
+    print(f"{'caso':<12} {'variante':<18} {'p50 ms':>9} {'p95 ms':>9} {'media ms':>9}")
+    for caso, variantes in reporte["resultados"].items():
+        for variante, datos in variantes.items():
+            print(f"{caso:<12} {variante:<18} {datos['p50_ms']:>9} {datos['p95_ms']:>9} {datos['media_ms']:>9}")
+    print(json.dumps(reporte, indent=2))
+
+
+if __name__ == "__main__":
+    main()
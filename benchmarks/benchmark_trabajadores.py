@@ -0,0 +1,153 @@
+"""
+Benchmark de trabajadores que comparten el índice mmap.
+
+Construye el índice de la ontología, lanza 1..N procesos que lo abren por
+mmap y ejecutan búsquedas locales, y reporta el throughput total y la
+memoria privada que añade cada trabajador (frente a cargar la ontología con
+owlready2 en cada proceso).
+
+Uso:
+    python -m benchmarks.benchmark_trabajadores --trabajadores 1 2 4 --consultas 2000
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+from owlready2 import World  # noqa: E402
+
+from busqueda_local import (  # noqa: E402
+    buscar_individuos_por_nombre, cargar_ontologia_archivo, individuo_a_dict
+)
+from indice_mmap import IndiceMmap, construir_indice  # noqa: E402
+
+ARCHIVO_OWL = os.path.join(RAIZ, "criptomonedas.owl")
+TERMINOS = ["bit", "coin", "eth", "exchange", "chain", "a", "zzz", "wallet"]
+
+
+def memoria_proceso() -> Dict[str, int]:
+    """Memoria residente y privada del proceso en KiB (Linux, /proc/self/smaps_rollup)"""
+    valores = {"rss_kib": 0, "privada_kib": 0}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for linea in f:
+                campo, _, resto = linea.partition(":")
+                if campo == "Rss":
+                    valores["rss_kib"] = int(resto.split()[0])
+                elif campo in ("Private_Clean", "Private_Dirty"):
+                    valores["privada_kib"] += int(resto.split()[0])
+    except OSError:
+        pass  # Otro sistema operativo: sin datos de memoria
+    return valores
+
+
+def _trabajador_indice(ruta: str, consultas: int, barrera, salida):
+    antes = memoria_proceso()
+    indice = IndiceMmap(ruta)
+    barrera.wait()
+    inicio = time.perf_counter()
+    for i in range(consultas):
+        for identificador in indice.buscar_por_nombre(TERMINOS[i % len(TERMINOS)]):
+            indice.individuo(identificador)
+    duracion = time.perf_counter() - inicio
+    despues = memoria_proceso()
+    salida.put({
+        "duracion": duracion,
+        "privada_extra_kib": despues["privada_kib"] - antes["privada_kib"],
+        "rss_extra_kib": despues["rss_kib"] - antes["rss_kib"],
+    })
+
+
+def _trabajador_owlready(consultas: int, barrera, salida):
+    antes = memoria_proceso()
+    onto = cargar_ontologia_archivo(ARCHIVO_OWL, mundo=World())
+    barrera.wait()
+    inicio = time.perf_counter()
+    for i in range(consultas):
+        for individuo in buscar_individuos_por_nombre(onto, TERMINOS[i % len(TERMINOS)]):
+            individuo_a_dict(individuo)
+    duracion = time.perf_counter() - inicio
+    despues = memoria_proceso()
+    salida.put({
+        "duracion": duracion,
+        "privada_extra_kib": despues["privada_kib"] - antes["privada_kib"],
+        "rss_extra_kib": despues["rss_kib"] - antes["rss_kib"],
+    })
+
+
+def ejecutar_ronda(modo: str, trabajadores: int, consultas: int, ruta_indice: str) -> Dict:
+    """Lanza `trabajadores` procesos en paralelo y resume throughput y memoria"""
+    contexto = multiprocessing.get_context("fork")
+    barrera = contexto.Barrier(trabajadores + 1)
+    salida = contexto.Queue()
+    if modo == "indice":
+        objetivo, argumentos = _trabajador_indice, (ruta_indice, consultas, barrera, salida)
+    else:
+        objetivo, argumentos = _trabajador_owlready, (consultas, barrera, salida)
+
+    procesos = [contexto.Process(target=objetivo, args=argumentos) for _ in range(trabajadores)]
+    for proceso in procesos:
+        proceso.start()
+    barrera.wait()
+    inicio = time.perf_counter()
+    resultados = [salida.get() for _ in procesos]
+    total = time.perf_counter() - inicio
+    for proceso in procesos:
+        proceso.join()
+
+    return {
+        "modo": modo,
+        "trabajadores": trabajadores,
+        "consultas_por_segundo": round(trabajadores * consultas / total, 1),
+        "privada_extra_kib_media": round(sum(r["privada_extra_kib"] for r in resultados) / trabajadores, 1),
+        "rss_extra_kib_media": round(sum(r["rss_extra_kib"] for r in resultados) / trabajadores, 1),
+    }
+
+
+def ejecutar(trabajadores: List[int], consultas: int, comparar_owlready: bool = True) -> Dict:
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta_indice = os.path.join(directorio, "ontologia.bsidx")
+        cabecera = construir_indice(cargar_ontologia_archivo(ARCHIVO_OWL, mundo=World()), ruta_indice)
+
+        rondas = []
+        for n in trabajadores:
+            rondas.append(ejecutar_ronda("indice", n, consultas, ruta_indice))
+            if comparar_owlready:
+                rondas.append(ejecutar_ronda("owlready2", n, consultas, ruta_indice))
+
+        return {
+            "individuos": cabecera["individuos"],
+            "bytes_indice": os.path.getsize(ruta_indice),
+            "nucleos": os.cpu_count(),
+            "rondas": rondas,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de trabajadores con índice mmap")
+    parser.add_argument("--trabajadores", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--consultas", type=int, default=2000, help="Consultas por trabajador")
+    parser.add_argument("--sin-owlready", action="store_true", help="No medir el caso owlready2")
+    args = parser.parse_args()
+
+    reporte = ejecutar(args.trabajadores, args.consultas, not args.sin_owlready)
+    print(f"Índice: {reporte['individuos']} individuos, {reporte['bytes_indice']} bytes, "
+          f"{reporte['nucleos']} núcleos")
+    print(f"{'modo':<10} {'trabaj.':>7} {'consultas/s':>12} {'privada KiB':>12} {'RSS KiB':>9}")
+    for r in reporte["rondas"]:
+        print(f"{r['modo']:<10} {r['trabajadores']:>7} {r['consultas_por_segundo']:>12} "
+              f"{r['privada_extra_kib_media']:>12} {r['rss_extra_kib_media']:>9}")
+    print(json.dumps(reporte, indent=2))
+
+
+if __name__ == "__main__":
+    main()
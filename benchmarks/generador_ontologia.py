@@ -0,0 +1,299 @@
+"""
+Generador de ontologías sintéticas grandes con el esquema de criptomonedas.owl.
+
+Toma una ontología base y escribe otra con las mismas clases, propiedades
+de objeto y de datos, y con N individuos en total. Conserva los individuos
+originales. El resto se crea a partir de ellos como plantillas, rotando
+entre todas:
+
+    - mismo tipo (o tipos) que la plantilla;
+    - nombre "<plantilla>_<n>" (bitcoin_1234), así las búsquedas por nombre
+      encuentran una fracción de la ontología parecida a la de la base;
+    - las mismas propiedades de datos; los valores numéricos varían entre
+      el 50 % y el 150 % del original;
+    - las relaciones apuntan a un individuo sintético de la misma plantilla
+      que el destino original;
+    - por cada propiedad de objeto cuyo dominio incluye la clase de la
+      plantilla, una relación con un individuo sintético de su rango (las
+      ontologías del repositorio no tienen relaciones entre individuos, así
+      que el esquema es lo único que las define).
+
+La salida se escribe en flujo (sin cargar la ontología generada en
+memoria), en RDF/XML como los archivos del repositorio o en N-Triples. El
+resultado es el mismo para la misma semilla.
+
+Uso:
+    python -m benchmarks.generador_ontologia --individuos 100000 --salida /tmp/cripto_100k.owl
+    python -m benchmarks.generador_ontologia --individuos 1000000 --formato ntriples --salida /tmp/cripto_1m.nt
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import re
+import sys
+from typing import Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+from owlready2 import World  # noqa: E402
+
+from busqueda_local import cargar_ontologia_archivo  # noqa: E402
+
+ARCHIVO_BASE = os.path.join(RAIZ, "criptomonedas.owl")
+TIPO = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+INDIVIDUO_OWL = "http://www.w3.org/2002/07/owl#NamedIndividual"
+XSD = "http://www.w3.org/2001/XMLSchema#"
+NUMERICOS = {XSD + "integer": int, XSD + "int": int, XSD + "long": int, XSD + "nonNegativeInteger": int,
+             XSD + "decimal": float, XSD + "double": float, XSD + "float": float}
+FORMATOS = ("rdfxml", "ntriples")
+
+_TRIPLETA = re.compile(r'^<([^>]*)> <([^>]*)> (.*) \.$')
+_LITERAL = re.compile(r'^"(.*)"(?:\^\^<([^>]*)>|@([A-Za-z0-9-]+))?$', re.DOTALL)
+_XMLNS = re.compile(r'xmlns:([A-Za-z_][\w.-]*)="([^"]+)"')
+_NOMBRE_XML = re.compile(r'^[^\W\d][\w.-]*$')
+
+
+class Plantilla:
+    """Un individuo de la base: tipos, literales y relaciones (por índice de plantilla)"""
+
+    __slots__ = ("iri", "tipos", "literales", "relaciones", "por_esquema")
+
+    def __init__(self, iri: str):
+        self.iri = iri
+        self.tipos: List[str] = []
+        self.literales: List[Tuple[str, str, Optional[str], Optional[str]]] = []  # (prop, valor, tipo, idioma)
+        self.relaciones: List[Tuple[str, int]] = []  # (prop, índice de la plantilla destino)
+        # (prop, plantillas del rango) de cada propiedad de objeto cuyo dominio incluye a la plantilla
+        self.por_esquema: List[Tuple[str, List[int]]] = []
+
+
+def leer_plantillas(archivo_base: str = ARCHIVO_BASE) -> List[Plantilla]:
+    """
+    Lee los individuos de la ontología base como plantillas
+
+    Returns:
+        Plantillas en un orden estable (por IRI)
+    """
+    onto = cargar_ontologia_archivo(archivo_base, mundo=World())
+    iris = sorted(individuo.iri for individuo in onto.individuals())
+    indices = {iri: i for i, iri in enumerate(iris)}
+    plantillas = [Plantilla(iri) for iri in iris]
+
+    salida = io.BytesIO()
+    onto.save(salida, format="ntriples")
+    for linea in salida.getvalue().decode("utf-8").splitlines():
+        tripleta = _TRIPLETA.match(linea)
+        if tripleta is None or tripleta.group(1) not in indices:
+            continue
+        plantilla = plantillas[indices[tripleta.group(1)]]
+        propiedad, objeto = tripleta.group(2), tripleta.group(3)
+        if objeto.startswith("<"):
+            destino = objeto[1:-1]
+            if propiedad == TIPO:
+                if destino != INDIVIDUO_OWL:
+                    plantilla.tipos.append(destino)
+            elif destino in indices:
+                plantilla.relaciones.append((propiedad, indices[destino]))
+            continue
+        literal = _LITERAL.match(objeto)
+        if literal is not None:
+            plantilla.literales.append((propiedad, _desescapar_nt(literal.group(1)),
+                                        literal.group(2), literal.group(3)))
+
+    # Clases de cada plantilla con sus ancestros, para cruzarlas con dominio y rango
+    clases = [set() for _ in plantillas]
+    for individuo in onto.individuals():
+        for clase in individuo.is_a:
+            if hasattr(clase, "ancestors"):
+                clases[indices[individuo.iri]].update(c.iri for c in clase.ancestors() if hasattr(c, "iri"))
+    for propiedad in onto.object_properties():
+        dominio = {c.iri for c in propiedad.domain if hasattr(c, "iri")}
+        rango = {c.iri for c in propiedad.range if hasattr(c, "iri")}
+        destinos = [j for j, conjunto in enumerate(clases) if conjunto & rango]
+        if not dominio or not destinos:
+            continue
+        for j, conjunto in enumerate(clases):
+            if conjunto & dominio:
+                plantillas[j].por_esquema.append((propiedad.iri, destinos))
+    return plantillas
+
+
+def _desescapar_nt(valor: str) -> str:
+    if "\\" not in valor:
+        return valor
+    try:
+        return json.loads(f'"{valor}"')
+    except ValueError:
+        return valor
+
+
+def _escapar_nt(valor: str) -> str:
+    return (valor.replace("\\", "\\\\").replace('"', '\\"')
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+def _variar(valor: str, tipo: Optional[str], azar: random.Random) -> str:
+    """Valor numérico entre el 50 % y el 150 % del original; el resto, igual"""
+    conversion = NUMERICOS.get(tipo)
+    if conversion is None:
+        return valor
+    try:
+        numero = float(valor) * azar.uniform(0.5, 1.5)
+    except ValueError:
+        return valor
+    return str(int(numero)) if conversion is int else f"{numero:.2f}"
+
+
+class EscritorRDFXML:
+    """Copia la base y agrega los individuos sintéticos antes del cierre de rdf:RDF"""
+
+    def __init__(self, archivo_base: str, salida):
+        with open(archivo_base, "r", encoding="utf-8") as f:
+            texto = f.read()
+        cierre = texto.rfind("</rdf:RDF>")
+        self._cola = texto[cierre:]
+        raiz = texto[:texto.find(">", texto.find("<rdf:RDF"))]
+        self._prefijos = {espacio: prefijo for prefijo, espacio in _XMLNS.findall(raiz)}
+        self._etiquetas: Dict[str, Tuple[str, str]] = {}
+        self.salida = salida
+        salida.write(texto[:cierre])
+        salida.write("\n    <!-- Individuos sintéticos (benchmarks/generador_ontologia.py) -->\n\n")
+
+    def _etiqueta(self, propiedad: str) -> Tuple[str, str]:
+        """(nombre del elemento, atributos xmlns extra) de una propiedad"""
+        etiqueta = self._etiquetas.get(propiedad)
+        if etiqueta is None:
+            corte = max(propiedad.rfind("#"), propiedad.rfind("/")) + 1
+            espacio, local = propiedad[:corte], propiedad[corte:]
+            if not _NOMBRE_XML.match(local):
+                raise ValueError(f"La propiedad {propiedad} no se puede escribir en RDF/XML")
+            prefijo = self._prefijos.get(espacio)
+            etiqueta = (f"{prefijo}:{local}", "") if prefijo else (local, f" xmlns={quoteattr(espacio)}")
+            self._etiquetas[propiedad] = etiqueta
+        return etiqueta
+
+    def individuo(self, iri: str, tipos: List[str], literales, relaciones):
+        lineas = [f"    <owl:NamedIndividual rdf:about={quoteattr(iri)}>"]
+        lineas.extend(f"        <rdf:type rdf:resource={quoteattr(tipo)}/>" for tipo in tipos)
+        for propiedad, valor, tipo, idioma in literales:
+            nombre, extra = self._etiqueta(propiedad)
+            atributo = f" rdf:datatype={quoteattr(tipo)}" if tipo else \
+                f" xml:lang={quoteattr(idioma)}" if idioma else ""
+            lineas.append(f"        <{nombre}{extra}{atributo}>{escape(valor)}</{nombre}>")
+        for propiedad, destino in relaciones:
+            nombre, extra = self._etiqueta(propiedad)
+            lineas.append(f"        <{nombre}{extra} rdf:resource={quoteattr(destino)}/>")
+        lineas.append("    </owl:NamedIndividual>\n")
+        self.salida.write("\n".join(lineas) + "\n")
+
+    def cerrar(self):
+        self.salida.write(self._cola)
+
+
+class EscritorNTriples:
+    """Escribe la base en N-Triples y los individuos sintéticos como tripletas"""
+
+    def __init__(self, archivo_base: str, salida):
+        onto = cargar_ontologia_archivo(archivo_base, mundo=World())
+        base = io.BytesIO()
+        onto.save(base, format="ntriples")
+        self.salida = salida
+        salida.write(base.getvalue().decode("utf-8").rstrip("\n") + "\n")
+
+    def individuo(self, iri: str, tipos: List[str], literales, relaciones):
+        sujeto = f"<{iri}>"
+        lineas = [f"{sujeto} <{TIPO}> <{INDIVIDUO_OWL}> ."]
+        lineas.extend(f"{sujeto} <{TIPO}> <{tipo}> ." for tipo in tipos)
+        for propiedad, valor, tipo, idioma in literales:
+            sufijo = f"^^<{tipo}>" if tipo else f"@{idioma}" if idioma else ""
+            lineas.append(f'{sujeto} <{propiedad}> "{_escapar_nt(valor)}"{sufijo} .')
+        lineas.extend(f"{sujeto} <{propiedad}> <{destino}> ." for propiedad, destino in relaciones)
+        self.salida.write("\n".join(lineas) + "\n")
+
+    def cerrar(self):
+        pass
+
+
+def generar_ontologia(individuos: int, salida: str, archivo_base: str = ARCHIVO_BASE,
+                      formato: str = "rdfxml", semilla: int = 42) -> Dict:
+    """
+    Escribe una ontología con el esquema de la base y `individuos` individuos en total
+
+    Args:
+        individuos: Total de individuos (originales incluidos)
+        salida: Archivo a escribir
+        archivo_base: Ontología de donde salen el esquema y las plantillas
+        formato: "rdfxml" o "ntriples"
+        semilla: Semilla del generador de valores y relaciones
+
+    Returns:
+        Resumen con individuos, sintéticos, plantillas, tripletas sintéticas y bytes
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconocido: {formato}")
+    plantillas = leer_plantillas(archivo_base)
+    sinteticos = max(0, individuos - len(plantillas))
+    azar = random.Random(semilla)
+    cantidad = len(plantillas)
+    # Sintéticos por plantilla: el k-ésimo usa la plantilla k % cantidad
+    por_plantilla = [sinteticos // cantidad + (1 if j < sinteticos % cantidad else 0) for j in range(cantidad)]
+
+    def iri_sintetico(j: int, numero: int) -> str:
+        plantilla = plantillas[j]
+        return f"{plantilla.iri}_{numero * cantidad + j}"
+
+    tripletas = 0
+    directorio = os.path.dirname(os.path.abspath(salida))
+    os.makedirs(directorio, exist_ok=True)
+    temporal = f"{salida}.tmp"
+    with open(temporal, "w", encoding="utf-8", newline="\n") as f:
+        escritor = (EscritorRDFXML if formato == "rdfxml" else EscritorNTriples)(archivo_base, f)
+        for k in range(sinteticos):
+            j = k % cantidad
+            plantilla = plantillas[j]
+            literales = [(p, _variar(v, t, azar), t, i) for p, v, t, i in plantilla.literales]
+            relaciones = []
+            for propiedad, destino in plantilla.relaciones:
+                if por_plantilla[destino]:
+                    relaciones.append((propiedad, iri_sintetico(destino, azar.randrange(por_plantilla[destino]))))
+                else:
+                    relaciones.append((propiedad, plantillas[destino].iri))
+            for propiedad, destinos in plantilla.por_esquema:
+                destino = destinos[azar.randrange(len(destinos))]
+                relaciones.append((propiedad, iri_sintetico(destino, azar.randrange(por_plantilla[destino]))
+                                   if por_plantilla[destino] else plantillas[destino].iri))
+            escritor.individuo(f"{plantilla.iri}_{k}", plantilla.tipos, literales, relaciones)
+            tripletas += 1 + len(plantilla.tipos) + len(literales) + len(relaciones)
+        escritor.cerrar()
+    os.replace(temporal, salida)
+    return {
+        "individuos": cantidad + sinteticos,
+        "sinteticos": sinteticos,
+        "plantillas": cantidad,
+        "tripletas_sinteticas": tripletas,
+        "bytes": os.path.getsize(salida),
+        "formato": formato,
+        "salida": salida,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera una ontología sintética con el esquema de la base")
+    parser.add_argument("--individuos", type=int, default=10000, help="Total de individuos")
+    parser.add_argument("--salida", required=True)
+    parser.add_argument("--base", default=ARCHIVO_BASE, help="Ontología de donde sale el esquema")
+    parser.add_argument("--formato", choices=FORMATOS, default="rdfxml")
+    parser.add_argument("--semilla", type=int, default=42)
+    args = parser.parse_args()
+    print(json.dumps(generar_ontologia(args.individuos, args.salida, args.base, args.formato, args.semilla),
+                     indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
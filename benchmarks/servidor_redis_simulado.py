@@ -0,0 +1,215 @@
+"""
+Servidor local que habla el protocolo de Redis (RESP2), para pruebas.
+
+Implementa en memoria los comandos que usa cache_compartida.CacheRedis
+(GET, SET con EX, MGET, MSET, DEL, SCAN, DBSIZE, FLUSHDB, SELECT, AUTH y
+PING), así las pruebas y los benchmarks de la caché compartida corren sin un
+Redis instalado. Cada conexión se atiende en su propio hilo y los comandos
+encadenados (pipelining) se responden en orden.
+
+Uso:
+    python -m benchmarks.servidor_redis_simulado --puerto 6390
+"""
+
+import argparse
+import fnmatch
+import socketserver
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class ServidorRedisSimulado:
+    """Servidor RESP en memoria que corre en un hilo en segundo plano"""
+
+    def __init__(self, puerto: int = 0, clave: Optional[str] = None, latencia_ms: float = 0.0):
+        """
+        Args:
+            puerto: Puerto TCP (0 = uno libre)
+            clave: Contraseña exigida con AUTH (None = sin autenticación)
+            latencia_ms: Retardo por cada lectura de la red (simula un servidor remoto)
+        """
+        self.clave = clave
+        self.latencia_ms = latencia_ms
+        self.bases: Dict[int, Dict[bytes, Tuple[bytes, Optional[float]]]] = {}
+        self.comandos = 0
+        self.lecturas = 0  # lecturas de la red: un pipeline suele llegar en una sola
+        self._lock = threading.Lock()
+        self._tcp = socketserver.ThreadingTCPServer(("127.0.0.1", puerto), _crear_manejador(self))
+        self._tcp.daemon_threads = True
+        self._hilo = None
+
+    @property
+    def puerto(self) -> int:
+        return self._tcp.server_address[1]
+
+    @property
+    def url(self) -> str:
+        credencial = f":{self.clave}@" if self.clave else ""
+        return f"redis://{credencial}127.0.0.1:{self.puerto}/0"
+
+    def iniciar(self) -> "ServidorRedisSimulado":
+        self._hilo = threading.Thread(target=self._tcp.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._tcp.shutdown()
+        self._tcp.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
+
+    def ejecutar(self, estado: Dict, argumentos: List[bytes]):
+        """Ejecuta un comando y devuelve la respuesta (bytes, int, str, lista, None o Exception)"""
+        with self._lock:
+            self.comandos += 1
+            nombre = argumentos[0].upper().decode("ascii")
+            if self.clave and not estado["autenticado"] and nombre not in ("AUTH", "PING"):
+                return Exception("NOAUTH Authentication required.")
+            datos = self.bases.setdefault(estado["base"], {})
+            resto = argumentos[1:]
+            if nombre == "PING":
+                return "PONG"
+            if nombre == "AUTH":
+                if resto and resto[-1].decode("utf-8") == self.clave:
+                    estado["autenticado"] = True
+                    return "OK"
+                return Exception("WRONGPASS invalid password")
+            if nombre == "SELECT":
+                estado["base"] = int(resto[0])
+                return "OK"
+            if nombre == "GET":
+                return self._vigente(datos, resto[0])
+            if nombre == "MGET":
+                return [self._vigente(datos, c) for c in resto]
+            if nombre == "SET":
+                vence = None
+                if len(resto) >= 4 and resto[2].upper() == b"EX":
+                    vence = time.monotonic() + int(resto[3])
+                datos[resto[0]] = (resto[1], vence)
+                return "OK"
+            if nombre == "MSET":
+                for i in range(0, len(resto), 2):
+                    datos[resto[i]] = (resto[i + 1], None)
+                return "OK"
+            if nombre == "DEL":
+                return sum(1 for c in resto if datos.pop(c, None) is not None)
+            if nombre == "DBSIZE":
+                return len(datos)
+            if nombre == "FLUSHDB":
+                datos.clear()
+                return "OK"
+            if nombre == "SCAN":
+                return self._scan(datos, resto)
+            return Exception(f"ERR unknown command '{nombre}'")
+
+    def _vigente(self, datos, clave: bytes) -> Optional[bytes]:
+        entrada = datos.get(clave)
+        if entrada is None:
+            return None
+        if entrada[1] is not None and entrada[1] <= time.monotonic():
+            del datos[clave]
+            return None
+        return entrada[0]
+
+    def _scan(self, datos, resto: List[bytes]):
+        cursor = int(resto[0])
+        patron, cantidad = b"*", 10
+        for i in range(1, len(resto) - 1, 2):
+            if resto[i].upper() == b"MATCH":
+                patron = resto[i + 1]
+            elif resto[i].upper() == b"COUNT":
+                cantidad = int(resto[i + 1])
+        claves = sorted(datos)
+        lote = claves[cursor:cursor + cantidad]
+        siguiente = cursor + cantidad if cursor + cantidad < len(claves) else 0
+        coincidentes = [c for c in lote if fnmatch.fnmatchcase(c.decode("utf-8"), patron.decode("utf-8"))]
+        return [str(siguiente).encode("ascii"), coincidentes]
+
+
+def _codificar(respuesta) -> bytes:
+    if respuesta is None:
+        return b"$-1\r\n"
+    if isinstance(respuesta, Exception):
+        return f"-{respuesta}\r\n".encode("utf-8")
+    if isinstance(respuesta, str):
+        return f"+{respuesta}\r\n".encode("utf-8")
+    if isinstance(respuesta, int):
+        return b":%d\r\n" % respuesta
+    if isinstance(respuesta, bytes):
+        return b"$%d\r\n%s\r\n" % (len(respuesta), respuesta)
+    return b"*%d\r\n" % len(respuesta) + b"".join(_codificar(r) for r in respuesta)
+
+
+def _analizar(buffer: bytearray, inicio: int) -> Tuple[Optional[List[bytes]], int]:
+    """Un comando completo desde `inicio`, o (None, inicio) si aún no llegó entero"""
+    fin = buffer.find(b"\r\n", inicio)
+    if fin < 0:
+        return None, inicio
+    cantidad = int(buffer[inicio + 1:fin])
+    posicion = fin + 2
+    argumentos = []
+    for _ in range(cantidad):
+        fin = buffer.find(b"\r\n", posicion)
+        if fin < 0:
+            return None, inicio
+        largo = int(buffer[posicion + 1:fin])
+        posicion = fin + 2
+        if len(buffer) < posicion + largo + 2:
+            return None, inicio
+        argumentos.append(bytes(buffer[posicion:posicion + largo]))
+        posicion += largo + 2
+    return argumentos, posicion
+
+
+def _crear_manejador(servidor: ServidorRedisSimulado):
+    class Manejador(socketserver.BaseRequestHandler):
+        def handle(self):
+            estado = {"base": 0, "autenticado": False}
+            buffer = bytearray()
+            while True:
+                recibido = self.request.recv(65536)
+                if not recibido:
+                    return
+                buffer.extend(recibido)
+                # Todos los comandos completos de lo recibido (un pipeline llega junto)
+                comandos, posicion = [], 0
+                while True:
+                    comando, posicion = _analizar(buffer, posicion)
+                    if comando is None:
+                        break
+                    comandos.append(comando)
+                del buffer[:posicion]
+                if not comandos:
+                    continue
+                with servidor._lock:
+                    servidor.lecturas += 1
+                if servidor.latencia_ms:
+                    time.sleep(servidor.latencia_ms / 1000.0)
+                self.request.sendall(b"".join(_codificar(servidor.ejecutar(estado, c)) for c in comandos))
+
+    return Manejador
+
+
+def iniciar_servidor_redis(puerto: int = 0, clave: Optional[str] = None,
+                           latencia_ms: float = 0.0) -> ServidorRedisSimulado:
+    """Crea y arranca un servidor RESP simulado en segundo plano"""
+    return ServidorRedisSimulado(puerto, clave, latencia_ms).iniciar()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local con protocolo Redis")
+    parser.add_argument("--puerto", type=int, default=6390)
+    parser.add_argument("--clave", help="Contraseña exigida con AUTH")
+    parser.add_argument("--latencia-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    servidor = ServidorRedisSimulado(args.puerto, args.clave, args.latencia_ms)
+    print(f"Redis simulado: {servidor.url}")
+    try:
+        servidor._tcp.serve_forever()
+    except KeyboardInterrupt:
+        servidor.detener()
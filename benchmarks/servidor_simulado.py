@@ -0,0 +1,336 @@
+"""
+Servidor HTTP local que simula DBpedia (SPARQL + Lookup API).
+
+Sirve respuestas grabadas desde benchmarks/datos/respuestas_dbpedia.json con
+una latencia inyectada configurable, para medir el rendimiento del buscador
+sin depender de dbpedia.org. Opcionalmente sirve primero las respuestas de un
+casete grabado con transporte.TransporteGrabador.
+
+Uso:
+    python -m benchmarks.servidor_simulado --puerto 8890 --latencia-ms 50
+    python -m benchmarks.servidor_simulado --casete casetes/dbpedia.jsonl.gz --respetar-tiempos
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+from formatos_sparql import formato_de_tipo, serializar_csv, serializar_tsv, tipo_contenido
+from transporte import TransporteReproductor
+
+RUTA_RESPUESTAS = os.path.join(os.path.dirname(__file__), "datos", "respuestas_dbpedia.json")
+
+RESPUESTA_VACIA = {"head": {"vars": []}, "results": {"bindings": []}}
+# Consultas por lotes (DBpediaConnector.obtener_lote / buscar_etiquetas_lote)
+PATRON_VALUES = re.compile(r"VALUES\s+\?(resource|label)\s*\{([^}]*)\}")
+# Conteo por categoría de la exploración (dbpedia_connector.contar_por_tipo_dbo)
+PATRON_TIPOS = re.compile(r"VALUES\s+\?tipo\s*\{([^}]*)\}")
+# Alternativa SPARQL del Lookup (DBpediaConnector._buscar_etiqueta_sparql)
+PATRON_ETIQUETA = re.compile(r'LCASE\(STR\(\?label\)\)\s*=\s*"((?:[^"\\]|\\.)*)"')
+# Proyección del SELECT y recortes en el servidor (modo de carga compacta del conector)
+PATRON_SELECT = re.compile(r"SELECT\s+(?:DISTINCT\s+)?(.*?)\s*WHERE", re.S)
+PATRON_SUBSTR = re.compile(r"\(SUBSTR\(\?\w+,\s*1,\s*(\d+)\)\s+AS\s+\?(\w+)\)")
+
+
+class _ServidorHTTP(ThreadingHTTPServer):
+    # La cola de conexiones por defecto (5) se desborda con ráfagas de clientes
+    # simultáneos y el reintento de conexión del sistema suma ~1 s de latencia falsa
+    request_queue_size = 128
+
+
+class ServidorSimulado:
+    """Servidor DBpedia simulado que corre en un hilo en segundo plano"""
+
+    def __init__(self, puerto: int = 0, latencia_ms: float = 0.0, variacion_ms: float = 0.0,
+                 ruta_respuestas: str = RUTA_RESPUESTAS, ruta_casete: Optional[str] = None,
+                 respetar_tiempos: bool = False, latencia_lookup_ms: Optional[float] = None):
+        with open(ruta_respuestas, 'r', encoding='utf-8') as f:
+            datos = json.load(f)
+
+        self.reglas_sparql = [
+            (regla["nombre"], re.compile(regla["patron"]), regla["respuesta"])
+            for regla in datos.get("sparql", [])
+        ]
+        self.lookup = datos.get("lookup", {"docs": []})
+        # Los recursos del Lookup grabado responden también las consultas por lotes
+        self.recursos = {
+            _primero(doc.get("resource")): doc for doc in self.lookup.get("docs", []) if doc.get("resource")
+        }
+        self.latencia_ms = latencia_ms
+        # Latencia propia del Lookup (None = la misma que SPARQL), para simular una fuente lenta
+        self.latencia_lookup_ms = latencia_lookup_ms
+        self.variacion_ms = variacion_ms
+        self.reproductor = None
+        if ruta_casete:
+            self.reproductor = TransporteReproductor(
+                ruta_casete, respetar_tiempos=respetar_tiempos, estricto=False
+            )
+        self.solicitudes = 0
+        self._lock = threading.Lock()
+
+        self._httpd = _ServidorHTTP(("127.0.0.1", puerto), _crear_manejador(self))
+        self._httpd.daemon_threads = True
+        self._hilo = None
+
+    @property
+    def puerto(self) -> int:
+        return self._httpd.server_address[1]
+
+    @property
+    def endpoint_sparql(self) -> str:
+        return f"http://127.0.0.1:{self.puerto}/sparql"
+
+    @property
+    def endpoint_lookup(self) -> str:
+        return f"http://127.0.0.1:{self.puerto}/api/search"
+
+    def iniciar(self) -> "ServidorSimulado":
+        """Arranca el servidor en un hilo daemon"""
+        self._hilo = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        """Detiene el servidor y libera el puerto"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
+
+    def esperar_latencia(self, ruta: str = ""):
+        """Aplica la latencia inyectada (con variación aleatoria opcional)"""
+        retardo = self.latencia_ms
+        if self.latencia_lookup_ms is not None and ruta.startswith("/api/search"):
+            retardo = self.latencia_lookup_ms
+        if self.variacion_ms:
+            retardo += random.uniform(-self.variacion_ms, self.variacion_ms)
+        if retardo > 0:
+            time.sleep(retardo / 1000.0)
+
+    def responder_sparql(self, consulta: str) -> Dict:
+        """Devuelve la respuesta grabada de la primera regla que coincida"""
+        tipos = PATRON_TIPOS.search(consulta)
+        if tipos:
+            return self.responder_conteo(tipos.group(1))
+        valores = PATRON_VALUES.search(consulta)
+        if valores:
+            return self.responder_values(valores.group(1), valores.group(2))
+        etiqueta = PATRON_ETIQUETA.search(consulta)
+        if etiqueta:
+            buscada = etiqueta.group(1)
+            return self._filas_recursos([
+                (uri, doc) for uri, doc in self.recursos.items()
+                if str(_primero(doc.get("label"))).lower() == buscada
+            ])
+        for _nombre, patron, respuesta in self.reglas_sparql:
+            if patron.search(consulta):
+                return respuesta
+        return RESPUESTA_VACIA
+
+    def proyectar(self, consulta: str, resultados: Dict) -> Dict:
+        """
+        Como un endpoint real: deja solo las variables del SELECT y aplica los
+        SUBSTR(?x, 1, n) AS ?y sobre las respuestas grabadas (sin modificarlas)
+        """
+        seleccion = PATRON_SELECT.search(consulta)
+        if not seleccion or seleccion.group(1).strip() == "*":
+            return resultados
+        recortes = {alias: int(largo) for largo, alias in PATRON_SUBSTR.findall(seleccion.group(1))}
+        variables = re.findall(r"\?(\w+)", PATRON_SUBSTR.sub("", seleccion.group(1))) + list(recortes)
+        bindings = []
+        for fila in resultados["results"]["bindings"]:
+            nueva = {v: fila[v] for v in variables if v in fila}
+            for alias, largo in recortes.items():
+                if alias in nueva:
+                    nueva[alias] = dict(nueva[alias], value=nueva[alias]["value"][:largo])
+            bindings.append(nueva)
+        return {"head": {"vars": variables}, "results": {"bindings": bindings}}
+
+    def responder_values(self, variable: str, valores: str) -> Dict:
+        """Filas de los recursos conocidos nombrados en un bloque VALUES (por URI o etiqueta)"""
+        if variable == "resource":
+            pedidos = set(re.findall(r"<([^>]+)>", valores))
+            docs = [(uri, doc) for uri, doc in self.recursos.items() if uri in pedidos]
+        else:
+            pedidos = set(re.findall(r'"((?:[^"\\]|\\.)*)"@en', valores))
+            docs = [(uri, doc) for uri, doc in self.recursos.items() if _primero(doc.get("label")) in pedidos]
+        return self._filas_recursos(docs)
+
+    def responder_conteo(self, tipos: str) -> Dict:
+        """Total por tipo: las filas grabadas de la consulta por clase (la misma respuesta para todos)"""
+        por_clase = next((r for n, _, r in self.reglas_sparql if n == "por_clase"), RESPUESTA_VACIA)
+        total = str(len(por_clase["results"]["bindings"]))
+        filas = [
+            {"tipo": {"type": "uri", "value": "http://dbpedia.org/ontology/" + tipo},
+             "total": {"type": "typed-literal", "datatype": "http://www.w3.org/2001/XMLSchema#integer",
+                       "value": total}}
+            for tipo in re.findall(r"dbo:(\w+)", tipos)
+        ]
+        return {"head": {"vars": ["tipo", "total"]}, "results": {"bindings": filas}}
+
+    def _filas_recursos(self, docs) -> Dict:
+        filas = []
+        for uri, doc in docs:
+            fila = {
+                "resource": {"type": "uri", "value": uri},
+                "label": {"type": "literal", "xml:lang": "en", "value": _primero(doc.get("label"))},
+            }
+            if doc.get("comment"):
+                fila["abstract"] = {"type": "literal", "xml:lang": "en", "value": _primero(doc["comment"])}
+            filas.append(fila)
+        return {"head": {"vars": ["resource", "label", "abstract"]}, "results": {"bindings": filas}}
+
+    def responder_lookup(self, termino: str) -> Dict:
+        """Filtra los documentos grabados del Lookup por el término"""
+        termino = termino.lower()
+        docs = [
+            doc for doc in self.lookup.get("docs", [])
+            if termino in " ".join(doc.get("label", [])).lower()
+        ]
+        return {"docs": docs or self.lookup.get("docs", [])}
+
+
+def _primero(valor):
+    """Los documentos del Lookup guardan cada campo como lista"""
+    return valor[0] if isinstance(valor, list) else valor
+
+
+def _crear_manejador(servidor: ServidorSimulado):
+    """Crea la clase manejadora HTTP ligada a un servidor simulado"""
+
+    class Manejador(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, formato, *args):
+            pass  # Silenciar el log por solicitud (distorsiona los tiempos)
+
+        def _parametros(self) -> Dict:
+            url = urlparse(self.path)
+            parametros = parse_qs(url.query)
+            if self.command == "POST":
+                longitud = int(self.headers.get("Content-Length", 0) or 0)
+                cuerpo = self.rfile.read(longitud).decode("utf-8") if longitud else ""
+                parametros.update(parse_qs(cuerpo))
+            return parametros
+
+        def _enviar_json(self, datos: Dict, tipo: str = "application/json"):
+            self._enviar(json.dumps(datos, ensure_ascii=False).encode("utf-8"), tipo)
+
+        def _enviar_resultados(self, resultados: Dict, parametros: Dict):
+            """Resultados SPARQL en el formato pedido (parámetro format o encabezado Accept)"""
+            formato = formato_de_tipo((parametros.get("format") or [""])[0] or self.headers.get("Accept", ""))
+            if formato == "tsv":
+                self._enviar(serializar_tsv(resultados), tipo_contenido("tsv"))
+            elif formato == "csv":
+                self._enviar(serializar_csv(resultados), tipo_contenido("csv"))
+            else:
+                self._enviar_json(resultados, tipo_contenido("json"))
+
+        def _enviar(self, cuerpo: bytes, tipo: str):
+            self.send_response(200)
+            self.send_header("Content-Type", f"{tipo}; charset=utf-8")
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def _atender(self):
+            with servidor._lock:
+                servidor.solicitudes += 1
+            ruta = urlparse(self.path).path
+            servidor.esperar_latencia(ruta)
+
+            parametros = self._parametros()
+
+            if servidor.reproductor and self._reproducir(ruta, parametros):
+                return
+
+            if ruta.startswith("/sparql"):
+                consulta = (parametros.get("query") or [""])[0]
+                if not consulta:
+                    # Comprobación de conectividad (DBpediaConnector.is_online)
+                    self._enviar_json({"estado": "ok"})
+                    return
+                self._enviar_resultados(servidor.proyectar(consulta, servidor.responder_sparql(consulta)),
+                                        parametros)
+            elif ruta.startswith("/api/search"):
+                termino = (parametros.get("query") or [""])[0]
+                self._enviar_json(servidor.responder_lookup(termino))
+            else:
+                self.send_error(404)
+
+        def _reproducir(self, ruta: str, parametros: Dict) -> bool:
+            """Sirve la respuesta del casete si la solicitud está grabada"""
+            if ruta.startswith("/sparql"):
+                tipo = "sparql" if parametros.get("query") else "ping"
+            elif ruta.startswith("/api/search"):
+                tipo = "lookup"
+            else:
+                return False
+
+            simples = {clave: valores[0] for clave, valores in parametros.items()}
+            respuesta = servidor.reproductor.solicitar(tipo, ruta, simples)
+            if respuesta.estado == 404:
+                return False
+
+            self.send_response(respuesta.estado)
+            self.send_header("Content-Type", respuesta.tipo_contenido or "application/json")
+            self.send_header("Content-Length", str(len(respuesta.cuerpo)))
+            self.end_headers()
+            self.wfile.write(respuesta.cuerpo)
+            return True
+
+        def do_GET(self):
+            self._atender()
+
+        def do_POST(self):
+            self._atender()
+
+    return Manejador
+
+
+def iniciar_servidor(puerto: int = 0, latencia_ms: float = 0.0,
+                     variacion_ms: float = 0.0, ruta_respuestas: Optional[str] = None,
+                     ruta_casete: Optional[str] = None,
+                     latencia_lookup_ms: Optional[float] = None) -> ServidorSimulado:
+    """Crea y arranca un servidor simulado en segundo plano"""
+    return ServidorSimulado(
+        puerto=puerto,
+        latencia_ms=latencia_ms,
+        variacion_ms=variacion_ms,
+        ruta_respuestas=ruta_respuestas or RUTA_RESPUESTAS,
+        ruta_casete=ruta_casete,
+        latencia_lookup_ms=latencia_lookup_ms
+    ).iniciar()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor DBpedia simulado")
+    parser.add_argument("--puerto", type=int, default=8890)
+    parser.add_argument("--latencia-ms", type=float, default=0.0)
+    parser.add_argument("--variacion-ms", type=float, default=0.0)
+    parser.add_argument("--latencia-lookup-ms", type=float, help="Latencia propia del Lookup API")
+    parser.add_argument("--respuestas", default=RUTA_RESPUESTAS)
+    parser.add_argument("--casete", help="Casete grabado a servir antes que las respuestas fijas")
+    parser.add_argument("--respetar-tiempos", action="store_true",
+                        help="Reproducir el casete con los tiempos originales")
+    args = parser.parse_args()
+
+    servidor = ServidorSimulado(args.puerto, args.latencia_ms, args.variacion_ms, args.respuestas,
+                                args.casete, args.respetar_tiempos, args.latencia_lookup_ms)
+    print(f"SPARQL: {servidor.endpoint_sparql}")
+    print(f"Lookup: {servidor.endpoint_lookup}")
+    try:
+        servidor._httpd.serve_forever()
+    except KeyboardInterrupt:
+        servidor.detener()
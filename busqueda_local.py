@@ -0,0 +1,161 @@
+"""
+Búsquedas sobre la ontología local (sin dependencias de Streamlit).
+
+Estas funciones contienen la lógica que antes vivía en línea dentro de
+app.py, para poder reutilizarla y medirla fuera de un rerun de Streamlit.
+"""
+
+import os
+from typing import Dict, List, Optional
+
+from owlready2 import World, default_world
+
+from metricas import metricas
+from perfilado import perfilar
+
+
+@perfilar("local.cargar_ontologia")
+def cargar_ontologia_archivo(archivo: str, mundo: Optional[World] = None):
+    """
+    Carga una ontología OWL desde disco
+
+    Args:
+        archivo: Ruta del archivo OWL
+        mundo: World de owlready2 donde cargarla (por defecto el global)
+
+    Returns:
+        Ontología cargada
+    """
+    mundo = mundo or default_world
+    ruta_completa = os.path.abspath(archivo)
+    with metricas.medir("ontologia", "cargar") as medicion:
+        medicion.bytes = os.path.getsize(ruta_completa)
+        return mundo.get_ontology(f"file://{ruta_completa}").load()
+
+
+@perfilar("local.buscar_por_nombre")
+def buscar_individuos_por_nombre(onto, termino: str) -> List:
+    """
+    Busca individuos cuyo nombre contenga el término (sin distinguir mayúsculas)
+
+    Args:
+        onto: Ontología cargada
+        termino: Término a buscar
+
+    Returns:
+        Lista de individuos encontrados
+    """
+    with metricas.medir("busqueda_local", "por_nombre") as medicion:
+        termino = termino.lower()
+        resultados = [ind for ind in onto.individuals() if termino in ind.name.lower()]
+        medicion.filas = len(resultados)
+    return resultados
+
+
+def buscar_clase_por_nombre(onto, nombre_clase: str):
+    """
+    Localiza una clase de la ontología por su nombre
+
+    Args:
+        onto: Ontología cargada
+        nombre_clase: Nombre de la clase
+
+    Returns:
+        La clase o None si no existe
+    """
+    clase = onto.search_one(iri=f"*{nombre_clase}")
+    if clase is None:
+        clase = onto.search_one(label=nombre_clase)
+    if clase is None:
+        for c in onto.classes():
+            if c.name == nombre_clase:
+                clase = c
+                break
+    return clase
+
+
+@perfilar("local.buscar_por_clase")
+def buscar_instancias_de_clase(onto, nombre_clase: str) -> List:
+    """
+    Lista las instancias de una clase
+
+    Args:
+        onto: Ontología cargada
+        nombre_clase: Nombre de la clase
+
+    Returns:
+        Lista de instancias (vacía si la clase no existe)
+    """
+    with metricas.medir("busqueda_local", "por_clase") as medicion:
+        clase = buscar_clase_por_nombre(onto, nombre_clase)
+        instancias = list(clase.instances()) if clase is not None else []
+        medicion.filas = len(instancias)
+    return instancias
+
+
+def listar_clases(onto) -> List[str]:
+    """Nombres de las clases de la ontología, ordenados"""
+    return sorted([cls.name for cls in onto.classes() if hasattr(cls, 'name')])
+
+
+def valores_como_texto(valores) -> List[str]:
+    """Normaliza el valor de una propiedad a una lista de cadenas"""
+    if not isinstance(valores, list):
+        valores = [valores]
+    return [v.name if hasattr(v, 'name') else str(v) for v in valores]
+
+
+def individuo_a_dict(individuo, materializacion=None) -> Dict:
+    """
+    Convierte un individuo en un diccionario serializable (JSON)
+
+    Args:
+        individuo: Individuo de owlready2
+        materializacion: Inferencias (razonador.Materializacion) a incluir, si las hay
+
+    Returns:
+        Diccionario con nombre, IRI, tipos y propiedades (valores como texto)
+        y, con materialización, tipos y relaciones inferidos
+    """
+    propiedades = {}
+    for prop in individuo.get_properties():
+        valores = prop[individuo]
+        if valores:
+            propiedades[prop.name] = valores_como_texto(valores)
+    datos = {
+        "nombre": individuo.name,
+        "iri": individuo.iri,
+        "tipos": [cls.name for cls in individuo.is_a if hasattr(cls, 'name')],
+        "propiedades": propiedades,
+    }
+    if materializacion is not None:
+        datos["tipos_inferidos"] = materializacion.tipos_inferidos(individuo)
+        datos["relaciones_inferidas"] = materializacion.relaciones_inferidas(individuo)
+    return datos
+
+
+@perfilar("local.buscar_texto_completo")
+def buscar_texto_completo(onto, termino: str) -> List:
+    """
+    Busca el término en el nombre y en los valores de las propiedades
+
+    Args:
+        onto: Ontología cargada
+        termino: Término a buscar
+
+    Returns:
+        Lista de individuos cuyo nombre o algún valor contiene el término
+    """
+    with metricas.medir("busqueda_local", "texto_completo") as medicion:
+        termino = termino.lower()
+        resultados = []
+        for individuo in onto.individuals():
+            if termino in individuo.name.lower():
+                resultados.append(individuo)
+                continue
+            for prop in individuo.get_properties():
+                if any(termino in valor.lower() for valor in valores_como_texto(prop[individuo])):
+                    resultados.append(individuo)
+                    break
+        medicion.filas = len(resultados)
+    return resultados
@@ -0,0 +1,432 @@
+"""
+Backends de la caché de DBpedia: memoria, archivo JSON, SQLite y Redis.
+
+DBpediaOffline guardaba sus datos en dbpedia_cache.json, así que cada réplica
+de la app tenía su propia caché y ninguna aprovechaba lo que ya habían
+consultado las demás. Con un backend compartido (SQLite en un disco común o
+un servidor con protocolo Redis), todas las réplicas leen y escriben las
+mismas entradas.
+
+Todos los backends ofrecen lectura y escritura de varias claves a la vez.
+En Redis se envían como MGET/MSET encadenados en un solo viaje de red
+(pipelining). Los valores se guardan como JSON compacto (orjson si está
+instalado) y, si superan SERIALIZACION_UMBRAL_ZLIB bytes, comprimidos con
+zlib; el primer byte indica el formato.
+
+Configuración (DBPEDIA_CACHE_URL):
+    json://dbpedia_cache.json      (por defecto, el comportamiento de siempre)
+    memoria://
+    sqlite:///ruta/dbpedia_cache.db
+    redis://[:clave@]host:6379/0
+
+Copiar una caché existente a otro backend:
+    python cache_compartida.py --origen json://dbpedia_cache.json --destino redis://127.0.0.1:6379/0
+"""
+
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import threading
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+from metricas import metricas
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CACHE_URL_POR_DEFECTO = "json://dbpedia_cache.json"
+# Valores más grandes que esto (en bytes) se guardan comprimidos
+SERIALIZACION_UMBRAL_ZLIB = 1024
+# Claves por comando MGET/MSET (y por consulta IN en SQLite)
+CLAVES_POR_LOTE = 500
+
+
+class ErrorCache(Exception):
+    """Error de comunicación con el backend de la caché"""
+
+
+# ---------- Serialización ----------
+
+def serializar(valor) -> bytes:
+    """JSON compacto, comprimido con zlib si es grande (primer byte: b"j" o b"z")"""
+    if orjson is not None:
+        datos = orjson.dumps(valor)
+    else:
+        datos = json.dumps(valor, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if len(datos) > SERIALIZACION_UMBRAL_ZLIB:
+        comprimidos = zlib.compress(datos, 6)
+        if len(comprimidos) < len(datos):
+            return b"z" + comprimidos
+    return b"j" + datos
+
+
+def deserializar(datos: bytes):
+    marca, cuerpo = datos[:1], datos[1:]
+    if marca == b"z":
+        cuerpo = zlib.decompress(cuerpo)
+    elif marca != b"j":
+        raise ErrorCache(f"Formato de valor desconocido: {marca!r}")
+    return orjson.loads(cuerpo) if orjson is not None else json.loads(cuerpo.decode("utf-8"))
+
+
+def _lotes(elementos: List, tamano: int = CLAVES_POR_LOTE) -> Iterator[List]:
+    for i in range(0, len(elementos), tamano):
+        yield elementos[i:i + tamano]
+
+
+# ---------- Interfaz ----------
+
+class BackendCache:
+    """Interfaz de los backends: claves de texto y valores serializables a JSON"""
+
+    nombre = "base"
+
+    def obtener_varios(self, claves: Iterable[str]) -> Dict[str, object]:
+        """Valores de las claves presentes (las ausentes no aparecen)"""
+        raise NotImplementedError
+
+    def guardar_varios(self, valores: Dict[str, object]):
+        raise NotImplementedError
+
+    def elementos(self) -> Iterator[Tuple[str, object]]:
+        """Todos los pares (clave, valor)"""
+        raise NotImplementedError
+
+    def obtener(self, clave: str):
+        return self.obtener_varios([clave]).get(clave)
+
+    def guardar(self, clave: str, valor):
+        self.guardar_varios({clave: valor})
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.elementos())
+
+    def cerrar(self):
+        pass
+
+
+class CacheMemoria(BackendCache):
+    """Diccionario del proceso (sin compartir ni persistir)"""
+
+    nombre = "memoria"
+
+    def __init__(self):
+        self._datos: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def obtener_varios(self, claves):
+        with self._lock:
+            return {c: self._datos[c] for c in claves if c in self._datos}
+
+    def guardar_varios(self, valores):
+        with self._lock:
+            self._datos.update(valores)
+
+    def elementos(self):
+        with self._lock:
+            return iter(list(self._datos.items()))
+
+    def __len__(self):
+        return len(self._datos)
+
+
+class CacheArchivoJSON(CacheMemoria):
+    """Archivo JSON legible, reescrito en cada escritura (el formato de dbpedia_cache.json)"""
+
+    nombre = "json"
+
+    def __init__(self, ruta: str = "dbpedia_cache.json"):
+        super().__init__()
+        self.ruta = ruta
+        try:
+            with open(ruta, "r", encoding="utf-8") as f:
+                self._datos = json.load(f)
+        except FileNotFoundError:
+            pass
+
+    def guardar_varios(self, valores):
+        with self._lock:
+            self._datos.update(valores)
+            with open(self.ruta, "w", encoding="utf-8") as f:
+                json.dump(self._datos, f, indent=2, ensure_ascii=False)
+
+
+class CacheSQLite(BackendCache):
+    """Tabla SQLite en modo WAL; varios procesos pueden compartir el archivo"""
+
+    nombre = "sqlite"
+
+    def __init__(self, ruta: str = "dbpedia_cache.db"):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False, timeout=10)
+        with self._lock:
+            self._conexion.execute("PRAGMA journal_mode=WAL")
+            self._conexion.execute(
+                "CREATE TABLE IF NOT EXISTS cache (clave TEXT PRIMARY KEY, valor BLOB NOT NULL)"
+            )
+            self._conexion.commit()
+
+    def obtener_varios(self, claves):
+        claves = list(dict.fromkeys(claves))
+        resultado = {}
+        with self._lock:
+            for lote in _lotes(claves):
+                marcas = ",".join("?" * len(lote))
+                filas = self._conexion.execute(
+                    f"SELECT clave, valor FROM cache WHERE clave IN ({marcas})", lote
+                )
+                resultado.update((clave, deserializar(valor)) for clave, valor in filas)
+        return resultado
+
+    def guardar_varios(self, valores):
+        filas = [(clave, serializar(valor)) for clave, valor in valores.items()]
+        with self._lock, self._conexion:
+            self._conexion.executemany("INSERT OR REPLACE INTO cache (clave, valor) VALUES (?, ?)", filas)
+
+    def elementos(self):
+        with self._lock:
+            filas = self._conexion.execute("SELECT clave, valor FROM cache").fetchall()
+        return ((clave, deserializar(valor)) for clave, valor in filas)
+
+    def __len__(self):
+        with self._lock:
+            return self._conexion.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def cerrar(self):
+        with self._lock:
+            self._conexion.close()
+
+
+# ---------- Redis ----------
+
+class ClienteRESP:
+    """
+    Cliente mínimo del protocolo de Redis (RESP2) con pipelining
+
+    Una sola conexión protegida por un lock; si se corta, se reconecta en la
+    siguiente operación.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", puerto: int = 6379, base: int = 0,
+                 clave: Optional[str] = None, timeout: float = 5.0):
+        self.host = host
+        self.puerto = puerto
+        self.base = base
+        self.clave = clave
+        self.timeout = timeout
+        self._socket: Optional[socket.socket] = None
+        self._lector = None
+        self._lock = threading.Lock()
+        self.viajes = 0  # envíos de red (un pipeline completo cuenta como uno)
+
+    def _conectar(self):
+        self._socket = socket.create_connection((self.host, self.puerto), timeout=self.timeout)
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._lector = self._socket.makefile("rb")
+        iniciales = []
+        if self.clave:
+            iniciales.append(["AUTH", self.clave])
+        if self.base:
+            iniciales.append(["SELECT", str(self.base)])
+        for respuesta in self._intercambiar(iniciales) if iniciales else ():
+            if isinstance(respuesta, ErrorCache):
+                raise respuesta
+
+    def cerrar(self):
+        with self._lock:
+            self._desconectar()
+
+    def _desconectar(self):
+        if self._socket is not None:
+            try:
+                self._lector.close()
+                self._socket.close()
+            except OSError:
+                pass
+        self._socket = self._lector = None
+
+    def ejecutar(self, *argumentos):
+        return self.pipeline([list(argumentos)])[0]
+
+    def pipeline(self, comandos: List[List]) -> List:
+        """
+        Envía todos los comandos juntos y lee las respuestas en orden
+
+        Raises:
+            ErrorCache si la conexión falla o algún comando responde con error
+        """
+        if not comandos:
+            return []
+        with self._lock:
+            for intento in range(2):
+                try:
+                    if self._socket is None:
+                        self._conectar()
+                    respuestas = self._intercambiar(comandos)
+                    break
+                except OSError as e:
+                    # Conexión vencida o cortada: se reintenta una vez con una nueva
+                    self._desconectar()
+                    if intento == 1:
+                        raise ErrorCache(f"Redis {self.host}:{self.puerto}: {e}") from e
+                except ErrorCache:
+                    self._desconectar()
+                    raise
+        errores = [r for r in respuestas if isinstance(r, ErrorCache)]
+        if errores:
+            raise errores[0]
+        return respuestas
+
+    def _intercambiar(self, comandos: List[List]) -> List:
+        self._socket.sendall(b"".join(_codificar(comando) for comando in comandos))
+        self.viajes += 1
+        return [self._leer() for _ in comandos]
+
+    def _leer(self):
+        linea = self._lector.readline()
+        if not linea.endswith(b"\r\n"):
+            raise ConnectionError("Conexión cerrada por el servidor")
+        tipo, contenido = linea[:1], linea[1:-2]
+        if tipo == b"+":
+            return contenido.decode("utf-8")
+        if tipo == b"-":
+            return ErrorCache(contenido.decode("utf-8"))
+        if tipo == b":":
+            return int(contenido)
+        if tipo == b"$":
+            largo = int(contenido)
+            if largo < 0:
+                return None
+            datos = self._lector.read(largo + 2)
+            return datos[:-2]
+        if tipo == b"*":
+            cantidad = int(contenido)
+            return None if cantidad < 0 else [self._leer() for _ in range(cantidad)]
+        raise ErrorCache(f"Respuesta RESP inválida: {linea!r}")
+
+
+def _codificar(comando: List) -> bytes:
+    partes = [b"*%d\r\n" % len(comando)]
+    for argumento in comando:
+        if not isinstance(argumento, bytes):
+            argumento = str(argumento).encode("utf-8")
+        partes.append(b"$%d\r\n%s\r\n" % (len(argumento), argumento))
+    return b"".join(partes)
+
+
+class CacheRedis(BackendCache):
+    """Servidor con protocolo Redis compartido por todas las réplicas"""
+
+    nombre = "redis"
+
+    def __init__(self, cliente: ClienteRESP, prefijo: str = "dbpedia:", ttl: Optional[int] = None):
+        """
+        Args:
+            cliente: Conexión RESP
+            prefijo: Espacio de nombres de las claves
+            ttl: Segundos de vida de cada entrada (None = sin vencimiento)
+        """
+        self.cliente = cliente
+        self.prefijo = prefijo
+        self.ttl = ttl
+
+    def obtener_varios(self, claves):
+        claves = list(dict.fromkeys(claves))
+        if not claves:
+            return {}
+        comandos = [["MGET"] + [self.prefijo + c for c in lote] for lote in _lotes(claves)]
+        resultado = {}
+        for lote, valores in zip(_lotes(claves), self.cliente.pipeline(comandos)):
+            resultado.update((c, deserializar(v)) for c, v in zip(lote, valores) if v is not None)
+        return resultado
+
+    def guardar_varios(self, valores):
+        pares = [(self.prefijo + c, serializar(v)) for c, v in valores.items()]
+        if self.ttl:
+            comandos = [["SET", clave, valor, "EX", self.ttl] for clave, valor in pares]
+        else:
+            comandos = [["MSET"] + [x for par in lote for x in par] for lote in _lotes(pares)]
+        self.cliente.pipeline(comandos)
+
+    def claves(self) -> List[str]:
+        """Claves con el prefijo (SCAN, sin bloquear el servidor como KEYS)"""
+        encontradas, cursor = [], "0"
+        while True:
+            cursor, lote = self.cliente.ejecutar("SCAN", cursor, "MATCH", self.prefijo + "*",
+                                                 "COUNT", CLAVES_POR_LOTE)
+            cursor = cursor.decode("utf-8")
+            encontradas.extend(c.decode("utf-8")[len(self.prefijo):] for c in lote)
+            if cursor == "0":
+                return list(dict.fromkeys(encontradas))
+
+    def elementos(self):
+        return iter(self.obtener_varios(self.claves()).items())
+
+    def __len__(self):
+        return len(self.claves())
+
+    def cerrar(self):
+        self.cliente.cerrar()
+
+
+# ---------- Construcción ----------
+
+def crear_backend(url: Optional[str] = None) -> BackendCache:
+    """
+    Backend según una URL (por defecto DBPEDIA_CACHE_URL o el archivo JSON)
+
+    Raises:
+        ValueError si el esquema no es json, memoria, sqlite ni redis
+    """
+    url = url or os.environ.get("DBPEDIA_CACHE_URL") or CACHE_URL_POR_DEFECTO
+    partes = urlparse(url)
+    # json://archivo.json y sqlite:///relativa.db son rutas relativas; sqlite:////abs/ruta.db, absoluta
+    ruta = unquote(partes.netloc + partes.path if partes.netloc else partes.path[1:])
+    if partes.scheme == "json":
+        return CacheArchivoJSON(ruta or "dbpedia_cache.json")
+    if partes.scheme == "memoria":
+        return CacheMemoria()
+    if partes.scheme == "sqlite":
+        return CacheSQLite(ruta or "dbpedia_cache.db")
+    if partes.scheme == "redis":
+        base = int(partes.path.strip("/") or 0)
+        cliente = ClienteRESP(partes.hostname or "127.0.0.1", partes.port or 6379, base,
+                              unquote(partes.password) if partes.password else None)
+        return CacheRedis(cliente, ttl=int(os.environ["DBPEDIA_CACHE_TTL"])
+                          if os.environ.get("DBPEDIA_CACHE_TTL") else None)
+    raise ValueError(f"Backend de caché desconocido: {url}")
+
+
+def copiar(origen: BackendCache, destino: BackendCache, tamano_lote: int = CLAVES_POR_LOTE) -> int:
+    """Copia todas las entradas de un backend a otro por lotes; devuelve cuántas copió"""
+    copiadas = 0
+    with metricas.medir("cache_compartida", "copiar") as medicion:
+        for lote in _lotes(list(origen.elementos()), tamano_lote):
+            destino.guardar_varios(dict(lote))
+            copiadas += len(lote)
+        medicion.filas = copiadas
+    return copiadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copia la caché de DBpedia entre backends")
+    parser.add_argument("--origen", default=CACHE_URL_POR_DEFECTO)
+    parser.add_argument("--destino", required=True)
+    args = parser.parse_args()
+    origen, destino = crear_backend(args.origen), crear_backend(args.destino)
+    try:
+        print(f"Copiadas {copiar(origen, destino)} entradas de {args.origen} a {args.destino}")
+    finally:
+        origen.cerrar()
+        destino.cerrar()
+
+
+if __name__ == "__main__":
+    main()
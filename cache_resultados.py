@@ -0,0 +1,76 @@
+"""
+Caché de resultados de búsqueda con capacidad acotada y vencimiento.
+
+El motor guarda cada resultado bajo una clave que incluye la versión de la
+ontología, así que un cambio (importación, recarga) deja inalcanzables las
+entradas viejas sin recorrerlas; el LRU las desaloja a medida que entran
+nuevas. El vencimiento (TTL) limita cuánto tiempo se reutiliza una respuesta
+de DBpedia, que puede cambiar sin que cambie la versión local.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Tuple
+
+from metricas import metricas
+
+
+class CacheResultados:
+    """LRU con vencimiento por entrada y contadores de aciertos y fallos"""
+
+    def __init__(self, capacidad: int = 256, ttl: float = 300.0,
+                 reloj: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            capacidad: Máximo de resultados guardados
+            ttl: Segundos que se reutiliza cada resultado
+            reloj: Fuente de tiempo (reemplazable en pruebas)
+        """
+        self.capacidad = capacidad
+        self.ttl = ttl
+        self.reloj = reloj
+        self._entradas: "OrderedDict[Hashable, Tuple[float, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave: Hashable):
+        """Resultado guardado y vigente, o None"""
+        with metricas.medir("cache_resultados", "obtener") as medicion:
+            with self._lock:
+                entrada = self._entradas.get(clave)
+                if entrada is not None and entrada[0] <= self.reloj():
+                    del self._entradas[clave]
+                    entrada = None
+                if entrada is not None:
+                    self._entradas.move_to_end(clave)
+                    self.aciertos += 1
+                else:
+                    self.fallos += 1
+            medicion.cache = "hit" if entrada is not None else "miss"
+        return entrada[1] if entrada is not None else None
+
+    def guardar(self, clave: Hashable, valor, ttl: float = None):
+        """Guarda un resultado por ttl segundos (por defecto, el de la caché)"""
+        with self._lock:
+            self._entradas[clave] = (self.reloj() + (self.ttl if ttl is None else ttl), valor)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def estadisticas(self) -> Dict:
+        return {
+            "guardados": len(self._entradas),
+            "capacidad": self.capacidad,
+            "ttl": self.ttl,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+        }
@@ -1,28 +1,90 @@
-from SPARQLWrapper import SPARQLWrapper, JSON
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
+
 import requests
-from typing import List, Dict, Optional
-import streamlit as st
+
+from cache_compartida import BackendCache, CacheArchivoJSON, crear_backend
+from latencias import HistorialLatencias, en_contexto, latencias as latencias_compartidas, solicitud_cubierta
+from metricas import metricas
+from perfilado import perfilar
+from transporte import ErrorTransporte, TransporteHTTP, transporte_por_defecto
+
+# Endpoints configurables (permite apuntar a un servidor local de pruebas)
+ENDPOINT_SPARQL = os.environ.get("DBPEDIA_SPARQL_ENDPOINT", "https://dbpedia.org/sparql")
+ENDPOINT_LOOKUP = os.environ.get("DBPEDIA_LOOKUP_ENDPOINT", "https://lookup.dbpedia.org/api/search")
+
+# Espera antes de lanzar SPARQL en paralelo mientras no se conoce el p95 del Lookup
+UMBRAL_COBERTURA_INICIAL = 1.0
+
+# Modo de carga reducida: textos recortados en el servidor (SUBSTR), solo los
+# campos que se muestran y resultados en un formato compacto (ver formatos_sparql.py)
+CARGA_COMPACTA = os.environ.get("DBPEDIA_CARGA_COMPACTA", "0") == "1"
+FORMATO_RESULTADOS = os.environ.get("DBPEDIA_FORMATO", "json")
+
+# Categorías de la vista "Explorar DBpedia": tipo dbo -> nombre en la interfaz
+CATEGORIAS_EXPLORAR = {
+    "Cryptocurrency": "Criptomonedas",
+    "Blockchain": "Tecnología Blockchain",
+    "Digital_currency": "Monedas digitales",
+    "Cryptocurrency_exchange": "Exchanges de Criptomonedas",
+    "Financial_service": "Servicios financieros",
+    "Company": "Empresas",
+}
+
+logger = logging.getLogger(__name__)
 
 class DBpediaConnector:
     """Conector para consultas a DBpedia (online y offline)"""
     
-    def __init__(self):
-        self.endpoint_online = "https://dbpedia.org/sparql"
-        self.sparql = SPARQLWrapper(self.endpoint_online)
-        self.sparql.setReturnFormat(JSON)
-        self.sparql.setTimeout(30)  # Aumentar timeout
+    def __init__(self, endpoint: str = None, endpoint_lookup: str = None,
+                 transporte: TransporteHTTP = None, latencias: HistorialLatencias = None,
+                 compacto: bool = None, formato: str = None):
+        self.endpoint_online = endpoint or ENDPOINT_SPARQL
+        self.endpoint_lookup = endpoint_lookup or ENDPOINT_LOOKUP
+        # El transporte puede grabar o reproducir el tráfico (ver transporte.py)
+        self.transporte = transporte or transporte_por_defecto()
+        # Los tiempos límite salen de las latencias observadas (ver latencias.py);
+        # los valores fijos de cada llamada son el techo y el valor inicial
+        self.latencias = latencias or latencias_compartidas
+        self.compacto = CARGA_COMPACTA if compacto is None else compacto
+        self.formato = formato or FORMATO_RESULTADOS
         self.timeout = 30
-        # Agregar user agent
-        self.sparql.addCustomHttpHeader("User-Agent", "Mozilla/5.0")
+        # Último error ocurrido (la interfaz decide cómo mostrarlo)
+        self.ultimo_error = None
     
     def is_online(self) -> bool:
         """Verifica si hay conexión a DBpedia"""
+        timeout = self.latencias.timeout("ping", 3)
         try:
-            response = requests.get(self.endpoint_online, timeout=3)
-            return response.status_code == 200
+            inicio = time.perf_counter()
+            response = self.transporte.solicitar("ping", self.endpoint_online, timeout=timeout)
+            if response.status_code == 200:
+                self.latencias.registrar("ping", time.perf_counter() - inicio - self.transporte.ultima_espera())
+                return True
+            return False
+        except requests.exceptions.RequestException:
+            self.latencias.registrar_vencida("ping", timeout)
+            return False
         except:
             return False
     
+    def _registrar_error(self, mensaje: str):
+        """Guarda el error para la interfaz y lo envía al log"""
+        self.ultimo_error = mensaje
+        logger.warning(mensaje)
+
+    def _consultar(self, query: str, timeout: float = None, operacion: str = "sparql") -> Dict:
+        """Ejecuta una consulta SPARQL a través del transporte"""
+        return consultar_adaptativo(
+            self.transporte, query, self.endpoint_online, operacion,
+            respaldo=timeout or self.timeout, historial=self.latencias, formato=self.formato
+        )
+
+    @perfilar("conector.buscar_criptomoneda")
     def buscar_criptomoneda(self, nombre: str) -> Optional[Dict]:
         """
         Busca información de una criptomoneda en DBpedia
@@ -55,18 +117,58 @@ class DBpediaConnector:
         """
         
         try:
-            self.sparql.setQuery(query)
-            self.sparql.setTimeout(15)
-            results = self.sparql.query().convert()
+            results = self._consultar(query, timeout=15, operacion="buscar_criptomoneda")
             
             if results["results"]["bindings"]:
                 return self._procesar_resultados(results)
             return None
             
         except Exception as e:
-            st.error(f"Error en consulta DBpedia: {e}")
+            self._registrar_error(f"Error en consulta DBpedia: {e}")
             return None
     
+    @perfilar("conector.obtener_por_uri")
+    def obtener_por_uri(self, uri: str) -> Optional[Dict]:
+        """
+        Obtiene un recurso conocido directamente por su URI (sin buscar por etiqueta)
+
+        Args:
+            uri: URI del recurso (ej: "http://dbpedia.org/resource/Bitcoin")
+
+        Returns:
+            Diccionario con información o None si no se encuentra
+        """
+        if not uri_valida(uri):
+            self._registrar_error(f"URI inválida para DBpedia: {uri!r}")
+            return None
+        query = f"""
+        PREFIX dbo: <http://dbpedia.org/ontology/>
+        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+        PREFIX foaf: <http://xmlns.com/foaf/0.1/>
+
+        SELECT ?label ?abstract ?thumbnail ?website
+        WHERE {{
+            <{uri}> rdfs:label ?label .
+            OPTIONAL {{ <{uri}> dbo:abstract ?abstract . FILTER(LANG(?abstract) = "en") }}
+            OPTIONAL {{ <{uri}> dbo:thumbnail ?thumbnail . }}
+            OPTIONAL {{ <{uri}> foaf:homepage ?website . }}
+            FILTER(LANG(?label) = "en")
+        }}
+        LIMIT 1
+        """
+
+        try:
+            results = self._consultar(query, timeout=10, operacion="obtener_por_uri")
+            datos = self._procesar_resultados(results)
+            if datos:
+                datos["uri"] = uri
+            return datos
+
+        except Exception as e:
+            self._registrar_error(f"Error obteniendo {uri} de DBpedia: {e}")
+            return None
+
+    @perfilar("conector.buscar_relacionados")
     def buscar_relacionados(self, concepto: str) -> List[Dict]:
         """
         Busca conceptos relacionados en DBpedia
@@ -77,13 +179,14 @@ class DBpediaConnector:
         Returns:
             Lista de recursos relacionados
         """
+        comentario, ligado = _seleccion("comment", 200, self.compacto)
         query = f"""
         PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
         
-        SELECT DISTINCT ?resource ?label ?comment
+        SELECT DISTINCT ?resource ?label {comentario}
         WHERE {{
             ?resource rdfs:label ?label .
-            OPTIONAL {{ ?resource rdfs:comment ?comment . }}
+            OPTIONAL {{ ?resource rdfs:comment {ligado} . }}
             
             FILTER (
                 CONTAINS(LCASE(?label), "{concepto.lower()}") &&
@@ -94,15 +197,14 @@ class DBpediaConnector:
         """
         
         try:
-            self.sparql.setQuery(query)
-            self.sparql.setTimeout(15)
-            results = self.sparql.query().convert()
+            results = self._consultar(query, timeout=15, operacion="buscar_relacionados")
             return self._procesar_lista_resultados(results)
             
         except Exception as e:
-            st.error(f"Error buscando relacionados: {e}")
+            self._registrar_error(f"Error buscando relacionados: {e}")
             return []
     
+    @perfilar("conector.obtener_propiedades")
     def obtener_propiedades(self, recurso_uri: str) -> Dict:
         """
         Obtiene todas las propiedades de un recurso específico
@@ -122,8 +224,7 @@ class DBpediaConnector:
         """
         
         try:
-            self.sparql.setQuery(query)
-            results = self.sparql.query().convert()
+            results = self._consultar(query, operacion="obtener_propiedades")
             
             propiedades = {}
             for result in results["results"]["bindings"]:
@@ -134,9 +235,10 @@ class DBpediaConnector:
             return propiedades
             
         except Exception as e:
-            st.error(f"Error obteniendo propiedades: {e}")
+            self._registrar_error(f"Error obteniendo propiedades: {e}")
             return {}
     
+    @perfilar("conector.buscar_por_tipo")
     def buscar_por_tipo(self, tipo: str = "Cryptocurrency") -> List[Dict]:
         """
         Busca recursos por tipo/categoría
@@ -147,15 +249,18 @@ class DBpediaConnector:
         Returns:
             Lista de recursos del tipo especificado
         """
+        # El resumen no se muestra (_procesar_lista_resultados usa comment): en modo compacto no se pide
+        resumen, opcional = ("", "") if self.compacto else \
+            ("?abstract", "OPTIONAL { ?resource dbo:abstract ?abstract }")
         query = f"""
         PREFIX dct: <http://purl.org/dc/terms/>
         PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
         PREFIX dbo: <http://dbpedia.org/ontology/>
         
-        SELECT DISTINCT ?resource ?label ?abstract
+        SELECT DISTINCT ?resource ?label {resumen}
         WHERE {{
             ?resource rdfs:label ?label .
-            OPTIONAL {{ ?resource dbo:abstract ?abstract }}
+            {opcional}
             
             FILTER (
                 CONTAINS(LCASE(STR(?resource)), "{tipo.lower()}") &&
@@ -166,15 +271,14 @@ class DBpediaConnector:
         """
         
         try:
-            self.sparql.setQuery(query)
-            self.sparql.setTimeout(15)
-            results = self.sparql.query().convert()
+            results = self._consultar(query, timeout=15, operacion="buscar_por_tipo")
             return self._procesar_lista_resultados(results)
             
         except Exception as e:
-            st.error(f"Error buscando por tipo: {e}")
+            self._registrar_error(f"Error buscando por tipo: {e}")
             return []
     
+    @perfilar("conector.buscar_simple")
     def buscar_simple(self, termino: str) -> List[Dict]:
         """
         Búsqueda simple y directa en DBpedia
@@ -200,10 +304,7 @@ class DBpediaConnector:
         """
         
         try:
-            self.sparql.setQuery(query)
-            self.sparql.setTimeout(30)
-            self.sparql.setRequestMethod('GET')  # Usar GET en lugar de POST
-            results = self.sparql.query().convert()
+            results = self._consultar(query, timeout=30, operacion="buscar_simple")
             
             if not results["results"]["bindings"]:
                 # Si no hay resultados exactos, intentar búsqueda parcial
@@ -218,8 +319,7 @@ class DBpediaConnector:
                 }}
                 LIMIT 10
                 """
-                self.sparql.setQuery(query2)
-                results = self.sparql.query().convert()
+                results = self._consultar(query2, operacion="buscar_simple")
             
             resultados = []
             for result in results["results"]["bindings"]:
@@ -239,24 +339,23 @@ class DBpediaConnector:
             return resultados
             
         except Exception as e:
-            st.error(f"Error en búsqueda simple: {str(e)}")
+            self._registrar_error(f"Error en búsqueda simple: {str(e)}")
             return []
     
     def _obtener_abstract_simple(self, uri: str) -> str:
         """Obtiene el abstract de un recurso específico"""
+        resumen, ligado = _seleccion("abstract", 401, self.compacto)
         query = f"""
-        SELECT ?abstract
+        SELECT {resumen}
         WHERE {{
-            <{uri}> dbo:abstract ?abstract .
-            FILTER (LANG(?abstract) = "en")
+            <{uri}> dbo:abstract {ligado} .
+            FILTER (LANG({ligado}) = "en")
         }}
         LIMIT 1
         """
         
         try:
-            self.sparql.setQuery(query)
-            self.sparql.setTimeout(10)
-            results = self.sparql.query().convert()
+            results = self._consultar(query, timeout=10, operacion="obtener_abstract_simple")
             
             if results["results"]["bindings"]:
                 abstract = results["results"]["bindings"][0].get("abstract", {}).get("value", "")
@@ -297,18 +396,24 @@ class DBpediaConnector:
         
         return lista
     
-    def enriquecer_con_dbpedia(self, nombre_cripto: str, datos_locales: Dict) -> Dict:
+    @perfilar("conector.enriquecer_con_dbpedia")
+    def enriquecer_con_dbpedia(self, nombre_cripto: str, datos_locales: Dict,
+                               uri: Optional[str] = None) -> Dict:
         """
         Enriquece datos locales con información de DBpedia
         
         Args:
             nombre_cripto: Nombre de la criptomoneda
             datos_locales: Datos de la ontología local
+            uri: URI ya enlazada (ver enlaces_dbpedia.py); evita buscar por etiqueta
         
         Returns:
             Datos combinados (local + DBpedia)
         """
-        datos_dbpedia = self.buscar_criptomoneda(nombre_cripto)
+        if uri:
+            datos_dbpedia = self.obtener_por_uri(uri)
+        else:
+            datos_dbpedia = self.buscar_criptomoneda(nombre_cripto)
         
         if datos_dbpedia:
             return {
@@ -322,82 +427,543 @@ class DBpediaConnector:
             "fuente_enriquecida": False
         }
     
-    def buscar_con_api_rest(self, termino: str) -> List[Dict]:
+    @perfilar("conector.obtener_lote")
+    def obtener_lote(self, uris: List[str]) -> Dict[str, Dict]:
+        """
+        Obtiene varios recursos conocidos en una sola consulta (VALUES)
+
+        A diferencia de obtener_por_uri, los errores se propagan: quien
+        procesa por lotes decide si reintenta el lote.
+
+        Args:
+            uris: URIs de los recursos
+
+        Returns:
+            URI -> datos (solo los recursos con etiqueta en inglés)
+        """
+        valores = " ".join(f"<{uri}>" for uri in uris if uri_valida(uri))
+        if not valores:
+            return {}
+        query = f"""
+        PREFIX dbo: <http://dbpedia.org/ontology/>
+        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+        PREFIX foaf: <http://xmlns.com/foaf/0.1/>
+
+        SELECT ?resource ?label ?abstract ?thumbnail ?website
+        WHERE {{
+            VALUES ?resource {{ {valores} }}
+            ?resource rdfs:label ?label .
+            OPTIONAL {{ ?resource dbo:abstract ?abstract . FILTER(LANG(?abstract) = "en") }}
+            OPTIONAL {{ ?resource dbo:thumbnail ?thumbnail . }}
+            OPTIONAL {{ ?resource foaf:homepage ?website . }}
+            FILTER(LANG(?label) = "en")
+        }}
+        """
+        results = self._consultar(query, timeout=30, operacion="obtener_lote")
+        return self._procesar_por_clave(results, "resource")
+
+    @perfilar("conector.buscar_etiquetas_lote")
+    def buscar_etiquetas_lote(self, etiquetas: List[str]) -> Dict[str, Dict]:
+        """
+        Busca los recursos cuya etiqueta en inglés es exactamente una de las
+        dadas, en una sola consulta (VALUES): la igualdad usa el índice de
+        etiquetas del endpoint en lugar de recorrerlas con CONTAINS
+
+        Returns:
+            Etiqueta -> datos del primer recurso con esa etiqueta
+
+        Raises:
+            Los errores de la consulta (ver obtener_lote)
+        """
+        valores = " ".join(f'"{_escapar_literal(e)}"@en' for e in etiquetas if e)
+        if not valores:
+            return {}
+        query = f"""
+        PREFIX dbo: <http://dbpedia.org/ontology/>
+        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+        PREFIX foaf: <http://xmlns.com/foaf/0.1/>
+
+        SELECT ?label ?resource ?abstract ?thumbnail ?website
+        WHERE {{
+            VALUES ?label {{ {valores} }}
+            ?resource rdfs:label ?label .
+            OPTIONAL {{ ?resource dbo:abstract ?abstract . FILTER(LANG(?abstract) = "en") }}
+            OPTIONAL {{ ?resource dbo:thumbnail ?thumbnail . }}
+            OPTIONAL {{ ?resource foaf:homepage ?website . }}
+        }}
+        """
+        results = self._consultar(query, timeout=30, operacion="buscar_etiquetas_lote")
+        return self._procesar_por_clave(results, "label")
+
+    def _procesar_por_clave(self, results: Dict, variable: str) -> Dict[str, Dict]:
+        """Agrupa las filas por una variable y se queda con la primera de cada valor"""
+        por_clave = {}
+        for fila in results["results"]["bindings"]:
+            clave = fila.get(variable, {}).get("value")
+            if clave is None or clave in por_clave:
+                continue
+            por_clave[clave] = {
+                "uri": fila.get("resource", {}).get("value", ""),
+                "label": fila.get("label", {}).get("value", ""),
+                "abstract": fila.get("abstract", {}).get("value", ""),
+                "thumbnail": fila.get("thumbnail", {}).get("value", ""),
+                "website": fila.get("website", {}).get("value", ""),
+            }
+        return por_clave
+
+    @perfilar("conector.buscar_con_api_rest")
+    def buscar_con_api_rest(self, termino: str, propagar_errores: bool = False) -> List[Dict]:
         """
         Búsqueda usando la API REST de DBpedia Lookup
         Más rápida y confiable que SPARQL
         
         Args:
             termino: Término a buscar
+            propagar_errores: Lanzar los errores en lugar de devolver una lista
+                vacía (para distinguir "sin resultados" de "no se pudo buscar")
         
         Returns:
             Lista de resultados
         """
         try:
-            # Usar DBpedia Lookup API
-            url = f"https://lookup.dbpedia.org/api/search?query={termino}&format=json"
-            
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                resultados = []
-                
-                for item in data.get("docs", [])[:10]:
-                    resultado = {
-                        "uri": item.get("resource", [""])[0] if isinstance(item.get("resource"), list) else item.get("resource", ""),
-                        "label": item.get("label", ["Sin título"])[0] if isinstance(item.get("label"), list) else item.get("label", "Sin título"),
-                        "abstract": item.get("comment", [""])[0][:300] + "..." if item.get("comment") else "Sin descripción",
-                        "categories": item.get("category", [])[:3] if item.get("category") else []
-                    }
-                    resultados.append(resultado)
-                
-                return resultados
-            else:
-                st.warning(f"Error en API: {response.status_code}")
-                return []
-                
+            return self._buscar_lookup(termino)
+        except ErrorTransporte as e:
+            self._registrar_error(f"Error en API: {e}")
+            if propagar_errores:
+                raise
+            return []
         except Exception as e:
-            st.error(f"Error con API REST: {e}")
+            self._registrar_error(f"Error con API REST: {e}")
+            if propagar_errores:
+                raise
             return []
 
+    def _buscar_lookup(self, termino: str) -> List[Dict]:
+        """Consulta al Lookup API; los errores se propagan"""
+        timeout = self.latencias.timeout("lookup", 10)
+        inicio = time.perf_counter()
+        try:
+            response = self.transporte.solicitar(
+                "lookup",
+                self.endpoint_lookup,
+                params={"query": termino, "format": "json"},
+                timeout=timeout
+            )
+        except requests.exceptions.RequestException:
+            self.latencias.registrar_vencida("lookup", timeout)
+            raise
+        if response.status_code != 200:
+            raise ErrorTransporte(str(response.status_code))
+        self.latencias.registrar("lookup", time.perf_counter() - inicio - self.transporte.ultima_espera())
+
+        data = response.json()
+        resultados = []
+        for item in data.get("docs", [])[:10]:
+            resultado = {
+                "uri": item.get("resource", [""])[0] if isinstance(item.get("resource"), list) else item.get("resource", ""),
+                "label": item.get("label", ["Sin título"])[0] if isinstance(item.get("label"), list) else item.get("label", "Sin título"),
+                "abstract": item.get("comment", [""])[0][:300] + "..." if item.get("comment") else "Sin descripción",
+                "categories": item.get("category", [])[:3] if item.get("category") else []
+            }
+            resultados.append(resultado)
+        return resultados
+
+    def _buscar_etiqueta_sparql(self, termino: str) -> List[Dict]:
+        """
+        Equivalente SPARQL del Lookup en una sola consulta (etiqueta exacta y
+        resumen opcional); es la alternativa de buscar_cubierta
+        """
+        query = f"""
+        PREFIX dbo: <http://dbpedia.org/ontology/>
+        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+
+        SELECT DISTINCT ?resource ?label ?abstract
+        WHERE {{
+            ?resource rdfs:label ?label .
+            OPTIONAL {{ ?resource dbo:abstract ?abstract . FILTER (LANG(?abstract) = "en") }}
+            FILTER (LCASE(STR(?label)) = "{_escapar_literal(termino.lower())}" && LANG(?label) = "en")
+        }}
+        LIMIT 10
+        """
+        results = self._consultar(query, timeout=15, operacion="buscar_etiqueta")
+        resultados = []
+        for datos in self._procesar_por_clave(results, "resource").values():
+            resumen = datos["abstract"]
+            resultados.append({
+                "uri": datos["uri"],
+                "label": datos["label"],
+                "abstract": resumen[:300] + "..." if resumen else "Sin descripción",
+                "categories": []
+            })
+        return resultados
+
+    @perfilar("conector.buscar_cubierta")
+    def buscar_cubierta(self, termino: str) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Busca en el Lookup API y, si tarda más que su p95 observado (o falla),
+        también por SPARQL; devuelve la primera respuesta con resultados
+
+        Args:
+            termino: Término a buscar
+
+        Returns:
+            (resultados, "lookup" o "sparql" según la fuente que respondió;
+            None si ninguna encontró resultados)
+        """
+        umbral = self.latencias.umbral_cobertura("lookup", UMBRAL_COBERTURA_INICIAL)
+        try:
+            resultados, indice = solicitud_cubierta(
+                lambda: self._buscar_lookup(termino),
+                lambda: self._buscar_etiqueta_sparql(termino),
+                umbral,
+                historial=self.latencias
+            )
+        except Exception as e:
+            self._registrar_error(f"Error en Lookup y SPARQL: {e}")
+            return [], None
+        if indice is None:
+            return resultados or [], None
+        return resultados, ("lookup", "sparql")[indice]
+
+def uri_valida(uri: str) -> bool:
+    """URI http(s) que se puede escribir entre <> en una consulta sin romperla"""
+    return (isinstance(uri, str) and uri.startswith(("http://", "https://"))
+            and not any(c in '<>"{}|\\^`' or ord(c) <= 0x20 for c in uri))
+
+
+_PATRON_TIPO_DBO = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def tipo_dbo_valido(tipo: str) -> bool:
+    """El tipo se puede escribir como dbo:<tipo> en una consulta sin romperla"""
+    return isinstance(tipo, str) and bool(_PATRON_TIPO_DBO.match(tipo))
+
+
+def _escapar_literal(texto: str) -> str:
+    """Texto seguro dentro de un literal SPARQL entre comillas dobles"""
+    return texto.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def _seleccion(variable: str, largo: int, compacto: bool) -> Tuple[str, str]:
+    """
+    Proyección de un texto largo en el SELECT y variable que se liga en el WHERE
+
+    En modo compacto el texto se recorta en el servidor a `largo` caracteres
+    (uno más que lo que se muestra, para saber si hay que añadir "...")
+    """
+    if not compacto:
+        return f"?{variable}", f"?{variable}"
+    return f"(SUBSTR(?{variable}_completo, 1, {largo}) AS ?{variable})", f"?{variable}_completo"
+
+
+def consultar_adaptativo(transporte: TransporteHTTP, query: str, endpoint: str, operacion: str,
+                         respaldo: float = 30, historial: HistorialLatencias = None,
+                         formato: str = "json") -> Dict:
+    """
+    Consulta SPARQL con el tiempo límite derivado de las latencias de la operación
+
+    Args:
+        transporte: Transporte HTTP
+        query: Texto de la consulta
+        endpoint: URL del endpoint SPARQL
+        operacion: Nombre de la operación (métricas y latencias)
+        respaldo: Tiempo límite fijo (techo y valor inicial)
+        historial: Latencias observadas (por defecto las compartidas del proceso)
+        formato: Formato de resultados pedido ("json", "tsv" o "csv")
+
+    Returns:
+        Resultados SPARQL JSON
+    """
+    historial = historial or latencias_compartidas
+    timeout = historial.timeout(operacion, respaldo)
+    inicio = time.perf_counter()
+    try:
+        resultados = transporte.consultar_sparql(query, endpoint, timeout, operacion=operacion, formato=formato)
+    except requests.exceptions.RequestException:
+        # Sin esta muestra el p99 no cambiaría y cada consulta volvería a vencer
+        historial.registrar_vencida(operacion, timeout)
+        raise
+    # La espera en el limitador de salida no es latencia del endpoint
+    historial.registrar(operacion, time.perf_counter() - inicio - transporte.ultima_espera())
+    return resultados
+
+
+# Funciones de búsqueda directa por SPARQL (usadas por app.py)
+@perfilar("buscar_en_dbpedia")
+def buscar_en_dbpedia(termino, limite=10, endpoint=None, transporte=None, compacto=False, formato="json"):
+    """Buscar entidades en DBpedia usando SPARQL queries"""
+    try:
+        comentario, ligado = _seleccion("comment", 301, compacto)
+
+        # Query to search for entities with label matching the term
+        query = f"""
+        PREFIX dbo: <http://dbpedia.org/ontology/>
+        PREFIX dbr: <http://dbpedia.org/resource/>
+        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+
+        SELECT DISTINCT ?entity ?label {comentario} ?thumbnail
+        WHERE {{
+            ?entity rdfs:label ?label .
+            OPTIONAL {{ ?entity rdfs:comment {ligado} . FILTER(LANG({ligado}) = "en") }}
+            OPTIONAL {{ ?entity dbo:thumbnail ?thumbnail }}
+            FILTER(LANG(?label) = "en")
+            FILTER(REGEX(?label, "{termino}", "i"))
+        }}
+        ORDER BY ?label
+        LIMIT {limite}
+        """
+
+        transporte = transporte or transporte_por_defecto()
+        results = consultar_adaptativo(transporte, query, endpoint or ENDPOINT_SPARQL, "buscar_en_dbpedia",
+                                       formato=formato)
+
+        entidades = []
+        for result in results["results"]["bindings"]:
+            comment_value = result.get('comment', {}).get('value', 'No description available')
+            entidad = {
+                'uri': result['entity']['value'],
+                'label': result['label']['value'],
+                'comment': comment_value[:300] + "..." if len(comment_value) > 300 else comment_value,
+                'thumbnail': result.get('thumbnail', {}).get('value', None),
+                'founding_date': None,  # SPARQL query doesn't include founding date
+                'website': None  # SPARQL query doesn't include website
+            }
+            entidades.append(entidad)
+
+        return entidades, None
+
+    except Exception as e:
+        return [], f"Error connecting to DBpedia: {str(e)}"
+
+@perfilar("obtener_detalles_dbpedia")
+def obtener_detalles_dbpedia(uri, endpoint=None, transporte=None, formato="json"):
+    """Obtener detalles completos de una entidad DBpedia usando SPARQL"""
+    if not uri_valida(uri):
+        return None, f"URI inválida para DBpedia: {uri!r}"
+    try:
+
+        # Query to get details for a specific entity
+        query = f"""
+        PREFIX dbo: <http://dbpedia.org/ontology/>
+        PREFIX dbr: <http://dbpedia.org/resource/>
+        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+        PREFIX foaf: <http://xmlns.com/foaf/0.1/>
+
+        SELECT ?label ?comment ?thumbnail ?foundingDate ?website
+        WHERE {{
+            <{uri}> rdfs:label ?label .
+            OPTIONAL {{ <{uri}> rdfs:comment ?comment . FILTER(LANG(?comment) = "en") }}
+            OPTIONAL {{ <{uri}> dbo:thumbnail ?thumbnail }}
+            OPTIONAL {{ <{uri}> dbo:foundingDate ?foundingDate }}
+            OPTIONAL {{ <{uri}> foaf:homepage ?website }}
+            FILTER(LANG(?label) = "en")
+        }}
+        LIMIT 1
+        """
+
+        transporte = transporte or transporte_por_defecto()
+        results = consultar_adaptativo(transporte, query, endpoint or ENDPOINT_SPARQL, "obtener_detalles_dbpedia",
+                                       formato=formato)
+
+        if results["results"]["bindings"]:
+            result = results["results"]["bindings"][0]
+            return {
+                'label': result['label']['value'],
+                'comment': result.get('comment', {}).get('value', 'No description available'),
+                'thumbnail': result.get('thumbnail', {}).get('value', None),
+                'founding_date': result.get('foundingDate', {}).get('value', None),
+                'website': result.get('website', {}).get('value', None),
+                'types': []  # SPARQL query doesn't include types in this simple query
+            }, None
+        else:
+            return None, "No se encontraron detalles para esta entidad"
+    except Exception as e:
+        return None, f"Error al obtener detalles de DBpedia: {str(e)}"
+
+
+@perfilar("buscar_por_tipo_dbo")
+def buscar_por_tipo_dbo(tipo, limite=20, endpoint=None, transporte=None, compacto=False, formato="json"):
+    """Buscar entidades de un tipo de la ontología DBpedia (dbo:<tipo>) usando SPARQL"""
+    if not tipo_dbo_valido(tipo):
+        return [], f"Tipo de DBpedia inválido: {tipo!r}"
+    limite = int(limite)
+    comentario, ligado = _seleccion("comment", 301, compacto)
+    query = f"""
+    PREFIX dbo: <http://dbpedia.org/ontology/>
+    PREFIX dbr: <http://dbpedia.org/resource/>
+    PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+    PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+
+    SELECT DISTINCT ?entity ?label {comentario} ?thumbnail
+    WHERE {{
+        ?entity rdf:type dbo:{tipo} .
+        ?entity rdfs:label ?label .
+        OPTIONAL {{ ?entity rdfs:comment {ligado} . FILTER(LANG({ligado}) = "en") }}
+        OPTIONAL {{ ?entity dbo:thumbnail ?thumbnail }}
+        FILTER(LANG(?label) = "en")
+    }}
+    ORDER BY ?label
+    LIMIT {limite}
+    """
+
+    try:
+        transporte = transporte or transporte_por_defecto()
+        results = consultar_adaptativo(transporte, query, endpoint or ENDPOINT_SPARQL, "buscar_por_tipo_dbo",
+                                       formato=formato)
+
+        entidades = []
+        for result in results["results"]["bindings"]:
+            comment_value = result.get('comment', {}).get('value', 'No description available')
+            entidad = {
+                'uri': result['entity']['value'],
+                'label': result['label']['value'],
+                'comment': comment_value[:300] + "..." if len(comment_value) > 300 else comment_value,
+                'thumbnail': result.get('thumbnail', {}).get('value', None),
+                'founding_date': None
+            }
+            entidades.append(entidad)
+
+        return entidades, None
+
+    except requests.exceptions.Timeout:
+        return [], "La consulta excedió el tiempo límite."
+    except requests.exceptions.RequestException as e:
+        return [], f"Error de conexión con DBpedia: {str(e)}"
+    except Exception as e:
+        return [], f"Error al buscar en DBpedia: {e}"
+
+
+def contar_por_tipo_dbo(tipos, endpoint=None, transporte=None, formato="json") -> Dict[str, int]:
+    """
+    Cantidad de entidades de cada tipo dbo:<tipo>, en una sola consulta (VALUES ?tipo)
+
+    Returns:
+        Tipo -> total (los tipos sin entidades no aparecen)
+
+    Raises:
+        Los errores de la consulta
+    """
+    valores = " ".join(f"dbo:{tipo}" for tipo in tipos if tipo_dbo_valido(tipo))
+    if not valores:
+        return {}
+    query = f"""
+    PREFIX dbo: <http://dbpedia.org/ontology/>
+    PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+
+    SELECT ?tipo (COUNT(DISTINCT ?entity) AS ?total)
+    WHERE {{
+        VALUES ?tipo {{ {valores} }}
+        ?entity rdf:type ?tipo .
+    }}
+    GROUP BY ?tipo
+    """
+    transporte = transporte or transporte_por_defecto()
+    results = consultar_adaptativo(transporte, query, endpoint or ENDPOINT_SPARQL, "contar_por_tipo_dbo",
+                                   formato=formato)
+    return {
+        fila["tipo"]["value"].rsplit("/", 1)[-1]: int(fila["total"]["value"])
+        for fila in results["results"]["bindings"] if "tipo" in fila and "total" in fila
+    }
+
+
+@perfilar("explorar_categorias")
+def explorar_categorias(tipos=None, limite=15, endpoint=None, transporte=None, compacto=False,
+                        formato="json") -> Dict[str, Dict]:
+    """
+    Entidades y total de varias categorías a la vez
+
+    Las consultas por categoría (LIMIT por tipo) y el conteo de todas en una
+    sola consulta salen en paralelo: el resultado completo tarda lo que la
+    más lenta, no la suma. Los errores quedan en la categoría que falló.
+
+    Args:
+        tipos: Tipos dbo (por defecto, los de CATEGORIAS_EXPLORAR)
+        limite: Entidades por categoría
+
+    Returns:
+        Tipo -> {"entidades": [...], "total": int o None, "error": str o None}
+    """
+    tipos = list(tipos or CATEGORIAS_EXPLORAR)
+    transporte = transporte or transporte_por_defecto()
+    # Hilos propios de esta llamada (una consulta por categoría y el conteo): dos
+    # exploraciones simultáneas no hacen cola una detrás de la otra
+    with metricas.medir("dbpedia", "explorar_categorias") as medicion, \
+            ThreadPoolExecutor(max_workers=len(tipos) + 1, thread_name_prefix="explorar") as ejecutor:
+        conteo = ejecutor.submit(en_contexto(
+            lambda: contar_por_tipo_dbo(tipos, endpoint, transporte, formato)))
+        futuros = {
+            tipo: ejecutor.submit(en_contexto(
+                lambda tipo=tipo: buscar_por_tipo_dbo(tipo, limite, endpoint, transporte, compacto, formato)))
+            for tipo in tipos
+        }
+        try:
+            totales, error_conteo = conteo.result(), None
+        except Exception as e:
+            totales, error_conteo = {}, e
+            logger.warning(f"Error contando entidades por categoría: {e}")
+        resultado = {}
+        for tipo, futuro in futuros.items():
+            entidades, error = futuro.result()
+            total = totales.get(tipo, 0) if error_conteo is None else None
+            resultado[tipo] = {"entidades": entidades, "total": total, "error": error}
+            medicion.filas += len(entidades)
+        medicion.error = all(r["error"] for r in resultado.values())
+    return resultado
+
 
 # Funciones auxiliares para modo offline
 class DBpediaOffline:
     """Manejo de datos DBpedia en modo offline (cache)"""
     
-    def __init__(self, cache_file: str = "dbpedia_cache.json"):
+    def __init__(self, cache_file: str = "dbpedia_cache.json", backend: BackendCache = None):
+        """
+        Args:
+            cache_file: Archivo JSON de la caché si no se indica otro backend
+            backend: Dónde se guarda la caché (ver cache_compartida.py); por defecto
+                DBPEDIA_CACHE_URL o, sin ella, el archivo JSON
+        """
         self.cache_file = cache_file
-        self.cache = self._cargar_cache()
+        if backend is None:
+            backend = crear_backend() if os.environ.get("DBPEDIA_CACHE_URL") else CacheArchivoJSON(cache_file)
+        self.backend = backend
     
-    def _cargar_cache(self) -> Dict:
-        """Carga cache de consultas previas"""
-        try:
-            import json
-            with open(self.cache_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {}
-    
-    def _guardar_cache(self):
-        """Guarda cache en archivo"""
-        import json
-        with open(self.cache_file, 'w', encoding='utf-8') as f:
-            json.dump(self.cache, f, indent=2, ensure_ascii=False)
+    @property
+    def cache(self) -> Dict:
+        """Todas las entradas (copia; en un backend compartido incluye las de otras réplicas)"""
+        return dict(self.backend.elementos())
     
     def agregar_al_cache(self, clave: str, datos: Dict):
         """Agrega datos al cache"""
-        self.cache[clave] = datos
-        self._guardar_cache()
+        self.agregar_varios({clave: datos})
+    
+    def agregar_varios(self, entradas: Dict[str, Dict]):
+        """Agrega varias entradas en una sola escritura"""
+        with metricas.medir("cache", "agregar") as medicion:
+            self.backend.guardar_varios(entradas)
+            medicion.filas = len(entradas)
     
     def obtener_del_cache(self, clave: str) -> Optional[Dict]:
         """Obtiene datos del cache"""
-        return self.cache.get(clave)
+        with metricas.medir("cache", "obtener") as medicion:
+            datos = self.backend.obtener(clave)
+            medicion.cache = "hit" if datos is not None else "miss"
+        return datos
+    
+    def obtener_varios(self, claves: List[str]) -> Dict[str, Dict]:
+        """Entradas de varias claves en una sola lectura (las ausentes no aparecen)"""
+        with metricas.medir("cache", "obtener_varios") as medicion:
+            encontradas = self.backend.obtener_varios(claves)
+            medicion.filas = len(encontradas)
+            medicion.cache = "hit" if len(encontradas) == len(set(claves)) else "miss"
+        return encontradas
     
     def buscar_en_cache(self, termino: str) -> List[Dict]:
         """Busca en cache por término"""
-        resultados = []
-        for clave, datos in self.cache.items():
-            if termino.lower() in clave.lower():
-                resultados.append(datos)
-        return resultados
\ No newline at end of file
+        with metricas.medir("cache", "buscar") as medicion:
+            resultados = []
+            for clave, datos in self.backend.elementos():
+                if termino.lower() in clave.lower():
+                    resultados.append(datos)
+            medicion.filas = len(resultados)
+            medicion.cache = "hit" if resultados else "miss"
+        return resultados
@@ -0,0 +1,273 @@
+"""
+Tabla persistente de enlaces entre individuos locales y recursos de DBpedia.
+
+En lugar de redescubrir en cada enriquecimiento el recurso de DBpedia de un
+individuo (búsquedas SPARQL con CONTAINS sobre las etiquetas, las más
+lentas), el enlace se calcula una vez por lotes y se guarda en un JSON:
+
+    {"bitcoin": {"uri": ..., "etiqueta": ..., "confianza": 1.0, "metodo": "lookup"}}
+
+La confianza es la similitud entre el nombre local y la etiqueta (o el final
+de la URI) del candidato. Un nombre sin candidatos queda registrado sin URI
+(confianza 0 y la fecha de la búsqueda) para no repetir la búsqueda hasta que
+vence. Con ella, el enriquecimiento es una consulta
+directa por URI o un acierto de caché, y los enlaces confiables se pueden
+emitir como owl:sameAs en la ontología. Al importar una entidad de DBpedia
+su enlace se registra con confianza 1.
+
+Uso:
+    python enlaces_dbpedia.py --owl criptomonedas.owl
+    python enlaces_dbpedia.py --owl criptomonedas.owl --sin-conexion --emitir-same-as
+"""
+
+import argparse
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from difflib import SequenceMatcher
+from typing import Callable, Dict, Iterable, List, Optional
+
+from owlready2 import owl_equivalentindividual
+
+from metricas import metricas
+
+RUTA_ENLACES = os.environ.get("DBPEDIA_ENLACES", "enlaces_dbpedia.json")
+# Por debajo de este umbral el enlace se guarda pero no se usa ni se emite
+UMBRAL_CONFIANZA = 0.8
+# Segundos que se recuerda que un nombre no tuvo candidatos (DBpedia puede agregarlos)
+TTL_SIN_COINCIDENCIA = 7 * 24 * 3600.0
+
+
+def sin_html(texto: str) -> str:
+    # DBpedia Lookup resalta las coincidencias con <B>...</B>
+    return re.sub(r"<[^>]+>", "", texto)
+
+
+def normalizar(texto: str) -> str:
+    """Texto comparable: sin HTML, camelCase separado, sin acentos y en minúsculas"""
+    texto = sin_html(texto)
+    texto = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", texto)
+    texto = texto.replace("_", " ").replace("-", " ")
+    texto = unicodedata.normalize("NFKD", texto)
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return " ".join(texto.lower().split())
+
+
+def calcular_confianza(nombre_local: str, etiqueta: str, uri: str = "") -> float:
+    """Similitud (0 a 1) entre el nombre local y la etiqueta o el final de la URI"""
+    nombre = normalizar(nombre_local)
+    textos = [normalizar(etiqueta)]
+    if uri:
+        textos.append(normalizar(uri.rstrip("/").rsplit("/", 1)[-1]))
+    return round(max(SequenceMatcher(None, nombre, texto).ratio() for texto in textos), 3)
+
+
+class TablaEnlaces:
+    """Enlaces nombre local -> recurso de DBpedia, persistidos en JSON"""
+
+    def __init__(self, ruta: Optional[str] = RUTA_ENLACES):
+        """
+        Args:
+            ruta: Archivo JSON de la tabla (None = solo en memoria)
+        """
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self.enlaces: Dict[str, Dict] = self._cargar()
+
+    def _cargar(self) -> Dict[str, Dict]:
+        if not self.ruta:
+            return {}
+        try:
+            with open(self.ruta, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def guardar(self):
+        """Escribe la tabla de forma atómica"""
+        if not self.ruta:
+            return
+        with self._lock:
+            temporal = f"{self.ruta}.tmp"
+            with open(temporal, "w", encoding="utf-8") as f:
+                json.dump(self.enlaces, f, indent=2, ensure_ascii=False, sort_keys=True)
+            os.replace(temporal, self.ruta)
+
+    def __len__(self) -> int:
+        return len(self.enlaces)
+
+    def __contains__(self, nombre: str) -> bool:
+        return nombre in self.enlaces
+
+    def obtener(self, nombre: str, umbral: float = UMBRAL_CONFIANZA) -> Optional[Dict]:
+        """Enlace de un individuo si su confianza alcanza el umbral"""
+        with metricas.medir("enlaces", "obtener") as medicion:
+            enlace = self.enlaces.get(nombre)
+            if enlace is not None and enlace["confianza"] < umbral:
+                enlace = None
+            medicion.cache = "hit" if enlace is not None else "miss"
+        return enlace
+
+    def buscado(self, nombre: str) -> bool:
+        """Si ya se buscó el nombre (con o sin coincidencia) y no hay que buscarlo de nuevo"""
+        enlace = self.enlaces.get(nombre)
+        if enlace is None:
+            return False
+        if enlace["uri"] is None:
+            return time.time() - enlace.get("fecha", 0) < TTL_SIN_COINCIDENCIA
+        return True
+
+    def registrar(self, nombre: str, uri: str, etiqueta: str, confianza: float,
+                  metodo: str, guardar: bool = True) -> Dict:
+        """Registra (o reemplaza) el enlace de un individuo"""
+        enlace = {"uri": uri, "etiqueta": sin_html(etiqueta), "confianza": confianza, "metodo": metodo}
+        if uri is None:
+            enlace["fecha"] = time.time()  # sin coincidencia: vence a los TTL_SIN_COINCIDENCIA segundos
+        with self._lock:
+            self.enlaces[nombre] = enlace
+        if guardar:
+            self.guardar()
+        return enlace
+
+    def vincular(self, nombre: str, candidatos: Iterable[Dict], metodo: str = "lookup",
+                 guardar: bool = True) -> Optional[Dict]:
+        """
+        Elige el candidato más parecido al nombre local y lo registra
+
+        Args:
+            nombre: Nombre del individuo local
+            candidatos: Resultados de DBpedia con "uri" y "label"
+            metodo: Origen de los candidatos (lookup, cache...)
+            guardar: Si se persiste la tabla
+
+        Returns:
+            El enlace registrado, o None si no había candidatos (entonces se
+            registra el nombre sin URI, ver buscado). Un enlace existente con
+            mayor confianza no se reemplaza.
+        """
+        mejor, confianza = None, -1.0
+        for candidato in candidatos:
+            if not candidato.get("uri"):
+                continue
+            puntaje = calcular_confianza(nombre, candidato.get("label", ""), candidato["uri"])
+            if puntaje > confianza:
+                mejor, confianza = candidato, puntaje
+        actual = self.enlaces.get(nombre)
+        if mejor is None:
+            if actual is None or actual["uri"] is None:
+                self.registrar(nombre, None, "", 0.0, metodo, guardar)
+            return None
+        if actual is not None and actual["confianza"] >= confianza:
+            return actual
+        return self.registrar(nombre, mejor["uri"], mejor.get("label", ""), confianza, metodo, guardar)
+
+
+def candidatos_desde(conector=None, cache=None) -> Callable[[str], List[Dict]]:
+    """
+    Función que busca candidatos para un nombre local: primero en la caché
+    offline (DBpediaOffline) y, si no hay, en DBpedia Lookup con el conector
+    """
+    def buscar(nombre: str) -> List[Dict]:
+        if cache is not None:
+            datos = cache.obtener_del_cache(nombre)
+            if datos:
+                return [datos]
+        if conector is not None:
+            return conector.buscar_con_api_rest(normalizar(nombre), propagar_errores=True)
+        return []
+    return buscar
+
+
+def calcular_enlaces(nombres: Iterable[str], tabla: TablaEnlaces,
+                     buscar_candidatos: Callable[[str], List[Dict]], recalcular: bool = False) -> int:
+    """
+    Calcula por lotes los enlaces de los individuos que aún no tienen
+
+    Args:
+        nombres: Nombres de los individuos locales
+        tabla: Tabla donde se registran los enlaces
+        buscar_candidatos: Nombre -> candidatos de DBpedia (ver candidatos_desde)
+        recalcular: Si se vuelven a calcular también los enlaces existentes
+
+    Returns:
+        Cantidad de enlaces registrados
+    """
+    with metricas.medir("enlaces", "calcular") as medicion:
+        registrados = 0
+        for nombre in nombres:
+            if tabla.buscado(nombre) and not recalcular:
+                continue
+            try:
+                candidatos = buscar_candidatos(nombre)
+            except Exception:
+                continue  # No se pudo buscar: se reintenta en la próxima ejecución
+            if tabla.vincular(nombre, candidatos, "lote", guardar=False) is not None:
+                registrados += 1
+        tabla.guardar()
+        medicion.filas = registrados
+    return registrados
+
+
+def emitir_same_as(onto, tabla: TablaEnlaces, umbral: float = UMBRAL_CONFIANZA,
+                   nombres: Optional[Iterable[str]] = None) -> int:
+    """
+    Agrega a la ontología una tripleta owl:sameAs por cada enlace confiable
+
+    Los recursos de DBpedia se referencian solo por IRI (sin declararlos
+    individuos), así que no aparecen en las búsquedas locales.
+
+    Args:
+        onto: Ontología a modificar (no se guarda en disco)
+        tabla: Tabla de enlaces
+        umbral: Confianza mínima
+        nombres: Solo estos individuos (None = todos los de la tabla)
+
+    Returns:
+        Cantidad de tripletas nuevas
+    """
+    nuevas = 0
+    individuos = {ind.name: ind for ind in onto.individuals()}
+    for nombre in (tabla.enlaces if nombres is None else nombres):
+        individuo = individuos.get(nombre)
+        enlace = tabla.enlaces.get(nombre)
+        if individuo is None or enlace is None or enlace["confianza"] < umbral:
+            continue
+        objeto = onto.world._abbreviate(enlace["uri"])
+        if not onto._has_obj_triple_spo(individuo.storid, owl_equivalentindividual, objeto):
+            onto._add_obj_triple_spo(individuo.storid, owl_equivalentindividual, objeto)
+            nuevas += 1
+    return nuevas
+
+
+def main():
+    from busqueda_local import cargar_ontologia_archivo
+    from dbpedia_connector import DBpediaConnector, DBpediaOffline
+
+    parser = argparse.ArgumentParser(description="Cálculo por lotes de enlaces con DBpedia")
+    parser.add_argument("--owl", default="criptomonedas.owl")
+    parser.add_argument("--salida", default=RUTA_ENLACES, help="Tabla de enlaces (JSON)")
+    parser.add_argument("--recalcular", action="store_true", help="Recalcular los enlaces existentes")
+    parser.add_argument("--sin-conexion", action="store_true", help="Usar solo dbpedia_cache.json")
+    parser.add_argument("--emitir-same-as", action="store_true",
+                        help="Guardar owl:sameAs de los enlaces confiables en el archivo OWL")
+    args = parser.parse_args()
+
+    onto = cargar_ontologia_archivo(args.owl)
+    tabla = TablaEnlaces(args.salida)
+    conector = None if args.sin_conexion else DBpediaConnector()
+    buscar = candidatos_desde(conector, DBpediaOffline())
+    registrados = calcular_enlaces([ind.name for ind in onto.individuals()], tabla, buscar, args.recalcular)
+    confiables = sum(1 for e in tabla.enlaces.values() if e["confianza"] >= UMBRAL_CONFIANZA)
+    print(f"Enlaces nuevos: {registrados}  total: {len(tabla)}  confiables: {confiables}")
+
+    if args.emitir_same_as:
+        nuevas = emitir_same_as(onto, tabla)
+        onto.save(file=os.path.abspath(args.owl))
+        print(f"owl:sameAs agregados: {nuevas}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Enriquecimiento masivo con DBpedia por lotes, concurrente y reanudable.
+
+DBpediaConnector.enriquecer_con_dbpedia resuelve un individuo por llamada,
+con una búsqueda de etiquetas (CONTAINS) en cada una. Para miles de
+individuos, este módulo los agrupa en lotes y resuelve cada lote con dos
+consultas VALUES:
+
+    1. por URI, para los individuos con enlace confiable (enlaces_dbpedia.py);
+    2. por etiqueta exacta, para el resto, con las variantes de su nombre
+       ("bitcoinCash" -> "Bitcoin Cash", "Bitcoin cash").
+
+Los lotes se ejecutan en varios hilos. Sus consultas salen por el
+limitador del transporte (limitador_salida.py) con prioridad "lote": la
+tasa la fija DBPEDIA_LIMITE_SPARQL y las búsquedas interactivas pasan
+delante. Cada lote terminado se guarda como un archivo Parquet en el
+directorio de progreso (identificado por los nombres que contiene), así
+que una ejecución interrumpida retoma solo los lotes que faltan. Al final
+las partes se unen en un único Parquet y los enlaces nuevos se registran en
+la tabla de enlaces.
+
+Uso:
+    python enriquecimiento_lotes.py --owl criptomonedas.owl --clase Criptomoneda
+    python enriquecimiento_lotes.py --salida enriquecimiento.parquet --lote 100 --hilos 8 --tasa 10
+    DBPEDIA_LIMITE_SPARQL=5/10 python enriquecimiento_lotes.py --hilos 8
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from enlaces_dbpedia import TablaEnlaces, calcular_confianza, normalizar
+from limitador_salida import prioridad
+from metricas import metricas
+
+ESQUEMA = pa.schema([
+    ("nombre", pa.string()),
+    ("uri", pa.string()),
+    ("etiqueta", pa.string()),
+    ("resumen", pa.string()),
+    ("miniatura", pa.string()),
+    ("sitio_web", pa.string()),
+    ("metodo", pa.string()),  # "uri", "etiqueta" o nulo si no se encontró
+    ("confianza", pa.float64()),
+])
+
+
+def etiquetas_candidatas(nombre: str) -> List[str]:
+    """Etiquetas en inglés con que se busca un nombre local ("bitcoinCash" -> "Bitcoin Cash")"""
+    normalizado = normalizar(nombre)
+    if not normalizado:
+        return []
+    return list(dict.fromkeys([normalizado.title(), normalizado.capitalize()]))
+
+
+def dividir_lotes(nombres: List[str], tamano: int) -> List[List[str]]:
+    """Lotes de nombres en un orden estable (el mismo en cada ejecución)"""
+    ordenados = sorted(set(nombres))
+    return [ordenados[i:i + tamano] for i in range(0, len(ordenados), tamano)]
+
+
+def id_lote(nombres: List[str]) -> str:
+    """Identificador del lote según su contenido: otra lista de entrada no reutiliza partes ajenas"""
+    return hashlib.sha1("\n".join(nombres).encode("utf-8")).hexdigest()[:16]
+
+
+def _fila(nombre: str, datos: Optional[Dict], metodo: Optional[str]) -> Dict:
+    if datos is None:
+        return {"nombre": nombre, "uri": None, "etiqueta": None, "resumen": None,
+                "miniatura": None, "sitio_web": None, "metodo": None, "confianza": None}
+    return {
+        "nombre": nombre,
+        "uri": datos["uri"],
+        "etiqueta": datos["label"],
+        "resumen": datos["abstract"] or None,
+        "miniatura": datos["thumbnail"] or None,
+        "sitio_web": datos["website"] or None,
+        "metodo": metodo,
+        "confianza": round(calcular_confianza(nombre, datos["label"], datos["uri"]), 3),
+    }
+
+
+def _escribir_parquet(tabla: pa.Table, ruta: str):
+    """Escribe de forma atómica (una parte a medio escribir no cuenta como terminada)"""
+    temporal = f"{ruta}.tmp"
+    pq.write_table(tabla, temporal)
+    os.replace(temporal, ruta)
+
+
+class EnriquecedorLotes:
+    """Enriquece individuos locales con DBpedia por lotes VALUES"""
+
+    def __init__(self, conector, enlaces: Optional[TablaEnlaces] = None, tamano_lote: int = 50,
+                 hilos: int = 4, reintentos: int = 2):
+        """
+        Args:
+            conector: DBpediaConnector (usa obtener_lote y buscar_etiquetas_lote)
+            enlaces: Tabla de enlaces para consultar por URI y registrar los nuevos
+            tamano_lote: Individuos por consulta
+            hilos: Lotes en curso a la vez (la tasa la limita el transporte del conector)
+            reintentos: Reintentos de un lote que falla antes de dejarlo pendiente
+        """
+        self.conector = conector
+        self.enlaces = enlaces
+        self.tamano_lote = tamano_lote
+        self.hilos = hilos
+        self.reintentos = reintentos
+
+    def enriquecer_lote(self, nombres: List[str]) -> List[Dict]:
+        """
+        Resuelve un lote: por URI los enlazados y por etiqueta exacta el resto
+
+        Returns:
+            Una fila (ver ESQUEMA) por nombre, en el mismo orden
+
+        Raises:
+            Los errores de las consultas, para que el lote se reintente
+        """
+        resultados: Dict[str, tuple] = {}
+        uris = {}
+        if self.enlaces is not None:
+            for nombre in nombres:
+                enlace = self.enlaces.obtener(nombre)
+                if enlace is not None:
+                    uris[nombre] = enlace["uri"]
+        if uris:
+            por_uri = self.conector.obtener_lote(list(dict.fromkeys(uris.values())))
+            for nombre, uri in uris.items():
+                if uri in por_uri:
+                    resultados[nombre] = (por_uri[uri], "uri")
+
+        candidatas = {nombre: etiquetas_candidatas(nombre) for nombre in nombres if nombre not in resultados}
+        etiquetas = list(dict.fromkeys(e for lista in candidatas.values() for e in lista))
+        if etiquetas:
+            por_etiqueta = self.conector.buscar_etiquetas_lote(etiquetas)
+            for nombre, lista in candidatas.items():
+                encontrada = next((e for e in lista if e in por_etiqueta), None)
+                if encontrada is not None:
+                    resultados[nombre] = (por_etiqueta[encontrada], "etiqueta")
+
+        return [_fila(nombre, *resultados.get(nombre, (None, None))) for nombre in nombres]
+
+    def _procesar(self, nombres: List[str], ruta_parte: str) -> pa.Table:
+        # Tráfico de fondo: cede el turno a las búsquedas interactivas en el limitador de salida
+        with prioridad("lote"), metricas.medir("enriquecimiento", "lote") as medicion:
+            for intento in range(self.reintentos + 1):
+                try:
+                    filas = self.enriquecer_lote(nombres)
+                    break
+                except Exception:
+                    if intento == self.reintentos:
+                        raise
+                    time.sleep(0.5 * 2 ** intento)
+            tabla = pa.Table.from_pylist(filas, schema=ESQUEMA)
+            _escribir_parquet(tabla, ruta_parte)
+            medicion.filas = sum(1 for f in filas if f["uri"] is not None)
+        return tabla
+
+    def ejecutar(self, nombres: List[str], salida: str, progreso: Optional[str] = None,
+                 conservar_progreso: bool = False) -> Dict:
+        """
+        Enriquece todos los nombres y escribe el resultado en un Parquet
+
+        Args:
+            nombres: Nombres de los individuos locales
+            salida: Archivo Parquet de salida
+            progreso: Directorio de las partes ya terminadas (por defecto <salida>.progreso)
+            conservar_progreso: Si no se borra el directorio de progreso al terminar
+
+        Returns:
+            Resumen con lotes, reanudados, fallidos, individuos y encontrados; si
+            algún lote falló no se escribe la salida (se retoma en la próxima ejecución)
+        """
+        progreso = progreso or f"{salida}.progreso"
+        os.makedirs(progreso, exist_ok=True)
+        lotes = dividir_lotes(nombres, self.tamano_lote)
+        rutas = [os.path.join(progreso, f"{id_lote(lote)}.parquet") for lote in lotes]
+        pendientes = [(lote, ruta) for lote, ruta in zip(lotes, rutas) if not os.path.exists(ruta)]
+        resumen = {"lotes": len(lotes), "reanudados": len(lotes) - len(pendientes), "fallidos": 0,
+                   "individuos": sum(len(lote) for lote in lotes), "encontrados": 0, "salida": None}
+
+        with ThreadPoolExecutor(max_workers=max(1, self.hilos)) as ejecutor:
+            futuros = {ejecutor.submit(self._procesar, lote, ruta): lote for lote, ruta in pendientes}
+            for futuro in as_completed(futuros):
+                try:
+                    futuro.result()
+                except Exception as e:
+                    resumen["fallidos"] += 1
+                    resumen["ultimo_error"] = str(e)
+        if resumen["fallidos"]:
+            return resumen
+
+        tabla = pa.concat_tables([pq.read_table(ruta, schema=ESQUEMA) for ruta in rutas]) if rutas \
+            else ESQUEMA.empty_table()
+        _escribir_parquet(tabla, salida)
+        encontrados = [f for f in tabla.to_pylist() if f["uri"] is not None]
+        resumen.update(encontrados=len(encontrados), salida=salida)
+        if self.enlaces is not None:
+            for fila in encontrados:
+                if fila["metodo"] == "etiqueta":
+                    candidato = {"uri": fila["uri"], "label": fila["etiqueta"]}
+                    self.enlaces.vincular(fila["nombre"], [candidato], "lote_values", guardar=False)
+            self.enlaces.guardar()
+        if not conservar_progreso:
+            shutil.rmtree(progreso, ignore_errors=True)
+        return resumen
+
+
+def main():
+    from busqueda_local import cargar_ontologia_archivo
+    from dbpedia_connector import DBpediaConnector
+
+    parser = argparse.ArgumentParser(description="Enriquecimiento masivo con DBpedia por lotes")
+    parser.add_argument("--owl", default="criptomonedas.owl")
+    parser.add_argument("--clase", help="Solo las instancias de esta clase (por defecto, todos los individuos)")
+    parser.add_argument("--salida", default="enriquecimiento.parquet")
+    parser.add_argument("--progreso", help="Directorio de progreso (por defecto <salida>.progreso)")
+    parser.add_argument("--lote", type=int, default=50, help="Individuos por consulta")
+    parser.add_argument("--hilos", type=int, default=4)
+    parser.add_argument("--tasa", help="Consultas SPARQL por segundo en el limitador de salida, p. ej. 5 o 5/10 "
+                                       "(por defecto DBPEDIA_LIMITE_SPARQL o 5)")
+    parser.add_argument("--sin-enlaces", action="store_true", help="No usar ni actualizar enlaces_dbpedia.json")
+    args = parser.parse_args()
+
+    onto = cargar_ontologia_archivo(args.owl)
+    if args.clase:
+        clase = onto.search_one(iri=f"*#{args.clase}")
+        if clase is None:
+            parser.error(f"Clase desconocida: {args.clase}")
+        nombres = [ind.name for ind in clase.instances()]
+    else:
+        nombres = [ind.name for ind in onto.individuals()]
+
+    # Antes de crear el conector: el transporte compartido lee su presupuesto al crearse
+    if args.tasa:
+        os.environ["DBPEDIA_LIMITE_SPARQL"] = args.tasa
+    else:
+        os.environ.setdefault("DBPEDIA_LIMITE_SPARQL", "5")
+    enriquecedor = EnriquecedorLotes(
+        DBpediaConnector(), None if args.sin_enlaces else TablaEnlaces(),
+        tamano_lote=args.lote, hilos=args.hilos
+    )
+    inicio = time.perf_counter()
+    resumen = enriquecedor.ejecutar(nombres, args.salida, args.progreso)
+    print(f"Lotes: {resumen['lotes']} ({resumen['reanudados']} retomados, {resumen['fallidos']} fallidos)")
+    if resumen["fallidos"]:
+        print(f"Error: {resumen['ultimo_error']}. Vuelva a ejecutar para retomar los lotes pendientes")
+    else:
+        print(f"Encontrados: {resumen['encontrados']} de {resumen['individuos']} -> {resumen['salida']}")
+    print(f"Tiempo: {time.perf_counter() - inicio:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Estadísticas y resumen del esquema de la ontología, por versión.
+
+En lugar de materializar listas completas de clases, propiedades e
+individuos en cada rerun solo para contarlas, el resumen se calcula una vez
+por versión de la ontología y se actualiza de forma incremental al importar
+o recargar individuos (se restan sus fichas anteriores y se suman las
+nuevas). Incluye:
+
+    - las clases (con sus superclases con nombre) y las propiedades de datos
+      y de objeto, ordenadas;
+    - las instancias afirmadas de cada clase (con o sin subclases, sin contar
+      dos veces a un individuo afirmado en la clase y en su superclase);
+    - por propiedad: aserciones, individuos que la usan y frecuencia de cada
+      valor, de donde salen la cardinalidad (valores distintos) y la
+      estimación de resultados que usan las facetas para planificar.
+"""
+
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set
+
+from metricas import metricas
+
+TIPO_DATOS = "datos"
+TIPO_OBJETO = "objeto"
+
+
+class EstadisticasOntologia:
+    """Conteos por clase y por propiedad, actualizables por individuo"""
+
+    def __init__(self, clases: Dict[str, List[str]], propiedades: Dict[str, str], fichas: Iterable[Dict]):
+        """
+        Args:
+            clases: Nombre de cada clase -> nombres de sus superclases directas
+            propiedades: Nombre de cada propiedad -> "datos" u "objeto"
+            fichas: Individuos como diccionarios con "nombre", "tipos" y
+                "propiedades" (formato de individuo_a_dict)
+        """
+        with metricas.medir("estadisticas", "construir") as medicion:
+            self.superclases = {clase: list(padres) for clase, padres in clases.items()}
+            self.subclases: Dict[str, List[str]] = {clase: [] for clase in clases}
+            for clase, padres in self.superclases.items():
+                for padre in padres:
+                    self.subclases.setdefault(padre, []).append(clase)
+            self.clases = sorted(clases)
+            self.tipos_propiedad = dict(propiedades)
+            self.propiedades_datos = sorted(p for p, t in propiedades.items() if t == TIPO_DATOS)
+            self.propiedades_objeto = sorted(p for p, t in propiedades.items() if t == TIPO_OBJETO)
+
+            self.cantidad_individuos = 0
+            # Clase -> nombres de sus instancias afirmadas
+            self.miembros: Dict[str, Set[str]] = {}
+            self.usos: Counter = Counter()
+            self.sujetos: Counter = Counter()
+            self.valores: Dict[str, Counter] = {p: Counter() for p in propiedades}
+            self._resumen: Optional[Dict] = None
+            medicion.filas = self.agregar(fichas)
+
+    @classmethod
+    def desde_ontologia(cls, onto) -> "EstadisticasOntologia":
+        """Estadísticas de una ontología de owlready2"""
+        from busqueda_local import individuo_a_dict
+
+        clases_onto = set(onto.classes())
+        clases = {
+            clase.name: [padre.name for padre in clase.is_a if padre in clases_onto]
+            for clase in clases_onto
+        }
+        propiedades = {p.name: TIPO_DATOS for p in onto.data_properties()}
+        propiedades.update({p.name: TIPO_OBJETO for p in onto.object_properties()})
+        return cls(clases, propiedades, (individuo_a_dict(ind) for ind in onto.individuals()))
+
+    @classmethod
+    def desde_indice(cls, indice) -> "EstadisticasOntologia":
+        """Estadísticas a partir de un índice mmap (sin jerarquía de clases ni tipo de propiedad)"""
+        fichas = [indice.individuo(i) for i in range(indice.cantidad_individuos)]
+        propiedades = {p: TIPO_DATOS for ficha in fichas for p in ficha["propiedades"]}
+        return cls({clase: [] for clase in indice.listar_clases()}, propiedades, fichas)
+
+    # ---------- Actualización incremental ----------
+
+    def _aplicar(self, fichas: Iterable[Dict], signo: int) -> int:
+        cantidad = 0
+        for ficha in fichas:
+            cantidad += 1
+            for clase in ficha["tipos"]:
+                miembros = self.miembros.setdefault(clase, set())
+                if signo > 0:
+                    miembros.add(ficha["nombre"])
+                else:
+                    miembros.discard(ficha["nombre"])
+            for propiedad, valores in ficha["propiedades"].items():
+                self.usos[propiedad] += signo * len(valores)
+                self.sujetos[propiedad] += signo
+                frecuencias = self.valores.setdefault(propiedad, Counter())
+                for valor in valores:
+                    frecuencias[valor] += signo
+                    if frecuencias[valor] <= 0:
+                        del frecuencias[valor]
+        self.cantidad_individuos += signo * cantidad
+        self._resumen = None
+        return cantidad
+
+    def agregar(self, fichas: Iterable[Dict]) -> int:
+        """Suma individuos nuevos (o la versión nueva de individuos modificados)"""
+        return self._aplicar(fichas, 1)
+
+    def quitar(self, fichas: Iterable[Dict]) -> int:
+        """Resta individuos eliminados (o la versión anterior de individuos modificados)"""
+        return self._aplicar(fichas, -1)
+
+    # ---------- Consultas ----------
+
+    def instancias(self, clase: str, incluir_subclases: bool = True) -> int:
+        """Instancias afirmadas de una clase (y, si se pide, de sus subclases)"""
+        if not incluir_subclases:
+            return len(self.miembros.get(clase, ()))
+        instancias: Set[str] = set()
+        pendientes, vistas = [clase], set()
+        while pendientes:
+            actual = pendientes.pop()
+            if actual in vistas:
+                continue
+            vistas.add(actual)
+            instancias |= self.miembros.get(actual, set())
+            pendientes.extend(self.subclases.get(actual, ()))
+        return len(instancias)
+
+    def cardinalidad(self, propiedad: str) -> int:
+        """Cantidad de valores distintos de una propiedad"""
+        return len(self.valores.get(propiedad, ()))
+
+    def frecuencias(self, propiedad: str) -> Dict[str, int]:
+        """Cantidad de individuos con cada valor de una propiedad"""
+        return dict(self.valores.get(propiedad, {}))
+
+    def estimar(self, propiedad: str, valores: Optional[Iterable[str]] = None) -> int:
+        """
+        Cota superior de los individuos con alguno de los valores (todos los
+        que usan la propiedad si no se dan valores)
+        """
+        if valores is None:
+            return self.sujetos.get(propiedad, 0)
+        frecuencias = self.valores.get(propiedad, {})
+        return min(sum(frecuencias.get(v, 0) for v in valores), self.cantidad_individuos)
+
+    def resumen(self) -> Dict:
+        """Resumen serializable: conteos generales, por clase y por propiedad (se guarda hasta el próximo cambio)"""
+        if self._resumen is None:
+            self._resumen = self._calcular_resumen()
+        return self._resumen
+
+    def _calcular_resumen(self) -> Dict:
+        return {
+            "clases": len(self.clases),
+            "propiedades": len(self.tipos_propiedad),
+            "individuos": self.cantidad_individuos,
+            "lista_clases": self.clases,
+            "propiedades_datos": self.propiedades_datos,
+            "propiedades_objeto": self.propiedades_objeto,
+            "instancias_por_clase": {c: self.instancias(c) for c in self.clases},
+            "uso_propiedades": {
+                p: {
+                    "tipo": self.tipos_propiedad.get(p, TIPO_DATOS),
+                    "aserciones": self.usos.get(p, 0),
+                    "individuos": self.sujetos.get(p, 0),
+                    "valores_distintos": self.cardinalidad(p),
+                }
+                for p in sorted(self.tipos_propiedad)
+            },
+        }
@@ -0,0 +1,171 @@
+"""
+Búsqueda facetada con índices de mapas de bits.
+
+Para cada propiedad categórica (faceta) y cada uno de sus valores se guarda
+un mapa de bits sobre los individuos: el bit i está encendido si el
+individuo i tiene ese valor. Los mapas son enteros de Python, así que
+combinar filtros es un AND/OR bit a bit y contar resultados es un
+int.bit_count(), sin recorrer individuos: profundizar por varias facetas
+cuesta microsegundos sin importar cuántos resultados haya.
+
+Dentro de una misma faceta los valores seleccionados se combinan con OR;
+entre facetas se usa el operador elegido ("AND" u "OR").
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from busqueda_local import valores_como_texto
+from metricas import metricas
+
+FACETAS_PREDETERMINADAS = (
+    "nivelDeRiesgo", "algoritmoConsenso", "tipoToken", "tipoEstafa",
+    "volatilidad", "escalabilidad", "jurisdiccionLegal",
+)
+OPERADORES = ("AND", "OR")
+
+
+def bits_a_ids(mapa: int) -> List[int]:
+    """Posiciones de los bits encendidos, en orden creciente"""
+    crudo = np.frombuffer(mapa.to_bytes((mapa.bit_length() + 7) // 8, "little"), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(crudo, bitorder="little")).tolist()
+
+
+def ids_a_bits(ids: Iterable[int], cantidad: int) -> int:
+    """Mapa de bits con los ids dados encendidos"""
+    bits = np.zeros(cantidad, dtype=np.uint8)
+    bits[np.fromiter(ids, dtype=np.int64)] = 1
+    return int.from_bytes(np.packbits(bits, bitorder="little").tobytes(), "little")
+
+
+class IndiceFacetas:
+    """Mapas de bits por valor de cada faceta"""
+
+    def __init__(self, nombres: Sequence[str], valores: Iterable[Dict[str, List[str]]],
+                 facetas: Iterable[str] = FACETAS_PREDETERMINADAS):
+        """
+        Args:
+            nombres: Nombre de cada individuo (el id es la posición)
+            valores: Propiedades de cada individuo, en el mismo orden (propiedad -> valores)
+            facetas: Propiedades que se indexan como facetas
+        """
+        with metricas.medir("facetas", "construir") as medicion:
+            self.nombres = list(nombres)
+            self.facetas = list(facetas)
+            self.universo = (1 << len(self.nombres)) - 1
+            # mapas[faceta][valor] -> mapa de bits de los individuos con ese valor
+            ids: Dict[str, Dict[str, List[int]]] = {faceta: {} for faceta in self.facetas}
+            for i, propiedades in enumerate(valores):
+                for faceta in self.facetas:
+                    for valor in propiedades.get(faceta, ()):
+                        ids[faceta].setdefault(valor, []).append(i)
+            cantidad = len(self.nombres)
+            self.mapas: Dict[str, Dict[str, int]] = {
+                faceta: {valor: ids_a_bits(lista, cantidad) for valor, lista in por_valor.items()}
+                for faceta, por_valor in ids.items()
+            }
+            medicion.filas = sum(len(por_valor) for por_valor in self.mapas.values())
+
+    @classmethod
+    def desde_ontologia(cls, onto, facetas: Iterable[str] = FACETAS_PREDETERMINADAS) -> "IndiceFacetas":
+        """Índice sobre los individuos de una ontología de owlready2"""
+        facetas = list(facetas)
+        individuos = list(onto.individuals())
+        posicion = {ind.storid: i for i, ind in enumerate(individuos)}
+        valores: List[Dict[str, List[str]]] = [{} for _ in individuos]
+        for prop in list(onto.data_properties()) + list(onto.object_properties()):
+            if prop.name not in facetas:
+                continue
+            for sujeto, valor in prop.get_relations():
+                i = posicion.get(getattr(sujeto, "storid", None))
+                if i is not None:
+                    valores[i].setdefault(prop.name, []).extend(valores_como_texto([valor]))
+        return cls([ind.name for ind in individuos], valores, facetas)
+
+    @classmethod
+    def desde_indice(cls, indice, facetas: Iterable[str] = FACETAS_PREDETERMINADAS) -> "IndiceFacetas":
+        """Índice a partir de un índice mmap (indice_mmap.IndiceMmap)"""
+        fichas = [indice.individuo(i) for i in range(indice.cantidad_individuos)]
+        return cls([f["nombre"] for f in fichas], [f["propiedades"] for f in fichas], facetas)
+
+    # ---------- Combinación de filtros ----------
+
+    def _mapa_faceta(self, faceta: str, valores: Iterable[str]) -> int:
+        """OR de los valores seleccionados de una faceta"""
+        if faceta not in self.mapas:
+            raise KeyError(f"Faceta desconocida: {faceta}")
+        mapa = 0
+        for valor in valores:
+            mapa |= self.mapas[faceta].get(valor, 0)
+        return mapa
+
+    def _combinar(self, mapas: List[int], operador: str) -> int:
+        if not mapas:
+            return self.universo
+        resultado = mapas[0]
+        for mapa in mapas[1:]:
+            if operador == "AND":
+                resultado &= mapa
+                # Con las facetas más selectivas primero, el AND suele vaciarse enseguida
+                if not resultado:
+                    break
+            else:
+                resultado |= mapa
+        return resultado
+
+    def filtrar(self, selecciones: Dict[str, List[str]], operador: str = "AND",
+                candidatos: Optional[Iterable[int]] = None) -> int:
+        """
+        Mapa de bits de los individuos que cumplen los filtros
+
+        Args:
+            selecciones: Faceta -> valores seleccionados (OR dentro de la faceta)
+            operador: "AND" u "OR" entre facetas
+            candidatos: Ids a los que se restringe el resultado (p. ej. una búsqueda por texto)
+
+        Returns:
+            Mapa de bits (entero) del resultado
+        """
+        if operador not in OPERADORES:
+            raise ValueError(f"Operador desconocido: {operador}")
+        mapas = [self._mapa_faceta(f, v) for f, v in selecciones.items() if v]
+        return self._combinar(mapas, operador) & self._mapa_candidatos(candidatos)
+
+    def _mapa_candidatos(self, candidatos: Optional[Iterable[int]]) -> int:
+        if candidatos is None:
+            return self.universo
+        return ids_a_bits(candidatos, len(self.nombres))
+
+    def conteos(self, selecciones: Dict[str, List[str]], operador: str = "AND",
+                candidatos: Optional[Iterable[int]] = None) -> Dict[str, Dict[str, int]]:
+        """
+        Cantidad de resultados de cada valor de cada faceta con los filtros actuales
+
+        El conteo de un valor combina ese valor con los filtros de las demás
+        facetas (no con la propia), de modo que se puede ver cuánto aportaría
+        sumarlo a la selección.
+        """
+        if operador not in OPERADORES:
+            raise ValueError(f"Operador desconocido: {operador}")
+        with metricas.medir("facetas", "conteos"):
+            por_faceta = {f: self._mapa_faceta(f, v) for f, v in selecciones.items() if v}
+            restriccion = self._mapa_candidatos(candidatos)
+            conteos = {}
+            for faceta, por_valor in self.mapas.items():
+                otras = [m for f, m in por_faceta.items() if f != faceta]
+                if operador == "AND":
+                    base = self._combinar(otras, "AND")
+                    conteos[faceta] = {v: (base & m & restriccion).bit_count() for v, m in por_valor.items()}
+                else:
+                    base = self._combinar(otras, "OR") if otras else 0
+                    conteos[faceta] = {v: ((base | m) & restriccion).bit_count() for v, m in por_valor.items()}
+        return conteos
+
+    def buscar(self, selecciones: Dict[str, List[str]], operador: str = "AND",
+               candidatos: Optional[Iterable[int]] = None) -> List[int]:
+        """Ids de los individuos que cumplen los filtros"""
+        with metricas.medir("facetas", "filtrar") as medicion:
+            ids = bits_a_ids(self.filtrar(selecciones, operador, candidatos))
+            medicion.filas = len(ids)
+        return ids
@@ -0,0 +1,176 @@
+"""
+Formatos de resultados SPARQL: JSON, TSV y CSV.
+
+El JSON de resultados SPARQL repite el nombre de cada variable, su tipo y su
+idioma en cada celda. TSV y CSV envían una fila de texto por resultado y
+suelen ocupar la mitad o menos. Este módulo lee los tres formatos y siempre
+devuelve la estructura del JSON (head/results/bindings), así que quien
+procesa los resultados no depende del formato pedido:
+
+    - TSV conserva el tipo de cada término (<uri>, "literal"@en, _:nodo).
+    - CSV solo trae los valores; todas las celdas quedan como literales.
+
+También serializa resultados a TSV y CSV, que es lo que hace el servidor
+DBpedia simulado cuando se le piden estos formatos.
+"""
+
+import csv
+import io
+import json
+from typing import Dict, List
+
+FORMATOS = {
+    "json": "application/sparql-results+json",
+    "tsv": "text/tab-separated-values",
+    "csv": "text/csv",
+}
+
+_ESCAPES_TSV = {"t": "\t", "n": "\n", "r": "\r", '"': '"', "\\": "\\", "'": "'"}
+
+
+def tipo_contenido(formato: str) -> str:
+    """Tipo MIME de un formato ("json", "tsv" o "csv")"""
+    try:
+        return FORMATOS[formato]
+    except KeyError:
+        raise ValueError(f"Formato SPARQL desconocido: {formato}") from None
+
+
+def formato_de_tipo(tipo: str) -> str:
+    """Formato correspondiente a un tipo MIME o a un parámetro format= (por defecto json)"""
+    tipo = (tipo or "").lower()
+    if "tab-separated" in tipo or tipo == "tsv":
+        return "tsv"
+    if "csv" in tipo:
+        return "csv"
+    return "json"
+
+
+def analizar_resultados(cuerpo: bytes, formato: str = "json") -> Dict:
+    """
+    Convierte el cuerpo de una respuesta SPARQL al formato JSON de resultados
+
+    Args:
+        cuerpo: Bytes de la respuesta
+        formato: "json", "tsv" o "csv"
+
+    Returns:
+        Diccionario {"head": {"vars": [...]}, "results": {"bindings": [...]}}
+    """
+    if formato == "json":
+        return json.loads(cuerpo.decode("utf-8"))
+    texto = cuerpo.decode("utf-8")
+    if formato == "tsv":
+        return analizar_tsv(texto)
+    if formato == "csv":
+        return analizar_csv(texto)
+    raise ValueError(f"Formato SPARQL desconocido: {formato}")
+
+
+def analizar_tsv(texto: str) -> Dict:
+    """Lee resultados SPARQL en TSV (términos en sintaxis N-Triples)"""
+    if "\r" in texto:
+        texto = texto.replace("\r\n", "\n")
+    lineas = texto.split("\n")
+    variables = [v.strip().strip('"').lstrip("?") for v in lineas[0].split("\t")] if lineas[0] else []
+    bindings = []
+    agregar = bindings.append
+    # Términos analizados en línea, sin una llamada por celda (camino caliente en respuestas grandes)
+    for linea in lineas[1:]:
+        if not linea:
+            continue
+        fila = {}
+        for variable, termino in zip(variables, linea.split("\t")):
+            if not termino:
+                continue
+            inicial = termino[0]
+            if inicial == '"':
+                fin = termino.rfind('"')
+                valor = termino[1:fin]
+                if "\\" in valor:
+                    valor = _desescapar(valor)
+                if fin + 1 == len(termino):
+                    fila[variable] = {"type": "literal", "value": valor}
+                elif termino[fin + 1] == "@":
+                    fila[variable] = {"type": "literal", "xml:lang": termino[fin + 2:], "value": valor}
+                else:
+                    fila[variable] = {"type": "literal", "datatype": termino[fin + 4:-1], "value": valor}
+            elif inicial == "<":
+                fila[variable] = {"type": "uri", "value": termino[1:-1]}
+            elif inicial == "_" and termino.startswith("_:"):
+                fila[variable] = {"type": "bnode", "value": termino[2:]}
+            else:
+                # Números y booleanos sin comillas
+                fila[variable] = {"type": "literal", "value": termino}
+        agregar(fila)
+    return {"head": {"vars": variables}, "results": {"bindings": bindings}}
+
+
+def _desescapar(valor: str) -> str:
+    partes = []
+    i = 0
+    while True:
+        barra = valor.find("\\", i)
+        if barra < 0 or barra + 1 >= len(valor):
+            partes.append(valor[i:])
+            return "".join(partes)
+        partes.append(valor[i:barra])
+        siguiente = valor[barra + 1]
+        partes.append(_ESCAPES_TSV.get(siguiente, siguiente))
+        i = barra + 2
+
+
+def analizar_csv(texto: str) -> Dict:
+    """Lee resultados SPARQL en CSV (solo valores: todas las celdas son literales)"""
+    filas = csv.reader(io.StringIO(texto, newline=""))
+    variables = next(filas, [])
+    bindings = [
+        {variable: {"type": "literal", "value": valor} for variable, valor in zip(variables, fila) if valor}
+        for fila in filas if fila
+    ]
+    return {"head": {"vars": variables}, "results": {"bindings": bindings}}
+
+
+def serializar_tsv(resultados: Dict) -> bytes:
+    """Resultados SPARQL JSON a TSV"""
+    variables = _variables(resultados)
+    lineas = ["\t".join(f"?{v}" for v in variables)]
+    for fila in resultados["results"]["bindings"]:
+        lineas.append("\t".join(_a_termino(fila.get(v)) for v in variables))
+    return ("\n".join(lineas) + "\n").encode("utf-8")
+
+
+def _a_termino(celda) -> str:
+    if celda is None:
+        return ""
+    if celda.get("type") == "uri":
+        return f"<{celda['value']}>"
+    if celda.get("type") == "bnode":
+        return f"_:{celda['value']}"
+    valor = (celda["value"].replace("\\", "\\\\").replace('"', '\\"')
+             .replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r"))
+    if celda.get("xml:lang"):
+        return f'"{valor}"@{celda["xml:lang"]}'
+    if celda.get("datatype"):
+        return f'"{valor}"^^<{celda["datatype"]}>'
+    return f'"{valor}"'
+
+
+def serializar_csv(resultados: Dict) -> bytes:
+    """Resultados SPARQL JSON a CSV"""
+    variables = _variables(resultados)
+    salida = io.StringIO(newline="")
+    escritor = csv.writer(salida, lineterminator="\r\n")
+    escritor.writerow(variables)
+    for fila in resultados["results"]["bindings"]:
+        escritor.writerow([fila.get(v, {}).get("value", "") for v in variables])
+    return salida.getvalue().encode("utf-8")
+
+
+def _variables(resultados: Dict) -> List[str]:
+    variables = list(resultados.get("head", {}).get("vars", []))
+    for fila in resultados["results"]["bindings"]:
+        for variable in fila:
+            if variable not in variables:
+                variables.append(variable)
+    return variables
@@ -0,0 +1,220 @@
+"""
+Índice de adyacencia CSR sobre las propiedades de objeto.
+
+Todas las aristas (individuo -propiedad-> individuo) se compilan en arreglos
+NumPy en formato CSR (compressed sparse row): para cada nodo, un rango
+contiguo de vecinos y el id de la propiedad de cada arista. Hay una versión
+para aristas salientes y otra para entrantes. Las consultas de k saltos y de
+camino más corto son BFS por niveles: cada nivel expande toda la frontera de
+una vez con operaciones vectorizadas, así que escalan a millones de aristas.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from metricas import metricas
+
+DIRECCIONES = ("salida", "entrada", "ambas")
+
+
+def _compilar_csr(cantidad_nodos: int, origenes: np.ndarray, destinos: np.ndarray,
+                  propiedades: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Ordena las aristas por origen y devuelve (indptr, vecinos, propiedad de cada arista)"""
+    orden = np.argsort(origenes, kind="stable")
+    conteos = np.bincount(origenes, minlength=cantidad_nodos)
+    indptr = np.zeros(cantidad_nodos + 1, dtype=np.int64)
+    np.cumsum(conteos, out=indptr[1:])
+    return indptr, destinos[orden].astype(np.int32), propiedades[orden].astype(np.int16)
+
+
+class GrafoRelaciones:
+    """Grafo dirigido de individuos con aristas etiquetadas por propiedad"""
+
+    def __init__(self, nombres: Sequence[str], propiedades: Sequence[str],
+                 aristas: Iterable[Tuple[int, int, int]]):
+        """
+        Args:
+            nombres: Nombre de cada nodo (el id es la posición)
+            propiedades: Nombre de cada propiedad (el id es la posición)
+            aristas: Tuplas (origen, id de propiedad, destino) o arreglo de n x 3
+        """
+        with metricas.medir("grafo", "construir") as medicion:
+            self.nombres = list(nombres)
+            self.propiedades = list(propiedades)
+            self._id_nodo = {nombre: i for i, nombre in enumerate(self.nombres)}
+            self._id_propiedad = {nombre: i for i, nombre in enumerate(self.propiedades)}
+
+            if not isinstance(aristas, np.ndarray):
+                aristas = list(aristas)
+            datos = np.asarray(aristas, dtype=np.int64).reshape(-1, 3)
+            origenes, props, destinos = datos[:, 0], datos[:, 1], datos[:, 2]
+            n = len(self.nombres)
+            self.salida = _compilar_csr(n, origenes, destinos, props)
+            self.entrada = _compilar_csr(n, destinos, origenes, props)
+            self.cantidad_aristas = len(datos)
+            medicion.filas = self.cantidad_aristas
+
+    @classmethod
+    def desde_materializacion(cls, materializacion) -> "GrafoRelaciones":
+        """Grafo con las aristas afirmadas e inferidas (razonador.Materializacion)"""
+        individuos = list(materializacion.onto.individuals())
+        id_nodo = {ind.storid: i for i, ind in enumerate(individuos)}
+        props = [p for p in materializacion.hechos if materializacion.hechos[p]]
+        aristas = [
+            (id_nodo[s], k, id_nodo[o])
+            for k, p in enumerate(props)
+            for s, objetos in materializacion.hechos[p].items() if s in id_nodo
+            for o in objetos if o in id_nodo
+        ]
+        nombres_props = [materializacion.mundo._get_by_storid(p).name for p in props]
+        return cls([ind.name for ind in individuos], nombres_props, aristas)
+
+    @classmethod
+    def desde_indice(cls, indice) -> "GrafoRelaciones":
+        """Grafo a partir de la adyacencia de un índice mmap (indice_mmap.IndiceMmap)"""
+        n = indice.cantidad_individuos
+        origenes = np.repeat(np.arange(n), np.diff(indice.ady_desp.astype(np.int64)))
+        ids_props, props = np.unique(indice.ady_prop, return_inverse=True)
+        nombres = [indice.cadena(int(indice.ind_nombre[i])) for i in range(n)]
+        aristas = zip(origenes.tolist(), props.tolist(), indice.ady_destino.tolist())
+        return cls(nombres, [indice.cadena(int(p)) for p in ids_props], aristas)
+
+    # ---------- Utilidades ----------
+
+    def id_nodo(self, nombre: str) -> int:
+        if nombre not in self._id_nodo:
+            raise KeyError(f"Individuo desconocido: {nombre}")
+        return self._id_nodo[nombre]
+
+    def _mascara_propiedades(self, propiedades: Optional[Iterable[str]]) -> Optional[np.ndarray]:
+        if not propiedades:
+            return None
+        mascara = np.zeros(max(1, len(self.propiedades)), dtype=bool)
+        for nombre in propiedades:
+            if nombre in self._id_propiedad:
+                mascara[self._id_propiedad[nombre]] = True
+        return mascara
+
+    def _expandir(self, frontera: np.ndarray, direccion: str, mascara: Optional[np.ndarray]):
+        """Vecinos de toda la frontera: (origen, vecino, propiedad, invertida) de cada arista"""
+        partes = []
+        csrs = []
+        if direccion in ("salida", "ambas"):
+            csrs.append((self.salida, False))
+        if direccion in ("entrada", "ambas"):
+            csrs.append((self.entrada, True))
+        for (indptr, vecinos, props), invertida in csrs:
+            inicios = indptr[frontera]
+            largos = indptr[frontera + 1] - inicios
+            total = int(largos.sum())
+            if total == 0:
+                continue
+            # Índices de todas las aristas de la frontera sin bucles de Python
+            desplazamiento = np.repeat(inicios - np.cumsum(largos) + largos, largos)
+            posiciones = desplazamiento + np.arange(total)
+            partes.append((np.repeat(frontera, largos), vecinos[posiciones], props[posiciones],
+                           np.full(total, invertida)))
+        if not partes:
+            vacio = np.empty(0, dtype=np.int64)
+            return vacio, vacio, vacio, np.empty(0, dtype=bool)
+        origenes, destinos, props, invertidas = (np.concatenate(p) for p in zip(*partes))
+        if mascara is not None:
+            seleccion = mascara[props]
+            origenes, destinos = origenes[seleccion], destinos[seleccion]
+            props, invertidas = props[seleccion], invertidas[seleccion]
+        return origenes, destinos, props, invertidas
+
+    # ---------- Consultas ----------
+
+    def vecindario(self, nombre: str, k: int = 2, propiedades: Optional[Iterable[str]] = None,
+                   direccion: str = "salida") -> List[Dict]:
+        """
+        Individuos alcanzables en k saltos o menos
+
+        Args:
+            nombre: Individuo de origen
+            k: Número máximo de saltos
+            propiedades: Propiedades a recorrer (None = todas)
+            direccion: "salida", "entrada" o "ambas"
+
+        Returns:
+            Lista de {"nombre", "distancia"} ordenada por distancia y nombre
+        """
+        if direccion not in DIRECCIONES:
+            raise ValueError(f"Dirección desconocida: {direccion}")
+        with metricas.medir("grafo", "vecindario") as medicion:
+            origen = self.id_nodo(nombre)
+            mascara = self._mascara_propiedades(propiedades)
+            distancia = np.full(len(self.nombres), -1, dtype=np.int32)
+            distancia[origen] = 0
+            frontera = np.array([origen], dtype=np.int64)
+            for salto in range(1, k + 1):
+                vecinos = self._expandir(frontera, direccion, mascara)[1]
+                vecinos = np.unique(vecinos)
+                nuevos = vecinos[distancia[vecinos] < 0]
+                if len(nuevos) == 0:
+                    break
+                distancia[nuevos] = salto
+                frontera = nuevos.astype(np.int64)
+            alcanzados = np.flatnonzero(distancia > 0)
+            resultado = sorted(
+                ({"nombre": self.nombres[i], "distancia": int(distancia[i])} for i in alcanzados),
+                key=lambda fila: (fila["distancia"], fila["nombre"])
+            )
+            medicion.filas = len(resultado)
+        return resultado
+
+    def camino_mas_corto(self, origen: str, destino: str, propiedades: Optional[Iterable[str]] = None,
+                         direccion: str = "salida") -> Optional[List[Dict]]:
+        """
+        Camino con menos saltos entre dos individuos
+
+        Args:
+            origen: Individuo de partida
+            destino: Individuo de llegada
+            propiedades: Propiedades a recorrer (None = todas)
+            direccion: "salida", "entrada" o "ambas"
+
+        Returns:
+            Lista de pasos {"desde", "propiedad", "hasta", "invertida"} (vacía si
+            origen == destino) o None si no hay camino; "invertida" indica que la
+            arista se recorrió de destino a origen
+        """
+        if direccion not in DIRECCIONES:
+            raise ValueError(f"Dirección desconocida: {direccion}")
+        with metricas.medir("grafo", "camino") as medicion:
+            inicio, fin = self.id_nodo(origen), self.id_nodo(destino)
+            mascara = self._mascara_propiedades(propiedades)
+            padre = np.full(len(self.nombres), -1, dtype=np.int64)
+            propiedad_padre = np.full(len(self.nombres), -1, dtype=np.int64)
+            invertida_padre = np.zeros(len(self.nombres), dtype=bool)
+            padre[inicio] = inicio
+            frontera = np.array([inicio], dtype=np.int64)
+            while len(frontera) and padre[fin] < 0:
+                origenes, vecinos, props, invertidas = self._expandir(frontera, direccion, mascara)
+                nuevos = padre[vecinos] < 0
+                origenes, vecinos = origenes[nuevos], vecinos[nuevos]
+                props, invertidas = props[nuevos], invertidas[nuevos]
+                # Primera arista que llega a cada vecino nuevo
+                vecinos, primeras = np.unique(vecinos, return_index=True)
+                padre[vecinos] = origenes[primeras]
+                propiedad_padre[vecinos] = props[primeras]
+                invertida_padre[vecinos] = invertidas[primeras]
+                frontera = vecinos.astype(np.int64)
+
+            if padre[fin] < 0:
+                return None
+            camino = []
+            nodo = fin
+            while nodo != inicio:
+                camino.append({
+                    "desde": self.nombres[int(padre[nodo])],
+                    "propiedad": self.propiedades[int(propiedad_padre[nodo])],
+                    "hasta": self.nombres[int(nodo)],
+                    "invertida": bool(invertida_padre[nodo]),
+                })
+                nodo = int(padre[nodo])
+            camino.reverse()
+            medicion.filas = len(camino)
+        return camino
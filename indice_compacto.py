@@ -0,0 +1,230 @@
+"""
+Índice invertido compacto en memoria para las búsquedas locales.
+
+En lugar de un diccionario de listas de objetos de owlready2, el índice usa:
+
+    - una única tabla de cadenas: los textos distintos (nombres y valores de
+      propiedades en minúsculas) concatenados en un bloque de bytes NumPy,
+      ordenados, con un arreglo uint32 de desplazamientos;
+    - ids enteros de individuos (posición en onto.individuals()) y un único
+      arreglo de referencias id -> individuo;
+    - listas de apariciones (postings) ordenadas y codificadas como deltas en
+      varint, todas en un único arreglo uint8 con desplazamientos por texto.
+
+Una búsqueda por subcadena recorre el bloque de textos con bytes.find y une
+las listas de los textos que coinciden, con el mismo resultado que recorrer
+la ontología. `reporte_memoria` compara su tamaño con el índice ingenuo.
+
+Uso:
+    python indice_compacto.py criptomonedas.owl
+"""
+
+import argparse
+import sys
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from busqueda_local import cargar_ontologia_archivo, valores_como_texto
+from metricas import metricas
+
+SEPARADOR = b"\x00"
+
+
+def codificar_deltas(ids: Iterable[int]) -> bytes:
+    """Codifica una lista creciente de enteros como deltas varint (7 bits por byte)"""
+    salida = bytearray()
+    anterior = 0
+    for identificador in ids:
+        delta = identificador - anterior
+        anterior = identificador
+        while delta >= 0x80:
+            salida.append((delta & 0x7F) | 0x80)
+            delta >>= 7
+        salida.append(delta)
+    return bytes(salida)
+
+
+def decodificar_deltas(datos) -> List[int]:
+    """Inverso de codificar_deltas"""
+    ids = []
+    actual = 0
+    valor = 0
+    desplazamiento = 0
+    for byte in datos:
+        valor |= (byte & 0x7F) << desplazamiento
+        if byte & 0x80:
+            desplazamiento += 7
+            continue
+        actual += valor
+        ids.append(actual)
+        valor = 0
+        desplazamiento = 0
+    return ids
+
+
+def _texto(valor: str) -> bytes:
+    return valor.lower().encode("utf-8").replace(SEPARADOR, b"")
+
+
+class IndiceCompacto:
+    """Índice de nombres y valores con postings comprimidos"""
+
+    def __init__(self, onto):
+        with metricas.medir("indice_compacto", "construir") as medicion:
+            self.individuos = list(onto.individuals())
+            por_nombre: Dict[bytes, List[int]] = {}
+            por_texto: Dict[bytes, List[int]] = {}
+            for i, ind in enumerate(self.individuos):
+                nombre = _texto(ind.name)
+                por_nombre.setdefault(nombre, []).append(i)
+                textos = {nombre}
+                for prop in ind.get_properties():
+                    textos.update(_texto(t) for t in valores_como_texto(prop[ind]))
+                for texto in textos:
+                    por_texto.setdefault(texto, []).append(i)
+
+            # Tabla única de textos ordenados; el arreglo NumPy es una vista del bloque de bytes
+            textos = sorted(por_texto)
+            self.cantidad_textos = len(textos)
+            self.cantidad_individuos = len(self.individuos)
+            self.tabla_desp, self.bloque = _tabla(textos)
+            self.tabla = np.frombuffer(self.bloque, dtype=np.uint8)
+
+            # El nombre de cada individuo siempre está entre sus textos
+            self.nombres_desp, self.nombres = _postings(textos, por_nombre)
+            self.texto_desp, self.postings_texto = _postings(textos, por_texto)
+            medicion.filas = len(self.individuos)
+            medicion.bytes = self.bytes_totales()
+
+    def texto(self, k: int) -> str:
+        """Texto k de la tabla (en minúsculas)"""
+        inicio, fin = self.tabla_desp[k:k + 2]
+        return self.tabla[inicio:fin - 1].tobytes().decode("utf-8")
+
+    def _textos_que_contienen(self, termino: str) -> List[int]:
+        """Posiciones en la tabla de los textos que contienen el término"""
+        patron = _texto(termino)
+        if not patron:
+            return list(range(self.cantidad_textos))
+        encontrados = []
+        posicion = self.bloque.find(patron)
+        while posicion != -1:
+            k = int(np.searchsorted(self.tabla_desp, posicion, side="right")) - 1
+            encontrados.append(k)
+            posicion = self.bloque.find(patron, int(self.tabla_desp[k + 1]))
+        return encontrados
+
+    def _buscar(self, termino: str, desplazamientos: np.ndarray, postings: np.ndarray) -> List[int]:
+        ids = set()
+        for k in self._textos_que_contienen(termino):
+            ids.update(decodificar_deltas(postings[desplazamientos[k]:desplazamientos[k + 1]]))
+        return sorted(ids)
+
+    def buscar_por_nombre(self, termino: str) -> List[int]:
+        """Ids de los individuos cuyo nombre contiene el término"""
+        return self._buscar(termino, self.nombres_desp, self.nombres)
+
+    def buscar_texto_completo(self, termino: str) -> List[int]:
+        """Ids de los individuos cuyo nombre o algún valor contiene el término"""
+        return self._buscar(termino, self.texto_desp, self.postings_texto)
+
+    def bytes_por_seccion(self) -> Dict[str, int]:
+        return {
+            "tabla_cadenas": sys.getsizeof(self.bloque) + self.tabla_desp.nbytes,
+            "postings_nombre": self.nombres.nbytes + self.nombres_desp.nbytes,
+            "postings_texto": self.postings_texto.nbytes + self.texto_desp.nbytes,
+            "ids_individuos": sys.getsizeof(self.individuos),
+        }
+
+    def bytes_totales(self) -> int:
+        return sum(self.bytes_por_seccion().values())
+
+
+def _tabla(cadenas: List[bytes]):
+    desplazamientos = np.zeros(len(cadenas) + 1, dtype=np.uint32)
+    desplazamientos[1:] = np.cumsum([len(c) + 1 for c in cadenas], dtype=np.uint64)
+    # Cada cadena termina en el separador para que una búsqueda no cruce dos textos
+    return desplazamientos, b"".join(c + SEPARADOR for c in cadenas)
+
+
+def _postings(textos: List[bytes], listas: Dict[bytes, List[int]]):
+    codificadas = [codificar_deltas(listas.get(texto, ())) for texto in textos]
+    desplazamientos = np.zeros(len(codificadas) + 1, dtype=np.uint32)
+    desplazamientos[1:] = np.cumsum([len(c) for c in codificadas], dtype=np.uint64)
+    return desplazamientos, np.frombuffer(b"".join(codificadas), dtype=np.uint8)
+
+
+def _tamano_profundo(objeto, vistos=None) -> int:
+    """Tamaño de diccionarios, listas y cadenas (sin contar los objetos de owlready2)"""
+    vistos = vistos if vistos is not None else set()
+    if id(objeto) in vistos:
+        return 0
+    vistos.add(id(objeto))
+    tamano = sys.getsizeof(objeto)
+    if isinstance(objeto, dict):
+        tamano += sum(_tamano_profundo(k, vistos) + _tamano_profundo(v, vistos) for k, v in objeto.items())
+    elif isinstance(objeto, list):
+        tamano += sum(_tamano_profundo(v, vistos) for v in objeto if isinstance(v, (str, int, list, dict)))
+    return tamano
+
+
+def indice_ingenuo(onto) -> Dict[str, Dict[str, List]]:
+    """Índice equivalente con diccionarios de listas de individuos (referencia de memoria)"""
+    por_nombre: Dict[str, List] = {}
+    por_texto: Dict[str, List] = {}
+    for ind in onto.individuals():
+        por_nombre.setdefault(ind.name.lower(), []).append(ind)
+        textos = {ind.name.lower()}
+        for prop in ind.get_properties():
+            textos.update(t.lower() for t in valores_como_texto(prop[ind]))
+        for texto in textos:
+            por_texto.setdefault(texto, []).append(ind)
+    return {"nombre": por_nombre, "texto": por_texto}
+
+
+def reporte_memoria(onto, indice: IndiceCompacto = None) -> Dict:
+    """
+    Compara la memoria del índice compacto con la del índice ingenuo
+
+    Args:
+        onto: Ontología cargada
+        indice: Índice compacto ya construido (si no, se construye)
+
+    Returns:
+        Diccionario con bytes totales, bytes por individuo y factor de reducción
+    """
+    indice = indice or IndiceCompacto(onto)
+    ingenuo = _tamano_profundo(indice_ingenuo(onto))
+    compacto = indice.bytes_totales()
+    individuos = max(1, indice.cantidad_individuos)
+    return {
+        "individuos": indice.cantidad_individuos,
+        "textos": indice.cantidad_textos,
+        "secciones": indice.bytes_por_seccion(),
+        "bytes_compacto": compacto,
+        "bytes_ingenuo": ingenuo,
+        "bytes_por_individuo_compacto": round(compacto / individuos, 1),
+        "bytes_por_individuo_ingenuo": round(ingenuo / individuos, 1),
+        "reduccion": round(ingenuo / compacto, 1) if compacto else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reporte de memoria del índice compacto")
+    parser.add_argument("owl", nargs="?", default="criptomonedas.owl")
+    args = parser.parse_args()
+
+    reporte = reporte_memoria(cargar_ontologia_archivo(args.owl))
+    print(f"Individuos: {reporte['individuos']}  textos distintos: {reporte['textos']}")
+    for seccion, cantidad in reporte["secciones"].items():
+        print(f"  {seccion:<18} {cantidad:>10} bytes")
+    print(f"Compacto: {reporte['bytes_compacto']} bytes "
+          f"({reporte['bytes_por_individuo_compacto']} por individuo)")
+    print(f"Ingenuo:  {reporte['bytes_ingenuo']} bytes "
+          f"({reporte['bytes_por_individuo_ingenuo']} por individuo)")
+    print(f"Reducción: {reporte['reduccion']}x")
+
+
+if __name__ == "__main__":
+    main()
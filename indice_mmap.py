@@ -0,0 +1,331 @@
+"""
+Índice compacto e inmutable de la ontología, en un solo archivo para mmap.
+
+El índice guarda, a partir de una ontología ya cargada, todo lo que
+necesitan las búsquedas locales: nombres, IRIs, clases de cada individuo,
+instancias de cada clase, valores de propiedades (como texto) y adyacencia
+por propiedades de objeto. Todo son arreglos de enteros y bloques de bytes,
+así que varios procesos trabajadores pueden abrir el mismo archivo con mmap
+y consultar sin copiarlo ni cargar owlready2: las páginas se comparten a
+través de la cache del sistema operativo.
+
+Formato (little-endian):
+    MAGIA (8 bytes) | largo de la cabecera (uint64) | cabecera JSON | secciones
+
+Cada sección empieza alineada a 8 bytes; la cabecera indica su
+desplazamiento, tipo NumPy y cantidad de elementos.
+
+Uso:
+    python indice_mmap.py criptomonedas.owl indices/criptomonedas.bsidx
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from busqueda_local import cargar_ontologia_archivo, valores_como_texto
+from metricas import metricas
+
+MAGIA = b"BSIDX001"
+VERSION_FORMATO = 1
+ALINEACION = 8
+
+# Separadores de los bloques de búsqueda (no pueden aparecer en un término)
+SEP_INDIVIDUO = b"\x00"
+SEP_VALOR = b"\x01"
+
+
+class ErrorIndice(Exception):
+    """Archivo de índice inválido o de otra versión"""
+
+
+class _TablaCadenas:
+    """Tabla única de cadenas (sin repetir) usada al construir el índice"""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.cadenas: List[bytes] = []
+
+    def id(self, texto: str) -> int:
+        identificador = self.ids.get(texto)
+        if identificador is None:
+            identificador = self.ids[texto] = len(self.cadenas)
+            self.cadenas.append(texto.encode("utf-8"))
+        return identificador
+
+    def arreglos(self) -> Tuple[np.ndarray, np.ndarray]:
+        return _bloque(self.cadenas)
+
+
+def _bloque(partes: List[bytes], separador: bytes = b"") -> Tuple[np.ndarray, np.ndarray]:
+    """Concatena las partes y devuelve (desplazamientos uint32, bytes uint8)"""
+    desplazamientos = np.zeros(len(partes) + 1, dtype=np.uint32)
+    posicion = 0
+    for i, parte in enumerate(partes):
+        desplazamientos[i] = posicion
+        posicion += len(parte) + len(separador)
+    desplazamientos[len(partes)] = posicion
+    datos = separador.join(partes) + (separador if partes else b"")
+    return desplazamientos, np.frombuffer(datos, dtype=np.uint8)
+
+
+def _csr(listas: List[List[int]], dtype=np.uint32) -> Tuple[np.ndarray, np.ndarray]:
+    """Listas de enteros en formato CSR (desplazamientos, valores)"""
+    desplazamientos = np.zeros(len(listas) + 1, dtype=np.uint32)
+    desplazamientos[1:] = np.cumsum([len(lista) for lista in listas], dtype=np.uint64)
+    valores = np.fromiter((v for lista in listas for v in lista), dtype=dtype,
+                          count=int(desplazamientos[-1]))
+    return desplazamientos, valores
+
+
+def _texto_busqueda(texto: str) -> bytes:
+    """Texto en minúsculas, sin los separadores reservados"""
+    return texto.lower().encode("utf-8").replace(SEP_INDIVIDUO, b"").replace(SEP_VALOR, b"")
+
+
+def construir_indice(onto, ruta: str) -> Dict:
+    """
+    Construye el índice de una ontología y lo escribe de forma atómica
+
+    Args:
+        onto: Ontología cargada
+        ruta: Archivo de salida
+
+    Returns:
+        Cabecera del índice escrito (conteos y secciones)
+    """
+    with metricas.medir("indice", "construir") as medicion:
+        individuos = list(onto.individuals())
+        posicion = {ind: i for i, ind in enumerate(individuos)}
+        cadenas = _TablaCadenas()
+
+        nombres, iris = [], []
+        clases_individuo, props_individuo, valores_individuo = [], [], []
+        ady_prop, ady_destino = [], []
+        bloque_nombres, bloque_texto = [], []
+
+        for ind in individuos:
+            nombres.append(cadenas.id(ind.name))
+            iris.append(cadenas.id(ind.iri))
+            clases_individuo.append([cadenas.id(c.name) for c in ind.is_a if hasattr(c, "name")])
+
+            props, valores, textos = [], [], []
+            propias, destinos = [], []
+            for prop in ind.get_properties():
+                brutos = prop[ind]
+                if not brutos:
+                    continue
+                if not isinstance(brutos, list):
+                    brutos = [brutos]
+                id_prop = cadenas.id(prop.name)
+                for bruto, texto in zip(brutos, valores_como_texto(brutos)):
+                    props.append(id_prop)
+                    valores.append(cadenas.id(texto))
+                    textos.append(_texto_busqueda(texto))
+                    if bruto in posicion:
+                        propias.append(id_prop)
+                        destinos.append(posicion[bruto])
+            props_individuo.append(props)
+            valores_individuo.append(valores)
+            ady_prop.append(propias)
+            ady_destino.append(destinos)
+
+            nombre_busqueda = _texto_busqueda(ind.name)
+            bloque_nombres.append(nombre_busqueda)
+            bloque_texto.append(SEP_VALOR.join([nombre_busqueda] + textos))
+
+        # Un solo recorrido de las clases; cada nombre se resuelve en el mapa (la primera con ese nombre)
+        todas = [c for c in onto.classes() if hasattr(c, "name")]
+        por_nombre = {}
+        for c in todas:
+            por_nombre.setdefault(c.name, c)
+        clases = sorted(c.name for c in todas)
+        instancias = [sorted(posicion[i] for i in por_nombre[nombre].instances() if i in posicion)
+                      for nombre in clases]
+
+        secciones = {}
+        secciones["cadenas_desp"], secciones["cadenas"] = cadenas.arreglos()
+        secciones["ind_nombre"] = np.array(nombres, dtype=np.uint32)
+        secciones["ind_iri"] = np.array(iris, dtype=np.uint32)
+        secciones["ind_clases_desp"], secciones["ind_clases"] = _csr(clases_individuo)
+        secciones["ind_props_desp"], secciones["ind_props"] = _csr(props_individuo)
+        _, secciones["ind_valores"] = _csr(valores_individuo)
+        secciones["ady_desp"], secciones["ady_prop"] = _csr(ady_prop)
+        _, secciones["ady_destino"] = _csr(ady_destino)
+        secciones["clases"] = np.array([cadenas.id(c) for c in clases], dtype=np.uint32)
+        secciones["clase_inst_desp"], secciones["clase_inst"] = _csr(instancias)
+        secciones["nombres_desp"], secciones["nombres"] = _bloque(bloque_nombres, SEP_INDIVIDUO)
+        secciones["texto_desp"], secciones["texto"] = _bloque(bloque_texto, SEP_INDIVIDUO)
+
+        cabecera = escribir_secciones(ruta, secciones, {
+            "version": VERSION_FORMATO,
+            "individuos": len(individuos),
+            "clases": len(clases),
+            "cadenas": len(cadenas.cadenas),
+            "origen": onto.base_iri,
+            "creado": time.time(),
+        })
+        medicion.filas = len(individuos)
+        medicion.bytes = os.path.getsize(ruta)
+    return cabecera
+
+
+def escribir_secciones(ruta: str, secciones: Dict[str, np.ndarray], datos: Dict) -> Dict:
+    """Escribe las secciones con su cabecera (tmp + rename, los lectores no se ven afectados)"""
+    # Los desplazamientos son relativos al inicio de los datos (tras la cabecera)
+    cabecera = dict(datos, secciones={})
+    posicion = 0
+    for nombre, arreglo in secciones.items():
+        cabecera["secciones"][nombre] = [posicion, arreglo.dtype.str, int(arreglo.size)]
+        posicion = _alinear(posicion + arreglo.nbytes)
+    texto = json.dumps(cabecera, sort_keys=True).encode("utf-8")
+    inicio_datos = _alinear(len(MAGIA) + 8 + len(texto))
+
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    os.makedirs(directorio, exist_ok=True)
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, "wb") as f:
+        f.write(MAGIA)
+        f.write(struct.pack("<Q", len(texto)))
+        f.write(texto)
+        for nombre, arreglo in secciones.items():
+            inicio = inicio_datos + cabecera["secciones"][nombre][0]
+            f.write(b"\x00" * (inicio - f.tell()))
+            f.write(np.ascontiguousarray(arreglo).tobytes())
+    os.replace(temporal, ruta)
+    return cabecera
+
+
+def _alinear(posicion: int) -> int:
+    return (posicion + ALINEACION - 1) // ALINEACION * ALINEACION
+
+
+class IndiceMmap:
+    """Índice de solo lectura mapeado en memoria (compartible entre procesos)"""
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self._archivo = open(ruta, "rb")
+        self._mm = mmap.mmap(self._archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIA)] != MAGIA:
+            self.cerrar()
+            raise ErrorIndice(f"{ruta} no es un índice de búsqueda")
+        (largo,) = struct.unpack_from("<Q", self._mm, len(MAGIA))
+        inicio = len(MAGIA) + 8
+        self.cabecera = json.loads(bytes(self._mm[inicio:inicio + largo]))
+        inicio_datos = _alinear(inicio + largo)
+        if self.cabecera.get("version") != VERSION_FORMATO:
+            self.cerrar()
+            raise ErrorIndice(f"Versión de índice no soportada: {self.cabecera.get('version')}")
+
+        # Vistas NumPy sobre el mmap: no copian datos
+        for nombre, (desplazamiento, tipo, cantidad) in self.cabecera["secciones"].items():
+            setattr(self, nombre, np.frombuffer(self._mm, dtype=np.dtype(tipo), count=cantidad,
+                                                offset=inicio_datos + desplazamiento))
+        self._inicio_nombres = inicio_datos + self.cabecera["secciones"]["nombres"][0]
+        self._inicio_texto = inicio_datos + self.cabecera["secciones"]["texto"][0]
+        self._clases = {self.cadena(int(i)): k for k, i in enumerate(self.clases)}
+
+    def cerrar(self):
+        """Libera el mmap (las vistas NumPy dejan de ser válidas)"""
+        for nombre in getattr(self, "cabecera", {}).get("secciones", {}):
+            self.__dict__.pop(nombre, None)
+        try:
+            self._mm.close()
+        except BufferError:
+            pass  # Aún hay vistas vivas; el mmap se libera con ellas
+        self._archivo.close()
+
+    @property
+    def cantidad_individuos(self) -> int:
+        return int(self.cabecera["individuos"])
+
+    def cadena(self, identificador: int) -> str:
+        inicio = int(self.cadenas_desp[identificador])
+        fin = int(self.cadenas_desp[identificador + 1])
+        return self.cadenas[inicio:fin].tobytes().decode("utf-8")
+
+    def _rango(self, desplazamientos: np.ndarray, i: int) -> slice:
+        return slice(int(desplazamientos[i]), int(desplazamientos[i + 1]))
+
+    def _buscar_en_bloque(self, inicio_bloque: int, desplazamientos: np.ndarray, termino: str) -> List[int]:
+        """Ids de los registros de un bloque que contienen el término"""
+        patron = _texto_busqueda(termino)
+        if not patron:
+            return list(range(self.cantidad_individuos))
+        fin_bloque = inicio_bloque + int(desplazamientos[-1])
+        posiciones = []
+        posicion = self._mm.find(patron, inicio_bloque, fin_bloque)
+        while posicion != -1:
+            posiciones.append(posicion - inicio_bloque)
+            # Saltar al siguiente registro: basta una coincidencia por individuo
+            registro = int(np.searchsorted(desplazamientos, posiciones[-1], side="right")) - 1
+            posicion = self._mm.find(patron, inicio_bloque + int(desplazamientos[registro + 1]), fin_bloque)
+        if not posiciones:
+            return []
+        registros = np.searchsorted(desplazamientos, np.array(posiciones, dtype=np.int64), side="right") - 1
+        return [int(r) for r in registros]
+
+    def buscar_por_nombre(self, termino: str) -> List[int]:
+        """Ids de los individuos cuyo nombre contiene el término (sin distinguir mayúsculas)"""
+        return self._buscar_en_bloque(self._inicio_nombres, self.nombres_desp, termino)
+
+    def buscar_texto_completo(self, termino: str) -> List[int]:
+        """Ids de los individuos cuyo nombre o algún valor contiene el término"""
+        return self._buscar_en_bloque(self._inicio_texto, self.texto_desp, termino)
+
+    def listar_clases(self) -> List[str]:
+        return list(self._clases)
+
+    def instancias_de_clase(self, nombre_clase: str) -> List[int]:
+        k = self._clases.get(nombre_clase)
+        if k is None:
+            return []
+        return [int(i) for i in self.clase_inst[self._rango(self.clase_inst_desp, k)]]
+
+    def vecinos(self, identificador: int) -> List[Tuple[str, int]]:
+        """Aristas (propiedad, id destino) salientes de un individuo"""
+        rango = self._rango(self.ady_desp, identificador)
+        return [(self.cadena(int(p)), int(d)) for p, d in zip(self.ady_prop[rango], self.ady_destino[rango])]
+
+    def individuo(self, identificador: int) -> Dict:
+        """
+        Reconstruye el diccionario de un individuo (mismo formato que individuo_a_dict)
+
+        Args:
+            identificador: Id del individuo en el índice
+
+        Returns:
+            Diccionario con nombre, IRI, tipos y propiedades
+        """
+        propiedades: Dict[str, List[str]] = {}
+        rango = self._rango(self.ind_props_desp, identificador)
+        for p, v in zip(self.ind_props[rango], self.ind_valores[rango]):
+            propiedades.setdefault(self.cadena(int(p)), []).append(self.cadena(int(v)))
+        return {
+            "nombre": self.cadena(int(self.ind_nombre[identificador])),
+            "iri": self.cadena(int(self.ind_iri[identificador])),
+            "tipos": [self.cadena(int(c)) for c in self.ind_clases[self._rango(self.ind_clases_desp, identificador)]],
+            "propiedades": propiedades,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construye el índice mmap de una ontología")
+    parser.add_argument("owl", help="Archivo OWL de origen")
+    parser.add_argument("salida", help="Archivo de índice a escribir")
+    args = parser.parse_args()
+
+    cabecera = construir_indice(cargar_ontologia_archivo(args.owl), args.salida)
+    print(f"Índice escrito en {args.salida}: {cabecera['individuos']} individuos, "
+          f"{cabecera['clases']} clases, {os.path.getsize(args.salida)} bytes")
+
+
+if __name__ == "__main__":
+    main()
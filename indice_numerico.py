@@ -0,0 +1,174 @@
+"""
+Índices numéricos ordenados para consultas por rango y top-N.
+
+Los literales de las propiedades cuantitativas (montos, cantidades, años...)
+se convierten a números al cargar y, por cada propiedad, se guardan dos
+arreglos NumPy alineados: los valores ordenados y el id del individuo de
+cada valor. Un rango ("montoRobado > 100M", "creadas entre 2015 y 2018") son
+dos búsquedas binarias (np.searchsorted) y un top-N es una rebanada de los
+extremos: ninguna consulta recorre los individuos.
+
+Las fechas se indexan por su año, de modo que añoCreación se consulta con
+años enteros.
+"""
+
+import re
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from metricas import metricas
+
+PROPIEDADES_NUMERICAS = (
+    "montoRobado", "cantidadVíctimas", "rendimientoAnual", "tiempoBloquePromedio",
+    "volumenTransacciones", "añoCreación", "costoAtaque",
+)
+
+# Sufijos de magnitud habituales en los literales escritos a mano ("b"/"bn" son
+# el billion inglés, 1e9; el billón español es 1e12 y 1e9 es un millardo)
+_MULTIPLICADORES = {
+    "k": 1e3, "mil": 1e3,
+    "m": 1e6, "mm": 1e6, "millon": 1e6, "millones": 1e6, "millón": 1e6,
+    "b": 1e9, "bn": 1e9, "millardo": 1e9, "millardos": 1e9,
+    "billon": 1e12, "billones": 1e12, "billón": 1e12,
+}
+_PATRON_NUMERO = re.compile(r"^([-+]?\d+(?:\.\d+)?)\s*([a-zñó]*)$")
+_PATRON_FECHA = re.compile(r"^(\d{4})-\d{2}-\d{2}")
+
+
+def convertir_numero(valor) -> Optional[float]:
+    """
+    Convierte un literal a número
+
+    Args:
+        valor: int, float, bool, fecha o texto ("2.5M", "$1,200", "2014-04-18")
+
+    Returns:
+        El número, el año si es una fecha, o None si no es numérico
+    """
+    if isinstance(valor, bool):
+        return None
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    if isinstance(valor, date):  # también datetime
+        return float(valor.year)
+    if not isinstance(valor, str):
+        return None
+
+    texto = valor.strip().lower()
+    fecha = _PATRON_FECHA.match(texto)
+    if fecha:
+        return float(fecha.group(1))
+    texto = texto.replace("$", "").replace("usd", "").replace("_", "").replace(",", "").strip()
+    coincidencia = _PATRON_NUMERO.match(texto)
+    if not coincidencia:
+        return None
+    numero, sufijo = coincidencia.groups()
+    if sufijo and sufijo not in _MULTIPLICADORES:
+        return None
+    return float(numero) * _MULTIPLICADORES.get(sufijo, 1.0)
+
+
+class IndiceNumerico:
+    """Valores ordenados e ids de individuos por propiedad numérica"""
+
+    def __init__(self, nombres: Sequence[str], valores: Iterable[Dict[str, List]],
+                 propiedades: Iterable[str] = PROPIEDADES_NUMERICAS):
+        """
+        Args:
+            nombres: Nombre de cada individuo (el id es la posición)
+            valores: Propiedades de cada individuo, en el mismo orden (propiedad -> literales)
+            propiedades: Propiedades que se indexan
+        """
+        with metricas.medir("indice_numerico", "construir") as medicion:
+            self.nombres = list(nombres)
+            self.propiedades = list(propiedades)
+            pares: Dict[str, Tuple[List[float], List[int]]] = {p: ([], []) for p in self.propiedades}
+            for i, por_propiedad in enumerate(valores):
+                for propiedad in self.propiedades:
+                    for literal in por_propiedad.get(propiedad, ()):
+                        numero = convertir_numero(literal)
+                        if numero is not None:
+                            pares[propiedad][0].append(numero)
+                            pares[propiedad][1].append(i)
+
+            # columnas[propiedad] -> (valores ordenados, ids en el mismo orden)
+            self.columnas: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+            for propiedad, (numeros, ids) in pares.items():
+                numeros = np.asarray(numeros, dtype=np.float64)
+                orden = np.argsort(numeros, kind="stable")
+                self.columnas[propiedad] = (numeros[orden], np.asarray(ids, dtype=np.int32)[orden])
+            medicion.filas = sum(len(v) for v, _ in self.columnas.values())
+
+    @classmethod
+    def desde_ontologia(cls, onto, propiedades: Iterable[str] = PROPIEDADES_NUMERICAS) -> "IndiceNumerico":
+        """Índice con los literales tipados de una ontología de owlready2"""
+        propiedades = list(propiedades)
+        individuos = list(onto.individuals())
+        posicion = {ind.storid: i for i, ind in enumerate(individuos)}
+        valores: List[Dict[str, List]] = [{} for _ in individuos]
+        for prop in onto.data_properties():
+            if prop.name not in propiedades:
+                continue
+            for sujeto, literal in prop.get_relations():
+                i = posicion.get(getattr(sujeto, "storid", None))
+                if i is not None:
+                    valores[i].setdefault(prop.name, []).append(literal)
+        return cls([ind.name for ind in individuos], valores, propiedades)
+
+    @classmethod
+    def desde_indice(cls, indice, propiedades: Iterable[str] = PROPIEDADES_NUMERICAS) -> "IndiceNumerico":
+        """Índice a partir de un índice mmap (los literales llegan como texto)"""
+        fichas = [indice.individuo(i) for i in range(indice.cantidad_individuos)]
+        return cls([f["nombre"] for f in fichas], [f["propiedades"] for f in fichas], propiedades)
+
+    def _columna(self, propiedad: str) -> Tuple[np.ndarray, np.ndarray]:
+        if propiedad not in self.columnas:
+            raise KeyError(f"Propiedad numérica desconocida: {propiedad}")
+        return self.columnas[propiedad]
+
+    # ---------- Consultas ----------
+
+    def rango(self, propiedad: str, minimo: Optional[float] = None, maximo: Optional[float] = None,
+              incluir_minimo: bool = True, incluir_maximo: bool = True) -> List[Tuple[int, float]]:
+        """
+        Individuos cuyo valor está en el rango, ordenados de menor a mayor
+
+        Args:
+            propiedad: Propiedad numérica
+            minimo: Límite inferior (None = sin límite)
+            maximo: Límite superior (None = sin límite)
+            incluir_minimo: Si el límite inferior es inclusivo
+            incluir_maximo: Si el límite superior es inclusivo
+
+        Returns:
+            Lista de (id del individuo, valor)
+        """
+        with metricas.medir("indice_numerico", "rango") as medicion:
+            valores, ids = self._columna(propiedad)
+            inicio = 0 if minimo is None else int(np.searchsorted(
+                valores, minimo, side="left" if incluir_minimo else "right"))
+            fin = len(valores) if maximo is None else int(np.searchsorted(
+                valores, maximo, side="right" if incluir_maximo else "left"))
+            resultado = list(zip(ids[inicio:fin].tolist(), valores[inicio:fin].tolist()))
+            medicion.filas = len(resultado)
+        return resultado
+
+    def top(self, propiedad: str, n: int = 10, descendente: bool = True) -> List[Tuple[int, float]]:
+        """Los n individuos con mayor (o menor) valor: lista de (id, valor)"""
+        valores, ids = self._columna(propiedad)
+        if descendente:
+            valores, ids = valores[::-1], ids[::-1]
+        return list(zip(ids[:n].tolist(), valores[:n].tolist()))
+
+    def estadisticas(self) -> Dict[str, Dict]:
+        """Cantidad de valores, mínimo y máximo de cada propiedad"""
+        return {
+            propiedad: {
+                "cantidad": len(valores),
+                "minimo": float(valores[0]) if len(valores) else None,
+                "maximo": float(valores[-1]) if len(valores) else None,
+            }
+            for propiedad, (valores, _) in self.columnas.items()
+        }
@@ -0,0 +1,198 @@
+"""
+Tiempos límite adaptativos y solicitudes cubiertas (hedging) hacia DBpedia.
+
+Cada consulta exitosa registra su duración en una ventana móvil por
+operación. El tiempo límite de la siguiente consulta sale de esas muestras
+(un múltiplo del p99) en lugar de una constante. La constante de cada
+llamada queda como techo y como valor inicial mientras no haya muestras
+suficientes. Una consulta que vence o falla por red cuenta como una muestra
+censurada igual a su tiempo límite: si DBpedia se vuelve más lenta, el p99
+sube con cada vencimiento y el tiempo límite se aleja del valor viejo hasta
+alcanzar la nueva latencia (o el techo).
+
+Una solicitud cubierta lanza la consulta principal y, solo si tarda más que
+su p95 observado (o si falla o no trae resultados), lanza también la
+alternativa. Gana la primera respuesta válida. La otra no se puede
+interrumpir (ya está en la red): termina en su hilo, hasta su tiempo límite
+como mucho, y su resultado se ignora. Cada solicitud cubierta usa hilos
+propios, así que una consulta rezagada no hace esperar a las solicitudes
+siguientes. Como la alternativa solo se lanza en la cola lenta, la carga
+extra sobre DBpedia es de alrededor del 5 % de las solicitudes.
+"""
+
+import contextvars
+import functools
+import math
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Muestras recientes por operación
+VENTANA_LATENCIAS = 256
+# Muestras necesarias antes de confiar en los percentiles
+MINIMO_MUESTRAS = 10
+
+
+class HistorialLatencias:
+    """Latencias recientes por operación y tiempos límite derivados de ellas"""
+
+    def __init__(self, ventana: int = VENTANA_LATENCIAS, minimo_muestras: int = MINIMO_MUESTRAS,
+                 factor_timeout: float = 3.0, timeout_minimo: float = 1.0):
+        """
+        Args:
+            ventana: Muestras guardadas por operación
+            minimo_muestras: Muestras necesarias para usar los percentiles
+            factor_timeout: Múltiplo del p99 que se usa como tiempo límite
+            timeout_minimo: Tiempo límite mínimo en segundos (evita cortar por ruido)
+        """
+        self.ventana = ventana
+        self.minimo_muestras = minimo_muestras
+        self.factor_timeout = factor_timeout
+        self.timeout_minimo = timeout_minimo
+        self._muestras: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self.coberturas = 0  # alternativas lanzadas
+        self.ganadas_alternativa = 0
+
+    def registrar(self, operacion: str, segundos: float):
+        """Registra la duración de una consulta exitosa"""
+        with self._lock:
+            muestras = self._muestras.get(operacion)
+            if muestras is None:
+                muestras = self._muestras[operacion] = deque(maxlen=self.ventana)
+            muestras.append(segundos)
+
+    def registrar_vencida(self, operacion: str, timeout: float):
+        """
+        Registra una consulta que venció o falló por red con su tiempo límite
+        como duración (muestra censurada: tardó al menos eso)
+        """
+        self.registrar(operacion, timeout)
+
+    def percentil(self, operacion: str, p: float) -> Optional[float]:
+        """Percentil p de las muestras recientes, o None si aún no hay suficientes"""
+        with self._lock:
+            muestras = sorted(self._muestras.get(operacion, ()))
+        if len(muestras) < self.minimo_muestras:
+            return None
+        indice = min(len(muestras) - 1, max(0, math.ceil(len(muestras) * p / 100.0) - 1))
+        return muestras[indice]
+
+    def timeout(self, operacion: str, respaldo: float) -> float:
+        """
+        Tiempo límite para la próxima consulta de una operación
+
+        Args:
+            operacion: Nombre de la operación
+            respaldo: Tiempo límite fijo de la llamada (techo y valor inicial)
+
+        Returns:
+            factor_timeout × p99, acotado entre timeout_minimo y respaldo
+        """
+        p99 = self.percentil(operacion, 99)
+        if p99 is None:
+            return respaldo
+        return min(respaldo, max(self.timeout_minimo, p99 * self.factor_timeout))
+
+    def umbral_cobertura(self, operacion: str, respaldo: float) -> float:
+        """Espera antes de lanzar la alternativa: el p95 observado o el respaldo"""
+        p95 = self.percentil(operacion, 95)
+        return respaldo if p95 is None else p95
+
+    def anotar_cobertura(self, ganada: bool = False):
+        """Cuenta una alternativa lanzada (ganada=True cuando además respondió primero)"""
+        with self._lock:
+            if ganada:
+                self.ganadas_alternativa += 1
+            else:
+                self.coberturas += 1
+
+    def reiniciar(self):
+        with self._lock:
+            self._muestras.clear()
+            self.coberturas = 0
+            self.ganadas_alternativa = 0
+
+    def resumen(self) -> List[Dict]:
+        """Una fila por operación con muestras, p50, p95 y p99 en milisegundos"""
+        with self._lock:
+            operaciones = sorted(self._muestras)
+        filas = []
+        for operacion in operaciones:
+            fila = {"operacion": operacion, "muestras": len(self._muestras[operacion])}
+            for p in (50, 95, 99):
+                valor = self.percentil(operacion, p)
+                fila[f"p{p}_ms"] = round(valor * 1000.0, 1) if valor is not None else None
+            filas.append(fila)
+        return filas
+
+
+# Historial compartido del proceso (todos los conectores aprenden de las mismas consultas)
+latencias = HistorialLatencias()
+
+def en_contexto(funcion: Callable[[], object]) -> Callable[[], object]:
+    """La función correrá en otro hilo con el contexto actual (p. ej. la prioridad de la solicitud)"""
+    return functools.partial(contextvars.copy_context().run, funcion)
+
+
+def solicitud_cubierta(primaria: Callable[[], object], alternativa: Callable[[], object],
+                       umbral: float, valida: Callable[[object], bool] = bool,
+                       historial: Optional[HistorialLatencias] = None) -> Tuple[object, Optional[int]]:
+    """
+    Ejecuta la principal y lanza la alternativa solo si la principal se demora
+
+    Args:
+        primaria: Consulta principal (sin argumentos)
+        alternativa: Consulta alternativa con resultados equivalentes
+        umbral: Segundos de espera antes de lanzar la alternativa
+        valida: Si un resultado cuenta como respuesta (por defecto, no vacío)
+        historial: Donde se cuentan las coberturas (por defecto el compartido)
+
+    Returns:
+        (resultado, 0 si ganó la principal / 1 si ganó la alternativa / None si
+        ninguna dio una respuesta válida; entonces el resultado es el último
+        obtenido)
+
+    Raises:
+        El último error si ninguna de las dos devolvió un resultado
+    """
+    historial = historial or latencias
+    # Hilos de esta llamada: la consulta perdedora sigue en el suyo sin ocupar un
+    # hilo compartido que otra solicitud necesite
+    ejecutor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cubierta")
+    try:
+        return _esperar_cubierta(ejecutor, primaria, alternativa, umbral, valida, historial)
+    finally:
+        ejecutor.shutdown(wait=False)
+
+
+def _esperar_cubierta(ejecutor: ThreadPoolExecutor, primaria, alternativa, umbral: float, valida,
+                      historial: HistorialLatencias) -> Tuple[object, Optional[int]]:
+    futuros = {ejecutor.submit(en_contexto(primaria)): 0}
+    wait(futuros, timeout=umbral)
+    ultimo = error = None
+    while True:
+        terminados = [f for f in futuros if f.done()]
+        for futuro in terminados:
+            indice = futuros.pop(futuro)
+            if futuro.exception() is None:
+                resultado = futuro.result()
+                if valida(resultado):
+                    # La otra, si sigue en vuelo, termina en su hilo y su resultado se ignora
+                    if indice == 1:
+                        historial.anotar_cobertura(ganada=True)
+                    return resultado, indice
+                ultimo = resultado
+            else:
+                error = futuro.exception()
+        # La principal se demora, falló o vino vacía: entra la alternativa (una sola vez)
+        if alternativa is not None:
+            futuros[ejecutor.submit(en_contexto(alternativa))] = 1
+            alternativa = None
+            historial.anotar_cobertura()
+        if not futuros:
+            if ultimo is None and error is not None:
+                raise error
+            return ultimo, None
+        wait(futuros, return_when=FIRST_COMPLETED)
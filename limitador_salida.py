@@ -0,0 +1,247 @@
+"""
+Límite de tasa de las solicitudes salientes a DBpedia, con prioridades.
+
+Cada tipo de solicitud del transporte ("sparql", "lookup") tiene su propio
+presupuesto: una cubeta de tokens con una tasa por segundo y una ráfaga
+máxima. Una solicitud toma un token antes de salir. Si no hay, espera en una
+cola ordenada por clase de prioridad y luego por orden de llegada:
+
+    interactiva   búsquedas que un usuario está esperando (app y API)
+    normal        todo lo que no declara una clase
+    lote          enriquecimiento masivo, precargas, importaciones
+
+Una solicitud interactiva pasa delante de todas las de lote que estén
+esperando (las que ya salieron no se interrumpen). Además, una fracción de
+la ráfaga queda reservada para el tráfico interactivo: los lotes no pueden
+vaciar la cubeta y dejar a un usuario esperando el siguiente token.
+
+La clase se declara con el gestor de contexto `prioridad("lote")` (o con
+`fijar_prioridad` en un script). La profundidad de las colas se publica
+como indicador y cada espera como una operación de la categoría
+"limitador" en metricas.py.
+
+Configuración por variables de entorno (sin ellas no se limita nada):
+    DBPEDIA_LIMITE_SPARQL=5/10     5 solicitudes por segundo, ráfaga de 10
+    DBPEDIA_LIMITE_LOOKUP=2        2 por segundo (la ráfaga es la tasa, mínimo 1)
+    DBPEDIA_RESERVA_INTERACTIVA=0.25
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from metricas import Medicion, metricas
+
+PRIORIDADES = {"interactiva": 0, "normal": 1, "lote": 2}
+RESERVA_INTERACTIVA = 0.25
+ESPERA_MAXIMA = 30.0
+
+_prioridad_actual: ContextVar[str] = ContextVar("prioridad_dbpedia", default="normal")
+
+
+class LimiteAgotado(Exception):
+    """La solicitud no consiguió turno dentro del tiempo máximo de espera"""
+
+
+def prioridad_actual() -> str:
+    """Clase de prioridad del contexto actual ("normal" si nadie la fijó)"""
+    return _prioridad_actual.get()
+
+
+def fijar_prioridad(clase: str):
+    """Fija la clase de prioridad del contexto actual (p. ej. al inicio de un script)"""
+    if clase not in PRIORIDADES:
+        raise ValueError(f"Prioridad desconocida: {clase}")
+    _prioridad_actual.set(clase)
+
+
+@contextmanager
+def prioridad(clase: str):
+    """
+    Las solicitudes a DBpedia hechas dentro del bloque usan esta clase
+
+    Args:
+        clase: "interactiva", "normal" o "lote"
+    """
+    if clase not in PRIORIDADES:
+        raise ValueError(f"Prioridad desconocida: {clase}")
+    marca = _prioridad_actual.set(clase)
+    try:
+        yield
+    finally:
+        _prioridad_actual.reset(marca)
+
+
+class CubetaTokens:
+    """Cubeta de tokens: `tasa` por segundo hasta un máximo de `rafaga`"""
+
+    def __init__(self, tasa: float, rafaga: float):
+        self.tasa = tasa
+        self.rafaga = max(1.0, rafaga)
+        self.tokens = self.rafaga
+        self._ultimo = time.monotonic()
+
+    def recargar(self, ahora: float):
+        self.tokens = min(self.rafaga, self.tokens + (ahora - self._ultimo) * self.tasa)
+        self._ultimo = ahora
+
+    def espera_para(self, cantidad: float) -> float:
+        """Segundos hasta tener `cantidad` tokens (0 si ya los hay)"""
+        return max(0.0, (cantidad - self.tokens) / self.tasa)
+
+
+class EstadisticaCola:
+    """Acumulado de una cola (tipo de solicitud, clase)"""
+
+    def __init__(self):
+        self.en_cola = 0
+        self.max_en_cola = 0
+        self.atendidas = 0
+        self.agotadas = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+
+
+class LimitadorSalida:
+    """Cubetas de tokens por tipo de solicitud con colas de prioridad (seguro entre hilos)"""
+
+    def __init__(self, presupuestos: Dict[str, Tuple[float, float]],
+                 reserva_interactiva: float = RESERVA_INTERACTIVA, espera_maxima: float = ESPERA_MAXIMA):
+        """
+        Args:
+            presupuestos: {tipo: (solicitudes por segundo, ráfaga)}; los tipos que
+                no aparecen no se limitan
+            reserva_interactiva: Fracción de la ráfaga que solo puede usar la clase interactiva
+            espera_maxima: Espera máxima por turno si la solicitud no indica otra
+        """
+        self.cubetas = {tipo: CubetaTokens(tasa, rafaga) for tipo, (tasa, rafaga) in presupuestos.items()}
+        # Sin reserva en una cubeta de un solo token: los lotes no podrían salir nunca
+        self.reservas = {tipo: min(cubeta.rafaga * reserva_interactiva, cubeta.rafaga - 1.0)
+                         for tipo, cubeta in self.cubetas.items()}
+        self.espera_maxima = espera_maxima
+        self._condicion = threading.Condition()
+        self._colas: Dict[str, List[Tuple[int, int]]] = {tipo: [] for tipo in self.cubetas}
+        self._secuencia = itertools.count()
+        self._estadisticas: Dict[Tuple[str, str], EstadisticaCola] = {}
+
+    def adquirir(self, tipo: str, clase: Optional[str] = None, timeout: Optional[float] = None) -> float:
+        """
+        Espera el turno de una solicitud y consume un token
+
+        Args:
+            tipo: Tipo de solicitud del transporte ("sparql", "lookup", ...)
+            clase: Clase de prioridad (por defecto la del contexto)
+            timeout: Espera máxima en segundos (por defecto espera_maxima)
+
+        Returns:
+            Segundos que esperó en la cola
+
+        Raises:
+            LimiteAgotado si no consiguió turno a tiempo
+        """
+        cubeta = self.cubetas.get(tipo)
+        if cubeta is None:
+            return 0.0
+        clase = clase or prioridad_actual()
+        nivel = PRIORIDADES[clase]
+        necesarios = 1.0 if nivel == 0 else 1.0 + self.reservas[tipo]
+        cola = self._colas[tipo]
+        inicio = time.monotonic()
+        limite = inicio + (self.espera_maxima if timeout is None else timeout)
+
+        with self._condicion:
+            turno = (nivel, next(self._secuencia))
+            heapq.heappush(cola, turno)
+            estadistica = self._estadistica(tipo, clase)
+            estadistica.en_cola += 1
+            estadistica.max_en_cola = max(estadistica.max_en_cola, estadistica.en_cola)
+            self._publicar_profundidad(tipo, clase, estadistica)
+            try:
+                while True:
+                    ahora = time.monotonic()
+                    cubeta.recargar(ahora)
+                    if cola[0] == turno and cubeta.tokens >= necesarios:
+                        cubeta.tokens -= 1.0
+                        heapq.heappop(cola)
+                        break
+                    if ahora >= limite:
+                        cola.remove(turno)
+                        heapq.heapify(cola)
+                        estadistica.agotadas += 1
+                        raise LimiteAgotado(f"Sin turno para '{tipo}' ({clase}) en {limite - inicio:.1f}s")
+                    # La cabeza de la cola duerme hasta el próximo token; el resto, hasta que avance la cola
+                    espera = cubeta.espera_para(necesarios) if cola[0] == turno else limite - ahora
+                    self._condicion.wait(min(max(espera, 0.001), limite - ahora))
+            finally:
+                estadistica.en_cola -= 1
+                self._publicar_profundidad(tipo, clase, estadistica)
+                self._condicion.notify_all()
+
+            espera = time.monotonic() - inicio
+            estadistica.atendidas += 1
+            estadistica.espera_total += espera
+            estadistica.espera_max = max(estadistica.espera_max, espera)
+        metricas.registrar("limitador", f"{tipo}/{clase}", espera, Medicion())
+        return espera
+
+    def _estadistica(self, tipo: str, clase: str) -> EstadisticaCola:
+        estadistica = self._estadisticas.get((tipo, clase))
+        if estadistica is None:
+            estadistica = self._estadisticas[(tipo, clase)] = EstadisticaCola()
+        return estadistica
+
+    def _publicar_profundidad(self, tipo: str, clase: str, estadistica: EstadisticaCola):
+        metricas.fijar_indicador("buscador_limitador_en_cola", estadistica.en_cola, tipo=tipo, clase=clase)
+
+    def resumen(self) -> List[Dict]:
+        """Una fila por (tipo, clase): en cola ahora, máximo, atendidas, agotadas y esperas"""
+        with self._condicion:
+            filas = []
+            for (tipo, clase), e in sorted(self._estadisticas.items(),
+                                           key=lambda item: (item[0][0], PRIORIDADES[item[0][1]])):
+                filas.append({
+                    "tipo": tipo,
+                    "clase": clase,
+                    "en_cola": e.en_cola,
+                    "max_en_cola": e.max_en_cola,
+                    "atendidas": e.atendidas,
+                    "agotadas": e.agotadas,
+                    "espera_media_ms": round(e.espera_total * 1000.0 / e.atendidas, 1) if e.atendidas else 0.0,
+                    "espera_max_ms": round(e.espera_max * 1000.0, 1),
+                    "tokens": round(self.cubetas[tipo].tokens, 2),
+                })
+        return filas
+
+
+def leer_presupuesto(valor: str) -> Tuple[float, float]:
+    """ "5/10" -> (5.0, 10.0); "5" -> (5.0, 5.0) """
+    tasa, _, rafaga = valor.partition("/")
+    tasa = float(tasa)
+    if tasa <= 0:
+        raise ValueError(f"Tasa inválida: {valor}")
+    return tasa, float(rafaga) if rafaga else max(1.0, tasa)
+
+
+def crear_limitador(entorno: Optional[Dict[str, str]] = None) -> Optional[LimitadorSalida]:
+    """
+    Limitador según las variables de entorno
+
+    Returns:
+        LimitadorSalida, o None si no se definió ningún presupuesto
+    """
+    entorno = os.environ if entorno is None else entorno
+    presupuestos = {}
+    for tipo in ("sparql", "lookup"):
+        valor = entorno.get(f"DBPEDIA_LIMITE_{tipo.upper()}")
+        if valor:
+            presupuestos[tipo] = leer_presupuesto(valor)
+    if not presupuestos:
+        return None
+    return LimitadorSalida(
+        presupuestos, float(entorno.get("DBPEDIA_RESERVA_INTERACTIVA", RESERVA_INTERACTIVA))
+    )
@@ -0,0 +1,258 @@
+"""
+Instrumentación del buscador: duración, bytes, filas, aciertos de cache y
+errores de cada consulta saliente, acceso a cache, carga de ontología y fase
+de renderizado.
+
+Las métricas se acumulan en memoria en un registro del proceso, se muestran en
+el panel "📈 Rendimiento" de la app y se pueden escribir periódicamente en un
+archivo de texto con formato Prometheus (textfile collector):
+
+    BUSCADOR_METRICAS_PROM=metricas/buscador.prom
+    BUSCADOR_METRICAS_INTERVALO=15
+"""
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# Límites superiores (segundos) de los buckets del histograma de duración
+BUCKETS_DURACION = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Muestras recientes guardadas por operación para calcular percentiles
+MUESTRAS_RECIENTES = 512
+
+
+class Medicion:
+    """Datos de una operación en curso (los completa quien la mide)"""
+
+    __slots__ = ("bytes", "filas", "cache", "error")
+
+    def __init__(self):
+        self.bytes = 0
+        self.filas = 0
+        self.cache = None  # "hit", "miss" o None si no aplica
+        self.error = False
+
+
+class EstadisticaOperacion:
+    """Acumulado de una (categoría, operación)"""
+
+    def __init__(self):
+        self.cantidad = 0
+        self.errores = 0
+        self.segundos = 0.0
+        self.bytes = 0
+        self.filas = 0
+        self.aciertos_cache = 0
+        self.fallos_cache = 0
+        self.buckets = [0] * len(BUCKETS_DURACION)
+        self.recientes = deque(maxlen=MUESTRAS_RECIENTES)
+
+    def agregar(self, duracion: float, medicion: Medicion):
+        self.cantidad += 1
+        self.segundos += duracion
+        self.bytes += medicion.bytes
+        self.filas += medicion.filas
+        if medicion.error:
+            self.errores += 1
+        if medicion.cache == "hit":
+            self.aciertos_cache += 1
+        elif medicion.cache == "miss":
+            self.fallos_cache += 1
+        for i, limite in enumerate(BUCKETS_DURACION):
+            if duracion <= limite:
+                self.buckets[i] += 1
+                break
+        self.recientes.append(duracion)
+
+    def percentil(self, p: float) -> float:
+        if not self.recientes:
+            return 0.0
+        ordenadas = sorted(self.recientes)
+        indice = min(len(ordenadas) - 1, max(0, math.ceil(len(ordenadas) * p / 100.0) - 1))
+        return ordenadas[indice]
+
+
+class RegistroMetricas:
+    """Registro de métricas seguro entre hilos"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._estadisticas: Dict[tuple, EstadisticaOperacion] = {}
+        # Valores instantáneos (gauges), p. ej. profundidad de las colas del limitador
+        self._indicadores: Dict[tuple, float] = {}
+        self._exportador: Optional[threading.Thread] = None
+
+    @contextmanager
+    def medir(self, categoria: str, operacion: str):
+        """
+        Mide una operación; las excepciones se cuentan como error y se propagan
+
+        Args:
+            categoria: Grupo de la operación ("dbpedia", "cache", "ontologia", "render", ...)
+            operacion: Nombre de la operación concreta
+
+        Yields:
+            Medicion para completar bytes, filas, cache o error
+        """
+        medicion = Medicion()
+        inicio = time.perf_counter()
+        try:
+            yield medicion
+        except BaseException:
+            medicion.error = True
+            raise
+        finally:
+            self.registrar(categoria, operacion, time.perf_counter() - inicio, medicion)
+
+    def registrar(self, categoria: str, operacion: str, duracion: float,
+                  medicion: Optional[Medicion] = None):
+        """Registra una operación ya medida"""
+        medicion = medicion or Medicion()
+        with self._lock:
+            estadistica = self._estadisticas.get((categoria, operacion))
+            if estadistica is None:
+                estadistica = self._estadisticas[(categoria, operacion)] = EstadisticaOperacion()
+            estadistica.agregar(duracion, medicion)
+
+    def fijar_indicador(self, nombre: str, valor: float, **etiquetas: str):
+        """Fija el valor actual de un indicador (gauge) con sus etiquetas"""
+        with self._lock:
+            self._indicadores[(nombre, tuple(sorted(etiquetas.items())))] = valor
+
+    def indicadores(self) -> List[Dict]:
+        """Valores actuales de los indicadores: una fila por nombre y etiquetas"""
+        with self._lock:
+            return [{"nombre": nombre, **dict(etiquetas), "valor": valor}
+                    for (nombre, etiquetas), valor in sorted(self._indicadores.items())]
+
+    def reiniciar(self):
+        """Descarta todas las métricas acumuladas"""
+        with self._lock:
+            self._estadisticas.clear()
+            self._indicadores.clear()
+
+    def resumen(self) -> List[Dict]:
+        """
+        Resumen tabular de todas las operaciones medidas
+
+        Returns:
+            Lista de diccionarios (una fila por operación), ordenada por tiempo total
+        """
+        with self._lock:
+            elementos = list(self._estadisticas.items())
+            filas = []
+            for (categoria, operacion), e in elementos:
+                filas.append({
+                    "categoria": categoria,
+                    "operacion": operacion,
+                    "llamadas": e.cantidad,
+                    "errores": e.errores,
+                    "total_ms": round(e.segundos * 1000.0, 1),
+                    "media_ms": round(e.segundos * 1000.0 / e.cantidad, 2) if e.cantidad else 0.0,
+                    "p95_ms": round(e.percentil(95) * 1000.0, 2),
+                    "bytes": e.bytes,
+                    "filas": e.filas,
+                    "cache_hit": e.aciertos_cache,
+                    "cache_miss": e.fallos_cache,
+                })
+        return sorted(filas, key=lambda fila: fila["total_ms"], reverse=True)
+
+    def exportar_prometheus(self) -> str:
+        """Genera el texto de exposición en formato Prometheus"""
+        lineas = [
+            "# HELP buscador_operacion_duracion_segundos Duración de las operaciones del buscador",
+            "# TYPE buscador_operacion_duracion_segundos histogram",
+        ]
+        contadores = {
+            "buscador_operacion_errores_total": ("Operaciones que terminaron en error", "errores"),
+            "buscador_operacion_bytes_total": ("Bytes recibidos por operación", "bytes"),
+            "buscador_operacion_filas_total": ("Filas/resultados devueltos por operación", "filas"),
+            "buscador_cache_aciertos_total": ("Aciertos de cache", "aciertos_cache"),
+            "buscador_cache_fallos_total": ("Fallos de cache", "fallos_cache"),
+        }
+
+        with self._lock:
+            elementos = sorted(self._estadisticas.items())
+            for (categoria, operacion), e in elementos:
+                etiquetas = f'categoria="{_escapar(categoria)}",operacion="{_escapar(operacion)}"'
+                acumulado = 0
+                for limite, cantidad in zip(BUCKETS_DURACION, e.buckets):
+                    acumulado += cantidad
+                    lineas.append(
+                        f'buscador_operacion_duracion_segundos_bucket{{{etiquetas},le="{limite}"}} {acumulado}'
+                    )
+                lineas.append(f'buscador_operacion_duracion_segundos_bucket{{{etiquetas},le="+Inf"}} {e.cantidad}')
+                lineas.append(f"buscador_operacion_duracion_segundos_sum{{{etiquetas}}} {e.segundos:.6f}")
+                lineas.append(f"buscador_operacion_duracion_segundos_count{{{etiquetas}}} {e.cantidad}")
+
+            for nombre, (ayuda, atributo) in contadores.items():
+                lineas.append(f"# HELP {nombre} {ayuda}")
+                lineas.append(f"# TYPE {nombre} counter")
+                for (categoria, operacion), e in elementos:
+                    etiquetas = f'categoria="{_escapar(categoria)}",operacion="{_escapar(operacion)}"'
+                    lineas.append(f"{nombre}{{{etiquetas}}} {getattr(e, atributo)}")
+
+            anterior = None
+            for (nombre, etiquetas), valor in sorted(self._indicadores.items()):
+                if nombre != anterior:
+                    lineas.append(f"# TYPE {nombre} gauge")
+                    anterior = nombre
+                texto = ",".join(f'{clave}="{_escapar(str(v))}"' for clave, v in etiquetas)
+                lineas.append(f"{nombre}{{{texto}}} {valor}")
+
+        return "\n".join(lineas) + "\n"
+
+    def escribir_prometheus(self, ruta: str):
+        """Escribe el archivo Prometheus de forma atómica (tmp + rename)"""
+        directorio = os.path.dirname(os.path.abspath(ruta))
+        os.makedirs(directorio, exist_ok=True)
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            f.write(self.exportar_prometheus())
+        os.replace(temporal, ruta)
+
+    def iniciar_exportador(self, ruta: str, intervalo: float = 15.0) -> bool:
+        """
+        Arranca un hilo que escribe el archivo Prometheus cada `intervalo` segundos
+
+        Returns:
+            True si se inició, False si ya había un exportador corriendo
+        """
+        with self._lock:
+            if self._exportador is not None:
+                return False
+
+            def _bucle():
+                while True:
+                    try:
+                        self.escribir_prometheus(ruta)
+                    except OSError:
+                        pass  # Reintentar en el siguiente intervalo
+                    time.sleep(intervalo)
+
+            self._exportador = threading.Thread(target=_bucle, name="exportador-prometheus", daemon=True)
+            self._exportador.start()
+            return True
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Registro global del proceso
+metricas = RegistroMetricas()
+
+
+def iniciar_exportador_desde_entorno() -> Optional[str]:
+    """Inicia el exportador Prometheus si BUSCADOR_METRICAS_PROM está definido"""
+    ruta = os.environ.get("BUSCADOR_METRICAS_PROM")
+    if not ruta:
+        return None
+    intervalo = float(os.environ.get("BUSCADOR_METRICAS_INTERVALO", "15"))
+    metricas.iniciar_exportador(ruta, intervalo)
+    return ruta
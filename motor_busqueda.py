@@ -0,0 +1,857 @@
+"""
+Motor de búsqueda independiente de la interfaz.
+
+Agrupa las búsquedas locales (nombre, clase, texto completo), las búsquedas
+en DBpedia y el modo híbrido detrás de una única clase sin dependencias de
+Streamlit. Todos los resultados son diccionarios serializables, de modo que
+la app de Streamlit, la API JSON (api_busqueda.py) y los benchmarks usan el
+mismo motor, y varios procesos del API pueden escalar horizontalmente.
+
+Con un índice mmap (indice_mmap.py) las búsquedas locales se responden desde
+el índice compartido, sin ontología de owlready2 en el proceso. Sin él, las
+búsquedas por nombre y texto usan un índice compacto en memoria
+(indice_compacto.py) que se reconstruye cuando cambia la versión, y las
+búsquedas por clase consultan las inferencias materializadas al cargar
+(razonador.py). Los resultados de buscar() y de las búsquedas por tipo en
+DBpedia se reutilizan desde una caché acotada con vencimiento
+(cache_resultados.py); la clave de buscar() incluye la versión de la
+ontología.
+"""
+
+import itertools
+import os
+import threading
+import types
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from owlready2 import Thing
+
+from autocompletado import IndiceAutocompletado
+from busqueda_local import individuo_a_dict, listar_clases
+from cache_resultados import CacheResultados
+from dbpedia_connector import (
+    CATEGORIAS_EXPLORAR, DBpediaConnector, DBpediaOffline, buscar_en_dbpedia, buscar_por_tipo_dbo,
+    explorar_categorias, obtener_detalles_dbpedia, tipo_dbo_valido, uri_valida
+)
+from enlaces_dbpedia import TablaEnlaces, emitir_same_as, normalizar
+from estadisticas_ontologia import EstadisticasOntologia
+from facetas import FACETAS_PREDETERMINADAS, IndiceFacetas
+from grafo_relaciones import DIRECCIONES, GrafoRelaciones
+from indice_compacto import IndiceCompacto
+from indice_numerico import PROPIEDADES_NUMERICAS, IndiceNumerico
+from metricas import metricas
+from parquet_ontologia import exportar, importar, leer_tablas
+from razonador import Materializacion
+from recarga_ontologia import SAME_AS, aplicar_diferencia, calcular_diferencia
+from sparql_local import PLANTILLAS, ConsultorSPARQL, ErrorSPARQL
+
+MODO_LOCAL = "local"
+MODO_DBPEDIA = "dbpedia"
+MODO_HIBRIDO = "hibrido"
+MODOS = (MODO_LOCAL, MODO_DBPEDIA, MODO_HIBRIDO)
+
+TIPO_NOMBRE = "nombre"
+TIPO_TEXTO = "texto"
+TIPOS = (TIPO_NOMBRE, TIPO_TEXTO)
+
+# Filas de SPARQL que se leen de una vez con la ontología bloqueada
+FILAS_POR_BLOQUE = 256
+
+# Topes de las consultas a DBpedia que llegan de afuera (entidades por tipo y tipos por exploración)
+LIMITE_MAXIMO_DBPEDIA = 100
+TIPOS_MAXIMOS_EXPLORAR = 10
+
+# Segundos que se reutiliza un resultado con error de DBpedia (los demás usan el TTL de la caché)
+TTL_ERRORES = 15.0
+
+
+class ErrorBusqueda(ValueError):
+    """Parámetros de búsqueda inválidos"""
+
+
+def _validar_dbpedia(tipos: List[str], limite: int):
+    """Los tipos van dentro de la consulta SPARQL como dbo:<tipo>: solo identificadores"""
+    for tipo in tipos:
+        if not tipo_dbo_valido(tipo):
+            raise ErrorBusqueda(f"Tipo de DBpedia inválido: {tipo!r}")
+    if not 1 <= limite <= LIMITE_MAXIMO_DBPEDIA:
+        raise ErrorBusqueda(f"El límite debe estar entre 1 y {LIMITE_MAXIMO_DBPEDIA}")
+
+
+class MotorBusqueda:
+    """Servicio de búsqueda sobre la ontología local y DBpedia"""
+
+    def __init__(self, onto, conector: Optional[DBpediaConnector] = None, indice=None,
+                 enlaces: Optional[TablaEnlaces] = None, offline: Optional[DBpediaOffline] = None,
+                 resultados: Optional[CacheResultados] = None):
+        self.onto = onto
+        self.conector = conector or DBpediaConnector()
+        # Caché offline de DBpedia: sus etiquetas también se sugieren al escribir
+        self.offline = offline if offline is not None else DBpediaOffline()
+        # Enlaces individuo local -> URI de DBpedia y datos ya obtenidos por URI
+        self.enlaces = enlaces if enlaces is not None else TablaEnlaces()
+        self._enriquecidos: Dict[str, Dict] = {}
+        # Resultados de buscar() por (término, modo, tipo, límite, versión)
+        self.resultados = resultados if resultados is not None else CacheResultados()
+        # Índice de solo lectura (IndiceMmap); si está, reemplaza a la ontología
+        self.indice = indice
+        self._compacto: Optional[IndiceCompacto] = None
+        self._version_compacto = 0
+        self._grafo: Optional[GrafoRelaciones] = None
+        self._version_grafo = 0
+        self._facetas: Optional[IndiceFacetas] = None
+        self._version_facetas = 0
+        self._numerico: Optional[IndiceNumerico] = None
+        self._version_numerico = 0
+        self._sparql: Optional[ConsultorSPARQL] = None
+        self._autocompletado: Optional[IndiceAutocompletado] = None
+        self._version_autocompletado = 0
+        # Resumen de la ontología; se actualiza en el lugar al importar o recargar individuos
+        self._estadisticas: Optional[EstadisticasOntologia] = None
+        self._version_estadisticas = 0
+        # Búsquedas por texto normalizado: se conservan al reconstruir el autocompletado
+        self._usos_autocompletado: Dict[str, int] = {}
+        # Versión de la ontología: cambia con cada importación o recarga
+        self.version = 1
+        self._lock = threading.Lock()
+        # owlready2 no es seguro entre hilos: el acceso a la ontología se serializa
+        self._lock_onto = threading.RLock()
+        # Inferencias materializadas una vez al cargar; se actualizan al importar
+        self._materializacion: Optional[Materializacion] = None
+        self._version_materializacion = 0
+        if onto is not None:
+            self.materializacion()
+
+    def notificar_cambio(self):
+        """Registra que la ontología cambió (importación, recarga)"""
+        with self._lock:
+            self.version += 1
+
+    def registrar_importacion(self, individuos: List):
+        """
+        Registra individuos importados: actualiza las inferencias de forma
+        incremental y cambia la versión (los índices se reconstruyen al usarse)
+
+        Args:
+            individuos: Individuos nuevos de la ontología
+        """
+        with self._lock_onto:
+            materializacion = self.materializacion()
+            materializacion.agregar_individuos(individuos)
+            estadisticas = self._estadisticas_vigentes()
+            if estadisticas is not None:
+                estadisticas.agregar(individuo_a_dict(ind) for ind in individuos)
+            self.notificar_cambio()
+            self._version_materializacion = self.version
+            self._sincronizar_estadisticas(estadisticas)
+
+    def recargar_desde_archivo(self, ruta: str) -> Dict:
+        """
+        Aplica a la ontología cargada los cambios del archivo OWL
+
+        Los cambios de individuos se aplican como diferencia de tripletas sobre
+        el World actual; los de esquema cargan la ontología en un World nuevo.
+        En ambos casos cambia la versión (los índices se reconstruyen al
+        usarse) y se conservan las cachés de DBpedia, los enlaces y los usos
+        del autocompletado.
+
+        Returns:
+            Resumen con "cambios" (bool), "completa" (bool) y los conteos de la diferencia
+        """
+        if self.onto is None:
+            raise ErrorBusqueda("La recarga necesita la ontología cargada (no disponible con --indice)")
+        with self._lock_onto:
+            diferencia, nueva = calcular_diferencia(self.onto, ruta)
+            # Los owl:sameAs de los enlaces confiables viven en memoria hasta que se guarda: no son bajas
+            diferencia.objetos_eliminados -= {
+                (s, p, o) for s, p, o in diferencia.objetos_eliminados
+                if p == SAME_AS and (self.enlaces.obtener(s.rsplit("#", 1)[-1]) or {}).get("uri") == o
+            }
+            resumen = dict(diferencia.resumen(), cambios=not diferencia.vacia, completa=False)
+            if diferencia.vacia:
+                return resumen
+            estadisticas = None
+            if diferencia.estructural:
+                self.onto = nueva
+                # El World nuevo no tiene los owl:sameAs en memoria: se vuelven a emitir todos los confiables
+                emitir_same_as(self.onto, self.enlaces)
+                self._materializacion = None
+                self._sparql = None
+                resumen["completa"] = True
+            else:
+                # Las estadísticas restan las fichas anteriores de los sujetos y suman las nuevas
+                estadisticas = self._estadisticas_vigentes()
+                sujetos = diferencia.sujetos()
+                if estadisticas is not None:
+                    anteriores = [individuo_a_dict(ind) for ind in self._individuos_por_iri(sujetos)]
+                aplicar_diferencia(self.onto, diferencia)
+                if estadisticas is not None:
+                    estadisticas.quitar(anteriores)
+                    estadisticas.agregar(individuo_a_dict(ind) for ind in self._individuos_por_iri(sujetos))
+                if diferencia.solo_agregados and self._materializacion is not None:
+                    # Solo altas: las inferencias se actualizan de forma incremental
+                    self._materializacion.agregar_individuos(self._individuos_por_iri(sujetos))
+                    self.notificar_cambio()
+                    self._version_materializacion = self.version
+                    self._sincronizar_estadisticas(estadisticas)
+                    return resumen
+            self.notificar_cambio()
+            self._sincronizar_estadisticas(estadisticas)
+            self.materializacion()
+        return resumen
+
+    def exportar_tablas(self, directorio: str, formato: str = "parquet") -> Dict:
+        """Exporta individuos, datos, relaciones y la caché offline de DBpedia (ver parquet_ontologia)"""
+        if self.onto is None:
+            raise ErrorBusqueda("La exportación necesita la ontología cargada (no disponible con --indice)")
+        with self._lock_onto:
+            return exportar(self.onto, directorio, self.offline, formato)
+
+    def importar_tablas(self, directorio: str) -> Dict:
+        """
+        Importa una exportación Parquet/Arrow en una sola transacción
+
+        Si todos los individuos son nuevos, las inferencias y estadísticas se
+        actualizan de forma incremental; si alguno ya existía, cambia la
+        versión y se recalculan al usarse.
+
+        Returns:
+            Conteos de individuos, datos, relaciones y enriquecimiento importados
+        """
+        if self.onto is None:
+            raise ErrorBusqueda("La importación necesita la ontología cargada (no disponible con --indice)")
+        tablas = leer_tablas(directorio)
+        iris = tablas["individuos"].column("iri").to_pylist()
+        with self._lock_onto:
+            existentes = self._individuos_por_iri(iris)
+            resumen = importar(self.onto, tablas, self.offline)
+            if existentes:
+                self.notificar_cambio()
+            else:
+                self.registrar_importacion(self._individuos_por_iri(iris))
+        return resumen
+
+    def importar_entidad(self, entidad: Dict, ruta: str) -> Dict:
+        """
+        Importa una entidad de DBpedia como individuo y guarda la ontología
+
+        La creación, las inferencias, el owl:sameAs y el guardado ocurren con
+        la ontología bloqueada: una recarga del vigilante (que el propio
+        guardado dispara) no ve el individuo a medio crear.
+
+        Args:
+            entidad: Entidad de DBpedia (uri, label y opcionalmente comment, website, founding_date)
+            ruta: Archivo OWL donde se guarda
+
+        Returns:
+            {"nombre": nombre del individuo, "clase": nombre de su clase}
+        """
+        if self.onto is None:
+            raise ErrorBusqueda("La importación necesita la ontología cargada (no disponible con --indice)")
+        nombre = entidad["label"].replace(" ", "_").replace("-", "_").lower()
+        with self._lock_onto:
+            onto = self.onto
+            # Por simplicidad, las entidades relacionadas se importan como Criptomoneda
+            clase = getattr(onto, "Criptomoneda", None)
+            if clase is None:
+                with onto:
+                    clase = types.new_class("Criptomoneda", (Thing,))
+            if getattr(onto, nombre, None) is not None:
+                raise ErrorBusqueda(f"La instancia '{nombre}' ya existe en la ontología")
+
+            instancia = clase(nombre)
+            # Solo las propiedades que declara la ontología (getattr de owlready2 devuelve None si no están)
+            for propiedad, valor in (("descripcion", entidad.get("comment")), ("website", entidad.get("website")),
+                                     ("fechaCreación", entidad.get("founding_date")), ("nombre", entidad["label"])):
+                if valor and getattr(onto, propiedad, None) is not None:
+                    setattr(instancia, propiedad, valor)
+
+            # Inferencias incrementales: no hace falta recargar la ontología
+            self.registrar_importacion([instancia])
+            self.registrar_enlace(instancia, entidad["uri"], entidad["label"])
+            onto.save(file=os.path.abspath(ruta))
+        return {"nombre": instancia.name, "clase": clase.name}
+
+    def listar_individuos(self) -> List[Dict]:
+        """Todos los individuos locales, ordenados por nombre"""
+        if self.indice is not None:
+            individuos = [self.indice.individuo(i) for i in range(self.indice.cantidad_individuos)]
+        else:
+            self.materializacion()
+            with self._lock_onto:
+                individuos = [self.describir(ind) for ind in self.onto.individuals()]
+        return sorted(individuos, key=lambda individuo: individuo["nombre"])
+
+    def nombres_individuos(self) -> List[str]:
+        """Nombres de todos los individuos locales, ordenados"""
+        if self.indice is not None:
+            return sorted(self.indice.individuo(i)["nombre"] for i in range(self.indice.cantidad_individuos))
+        with self._lock_onto:
+            return sorted(ind.name for ind in self.onto.individuals())
+
+    def _individuos_por_iri(self, iris) -> List:
+        """Individuos vivos de la ontología con esas IRIs (las que no lo son se omiten)"""
+        mundo = self.onto.world
+        entidades = (mundo._get_by_storid(mundo._abbreviate(iri)) for iri in iris)
+        return [e for e in entidades if isinstance(e, Thing)]
+
+    def materializacion(self) -> Materializacion:
+        """Inferencias de la versión actual (materialización completa si cambió por otra vía)"""
+        with self._lock_onto:
+            if self._materializacion is None:
+                self._materializacion = Materializacion(self.onto)
+            elif self._version_materializacion != self.version:
+                self._materializacion.materializar()
+            self._version_materializacion = self.version
+            return self._materializacion
+
+    # ---------- Estadísticas de la ontología ----------
+
+    def estadisticas_ontologia(self) -> EstadisticasOntologia:
+        """Estadísticas de la versión actual (se recalculan si cambió por otra vía)"""
+        with self._lock_onto:
+            if self._estadisticas is None or self._version_estadisticas != self.version:
+                if self.indice is not None:
+                    self._estadisticas = EstadisticasOntologia.desde_indice(self.indice)
+                else:
+                    self._estadisticas = EstadisticasOntologia.desde_ontologia(self.onto)
+                self._version_estadisticas = self.version
+            return self._estadisticas
+
+    def _estadisticas_vigentes(self) -> Optional[EstadisticasOntologia]:
+        """Estadísticas ya calculadas para la versión actual (None si habría que recalcularlas)"""
+        if self._estadisticas is not None and self._version_estadisticas == self.version:
+            return self._estadisticas
+        return None
+
+    def _sincronizar_estadisticas(self, estadisticas: Optional[EstadisticasOntologia]):
+        """Marca como vigentes las estadísticas actualizadas en el lugar"""
+        if estadisticas is not None:
+            self._version_estadisticas = self.version
+
+    def estadisticas(self) -> Dict:
+        """Resumen de la ontología: clases, propiedades, individuos y sus conteos"""
+        with self._lock_onto:
+            return dict(self.estadisticas_ontologia().resumen(), version=self.version)
+
+    # ---------- Búsquedas locales ----------
+
+    def buscar_por_nombre(self, termino: str) -> List[Dict]:
+        """Individuos cuyo nombre contiene el término"""
+        if self.indice is not None:
+            return self._desde_indice("por_nombre", self.indice.buscar_por_nombre, termino)
+        return self._desde_compacto("por_nombre", termino)
+
+    def buscar_texto_completo(self, termino: str) -> List[Dict]:
+        """Individuos cuyo nombre o algún valor de propiedad contiene el término"""
+        if self.indice is not None:
+            return self._desde_indice("texto_completo", self.indice.buscar_texto_completo, termino)
+        return self._desde_compacto("texto_completo", termino)
+
+    def buscar_por_clase(self, nombre_clase: str) -> List[Dict]:
+        """Instancias de una clase local"""
+        if self.indice is not None:
+            return self._desde_indice("por_clase", self.indice.instancias_de_clase, nombre_clase)
+        materializacion = self.materializacion()
+        with self._lock_onto, metricas.medir("busqueda_local", "por_clase_inferida") as medicion:
+            resultados = [self.describir(ind) for ind in materializacion.instancias_de(nombre_clase)]
+            medicion.filas = len(resultados)
+        return resultados
+
+    def describir(self, individuo) -> Dict:
+        """Diccionario del individuo con sus tipos y relaciones inferidos"""
+        return individuo_a_dict(individuo, self._materializacion)
+
+    def listar_clases(self) -> List[str]:
+        """Nombres de las clases locales"""
+        if self.indice is not None:
+            return self.indice.listar_clases()
+        with self._lock_onto:
+            return listar_clases(self.onto)
+
+    def indice_compacto(self) -> IndiceCompacto:
+        """Índice compacto de la versión actual (se reconstruye tras un cambio)"""
+        with self._lock_onto:
+            if self._compacto is None or self._version_compacto != self.version:
+                self._compacto = IndiceCompacto(self.onto)
+                self._version_compacto = self.version
+            return self._compacto
+
+    def _desde_compacto(self, operacion: str, termino: str) -> List[Dict]:
+        """Búsqueda en el índice compacto; los individuos se leen de la ontología"""
+        indice = self.indice_compacto()
+        self.materializacion()
+        consulta = indice.buscar_por_nombre if operacion == "por_nombre" else indice.buscar_texto_completo
+        with self._lock_onto, metricas.medir("indice_compacto", operacion) as medicion:
+            resultados = [self.describir(indice.individuos[i]) for i in consulta(termino)]
+            medicion.filas = len(resultados)
+        return resultados
+
+    def _desde_indice(self, operacion: str, consulta, argumento: str) -> List[Dict]:
+        """Ejecuta una consulta del índice y reconstruye los individuos"""
+        with metricas.medir("indice", operacion) as medicion:
+            resultados = [self.indice.individuo(i) for i in consulta(argumento)]
+            medicion.filas = len(resultados)
+        return resultados
+
+    # ---------- Relaciones (grafo CSR) ----------
+
+    def grafo(self) -> GrafoRelaciones:
+        """Grafo de relaciones de la versión actual (afirmadas e inferidas)"""
+        with self._lock_onto:
+            if self._grafo is None or self._version_grafo != self.version:
+                if self.indice is not None:
+                    self._grafo = GrafoRelaciones.desde_indice(self.indice)
+                else:
+                    self._grafo = GrafoRelaciones.desde_materializacion(self.materializacion())
+                self._version_grafo = self.version
+            return self._grafo
+
+    def propiedades_grafo(self) -> List[str]:
+        """Propiedades de objeto que tienen al menos una arista"""
+        return sorted(self.grafo().propiedades)
+
+    def _validar_grafo(self, grafo: GrafoRelaciones, nombres: List[str], direccion: str):
+        if direccion not in DIRECCIONES:
+            raise ErrorBusqueda(f"Dirección desconocida: {direccion}")
+        for nombre in nombres:
+            try:
+                grafo.id_nodo(nombre)
+            except KeyError as e:
+                raise ErrorBusqueda(str(e.args[0]))
+
+    def vecindario(self, nombre: str, k: int = 2, propiedades: Optional[List[str]] = None,
+                   direccion: str = "salida") -> List[Dict]:
+        """Individuos a k saltos o menos de `nombre` (por las propiedades dadas o todas)"""
+        grafo = self.grafo()
+        self._validar_grafo(grafo, [nombre], direccion)
+        return grafo.vecindario(nombre, k, propiedades, direccion)
+
+    def camino(self, origen: str, destino: str, propiedades: Optional[List[str]] = None,
+               direccion: str = "salida") -> Optional[List[Dict]]:
+        """Camino más corto entre dos individuos (None si no hay)"""
+        grafo = self.grafo()
+        self._validar_grafo(grafo, [origen, destino], direccion)
+        return grafo.camino_mas_corto(origen, destino, propiedades, direccion)
+
+    # ---------- Búsqueda facetada (mapas de bits) ----------
+
+    def facetas(self) -> IndiceFacetas:
+        """Índice de facetas de la versión actual"""
+        with self._lock_onto:
+            if self._facetas is None or self._version_facetas != self.version:
+                if self.indice is not None:
+                    self._facetas = IndiceFacetas.desde_indice(self.indice, FACETAS_PREDETERMINADAS)
+                else:
+                    self._facetas = IndiceFacetas.desde_ontologia(self.onto, FACETAS_PREDETERMINADAS)
+                self._version_facetas = self.version
+            return self._facetas
+
+    def buscar_facetado(self, selecciones: Dict[str, List[str]], operador: str = "AND",
+                        termino: str = "", tipo: str = TIPO_NOMBRE, limite: Optional[int] = None) -> Dict:
+        """
+        Búsqueda por facetas, opcionalmente restringida a una búsqueda por término
+
+        Args:
+            selecciones: Faceta -> valores seleccionados (OR dentro de cada faceta)
+            operador: "AND" u "OR" entre facetas
+            termino: Si no está vacío, solo se consideran los individuos que coinciden
+            tipo: "nombre" o "texto" para el término
+            limite: Máximo de individuos a devolver (los conteos usan todos)
+
+        Returns:
+            Diccionario con el total, los individuos y los conteos por faceta y valor
+        """
+        if tipo not in TIPOS:
+            raise ErrorBusqueda(f"Tipo de búsqueda desconocido: {tipo}")
+        if operador == "AND" and len(selecciones) > 1:
+            # Plan: las facetas con menos individuos estimados se combinan primero
+            estadisticas = self.estadisticas_ontologia()
+            selecciones = dict(sorted(selecciones.items(), key=lambda par: estadisticas.estimar(*par)))
+        facetas = self.facetas()
+        candidatos = self._ids_por_termino(termino, tipo) if termino else None
+        try:
+            ids = facetas.buscar(selecciones, operador, candidatos)
+            conteos = facetas.conteos(selecciones, operador, candidatos)
+        except (KeyError, ValueError) as e:
+            raise ErrorBusqueda(str(e.args[0]))
+
+        seleccion = ids[:limite] if limite is not None else ids
+        if self.indice is not None:
+            resultados = [self.indice.individuo(i) for i in seleccion]
+        else:
+            compacto = self.indice_compacto()
+            with self._lock_onto:
+                resultados = [self.describir(compacto.individuos[i]) for i in seleccion]
+        return {
+            "version": self.version,
+            "operador": operador,
+            "total": len(ids),
+            "resultados": resultados,
+            "conteos": conteos,
+        }
+
+    def facetas_disponibles(self) -> Dict[str, Dict[str, int]]:
+        """
+        Valores de cada faceta con su cantidad de individuos, sin filtros
+
+        Sale de las estadísticas de la versión, sin combinar mapas de bits.
+        """
+        estadisticas = self.estadisticas_ontologia()
+        with self._lock_onto:
+            return {faceta: estadisticas.frecuencias(faceta) for faceta in FACETAS_PREDETERMINADAS}
+
+    def _ids_por_termino(self, termino: str, tipo: str) -> List[int]:
+        """Ids (posición en la ontología) de los individuos que coinciden con el término"""
+        indice = self.indice if self.indice is not None else self.indice_compacto()
+        if tipo == TIPO_TEXTO:
+            return indice.buscar_texto_completo(termino)
+        return indice.buscar_por_nombre(termino)
+
+    # ---------- Rangos y top-N (índices numéricos) ----------
+
+    def indice_numerico(self) -> IndiceNumerico:
+        """Índice numérico de la versión actual"""
+        with self._lock_onto:
+            if self._numerico is None or self._version_numerico != self.version:
+                if self.indice is not None:
+                    self._numerico = IndiceNumerico.desde_indice(self.indice, PROPIEDADES_NUMERICAS)
+                else:
+                    self._numerico = IndiceNumerico.desde_ontologia(self.onto, PROPIEDADES_NUMERICAS)
+                self._version_numerico = self.version
+            return self._numerico
+
+    def propiedades_numericas(self) -> Dict[str, Dict]:
+        """Cantidad de valores, mínimo y máximo de cada propiedad numérica"""
+        return self.indice_numerico().estadisticas()
+
+    def buscar_por_rango(self, propiedad: str, minimo: Optional[float] = None,
+                         maximo: Optional[float] = None, limite: Optional[int] = None) -> Dict:
+        """
+        Individuos con un valor numérico en [minimo, maximo], de menor a mayor
+
+        Args:
+            propiedad: Propiedad numérica (p. ej. "montoRobado")
+            minimo: Límite inferior inclusivo (None = sin límite)
+            maximo: Límite superior inclusivo (None = sin límite)
+            limite: Máximo de individuos a devolver
+
+        Returns:
+            Diccionario con el total y los individuos, cada uno con su "valor"
+        """
+        try:
+            pares = self.indice_numerico().rango(propiedad, minimo, maximo)
+        except KeyError as e:
+            raise ErrorBusqueda(str(e.args[0]))
+        return {
+            "propiedad": propiedad,
+            "total": len(pares),
+            "resultados": self._fichas_con_valor(pares[:limite] if limite is not None else pares),
+        }
+
+    def top_numerico(self, propiedad: str, n: int = 10, descendente: bool = True) -> List[Dict]:
+        """Los n individuos con mayor (o menor) valor de una propiedad numérica"""
+        try:
+            pares = self.indice_numerico().top(propiedad, n, descendente)
+        except KeyError as e:
+            raise ErrorBusqueda(str(e.args[0]))
+        return self._fichas_con_valor(pares)
+
+    def _fichas_con_valor(self, pares: List[Tuple[int, float]]) -> List[Dict]:
+        if self.indice is not None:
+            return [dict(self.indice.individuo(i), valor=valor) for i, valor in pares]
+        compacto = self.indice_compacto()
+        with self._lock_onto:
+            return [dict(self.describir(compacto.individuos[i]), valor=valor) for i, valor in pares]
+
+    # ---------- Autocompletado ----------
+
+    def autocompletado(self) -> IndiceAutocompletado:
+        """Índice de sugerencias de la versión actual"""
+        with self._lock_onto:
+            if self._autocompletado is None or self._version_autocompletado != self.version:
+                if self.indice is not None:
+                    self._autocompletado = IndiceAutocompletado.desde_indice(
+                        self.indice, self.offline.cache, self._usos_autocompletado)
+                else:
+                    self._autocompletado = IndiceAutocompletado.desde_ontologia(
+                        self.onto, self.offline.cache, self._usos_autocompletado)
+                self._version_autocompletado = self.version
+            return self._autocompletado
+
+    def sugerir(self, prefijo: str, limite: int = 10, tipos: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Sugerencias para lo que se lleva escrito en el buscador
+
+        Args:
+            prefijo: Texto escrito
+            limite: Máximo de sugerencias
+            tipos: "individuo", "clase", "propiedad" y/o "dbpedia" (None = todos)
+
+        Returns:
+            Lista de {"texto", "tipo", "valor", "puntaje"}; "valor" es el nombre
+            local o la URI de DBpedia
+        """
+        try:
+            return self.autocompletado().sugerir(prefijo, limite, tipos)
+        except KeyError as e:
+            raise ErrorBusqueda(str(e.args[0]))
+
+    def registrar_uso_sugerencia(self, texto: str):
+        """Suma una búsqueda del texto: las sugerencias más buscadas suben"""
+        with self._lock_onto:
+            if self._autocompletado is not None and self._version_autocompletado == self.version:
+                self._autocompletado.registrar_uso(texto)
+            else:
+                # Se aplicará al construir el próximo índice
+                normalizado = normalizar(texto)
+                self._usos_autocompletado[normalizado] = self._usos_autocompletado.get(normalizado, 0) + 1
+
+    # ---------- SPARQL sobre la ontología local ----------
+
+    def consultor_sparql(self) -> ConsultorSPARQL:
+        """Consultor SPARQL local (con su caché de consultas preparadas)"""
+        if self.onto is None:
+            raise ErrorBusqueda("El SPARQL local necesita la ontología cargada (no disponible con --indice)")
+        with self._lock_onto:
+            if self._sparql is None:
+                self._sparql = ConsultorSPARQL(self.onto)
+            return self._sparql
+
+    def consultar_sparql(self, consulta: str, limite: Optional[int] = None) -> Tuple[List[str], Iterator[List]]:
+        """
+        Ejecuta un SELECT sobre la ontología local
+
+        Returns:
+            (columnas, generador de filas); las filas se leen bajo demanda
+        """
+        consultor = self.consultor_sparql()
+        try:
+            with self._lock_onto:
+                columnas = consultor.columnas(consulta)
+                filas = consultor.ejecutar(consulta, limite=limite)
+                version = self.version
+        except ErrorSPARQL as e:
+            raise ErrorBusqueda(str(e))
+        return columnas, self._filas_con_lock(filas, version)
+
+    def plantilla_sparql(self, nombre: str, parametros: List[str] = (),
+                         limite: Optional[int] = None) -> Tuple[List[str], Iterator[List]]:
+        """Ejecuta una de las plantillas de sparql_local.PLANTILLAS: (columnas, filas)"""
+        consultor = self.consultor_sparql()
+        try:
+            with self._lock_onto:
+                filas = consultor.ejecutar_plantilla(nombre, *parametros, limite=limite)
+                columnas = consultor.columnas(PLANTILLAS[nombre][0])
+                version = self.version
+        except ErrorSPARQL as e:
+            raise ErrorBusqueda(str(e))
+        return columnas, self._filas_con_lock(filas, version)
+
+    def _filas_con_lock(self, filas: Iterator[List], version: int) -> Iterator[List]:
+        """
+        Lee las filas por bloques con la ontología bloqueada (sin retenerla
+        mientras quien consume procesa un bloque). Si entre dos bloques la
+        ontología cambió (recarga, importación), el cursor ya no corresponde
+        a la versión actual: se corta con un error en lugar de mezclar versiones.
+        """
+        while True:
+            with self._lock_onto:
+                if self.version != version:
+                    raise ErrorBusqueda("La ontología cambió durante la consulta; vuelva a ejecutarla")
+                bloque = list(itertools.islice(filas, FILAS_POR_BLOQUE))
+            yield from bloque
+            if len(bloque) < FILAS_POR_BLOQUE:
+                return
+
+    # ---------- Búsquedas en DBpedia ----------
+
+    def buscar_dbpedia(self, termino: str, limite: int = 10) -> Tuple[List[Dict], Optional[str]]:
+        """Entidades de DBpedia cuya etiqueta coincide con el término"""
+        return buscar_en_dbpedia(
+            termino, limite, endpoint=self.conector.endpoint_online, transporte=self.conector.transporte,
+            compacto=self.conector.compacto, formato=self.conector.formato
+        )
+
+    def buscar_dbpedia_por_tipo(self, tipo: str, limite: int = 20) -> Tuple[List[Dict], Optional[str]]:
+        """Entidades de DBpedia de un tipo dbo:<tipo> (reutilizadas mientras no vencen en la caché)"""
+        _validar_dbpedia([tipo], limite)
+        clave = ("dbpedia_tipo", tipo, limite)
+        guardado = self.resultados.obtener(clave)
+        if guardado is not None:
+            return guardado, None
+        entidades, error = buscar_por_tipo_dbo(
+            tipo, limite, endpoint=self.conector.endpoint_online, transporte=self.conector.transporte,
+            compacto=self.conector.compacto, formato=self.conector.formato
+        )
+        if error is None:
+            self.resultados.guardar(clave, entidades)
+        return entidades, error
+
+    def explorar_dbpedia(self, tipos: Optional[List[str]] = None, limite: int = 15) -> Dict[str, Dict]:
+        """
+        Entidades y totales de las categorías de la exploración en una sola ronda
+
+        Solo se consultan las categorías que no están vigentes en la caché; las
+        que fallan se guardan TTL_ERRORES segundos, como las búsquedas con error.
+
+        Returns:
+            Tipo -> {"entidades", "total", "error"} (ver explorar_categorias)
+        """
+        tipos = list(dict.fromkeys(tipos or CATEGORIAS_EXPLORAR))
+        _validar_dbpedia(tipos, limite)
+        if len(tipos) > TIPOS_MAXIMOS_EXPLORAR:
+            raise ErrorBusqueda(f"Se pueden explorar hasta {TIPOS_MAXIMOS_EXPLORAR} tipos a la vez")
+        resultado = {tipo: self.resultados.obtener(("dbpedia_explorar", tipo, limite)) for tipo in tipos}
+        faltantes = [tipo for tipo, guardado in resultado.items() if guardado is None]
+        if faltantes:
+            nuevos = explorar_categorias(
+                faltantes, limite, endpoint=self.conector.endpoint_online, transporte=self.conector.transporte,
+                compacto=self.conector.compacto, formato=self.conector.formato
+            )
+            for tipo, categoria in nuevos.items():
+                fallida = categoria["error"] is not None or categoria["total"] is None
+                self.resultados.guardar(("dbpedia_explorar", tipo, limite), categoria,
+                                        ttl=TTL_ERRORES if fallida else None)
+            resultado.update(nuevos)
+        return resultado
+
+    def detalles_dbpedia(self, uri: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """Detalles de una entidad de DBpedia"""
+        if not uri_valida(uri):
+            raise ErrorBusqueda(f"URI inválida: {uri!r}")
+        return obtener_detalles_dbpedia(
+            uri, endpoint=self.conector.endpoint_online, transporte=self.conector.transporte,
+            formato=self.conector.formato
+        )
+
+    # ---------- Enlaces con DBpedia ----------
+
+    def enlace_dbpedia(self, nombre: str) -> Optional[Dict]:
+        """Enlace confiable de un individuo local con DBpedia (o None)"""
+        return self.enlaces.obtener(nombre)
+
+    def registrar_enlace(self, individuo, uri: str, etiqueta: str):
+        """Enlace exacto de un individuo importado desde DBpedia, emitido como owl:sameAs"""
+        enlace = self.enlaces.registrar(individuo.name, uri, etiqueta, 1.0, "importacion")
+        with self._lock_onto:
+            emitir_same_as(self.onto, self.enlaces, nombres=[individuo.name])
+        # Los resultados locales guardados llevan el owl:sameAs de cada individuo
+        self.resultados.limpiar()
+        return enlace
+
+    def enriquecer(self, nombre: str) -> Optional[Dict]:
+        """
+        Datos de DBpedia de un individuo local
+
+        Con un enlace confiable es un acierto de caché (del proceso o de la
+        caché offline, que puede estar compartida entre réplicas) o una
+        consulta directa por URI; sin enlace se busca en DBpedia Lookup una
+        vez y el resultado queda en la tabla de enlaces (también cuando no hay
+        coincidencia confiable o ningún candidato, para no repetir la búsqueda;
+        ver TablaEnlaces.buscado). Lo obtenido en línea se guarda en la caché
+        offline. Si DBpedia no responde, el fallo se recuerda TTL_ERRORES
+        segundos: los reruns no vuelven a esperar el tiempo límite.
+
+        Returns:
+            Datos del recurso con "confianza" y "fuente" (cache, uri o busqueda), o None
+        """
+        enlace = self.enlaces.obtener(nombre)
+        if enlace is not None:
+            uri = enlace["uri"]
+            with metricas.medir("enlaces", "enriquecer") as medicion:
+                datos = self._enriquecidos.get(uri)
+                if datos is None:
+                    guardados = self.offline.obtener_del_cache(nombre)
+                    if guardados and guardados.get("uri") == uri:
+                        datos = self._enriquecidos[uri] = dict(guardados, confianza=enlace["confianza"])
+                medicion.cache = "hit" if datos is not None else "miss"
+            if datos is not None:
+                return dict(datos, fuente="cache")
+            if self.resultados.obtener(("enriquecer", nombre)) is not None:
+                return None  # Falló hace poco
+            datos = self.conector.obtener_por_uri(uri)
+            if datos is None:
+                self.resultados.guardar(("enriquecer", nombre), True, ttl=TTL_ERRORES)
+                return None
+            datos = self._enriquecidos[uri] = dict(datos, confianza=enlace["confianza"])
+            self.offline.agregar_al_cache(nombre, dict(datos, fuente="uri"))
+            return dict(datos, fuente="uri")
+
+        if self.enlaces.buscado(nombre):
+            return None  # Ya se buscó y no hubo coincidencia confiable
+        if self.resultados.obtener(("enriquecer", nombre)) is not None:
+            return None  # Falló hace poco
+        try:
+            candidatos = self.conector.buscar_con_api_rest(normalizar(nombre), propagar_errores=True)
+        except Exception:
+            # Sin respuesta no se sabe si hay candidatos: no va a la tabla de enlaces, solo se recuerda el fallo
+            self.resultados.guardar(("enriquecer", nombre), True, ttl=TTL_ERRORES)
+            return None
+        enlace = self.enlaces.vincular(nombre, candidatos, "lookup")
+        if enlace is None or self.enlaces.obtener(nombre) is None:
+            return None
+        datos = next(c for c in candidatos if c.get("uri") == enlace["uri"])
+        self._enriquecidos[enlace["uri"]] = dict(datos, confianza=enlace["confianza"])
+        datos = dict(datos, confianza=enlace["confianza"], fuente="busqueda")
+        self.offline.agregar_al_cache(nombre, datos)
+        return datos
+
+    # ---------- Punto de entrada común ----------
+
+    def buscar(self, termino: str, modo: str = MODO_HIBRIDO, tipo: str = TIPO_NOMBRE,
+               limite: int = 10) -> Dict:
+        """
+        Búsqueda local, en DBpedia o híbrida
+
+        Args:
+            termino: Término a buscar
+            modo: "local", "dbpedia" o "hibrido"
+            tipo: "nombre" (solo nombres) o "texto" (nombres y valores) para la parte local
+            limite: Máximo de resultados de DBpedia
+
+        Returns:
+            Diccionario con resultados locales, de DBpedia y el posible error de
+            DBpedia (guardado en caché: no se debe modificar)
+        """
+        if modo not in MODOS:
+            raise ErrorBusqueda(f"Modo de búsqueda desconocido: {modo}")
+        if tipo not in TIPOS:
+            raise ErrorBusqueda(f"Tipo de búsqueda desconocido: {tipo}")
+        if not termino:
+            raise ErrorBusqueda("El término de búsqueda está vacío")
+        clave = (termino, modo, tipo, limite, self.version)
+        resultado = self.resultados.obtener(clave)
+        if resultado is not None:
+            return resultado
+        # Solo las búsquedas nuevas cuentan: los reruns de la interfaz leen de la caché
+        self.registrar_uso_sugerencia(termino)
+
+        locales = []
+        if modo != MODO_DBPEDIA:
+            if tipo == TIPO_TEXTO:
+                locales = self.buscar_texto_completo(termino)
+            else:
+                locales = self.buscar_por_nombre(termino)
+            for local in locales:
+                enlace = self.enlaces.obtener(local["nombre"])
+                if enlace is not None:
+                    local["dbpedia_uri"] = enlace["uri"]
+
+        dbpedia, error_dbpedia = [], None
+        if modo != MODO_LOCAL:
+            dbpedia, error_dbpedia = self.buscar_dbpedia(termino, limite)
+
+        resultado = {
+            "termino": termino,
+            "modo": modo,
+            "tipo": tipo,
+            "version": clave[-1],
+            "locales": locales,
+            "dbpedia": dbpedia,
+            "error_dbpedia": error_dbpedia,
+        }
+        # Un error de DBpedia suele ser pasajero: ese resultado se reutiliza poco
+        # tiempo (lo justo para que los reruns no esperen de nuevo el tiempo límite)
+        self.resultados.guardar(clave, resultado, ttl=TTL_ERRORES if error_dbpedia else None)
+        return resultado
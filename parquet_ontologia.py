@@ -0,0 +1,345 @@
+"""
+Exportación e importación columnar (Parquet o Arrow IPC) de la ontología.
+
+Exporta en un directorio una tabla por archivo:
+
+    individuos        iri, nombre, clases (lista de IRIs)
+    datos             sujeto, propiedad, valor (texto), numero, tipo, idioma
+    relaciones        sujeto, propiedad, objeto (propiedades de objeto entre individuos)
+    enriquecimiento   datos de DBpedia de la caché offline, por nombre
+
+Las tablas salen directamente del almacén de tripletas de owlready2, sin
+crear un objeto Python por individuo, así que exportar 100 000 individuos
+toma segundos. La importación hace el camino inverso: inserta todas las
+tripletas con inserciones masivas en una sola transacción (si algo falla no
+queda nada a medias) y descarta de la caché de owlready2 solo los sujetos
+afectados. Sirve para análisis fuera de la app (pandas, DuckDB, Spark) y
+para sembrar otra instalación con los individuos y el enriquecimiento.
+
+Uso:
+    python parquet_ontologia.py exportar --owl criptomonedas.owl --salida exportacion/
+    python parquet_ontologia.py importar --owl esquema.owl --entrada exportacion/ --guardar completa.owl
+"""
+
+import argparse
+import json
+import os
+from typing import Dict, List, Optional
+
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from metricas import metricas
+
+TIPO_RDF = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+TIPO_INDIVIDUO = "http://www.w3.org/2002/07/owl#NamedIndividual"
+XSD_STRING = "http://www.w3.org/2001/XMLSchema#string"
+FORMATOS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+ESQUEMAS = {
+    "individuos": pa.schema([
+        ("iri", pa.string()),
+        ("nombre", pa.string()),
+        ("clases", pa.list_(pa.string())),
+    ]),
+    "datos": pa.schema([
+        ("sujeto", pa.string()),
+        ("propiedad", pa.string()),
+        ("valor", pa.string()),
+        ("numero", pa.float64()),  # el valor si es numérico (para filtrar y agregar sin convertir)
+        ("tipo", pa.string()),  # IRI del tipo de dato
+        ("idioma", pa.string()),
+    ]),
+    "relaciones": pa.schema([
+        ("sujeto", pa.string()),
+        ("propiedad", pa.string()),
+        ("objeto", pa.string()),
+    ]),
+    "enriquecimiento": pa.schema([
+        ("nombre", pa.string()),
+        ("uri", pa.string()),
+        ("etiqueta", pa.string()),
+        ("resumen", pa.string()),
+        ("miniatura", pa.string()),
+        ("sitio_web", pa.string()),
+        ("categorias", pa.list_(pa.string())),
+        ("confianza", pa.float64()),
+        ("datos", pa.string()),  # la entrada completa en JSON (la importación la restaura tal cual)
+    ]),
+}
+
+
+def tablas_ontologia(onto) -> Dict[str, pa.Table]:
+    """
+    Individuos, datos y relaciones de la ontología como tablas Arrow
+
+    Returns:
+        {"individuos": ..., "datos": ..., "relaciones": ...}
+    """
+    mundo = onto.world
+    iris: Dict[int, str] = {}
+
+    def iri(storid: int) -> str:
+        texto = iris.get(storid)
+        if texto is None:
+            texto = iris[storid] = mundo._unabbreviate(storid)
+        return texto
+
+    tipo_rdf = mundo._abbreviate(TIPO_RDF)
+    tipo_individuo = mundo._abbreviate(TIPO_INDIVIDUO)
+    clases: Dict[int, list] = {}
+    relaciones = []
+    for s, p, o in onto._get_obj_triples_spo_spo(None, None, None):
+        if s < 0 or o < 0:
+            continue  # nodos anónimos: axiomas del esquema
+        if p == tipo_rdf:
+            clases.setdefault(s, []).append(o)
+        else:
+            relaciones.append((s, p, o))
+
+    # Las clases y propiedades también tienen rdf:type; los individuos se declaran owl:NamedIndividual
+    individuos = {s for s, tipos in clases.items() if tipo_individuo in tipos}
+    filas_individuos = {"iri": [], "nombre": [], "clases": []}
+    for s in sorted(individuos, key=iri):
+        texto = iri(s)
+        filas_individuos["iri"].append(texto)
+        filas_individuos["nombre"].append(texto.rsplit("#", 1)[-1].rsplit("/", 1)[-1])
+        filas_individuos["clases"].append([iri(c) for c in clases[s] if c != tipo_individuo])
+
+    filas_relaciones = {"sujeto": [], "propiedad": [], "objeto": []}
+    for s, p, o in relaciones:
+        if s in individuos and o in individuos:
+            filas_relaciones["sujeto"].append(iri(s))
+            filas_relaciones["propiedad"].append(iri(p))
+            filas_relaciones["objeto"].append(iri(o))
+
+    filas_datos = {"sujeto": [], "propiedad": [], "valor": [], "numero": [], "tipo": [], "idioma": []}
+    for s, p, o, d in onto._get_data_triples_spod_spod(None, None, None, None):
+        if s not in individuos:
+            continue
+        filas_datos["sujeto"].append(iri(s))
+        filas_datos["propiedad"].append(iri(p))
+        filas_datos["valor"].append(str(o))
+        filas_datos["numero"].append(float(o) if isinstance(o, (int, float)) and not isinstance(o, bool) else None)
+        idioma = d[1:] if isinstance(d, str) and d.startswith("@") else None
+        filas_datos["tipo"].append(iri(d) if isinstance(d, int) and d > 0 else None)
+        filas_datos["idioma"].append(idioma)
+
+    return {
+        "individuos": pa.table(filas_individuos, schema=ESQUEMAS["individuos"]),
+        "datos": pa.table(filas_datos, schema=ESQUEMAS["datos"]),
+        "relaciones": pa.table(filas_relaciones, schema=ESQUEMAS["relaciones"]),
+    }
+
+
+def tabla_enriquecimiento(offline) -> pa.Table:
+    """Entradas de la caché offline de DBpedia (DBpediaOffline) como tabla Arrow"""
+    filas = []
+    for nombre, datos in sorted(offline.backend.elementos()):
+        if not isinstance(datos, dict):
+            continue
+        categorias = datos.get("categories") or []
+        filas.append({
+            "nombre": nombre,
+            "uri": datos.get("uri"),
+            "etiqueta": datos.get("label"),
+            "resumen": datos.get("abstract") or None,
+            "miniatura": datos.get("thumbnail") or None,
+            "sitio_web": datos.get("website") or None,
+            "categorias": [str(c) for c in categorias] if isinstance(categorias, list) else [str(categorias)],
+            "confianza": datos.get("confianza"),
+            "datos": json.dumps(datos, ensure_ascii=False),
+        })
+    return pa.Table.from_pylist(filas, schema=ESQUEMAS["enriquecimiento"])
+
+
+def _escribir(tabla: pa.Table, ruta: str, formato: str):
+    """Escribe de forma atómica (un archivo a medio escribir no reemplaza al anterior)"""
+    temporal = f"{ruta}.tmp"
+    if formato == "parquet":
+        pq.write_table(tabla, temporal)
+    else:
+        feather.write_feather(tabla, temporal)
+    os.replace(temporal, ruta)
+
+
+def exportar(onto, directorio: str, offline=None, formato: str = "parquet") -> Dict:
+    """
+    Exporta individuos, datos, relaciones y (si se da la caché offline) enriquecimiento
+
+    Args:
+        onto: Ontología cargada
+        directorio: Directorio de salida (se crea si no existe)
+        offline: DBpediaOffline cuya caché se exporta como tabla de enriquecimiento
+        formato: "parquet" o "arrow" (Arrow IPC / Feather v2)
+
+    Returns:
+        Filas por tabla y rutas escritas
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconocido: {formato}")
+    os.makedirs(directorio, exist_ok=True)
+    with metricas.medir("parquet", "exportar") as medicion:
+        tablas = tablas_ontologia(onto)
+        if offline is not None:
+            tablas["enriquecimiento"] = tabla_enriquecimiento(offline)
+        resumen = {"formato": formato, "rutas": {}}
+        for nombre, tabla in tablas.items():
+            ruta = os.path.join(directorio, nombre + FORMATOS[formato])
+            _escribir(tabla, ruta, formato)
+            resumen[nombre] = tabla.num_rows
+            resumen["rutas"][nombre] = ruta
+            medicion.bytes += os.path.getsize(ruta)
+        medicion.filas = resumen["individuos"]
+    return resumen
+
+
+def leer_tablas(directorio: str) -> Dict[str, pa.Table]:
+    """Tablas exportadas en un directorio (Parquet o Arrow, según la extensión)"""
+    tablas = {}
+    for nombre, esquema in ESQUEMAS.items():
+        for formato, extension in FORMATOS.items():
+            ruta = os.path.join(directorio, nombre + extension)
+            if os.path.exists(ruta):
+                tabla = pq.read_table(ruta) if formato == "parquet" else feather.read_table(ruta)
+                tablas[nombre] = tabla.select(esquema.names).cast(esquema)
+                break
+    if "individuos" not in tablas:
+        raise FileNotFoundError(f"No hay una exportación de individuos en {directorio}")
+    return tablas
+
+
+def _valor_crudo(valor: str, numero: Optional[float]):
+    """El valor como lo guarda owlready2: int, float o texto"""
+    if numero is None:
+        return valor
+    return int(valor) if valor.lstrip("-").isdigit() else numero
+
+
+def importar(onto, tablas: Dict[str, pa.Table], offline=None) -> Dict:
+    """
+    Inserta las tablas en la ontología en una sola transacción
+
+    Las tripletas ya presentes se ignoran, así que importar dos veces lo
+    mismo no duplica nada. Las clases y propiedades deben existir en el
+    esquema de la ontología destino.
+
+    Args:
+        onto: Ontología destino
+        tablas: Tablas como las de tablas_ontologia (p. ej. de leer_tablas)
+        offline: DBpediaOffline donde se carga la tabla de enriquecimiento, si hay
+
+    Returns:
+        Individuos, tripletas de datos y de relaciones realmente insertados
+        (sin contar los que ya estaban) y entradas de enriquecimiento cargadas
+    """
+    mundo = onto.world
+    grafo = onto.graph
+    storids: Dict[str, int] = {}
+
+    def storid(iri: str) -> int:
+        valor = storids.get(iri)
+        if valor is None:
+            valor = storids[iri] = mundo._abbreviate(iri)
+        return valor
+
+    with metricas.medir("parquet", "importar") as medicion:
+        mundo.graph.acquire_write_lock()
+        try:
+            tipo_rdf, tipo_individuo = storid(TIPO_RDF), storid(TIPO_INDIVIDUO)
+            tipo_texto = storid(XSD_STRING)
+            individuos = tablas["individuos"].to_pydict()
+            declaraciones, tipos, relaciones = [], [], []
+            for iri, clases in zip(individuos["iri"], individuos["clases"]):
+                s = storid(iri)
+                declaraciones.append((grafo.c, s, tipo_rdf, tipo_individuo))
+                tipos.extend((grafo.c, s, tipo_rdf, storid(clase)) for clase in clases or [])
+            if tablas.get("relaciones") is not None:
+                columnas = tablas["relaciones"].to_pydict()
+                relaciones = [(grafo.c, storid(s), storid(p), storid(o)) for s, p, o in
+                              zip(columnas["sujeto"], columnas["propiedad"], columnas["objeto"])]
+            datos = []
+            if tablas.get("datos") is not None:
+                columnas = tablas["datos"].to_pydict()
+                for s, p, valor, numero, tipo, idioma in zip(
+                        columnas["sujeto"], columnas["propiedad"], columnas["valor"],
+                        columnas["numero"], columnas["tipo"], columnas["idioma"]):
+                    d = f"@{idioma}" if idioma else storid(tipo) if tipo else tipo_texto
+                    datos.append((grafo.c, storid(s), storid(p), _valor_crudo(valor, numero), d))
+
+            # Un punto de guardado y no BEGIN/COMMIT: owlready2 mantiene abierta
+            # su propia transacción (el esquema recién cargado no está confirmado)
+            db = grafo.db
+
+            def insertar(sql: str, filas: List[tuple]) -> int:
+                # Filas que sqlite insertó de verdad (INSERT OR IGNORE salta las repetidas)
+                antes = db.total_changes
+                db.executemany(sql, filas)
+                return db.total_changes - antes
+
+            db.execute("SAVEPOINT importacion")
+            try:
+                insertados = {
+                    "individuos": insertar("INSERT OR IGNORE INTO objs VALUES (?, ?, ?, ?)", declaraciones),
+                    "relaciones": insertar("INSERT OR IGNORE INTO objs VALUES (?, ?, ?, ?)", relaciones),
+                    "datos": insertar("INSERT OR IGNORE INTO datas VALUES (?, ?, ?, ?, ?)", datos),
+                }
+                db.executemany("INSERT OR IGNORE INTO objs VALUES (?, ?, ?, ?)", tipos)
+            except Exception:
+                db.execute("ROLLBACK TO importacion")
+                raise
+            finally:
+                db.execute("RELEASE importacion")
+            mundo.graph.analyze()
+        finally:
+            mundo.graph.release_write_lock()
+
+        # owlready2 vuelve a leer de la base los sujetos que ya tenía en memoria
+        sujetos = {fila[1] for filas in (declaraciones, relaciones, datos) for fila in filas}
+        for s in sujetos:
+            mundo._entities.pop(s, None)
+
+        resumen = dict(insertados, enriquecimiento=0)
+        if offline is not None and tablas.get("enriquecimiento") is not None:
+            entradas = {fila["nombre"]: json.loads(fila["datos"])
+                        for fila in tablas["enriquecimiento"].to_pylist()}
+            offline.agregar_varios(entradas)
+            resumen["enriquecimiento"] = len(entradas)
+        medicion.filas = resumen["individuos"]
+    return resumen
+
+
+def main():
+    from busqueda_local import cargar_ontologia_archivo
+    from dbpedia_connector import DBpediaOffline
+
+    parser = argparse.ArgumentParser(description="Exporta o importa la ontología en Parquet/Arrow")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+    exportacion = subcomandos.add_parser("exportar")
+    exportacion.add_argument("--owl", default="criptomonedas.owl")
+    exportacion.add_argument("--salida", default="exportacion")
+    exportacion.add_argument("--formato", choices=list(FORMATOS), default="parquet")
+    exportacion.add_argument("--sin-enriquecimiento", action="store_true", help="No exportar la caché de DBpedia")
+    importacion = subcomandos.add_parser("importar")
+    importacion.add_argument("--owl", required=True, help="Ontología destino (con el esquema)")
+    importacion.add_argument("--entrada", default="exportacion")
+    importacion.add_argument("--guardar", help="Archivo OWL donde guardar el resultado (por defecto --owl)")
+    importacion.add_argument("--sin-enriquecimiento", action="store_true", help="No cargar la caché de DBpedia")
+    args = parser.parse_args()
+
+    onto = cargar_ontologia_archivo(args.owl)
+    offline = None if args.sin_enriquecimiento else DBpediaOffline()
+    if args.comando == "exportar":
+        resumen = exportar(onto, args.salida, offline, args.formato)
+        print(f"Exportados {resumen['individuos']} individuos, {resumen['datos']} valores y "
+              f"{resumen['relaciones']} relaciones a {args.salida}")
+    else:
+        resumen = importar(onto, leer_tablas(args.entrada), offline)
+        onto.save(file=args.guardar or args.owl, format="rdfxml")
+        print(f"Importados {resumen['individuos']} individuos, {resumen['datos']} valores, "
+              f"{resumen['relaciones']} relaciones y {resumen['enriquecimiento']} entradas de DBpedia")
+
+
+if __name__ == "__main__":
+    main()
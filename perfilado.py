@@ -0,0 +1,221 @@
+"""
+Perfilado opcional (cProfile + tracemalloc) de cada rerun de Streamlit y de
+las funciones de búsqueda.
+
+Se activa con la variable de entorno BUSCADOR_PERFILADO=1 o desde la casilla
+"🔬 Perfilar reruns" de la barra lateral. Cada rerun perfilado escribe en
+BUSCADOR_PERFILADO_DIR (por defecto "perfiles/"):
+
+    rerun-<fecha>-<n>.prof        estadísticas de cProfile (abrir con pstats/snakeviz)
+    rerun-<fecha>-<n>.tracemalloc snapshot de memoria (tracemalloc.Snapshot.load)
+
+Las funciones decoradas con @perfilar aparecen desglosadas en el resumen del
+rerun; fuera de un rerun perfilado (API, scripts) generan sus propios archivos.
+"""
+
+import cProfile
+import functools
+import itertools
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+DIRECTORIO_POR_DEFECTO = "perfiles"
+TOP_POR_DEFECTO = 15
+
+# Funciones de búsqueda registradas con @perfilar: código -> nombre legible
+FUNCIONES_BUSQUEDA: Dict[object, str] = {}
+
+_contador = itertools.count(1)
+
+# Perfiladores activos por hilo; tracemalloc es global y se detiene con el último
+_activos: Dict[int, "Perfilador"] = {}
+_lock = threading.Lock()
+
+
+def perfilado_activo() -> bool:
+    """Indica si el perfilado está activado por variable de entorno"""
+    return os.environ.get("BUSCADOR_PERFILADO", "0") == "1"
+
+
+def directorio_perfiles() -> str:
+    return os.environ.get("BUSCADOR_PERFILADO_DIR", DIRECTORIO_POR_DEFECTO)
+
+
+def top_por_defecto() -> int:
+    return int(os.environ.get("BUSCADOR_PERFILADO_TOP", TOP_POR_DEFECTO))
+
+
+class Perfilador:
+    """Perfila un bloque de código con cProfile y tracemalloc"""
+
+    def __init__(self, prefijo: str = "rerun", directorio: Optional[str] = None, top: Optional[int] = None):
+        self.prefijo = prefijo
+        self.directorio = directorio or directorio_perfiles()
+        self.top = top or top_por_defecto()
+        self.perfil = cProfile.Profile()
+        self._inicio = 0.0
+        self._hilo = None
+
+    def iniciar(self) -> "Perfilador":
+        """Empieza a perfilar el hilo actual"""
+        with _lock:
+            # Un rerun interrumpido (st.stop, nuevo rerun) puede dejar perfiladores huérfanos
+            vivos = {hilo.ident for hilo in threading.enumerate()}
+            for ident, anterior in list(_activos.items()):
+                if ident not in vivos or ident == threading.get_ident():
+                    anterior.perfil.disable()
+                    del _activos[ident]
+
+            self._hilo = threading.get_ident()
+            _activos[self._hilo] = self
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+
+        self._inicio = time.perf_counter()
+        self.perfil.enable()
+        return self
+
+    def _detener(self):
+        """Deja de perfilar; tracemalloc se detiene si no queda ningún perfilador"""
+        self.perfil.disable()
+        with _lock:
+            if _activos.get(self._hilo) is self:
+                del _activos[self._hilo]
+
+    def finalizar(self) -> Dict:
+        """
+        Detiene el perfilado, escribe los archivos y resume los puntos calientes
+
+        Returns:
+            Diccionario con rutas de archivos, duración, hotspots, memoria y
+            tiempos de las funciones de búsqueda
+        """
+        self.perfil.disable()
+        duracion = time.perf_counter() - self._inicio
+
+        snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        self._detener()
+        with _lock:
+            if not _activos and tracemalloc.is_tracing():
+                tracemalloc.stop()
+
+        os.makedirs(self.directorio, exist_ok=True)
+        base = os.path.join(
+            self.directorio,
+            f"{self.prefijo}-{time.strftime('%Y%m%d-%H%M%S')}-{next(_contador)}"
+        )
+        archivo_prof = base + ".prof"
+        self.perfil.dump_stats(archivo_prof)
+
+        archivo_memoria = None
+        memoria = []
+        if snapshot is not None:
+            snapshot = snapshot.filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ))
+            archivo_memoria = base + ".tracemalloc"
+            snapshot.dump(archivo_memoria)
+            memoria = resumir_memoria(snapshot, self.top)
+
+        estadisticas = pstats.Stats(self.perfil)
+        return {
+            "archivo_prof": archivo_prof,
+            "archivo_memoria": archivo_memoria,
+            "duracion_ms": round(duracion * 1000.0, 1),
+            "hotspots": resumir_hotspots(estadisticas, self.top),
+            "memoria": memoria,
+            "funciones_busqueda": resumir_funciones_busqueda(estadisticas),
+        }
+
+
+def _ubicacion(clave) -> str:
+    archivo, linea, funcion = clave
+    if archivo == "~":
+        return funcion  # funciones internas de C (p. ej. <built-in method ...>)
+    return f"{os.path.basename(archivo)}:{linea}({funcion})"
+
+
+def resumir_hotspots(estadisticas: pstats.Stats, top: int = TOP_POR_DEFECTO) -> List[Dict]:
+    """
+    Funciones con mayor tiempo acumulado
+
+    Args:
+        estadisticas: Estadísticas de cProfile
+        top: Cantidad de funciones a devolver
+
+    Returns:
+        Lista de diccionarios (función, llamadas, tiempo propio y acumulado en ms)
+    """
+    filas = []
+    for clave, (_cc, llamadas, propio, acumulado, _llamadores) in estadisticas.stats.items():
+        filas.append({
+            "funcion": _ubicacion(clave),
+            "llamadas": llamadas,
+            "propio_ms": round(propio * 1000.0, 2),
+            "acumulado_ms": round(acumulado * 1000.0, 2),
+        })
+    filas.sort(key=lambda fila: fila["acumulado_ms"], reverse=True)
+    return filas[:top]
+
+
+def resumir_memoria(snapshot: tracemalloc.Snapshot, top: int = TOP_POR_DEFECTO) -> List[Dict]:
+    """Líneas de código que más memoria asignaron durante el perfilado"""
+    filas = []
+    for estadistica in snapshot.statistics("lineno")[:top]:
+        marco = estadistica.traceback[0]
+        filas.append({
+            "ubicacion": f"{os.path.basename(marco.filename)}:{marco.lineno}",
+            "kib": round(estadistica.size / 1024.0, 1),
+            "asignaciones": estadistica.count,
+        })
+    return filas
+
+
+def resumir_funciones_busqueda(estadisticas: pstats.Stats) -> List[Dict]:
+    """Tiempo acumulado de cada función de búsqueda registrada con @perfilar"""
+    filas = []
+    for (archivo, linea, funcion), (_cc, llamadas, _propio, acumulado, _ll) in estadisticas.stats.items():
+        for codigo, nombre in FUNCIONES_BUSQUEDA.items():
+            if codigo.co_filename == archivo and codigo.co_firstlineno == linea and codigo.co_name == funcion:
+                filas.append({
+                    "ruta": nombre,
+                    "llamadas": llamadas,
+                    "acumulado_ms": round(acumulado * 1000.0, 2),
+                })
+    filas.sort(key=lambda fila: fila["acumulado_ms"], reverse=True)
+    return filas
+
+
+def perfilar(nombre: Optional[str] = None) -> Callable:
+    """
+    Decorador para las funciones de las rutas de búsqueda
+
+    Dentro de un rerun perfilado la función solo se registra para aparecer
+    desglosada en el resumen (cProfile no admite perfiladores anidados). Fuera
+    de un rerun, con BUSCADOR_PERFILADO=1, cada llamada se perfila por separado.
+
+    Args:
+        nombre: Nombre legible de la ruta (por defecto el de la función)
+    """
+    def decorador(funcion: Callable) -> Callable:
+        etiqueta = nombre or funcion.__name__
+        FUNCIONES_BUSQUEDA[funcion.__code__] = etiqueta
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not perfilado_activo() or threading.get_ident() in _activos:
+                return funcion(*args, **kwargs)
+            perfilador = Perfilador(prefijo=etiqueta).iniciar()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                perfilador.finalizar()
+
+        return envoltura
+
+    return decorador
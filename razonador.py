@@ -0,0 +1,272 @@
+"""
+Motor de reglas ligero (RDFS + subconjunto de OWL-RL) para la ontología.
+
+En lugar de ejecutar un razonador externo en cada consulta, las inferencias
+se materializan una vez al cargar la ontología y se guardan en memoria,
+indexadas por storid de owlready2. Las reglas implementadas son:
+
+    subclase         x rdf:type C, C ⊑ D              ⇒ x rdf:type D
+    dominio          x p y, dominio(p) = C             ⇒ x rdf:type C
+    rango            x p y, rango(p) = C               ⇒ y rdf:type C
+    subpropiedad     x p y, p ⊑ q                      ⇒ x q y
+    inversa          x p y, inversa(p) = q             ⇒ y q x
+    simetrica        x p y, p simétrica                ⇒ y p x
+    transitiva       x p y, y p z, p transitiva        ⇒ x p z
+
+La materialización es semi-ingenua (solo se procesan los hechos nuevos), así
+que agregar individuos importados solo deriva lo que ellos aportan.
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from owlready2 import (
+    Nothing, ObjectPropertyClass, SymmetricProperty, Thing, ThingClass, TransitiveProperty, owl
+)
+
+from metricas import metricas
+
+REGLAS = ("subclase", "dominio", "rango", "subpropiedad", "inversa", "simetrica", "transitiva")
+
+
+def _clases_con_nombre(expresiones) -> List[ThingClass]:
+    """Solo clases con nombre (se ignoran restricciones y uniones)"""
+    return [c for c in expresiones if isinstance(c, ThingClass) and c not in (Thing, Nothing)]
+
+
+class Materializacion:
+    """Tipos y relaciones (explícitos + inferidos) de los individuos de una ontología"""
+
+    def __init__(self, onto, reglas: Iterable[str] = REGLAS):
+        self.onto = onto
+        self.mundo = onto.world
+        self.reglas = set(reglas)
+
+        # tipos[individuo] -> clases; instancias[clase] -> individuos
+        self.tipos: Dict[int, Set[int]] = defaultdict(set)
+        self.instancias: Dict[int, Set[int]] = defaultdict(set)
+        # hechos[propiedad][sujeto] -> objetos; inversos[propiedad][objeto] -> sujetos
+        self.hechos: Dict[int, Dict[int, Set[int]]] = defaultdict(lambda: defaultdict(set))
+        self.inversos: Dict[int, Dict[int, Set[int]]] = defaultdict(lambda: defaultdict(set))
+
+        # Hechos afirmados en el archivo (para distinguir lo inferido)
+        self.tipos_explicitos: Set[Tuple[int, int]] = set()
+        self.hechos_explicitos: Set[Tuple[int, int, int]] = set()
+        self.inferidos_por_regla: Dict[str, int] = defaultdict(int)
+        # Individuos en el orden de la ontología (storid -> individuo), para responder sin recorrerla
+        self.individuos: Dict[int, object] = {}
+        self._posicion: Dict[int, int] = {}
+
+        self._compilar_esquema()
+        self.materializar()
+
+    # ---------- Esquema ----------
+
+    def _compilar_esquema(self):
+        """Precalcula superclases y características de las propiedades de objeto"""
+        self.superclases: Dict[int, Set[int]] = {}
+        self.clases_por_nombre: Dict[str, int] = {}
+        for clase in self.onto.classes():
+            self.clases_por_nombre.setdefault(clase.name, clase.storid)
+            self.superclases[clase.storid] = {
+                c.storid for c in clase.ancestors() if isinstance(c, ThingClass) and c is not Thing
+            }
+
+        self.dominio: Dict[int, List[int]] = {}
+        self.rango: Dict[int, List[int]] = {}
+        self.superpropiedades: Dict[int, List[int]] = {}
+        self.inversa: Dict[int, int] = {}
+        self.simetricas: Set[int] = set()
+        self.transitivas: Set[int] = set()
+        for prop in self.onto.object_properties():
+            p = prop.storid
+            self.dominio[p] = [c.storid for c in _clases_con_nombre(prop.domain)]
+            self.rango[p] = [c.storid for c in _clases_con_nombre(prop.range)]
+            # Se ignoran owl:ObjectProperty y owl:topObjectProperty (vocabulario OWL, no relaciones)
+            self.superpropiedades[p] = [
+                q.storid for q in prop.is_a
+                if isinstance(q, ObjectPropertyClass) and not q.iri.startswith(owl.base_iri)
+            ]
+            if prop.inverse_property is not None:
+                self.inversa[p] = prop.inverse_property.storid
+                self.inversa[prop.inverse_property.storid] = p
+            if SymmetricProperty in prop.is_a:
+                self.simetricas.add(p)
+            if TransitiveProperty in prop.is_a:
+                self.transitivas.add(p)
+
+    def _superclases_de(self, c: int) -> Set[int]:
+        """Superclases de una clase (las clases de otros espacios de nombres se calculan al vuelo)"""
+        superclases = self.superclases.get(c)
+        if superclases is None:
+            clase = self._entidad(c)
+            superclases = self.superclases[c] = {
+                d.storid for d in clase.ancestors() if isinstance(d, ThingClass) and d is not Thing
+            } if isinstance(clase, ThingClass) else set()
+        return superclases
+
+    # ---------- Materialización ----------
+
+    def _hechos_afirmados(self, individuos) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int, int]]]:
+        """Tipos y aserciones de propiedades de objeto afirmados para los individuos dados"""
+        tipos, hechos = [], []
+        propiedades = set(self.dominio)
+        for individuo in individuos:
+            s = individuo.storid
+            for clase in _clases_con_nombre(individuo.is_a):
+                tipos.append((s, clase.storid))
+            for p, o in self.mundo._get_obj_triples_s_po(s):
+                if p in propiedades:
+                    hechos.append((s, p, o))
+        return tipos, hechos
+
+    def materializar(self):
+        """Materialización completa (al cargar la ontología)"""
+        with metricas.medir("razonador", "materializar") as medicion:
+            self.tipos.clear()
+            self.instancias.clear()
+            self.hechos.clear()
+            self.inversos.clear()
+            self.tipos_explicitos.clear()
+            self.hechos_explicitos.clear()
+            self.inferidos_por_regla.clear()
+            self.individuos.clear()
+            self._posicion.clear()
+            individuos = self._indexar(self.onto.individuals())
+            tipos, hechos = self._hechos_afirmados(individuos)
+            medicion.filas = self._propagar(tipos, hechos)
+
+    def agregar_individuos(self, individuos: Iterable) -> int:
+        """
+        Actualización incremental tras importar individuos nuevos (o con nuevos hechos)
+
+        Args:
+            individuos: Individuos agregados o modificados
+
+        Returns:
+            Cantidad de hechos inferidos nuevos
+        """
+        with metricas.medir("razonador", "incremental") as medicion:
+            individuos = self._indexar(individuos)
+            tipos, hechos = self._hechos_afirmados(individuos)
+            medicion.filas = self._propagar(tipos, hechos)
+        return medicion.filas
+
+    def _indexar(self, individuos: Iterable) -> List:
+        """Agrega los individuos al índice storid -> individuo (los nuevos van al final)"""
+        individuos = list(individuos)
+        for individuo in individuos:
+            if individuo.storid not in self._posicion:
+                self._posicion[individuo.storid] = len(self._posicion)
+            self.individuos[individuo.storid] = individuo
+        return individuos
+
+    def _propagar(self, tipos: List[Tuple[int, int]], hechos: List[Tuple[int, int, int]]) -> int:
+        """Aplica las reglas hasta el punto fijo procesando solo hechos nuevos"""
+        pendientes_tipos = []
+        pendientes_hechos = []
+        inferidos = 0
+
+        def agregar_tipo(x: int, c: int, regla: Optional[str]):
+            nonlocal inferidos
+            if regla is None:
+                self.tipos_explicitos.add((x, c))
+            if c in self.tipos[x]:
+                return
+            self.tipos[x].add(c)
+            self.instancias[c].add(x)
+            if regla is not None:
+                self.inferidos_por_regla[regla] += 1
+                inferidos += 1
+            pendientes_tipos.append((x, c))
+
+        def agregar_hecho(s: int, p: int, o: int, regla: Optional[str]):
+            nonlocal inferidos
+            if regla is None:
+                self.hechos_explicitos.add((s, p, o))
+            if o in self.hechos[p][s]:
+                return
+            self.hechos[p][s].add(o)
+            self.inversos[p][o].add(s)
+            if regla is not None:
+                self.inferidos_por_regla[regla] += 1
+                inferidos += 1
+            pendientes_hechos.append((s, p, o))
+
+        for x, c in tipos:
+            agregar_tipo(x, c, None)
+        for s, p, o in hechos:
+            agregar_hecho(s, p, o, None)
+
+        reglas = self.reglas
+        while pendientes_tipos or pendientes_hechos:
+            while pendientes_tipos:
+                x, c = pendientes_tipos.pop()
+                if "subclase" in reglas:
+                    for d in self._superclases_de(c):
+                        agregar_tipo(x, d, "subclase")
+
+            while pendientes_hechos:
+                s, p, o = pendientes_hechos.pop()
+                if "dominio" in reglas:
+                    for c in self.dominio.get(p, ()):
+                        agregar_tipo(s, c, "dominio")
+                if "rango" in reglas:
+                    for c in self.rango.get(p, ()):
+                        agregar_tipo(o, c, "rango")
+                if "subpropiedad" in reglas:
+                    for q in self.superpropiedades.get(p, ()):
+                        agregar_hecho(s, q, o, "subpropiedad")
+                if "inversa" in reglas and p in self.inversa:
+                    agregar_hecho(o, self.inversa[p], s, "inversa")
+                if "simetrica" in reglas and p in self.simetricas:
+                    agregar_hecho(o, p, s, "simetrica")
+                if "transitiva" in reglas and p in self.transitivas:
+                    for z in list(self.hechos[p].get(o, ())):
+                        agregar_hecho(s, p, z, "transitiva")
+                    for w in list(self.inversos[p].get(s, ())):
+                        agregar_hecho(w, p, o, "transitiva")
+        return inferidos
+
+    # ---------- Consultas (búsquedas directas) ----------
+
+    def _entidad(self, storid: int):
+        return self.mundo._get_by_storid(storid)
+
+    def _clase(self, nombre_clase: str) -> Optional[int]:
+        return self.clases_por_nombre.get(nombre_clase)
+
+    def instancias_de(self, nombre_clase: str) -> List:
+        """Instancias explícitas e inferidas de una clase, en el orden de la ontología"""
+        c = self._clase(nombre_clase)
+        if c is None:
+            return []
+        miembros = [s for s in self.instancias.get(c, ()) if s in self.individuos]
+        return [self.individuos[s] for s in sorted(miembros, key=self._posicion.__getitem__)]
+
+    def tipos_inferidos(self, individuo) -> List[str]:
+        """Clases inferidas (no afirmadas) de un individuo"""
+        s = individuo.storid
+        return sorted(
+            self._entidad(c).name for c in self.tipos.get(s, ())
+            if (s, c) not in self.tipos_explicitos
+        )
+
+    def relaciones_inferidas(self, individuo) -> Dict[str, List[str]]:
+        """Relaciones inferidas (no afirmadas) de un individuo: propiedad -> nombres"""
+        s = individuo.storid
+        relaciones: Dict[str, List[str]] = {}
+        for p, por_sujeto in self.hechos.items():
+            objetos = [o for o in por_sujeto.get(s, ()) if (s, p, o) not in self.hechos_explicitos]
+            if objetos:
+                relaciones[self._entidad(p).name] = sorted(self._entidad(o).name for o in objetos)
+        return relaciones
+
+    def resumen(self) -> Dict:
+        """Conteos de hechos afirmados e inferidos por regla"""
+        return {
+            "tipos_explicitos": len(self.tipos_explicitos),
+            "hechos_explicitos": len(self.hechos_explicitos),
+            "inferidos": dict(self.inferidos_por_regla),
+            "total_inferidos": sum(self.inferidos_por_regla.values()),
+        }
@@ -0,0 +1,232 @@
+"""
+Recarga en caliente de la ontología a partir de las diferencias de tripletas.
+
+Cuando el archivo OWL cambia en disco, se parsea en un World temporal y sus
+tripletas (con IRIs, no storids) se comparan con las de la ontología
+cargada. Si solo cambian individuos (altas, bajas o valores de propiedades),
+las tripletas agregadas y eliminadas se aplican directamente al World vivo y
+se descartan de la caché de owlready2 únicamente los individuos afectados;
+el motor actualiza las inferencias y sus índices sin tocar el resto de las
+cachés (conector y caché de DBpedia, enlaces, datos enriquecidos). Los
+cambios de esquema (clases, propiedades, axiomas con nodos anónimos) no se
+pueden aplicar con seguridad sobre objetos ya creados y se resuelven con una
+recarga completa en un World nuevo.
+
+VigilanteOntologia observa el archivo con watchdog y aplica los cambios al
+motor automáticamente.
+"""
+
+import os
+import threading
+from collections import Counter
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from owlready2 import World
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+from busqueda_local import cargar_ontologia_archivo
+from metricas import metricas
+
+# IRIs de los tipos que convierten a un sujeto en parte del esquema
+TIPOS_ESQUEMA = {
+    "http://www.w3.org/2002/07/owl#Class",
+    "http://www.w3.org/2002/07/owl#ObjectProperty",
+    "http://www.w3.org/2002/07/owl#DatatypeProperty",
+    "http://www.w3.org/2002/07/owl#AnnotationProperty",
+    "http://www.w3.org/2000/01/rdf-schema#Datatype",
+}
+TIPO_INDIVIDUO = "http://www.w3.org/2002/07/owl#NamedIndividual"
+TIPO_RDF = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+SAME_AS = "http://www.w3.org/2002/07/owl#sameAs"
+ANONIMO = "_:"
+
+TripletaObjeto = Tuple[str, str, str]
+TripletaDato = Tuple[str, str, object, object]
+
+
+class TripletasOntologia:
+    """Tripletas de una ontología expresadas con IRIs (comparables entre Worlds)"""
+
+    def __init__(self, onto):
+        mundo = onto.world
+        iri = mundo._unabbreviate
+        self.objetos: Set[TripletaObjeto] = set()
+        self.datos: Set[TripletaDato] = set()
+        # Las tripletas con nodos anónimos no se pueden comparar por id: se
+        # comparan como multiconjunto con el nodo reemplazado por "_:"
+        self.anonimas: Counter = Counter()
+        for s, p, o in onto._get_obj_triples_spo_spo(None, None, None):
+            if s < 0 or o < 0:
+                self.anonimas[(ANONIMO if s < 0 else iri(s), iri(p), ANONIMO if o < 0 else iri(o))] += 1
+            else:
+                self.objetos.add((iri(s), iri(p), iri(o)))
+        for s, p, o, d in onto._get_data_triples_spod_spod(None, None, None, None):
+            tipo = iri(d) if isinstance(d, int) and d > 0 else d
+            if s < 0:
+                self.anonimas[(ANONIMO, iri(p), o, tipo)] += 1
+            else:
+                self.datos.add((iri(s), iri(p), o, tipo))
+        self.esquema = {s for s, p, o in self.objetos if p == TIPO_RDF and o in TIPOS_ESQUEMA}
+        self.individuos = {s for s, p, o in self.objetos if p == TIPO_RDF and o == TIPO_INDIVIDUO}
+
+
+class DiferenciaTripletas:
+    """Tripletas agregadas y eliminadas entre la ontología cargada y el archivo"""
+
+    def __init__(self, actual: TripletasOntologia, nueva: TripletasOntologia):
+        self.objetos_agregados = nueva.objetos - actual.objetos
+        self.objetos_eliminados = actual.objetos - nueva.objetos
+        self.datos_agregados = nueva.datos - actual.datos
+        self.datos_eliminados = actual.datos - nueva.datos
+        esquema = actual.esquema | nueva.esquema
+        self.estructural = actual.anonimas != nueva.anonimas or any(
+            s in esquema for s in self.sujetos()
+        )
+        self.individuos_nuevos = nueva.individuos - actual.individuos
+        self.individuos_eliminados = actual.individuos - nueva.individuos
+
+    def sujetos(self) -> Set[str]:
+        """IRIs de los sujetos con alguna tripleta agregada o eliminada"""
+        return {t[0] for conjunto in (self.objetos_agregados, self.objetos_eliminados,
+                                      self.datos_agregados, self.datos_eliminados) for t in conjunto}
+
+    @property
+    def vacia(self) -> bool:
+        return not (self.estructural or self.objetos_agregados or self.objetos_eliminados
+                    or self.datos_agregados or self.datos_eliminados)
+
+    @property
+    def solo_agregados(self) -> bool:
+        """Sin eliminaciones: las inferencias se pueden actualizar de forma incremental"""
+        return not (self.objetos_eliminados or self.datos_eliminados)
+
+    def resumen(self) -> Dict:
+        return {
+            "tripletas_agregadas": len(self.objetos_agregados) + len(self.datos_agregados),
+            "tripletas_eliminadas": len(self.objetos_eliminados) + len(self.datos_eliminados),
+            "individuos_nuevos": len(self.individuos_nuevos),
+            "individuos_eliminados": len(self.individuos_eliminados),
+            "estructural": self.estructural,
+        }
+
+
+def leer_archivo(ruta: str):
+    """Ontología del archivo cargada en un World nuevo (no toca la cargada)"""
+    return cargar_ontologia_archivo(ruta, mundo=World())
+
+
+def calcular_diferencia(onto, ruta: str) -> Tuple[DiferenciaTripletas, object]:
+    """
+    Compara la ontología cargada con el contenido actual del archivo
+
+    Returns:
+        (diferencia, ontología del archivo en su propio World)
+    """
+    with metricas.medir("recarga", "diferencia") as medicion:
+        nueva = leer_archivo(ruta)
+        diferencia = DiferenciaTripletas(TripletasOntologia(onto), TripletasOntologia(nueva))
+        resumen = diferencia.resumen()
+        medicion.filas = resumen["tripletas_agregadas"] + resumen["tripletas_eliminadas"]
+    return diferencia, nueva
+
+
+def aplicar_diferencia(onto, diferencia: DiferenciaTripletas) -> Set[int]:
+    """
+    Aplica las tripletas de una diferencia no estructural al World de la ontología
+
+    Los individuos afectados que owlready2 ya tenía en memoria se descartan
+    de su caché, así que se vuelven a leer con los valores nuevos.
+
+    Returns:
+        Storids de los sujetos modificados
+    """
+    if diferencia.estructural:
+        raise ValueError("Los cambios de esquema requieren una recarga completa")
+    mundo = onto.world
+    storid = mundo._abbreviate
+
+    def dato(t: TripletaDato):
+        s, p, o, tipo = t
+        return storid(s), storid(p), o, storid(tipo) if isinstance(tipo, str) and "://" in tipo else tipo
+
+    with metricas.medir("recarga", "aplicar") as medicion:
+        for s, p, o in diferencia.objetos_eliminados:
+            onto._del_obj_triple_spo(storid(s), storid(p), storid(o))
+        for t in diferencia.datos_eliminados:
+            onto._del_data_triple_spod(*dato(t))
+        for s, p, o in diferencia.objetos_agregados:
+            onto._add_obj_triple_spo(storid(s), storid(p), storid(o))
+        for t in diferencia.datos_agregados:
+            onto._add_data_triple_spod(*dato(t))
+
+        sujetos = {storid(s) for s in diferencia.sujetos()}
+        for s in sujetos:
+            mundo._entities.pop(s, None)
+        medicion.filas = len(sujetos)
+    return sujetos
+
+
+class VigilanteOntologia(FileSystemEventHandler):
+    """Observa el archivo OWL y aplica sus cambios al motor de búsqueda"""
+
+    def __init__(self, motor, ruta: str, al_recargar: Optional[Callable[[Dict], None]] = None,
+                 espera: float = 0.5):
+        """
+        Args:
+            motor: MotorBusqueda con la ontología cargada
+            ruta: Archivo OWL a observar
+            al_recargar: Se llama con el resumen de cada recarga aplicada
+            espera: Segundos sin eventos antes de recargar (los editores escriben en varios pasos)
+        """
+        self.motor = motor
+        self.ruta = os.path.abspath(ruta)
+        self.al_recargar = al_recargar
+        self.espera = espera
+        self.ultimo_resumen: Optional[Dict] = None
+        self.ultimo_error: Optional[str] = None
+        self._temporizador: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        self._observador = None
+
+    def iniciar(self) -> "VigilanteOntologia":
+        self._observador = Observer()
+        self._observador.schedule(self, os.path.dirname(self.ruta), recursive=False)
+        self._observador.daemon = True
+        self._observador.start()
+        return self
+
+    def detener(self):
+        with self._lock:
+            if self._temporizador is not None:
+                self._temporizador.cancel()
+        if self._observador is not None:
+            self._observador.stop()
+            self._observador.join()
+            self._observador = None
+
+    def on_any_event(self, evento):
+        rutas = {getattr(evento, "src_path", None), getattr(evento, "dest_path", None)}
+        if self.ruta not in {os.path.abspath(r) for r in rutas if r}:
+            return
+        if evento.event_type not in ("modified", "created", "moved", "closed"):
+            return
+        with self._lock:
+            if self._temporizador is not None:
+                self._temporizador.cancel()
+            self._temporizador = threading.Timer(self.espera, self.recargar)
+            self._temporizador.daemon = True
+            self._temporizador.start()
+
+    def recargar(self) -> Optional[Dict]:
+        """Aplica los cambios del archivo al motor (también se puede llamar a mano)"""
+        try:
+            resumen = self.motor.recargar_desde_archivo(self.ruta)
+        except Exception as e:  # Archivo a medio escribir o inválido: se espera al próximo evento
+            self.ultimo_error = str(e)
+            return None
+        self.ultimo_error = None
+        self.ultimo_resumen = resumen
+        if self.al_recargar is not None and resumen["cambios"]:
+            self.al_recargar(resumen)
+        return resumen
@@ -0,0 +1,180 @@
+"""
+Consultas SPARQL sobre la ontología local con el motor nativo de owlready2.
+
+Las consultas se preparan (parseo y traducción a SQL) una sola vez y se
+guardan en una caché LRU indexada por el texto de la consulta; ejecutar de
+nuevo la misma consulta, o una plantilla con otros parámetros (?? / ??1 en
+owlready2), reutiliza la consulta preparada. Los resultados se entregan como
+un generador de filas, de modo que se pueden enviar o mostrar a medida que
+llegan sin materializar todo el resultado.
+
+Solo se aceptan consultas de lectura (SELECT): las de modificación
+(INSERT/DELETE) cambiarían la ontología sin pasar por el motor.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from owlready2.sparql.main import PreparedSelectQuery
+
+from busqueda_local import buscar_clase_por_nombre
+from metricas import Medicion, metricas
+
+# Plantillas equivalentes a las búsquedas locales de busqueda_local.py:
+# nombre -> (consulta, tipo de cada parámetro). Los parámetros "entidad" se
+# pasan por nombre y se resuelven a la entidad de la ontología; los de tipo
+# "minusculas" se comparan sin distinguir mayúsculas.
+PLANTILLAS = {
+    "individuos_por_nombre": ("""
+SELECT ?individuo WHERE {
+    ?individuo rdf:type owl:NamedIndividual .
+    FILTER(CONTAINS(LCASE(STRAFTER(STR(?individuo), "#")), ??1))
+}""", ("minusculas",)),
+    "instancias_de_clase": ("""
+SELECT DISTINCT ?individuo WHERE {
+    ?individuo rdf:type/rdfs:subClassOf* ??1 .
+    ?individuo rdf:type owl:NamedIndividual .
+}""", ("entidad",)),
+    "valores_de_propiedad": ("""
+SELECT ?individuo ?valor WHERE {
+    ?individuo ??1 ?valor .
+}""", ("entidad",)),
+    "clases": ("""
+SELECT ?clase WHERE {
+    ?clase rdf:type owl:Class .
+}""", ()),
+}
+
+CONSULTA_EJEMPLO = """SELECT ?individuo ?tipo WHERE {
+    ?individuo rdf:type owl:NamedIndividual .
+    ?individuo rdf:type ?tipo .
+    ?tipo rdf:type owl:Class .
+}"""
+
+
+class ErrorSPARQL(ValueError):
+    """Consulta SPARQL inválida o no permitida"""
+
+
+def valor_a_json(valor):
+    """Valor de una fila de owlready2 a un valor serializable"""
+    if hasattr(valor, "name") and hasattr(valor, "iri"):
+        return valor.name
+    if isinstance(valor, date):  # también datetime
+        return valor.isoformat()
+    if valor is None or isinstance(valor, (bool, int, float, str)):
+        return valor
+    return str(valor)
+
+
+class ConsultorSPARQL:
+    """Ejecuta consultas SPARQL sobre un World de owlready2 con caché de consultas preparadas"""
+
+    def __init__(self, onto, capacidad: int = 128):
+        """
+        Args:
+            onto: Ontología cargada (se consulta todo su World)
+            capacidad: Máximo de consultas preparadas en caché
+        """
+        self.onto = onto
+        self.mundo = onto.world
+        self.capacidad = capacidad
+        self._preparadas: "OrderedDict[str, PreparedSelectQuery]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        # Prefijo del espacio de nombres de las clases (el de Protégé, no el base_iri)
+        clase = next(iter(onto.classes()), None)
+        self.prefijos = f"PREFIX cripto: <{clase.namespace.base_iri}>\n" if clase is not None else ""
+
+    def preparar(self, consulta: str) -> PreparedSelectQuery:
+        """
+        Consulta preparada desde la caché (o parseada y guardada si no estaba)
+
+        Raises:
+            ErrorSPARQL: Si la consulta no se puede parsear o no es un SELECT
+        """
+        with metricas.medir("sparql_local", "preparar") as medicion:
+            with self._lock:
+                preparada = self._preparadas.get(consulta)
+                if preparada is not None:
+                    self._preparadas.move_to_end(consulta)
+                    self.aciertos += 1
+                else:
+                    self.fallos += 1
+            medicion.cache = "hit" if preparada is not None else "miss"
+            if preparada is None:
+                try:
+                    preparada = self.mundo.prepare_sparql(self.prefijos + consulta)
+                except Exception as e:
+                    raise ErrorSPARQL(f"Consulta SPARQL inválida: {e}")
+                if not isinstance(preparada, PreparedSelectQuery):
+                    raise ErrorSPARQL("Solo se permiten consultas SELECT sobre la ontología local")
+                with self._lock:
+                    self._preparadas[consulta] = preparada
+                    while len(self._preparadas) > self.capacidad:
+                        self._preparadas.popitem(last=False)
+        return preparada
+
+    def columnas(self, consulta: str) -> List[str]:
+        """Nombres de las variables del SELECT (sin el '?')"""
+        return [c.lstrip("?") for c in self.preparar(consulta).column_names]
+
+    def ejecutar(self, consulta: str, parametros: Sequence = (),
+                 limite: Optional[int] = None) -> Iterator[List]:
+        """
+        Ejecuta una consulta y entrega las filas a medida que se leen
+
+        Args:
+            consulta: Texto SPARQL (el prefijo cripto: ya está definido)
+            parametros: Valores de los parámetros ?? / ??1... de la consulta
+            limite: Máximo de filas a entregar
+
+        Returns:
+            Generador de filas (listas de valores serializables)
+        """
+        # Se prepara antes de devolver el generador para que los errores se vean de inmediato
+        return self._filas(self.preparar(consulta), list(parametros), limite)
+
+    def _filas(self, preparada: PreparedSelectQuery, parametros: List,
+               limite: Optional[int]) -> Iterator[List]:
+        # Sin metricas.medir: cerrar el generador antes de tiempo no es un error
+        medicion = Medicion()
+        inicio = time.perf_counter()
+        try:
+            for fila in preparada.execute(parametros):
+                if limite is not None and medicion.filas >= limite:
+                    break
+                medicion.filas += 1
+                yield [valor_a_json(v) for v in fila]
+        finally:
+            metricas.registrar("sparql_local", "ejecutar", time.perf_counter() - inicio, medicion)
+
+    def ejecutar_plantilla(self, nombre: str, *parametros, limite: Optional[int] = None) -> Iterator[List]:
+        """Ejecuta una de las PLANTILLAS con los parámetros dados (entidades por nombre)"""
+        if nombre not in PLANTILLAS:
+            raise ErrorSPARQL(f"Plantilla desconocida: {nombre}")
+        consulta, tipos = PLANTILLAS[nombre]
+        if len(parametros) != len(tipos):
+            raise ErrorSPARQL(f"La plantilla '{nombre}' espera {len(tipos)} parámetros")
+        valores = []
+        for tipo, valor in zip(tipos, parametros):
+            if tipo == "entidad":
+                valor = self._entidad(valor)
+            elif tipo == "minusculas":
+                valor = str(valor).lower()
+            valores.append(valor)
+        return self.ejecutar(consulta, valores, limite)
+
+    def _entidad(self, nombre: str):
+        entidad = buscar_clase_por_nombre(self.onto, nombre) or self.mundo.search_one(iri=f"*#{nombre}")
+        if entidad is None:
+            raise ErrorSPARQL(f"Entidad desconocida: {nombre}")
+        return entidad
+
+    def estadisticas_cache(self) -> Dict:
+        return {"preparadas": len(self._preparadas), "capacidad": self.capacidad,
+                "aciertos": self.aciertos, "fallos": self.fallos}
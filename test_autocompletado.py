@@ -0,0 +1,69 @@
+"""
+Pruebas del autocompletado: prefijos al inicio y en cualquier palabra,
+orden por popularidad, filtro por tipo y sugerencias del motor.
+"""
+
+import pytest
+from owlready2 import World
+
+from autocompletado import IndiceAutocompletado
+from busqueda_local import cargar_ontologia_archivo
+from motor_busqueda import ErrorBusqueda, MotorBusqueda
+
+
+@pytest.fixture(scope="module")
+def onto():
+    return cargar_ontologia_archivo("criptomonedas.owl", mundo=World())
+
+
+@pytest.fixture
+def indice():
+    entradas = [
+        ("bitcoin", "individuo", "bitcoin", 10),
+        ("bitcoinCash", "individuo", "bitcoinCash", 2),
+        ("Exchange", "clase", "Exchange", 5),
+        ("binanceExchange", "individuo", "binanceExchange", 1),
+        ("<B>Bitcoin</B>", "dbpedia", "http://dbpedia.org/resource/Bitcoin", 3),
+        ("Bitcoin", "dbpedia", "http://dbpedia.org/resource/Bitcoin", 0),
+    ]
+    return IndiceAutocompletado(entradas)
+
+
+def test_prefijo_al_inicio_y_en_palabras(indice):
+    assert [s["valor"] for s in indice.sugerir("bit", 2)] == ["bitcoin", "bitcoinCash"]
+    # Sin espacios y con camelCase se llega a la misma entrada
+    assert [s["valor"] for s in indice.sugerir("bitcoinc")] == ["bitcoinCash"]
+    assert [s["valor"] for s in indice.sugerir("BitcoinC")] == ["bitcoinCash"]
+    assert [s["valor"] for s in indice.sugerir("cash")] == ["bitcoinCash"]
+    # Coincidir con el inicio del texto pesa más que con una palabra interna
+    assert [s["valor"] for s in indice.sugerir("exch")] == ["Exchange", "binanceExchange"]
+    assert indice.sugerir("zzz") == [] and indice.sugerir("") == []
+
+
+def test_etiquetas_repetidas_y_filtro_por_tipo(indice):
+    dbpedia = indice.sugerir("bitcoin", tipos=["dbpedia"])
+    assert [s["texto"] for s in dbpedia] == ["<B>Bitcoin</B>"]
+    assert {s["tipo"] for s in indice.sugerir("b", tipos=["clase", "individuo"])} == {"individuo"}
+    with pytest.raises(KeyError):
+        indice.sugerir("b", tipos=["otra"])
+
+
+def test_usos_suben_en_el_orden(indice):
+    assert indice.sugerir("bitcoin")[0]["valor"] == "bitcoin"
+    for _ in range(30):
+        indice.registrar_uso("Bitcoin Cash")
+    assert indice.sugerir("bitcoin")[0]["valor"] == "bitcoinCash"
+    # Los usos se conservan al reconstruir con el mismo diccionario
+    nuevo = IndiceAutocompletado([("bitcoin", "individuo", "bitcoin", 10),
+                                  ("bitcoinCash", "individuo", "bitcoinCash", 2)], indice.usos)
+    assert nuevo.sugerir("bit")[0]["valor"] == "bitcoinCash"
+
+
+def test_motor_sugiere_entidades_locales_y_de_dbpedia(onto):
+    motor = MotorBusqueda(onto)
+    sugerencias = motor.sugerir("bitc", limite=10)
+    assert sugerencias[0] == dict(sugerencias[0], valor="bitcoin", tipo="individuo")
+    assert "dbpedia" in {s["tipo"] for s in sugerencias}
+    assert motor.sugerir("Criptomoneda", tipos=["clase"])[0]["valor"] == "Criptomoneda"
+    with pytest.raises(ErrorBusqueda):
+        motor.sugerir("bit", tipos=["otra"])
@@ -0,0 +1,42 @@
+"""
+Pruebas del benchmark offline: el servidor DBpedia simulado debe responder
+a las mismas consultas que usa el buscador, sin conexión a dbpedia.org.
+"""
+
+from benchmarks.benchmark_busquedas import comparar, medir, percentil
+from benchmarks.servidor_simulado import iniciar_servidor
+from dbpedia_connector import DBpediaConnector, buscar_en_dbpedia, obtener_detalles_dbpedia
+
+
+def test_servidor_simulado_responde_busquedas():
+    servidor = iniciar_servidor()
+    try:
+        entidades, error = buscar_en_dbpedia("bitcoin", endpoint=servidor.endpoint_sparql)
+        assert error is None
+        assert entidades and entidades[0]["uri"].startswith("http://dbpedia.org/resource/")
+
+        detalles, error = obtener_detalles_dbpedia(
+            "http://dbpedia.org/resource/Bitcoin", endpoint=servidor.endpoint_sparql
+        )
+        assert error is None
+        assert detalles["label"] == "Bitcoin"
+
+        conector = DBpediaConnector(servidor.endpoint_sparql, servidor.endpoint_lookup)
+        assert conector.is_online()
+        assert conector.buscar_con_api_rest("Ethereum")[0]["label"] == "Ethereum"
+    finally:
+        servidor.detener()
+
+
+def test_percentiles_y_regresiones():
+    valores = sorted(float(v) for v in range(1, 101))
+    assert percentil(valores, 50) == 50.0
+    assert percentil(valores, 99) == 99.0
+
+    estadisticas = medir(lambda: None, iteraciones=5, calentamiento=0)
+    assert estadisticas["iteraciones"] == 5
+
+    anterior = {"resultados": {"x": {"p95_ms": 10.0}}}
+    actual = {"resultados": {"x": {"p95_ms": 15.0}}}
+    assert comparar(actual, anterior)
+    assert not comparar(anterior, anterior)
@@ -0,0 +1,94 @@
+"""
+Pruebas de los backends de la caché de DBpedia: misma interfaz en memoria,
+JSON, SQLite y Redis (contra el servidor RESP simulado), lecturas y
+escrituras encadenadas en un solo viaje y caché compartida entre réplicas.
+"""
+
+import pytest
+from owlready2 import World
+
+from benchmarks.servidor_redis_simulado import iniciar_servidor_redis
+from benchmarks.servidor_simulado import iniciar_servidor
+from busqueda_local import cargar_ontologia_archivo
+from cache_compartida import ErrorCache, crear_backend, deserializar, serializar
+from dbpedia_connector import DBpediaConnector, DBpediaOffline
+from enlaces_dbpedia import TablaEnlaces
+from motor_busqueda import MotorBusqueda
+
+
+@pytest.fixture(scope="module")
+def redis():
+    servidor = iniciar_servidor_redis(clave="secreta")
+    yield servidor
+    servidor.detener()
+
+
+@pytest.fixture(params=["memoria", "json", "sqlite", "redis"])
+def backend(request, tmp_path, redis):
+    urls = {
+        "memoria": "memoria://",
+        "json": f"json:///{tmp_path}/cache.json",
+        "sqlite": f"sqlite:///{tmp_path}/cache.db",
+        "redis": redis.url,
+    }
+    backend = crear_backend(urls[request.param])
+    if request.param == "redis":
+        backend.cliente.ejecutar("FLUSHDB")
+    yield backend
+    backend.cerrar()
+
+
+def test_serializacion_compacta():
+    pequeno = {"label": "Bitcoin", "categories": ["Cryptocurrencies"]}
+    grande = {"abstract": "Bitcoin is a cryptocurrency. " * 200}
+    assert serializar(pequeno)[:1] == b"j" and deserializar(serializar(pequeno)) == pequeno
+    assert serializar(grande)[:1] == b"z" and len(serializar(grande)) < len(grande["abstract"]) / 10
+    assert deserializar(serializar(grande)) == grande
+
+
+def test_misma_interfaz_en_todos_los_backends(backend):
+    entradas = {f"moneda{i}": {"uri": f"http://dbpedia.org/resource/M{i}", "label": f"Moneda {i}"}
+                for i in range(1200)}
+    backend.guardar_varios(entradas)
+    backend.guardar("bitcoin", {"uri": "http://dbpedia.org/resource/Bitcoin", "label": "Bitcoin"})
+    assert len(backend) == 1201
+    assert backend.obtener("bitcoin")["label"] == "Bitcoin"
+    assert backend.obtener("inexistente") is None
+    encontradas = backend.obtener_varios(["moneda5", "inexistente", "moneda1199", "moneda5"])
+    assert encontradas == {"moneda5": entradas["moneda5"], "moneda1199": entradas["moneda1199"]}
+    assert dict(backend.elementos())["moneda42"] == entradas["moneda42"]
+
+
+def test_redis_encadena_los_lotes_en_un_viaje(redis):
+    backend = crear_backend(redis.url)
+    backend.cliente.ejecutar("FLUSHDB")
+    viajes, lecturas = backend.cliente.viajes, redis.lecturas
+    backend.guardar_varios({f"k{i}": {"i": i} for i in range(1200)})  # 3 MSET
+    backend.obtener_varios([f"k{i}" for i in range(1200)])  # 3 MGET
+    assert backend.cliente.viajes - viajes == 2
+    assert redis.lecturas - lecturas <= 4  # el servidor puede recibir un envío grande en partes
+
+    with pytest.raises(ErrorCache):
+        crear_backend(redis.url.replace("secreta", "otra")).obtener("k1")
+
+
+def test_replicas_comparten_la_cache(redis):
+    onto = cargar_ontologia_archivo("criptomonedas.owl", mundo=World())
+    servidor = iniciar_servidor()
+    try:
+        conector = DBpediaConnector(servidor.endpoint_sparql, servidor.endpoint_lookup)
+        crear_backend(redis.url).cliente.ejecutar("FLUSHDB")
+        replicas = []
+        for _ in range(2):
+            enlaces = TablaEnlaces(None)
+            enlaces.registrar("bitcoin", "http://dbpedia.org/resource/Bitcoin", "Bitcoin", 1.0, "prueba")
+            replicas.append(MotorBusqueda(onto, conector, enlaces=enlaces,
+                                          offline=DBpediaOffline(backend=crear_backend(redis.url))))
+
+        assert replicas[0].enriquecer("bitcoin")["fuente"] == "uri"
+        solicitudes = servidor.solicitudes
+        assert replicas[1].enriquecer("bitcoin")["fuente"] == "cache"
+        assert servidor.solicitudes == solicitudes
+        assert "bitcoin" in replicas[1].offline.cache
+    finally:
+        servidor.detener()
@@ -0,0 +1,96 @@
+"""
+Pruebas de la caché de resultados: desalojo LRU, vencimiento y reutilización
+de las búsquedas del motor hasta que cambia la versión de la ontología, y
+errores de DBpedia reutilizados solo por poco tiempo.
+"""
+
+import pytest
+from owlready2 import World
+
+from benchmarks.servidor_simulado import iniciar_servidor
+from busqueda_local import cargar_ontologia_archivo
+from cache_resultados import CacheResultados
+from dbpedia_connector import DBpediaConnector
+from motor_busqueda import TTL_ERRORES, MotorBusqueda
+
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 0.0
+
+    def __call__(self):
+        return self.ahora
+
+
+@pytest.fixture(scope="module")
+def servidor():
+    servidor = iniciar_servidor()
+    yield servidor
+    servidor.detener()
+
+
+@pytest.fixture
+def onto():
+    return cargar_ontologia_archivo("criptomonedas.owl", mundo=World())
+
+
+def test_lru_y_vencimiento():
+    reloj = Reloj()
+    cache = CacheResultados(capacidad=2, ttl=10, reloj=reloj)
+    cache.guardar("a", 1)
+    cache.guardar("b", 2)
+    assert cache.obtener("a") == 1  # "a" pasa a ser la más reciente
+    cache.guardar("c", 3)
+    assert cache.obtener("b") is None and len(cache) == 2
+
+    reloj.ahora = 10
+    assert cache.obtener("a") is None and cache.obtener("c") is None
+    assert len(cache) == 0
+    assert cache.estadisticas() == dict(cache.estadisticas(), aciertos=1, fallos=3)
+
+
+def test_motor_reutiliza_hasta_cambiar_la_version(servidor, onto):
+    motor = MotorBusqueda(onto, DBpediaConnector(servidor.endpoint_sparql, servidor.endpoint_lookup))
+    primero = motor.buscar("bitcoin", modo="hibrido")
+    assert motor.buscar("bitcoin", modo="hibrido") is primero
+    assert motor.buscar("bitcoin", modo="local") is not primero
+    assert motor.resultados.aciertos == 1
+
+    criptomoneda = onto.search_one(iri="*#Criptomoneda")
+    motor.registrar_importacion([criptomoneda("bitcoinNuevo", namespace=criptomoneda.namespace)])
+    nuevo = motor.buscar("bitcoin", modo="hibrido")
+    assert nuevo is not primero and nuevo["version"] == motor.version
+    assert "bitcoinNuevo" in {r["nombre"] for r in nuevo["locales"]}
+
+    entidades, error = motor.buscar_dbpedia_por_tipo("Cryptocurrency")
+    assert error is None and motor.buscar_dbpedia_por_tipo("Cryptocurrency")[0] is entidades
+
+
+def test_errores_de_dbpedia_se_guardan_poco_tiempo(onto):
+    reloj = Reloj()
+    motor = MotorBusqueda(onto, DBpediaConnector("http://127.0.0.1:9/sparql", "http://127.0.0.1:9/lookup"),
+                          resultados=CacheResultados(reloj=reloj))
+    resultado = motor.buscar("bitcoin", modo="dbpedia")
+    assert resultado["error_dbpedia"]
+    # Los reruns no vuelven a esperar a DBpedia mientras el error está vigente
+    assert motor.buscar("bitcoin", modo="dbpedia") is resultado
+    reloj.ahora = TTL_ERRORES
+    assert motor.buscar("bitcoin", modo="dbpedia") is not resultado
+
+
+def test_categorias_fallidas_de_la_exploracion_se_guardan_poco_tiempo(onto):
+    reloj = Reloj()
+    motor = MotorBusqueda(onto, DBpediaConnector("http://127.0.0.1:9/sparql", "http://127.0.0.1:9/lookup"),
+                          resultados=CacheResultados(reloj=reloj))
+    categoria = motor.explorar_dbpedia(["Bank"])["Bank"]
+    assert categoria["error"] and categoria["total"] is None
+    assert motor.explorar_dbpedia(["Bank"])["Bank"] is categoria
+    reloj.ahora = TTL_ERRORES
+    assert motor.explorar_dbpedia(["Bank"])["Bank"] is not categoria
+
+
+def test_solo_las_busquedas_nuevas_cuentan_como_uso(servidor, onto):
+    motor = MotorBusqueda(onto, DBpediaConnector(servidor.endpoint_sparql, servidor.endpoint_lookup))
+    for _ in range(3):
+        motor.buscar("bitcoin", modo="local")
+    assert motor._usos_autocompletado == {"bitcoin": 1}
@@ -0,0 +1,132 @@
+"""
+Pruebas de la tabla de enlaces con DBpedia: confianza, persistencia,
+emisión de owl:sameAs, nombres sin candidatos que no se vuelven a buscar y
+enriquecimiento por URI o desde caché.
+"""
+
+import pytest
+from owlready2 import World, owl_equivalentindividual
+
+from benchmarks.servidor_simulado import iniciar_servidor
+from busqueda_local import cargar_ontologia_archivo
+from cache_compartida import CacheMemoria
+from cache_resultados import CacheResultados
+from dbpedia_connector import DBpediaConnector, DBpediaOffline
+from enlaces_dbpedia import (
+    TTL_SIN_COINCIDENCIA, TablaEnlaces, calcular_confianza, calcular_enlaces, emitir_same_as
+)
+from motor_busqueda import TTL_ERRORES, MotorBusqueda
+
+
+@pytest.fixture
+def onto():
+    return cargar_ontologia_archivo("criptomonedas.owl", mundo=World())
+
+
+def test_confianza():
+    assert calcular_confianza("bitcoinCash", "Bitcoin Cash", "http://dbpedia.org/resource/Bitcoin_Cash") == 1.0
+    assert calcular_confianza("bitcoin", "<B>Bitcoin</B>") == 1.0
+    assert calcular_confianza("cardano", "Gerolamo Cardano") < 0.8
+
+
+def test_tabla_persistente_y_vincular(tmp_path):
+    ruta = str(tmp_path / "enlaces.json")
+    tabla = TablaEnlaces(ruta)
+    candidatos = {
+        "solana": [{"uri": "http://dbpedia.org/resource/Javier_Solana", "label": "Javier Solana"}],
+        "ethereum": [
+            {"uri": "http://dbpedia.org/resource/Ethereum_Classic", "label": "Ethereum Classic"},
+            {"uri": "http://dbpedia.org/resource/Ethereum", "label": "Ethereum"},
+        ],
+    }
+    assert calcular_enlaces(["solana", "ethereum", "sinCandidatos"], tabla,
+                            lambda nombre: candidatos.get(nombre, [])) == 2
+
+    recargada = TablaEnlaces(ruta)
+    assert recargada.obtener("ethereum")["uri"] == "http://dbpedia.org/resource/Ethereum"
+    assert recargada.obtener("solana") is None  # guardado, pero por debajo del umbral
+    assert "solana" in recargada
+    # Sin candidatos: queda registrado sin URI para no repetir la búsqueda hasta que vence
+    assert recargada.obtener("sinCandidatos", umbral=0.0)["uri"] is None
+    assert recargada.buscado("sinCandidatos")
+    recargada.enlaces["sinCandidatos"]["fecha"] -= TTL_SIN_COINCIDENCIA
+    assert not recargada.buscado("sinCandidatos")
+    assert calcular_enlaces(["sinCandidatos", "solana"], recargada, lambda nombre: []) == 0
+    assert recargada.buscado("sinCandidatos") and recargada.obtener("solana", umbral=0.0)["uri"]
+
+    # Un candidato peor no reemplaza a un enlace existente
+    recargada.vincular("ethereum", candidatos["ethereum"][:1])
+    assert recargada.obtener("ethereum")["uri"] == "http://dbpedia.org/resource/Ethereum"
+
+
+def test_emitir_same_as(onto):
+    tabla = TablaEnlaces(None)
+    tabla.registrar("bitcoin", "http://dbpedia.org/resource/Bitcoin", "Bitcoin", 1.0, "prueba")
+    tabla.registrar("cardano", "http://dbpedia.org/resource/Gerolamo_Cardano", "Gerolamo Cardano", 0.6, "prueba")
+    assert emitir_same_as(onto, tabla) == 1
+    assert emitir_same_as(onto, tabla) == 0
+
+    bitcoin = onto.search_one(iri="*#bitcoin")
+    objeto = onto.world._abbreviate("http://dbpedia.org/resource/Bitcoin")
+    assert onto._has_obj_triple_spo(bitcoin.storid, owl_equivalentindividual, objeto)
+    assert len(list(onto.individuals())) == 91  # DBpedia no se declara como individuo
+
+
+def test_enriquecer_por_uri_y_cache(onto):
+    servidor = iniciar_servidor()
+    try:
+        tabla = TablaEnlaces(None)
+        tabla.registrar("bitcoin", "http://dbpedia.org/resource/Bitcoin", "Bitcoin", 1.0, "prueba")
+        # Caché offline vacía: dbpedia_cache.json del repositorio ya tiene "bitcoin"
+        motor = MotorBusqueda(onto, DBpediaConnector(servidor.endpoint_sparql, servidor.endpoint_lookup),
+                              enlaces=tabla, offline=DBpediaOffline(backend=CacheMemoria()))
+
+        primera = motor.enriquecer("bitcoin")
+        assert primera["fuente"] == "uri" and primera["uri"] == "http://dbpedia.org/resource/Bitcoin"
+        solicitudes = servidor.solicitudes
+        assert motor.enriquecer("bitcoin")["fuente"] == "cache"
+        assert servidor.solicitudes == solicitudes
+
+        # Sin enlace: una búsqueda en Lookup que queda registrada en la tabla
+        assert motor.enriquecer("monero")["fuente"] == "busqueda"
+        assert tabla.obtener("monero")["uri"].endswith("/Monero")
+        # Sin candidatos: la segunda vez no se vuelve a consultar el Lookup
+        servidor.lookup = {"docs": []}
+        assert motor.enriquecer("nombreSinEquivalente") is None
+        assert tabla.enlaces["nombreSinEquivalente"]["uri"] is None
+        solicitudes = servidor.solicitudes
+        assert motor.enriquecer("nombreSinEquivalente") is None
+        assert servidor.solicitudes == solicitudes
+        # Un Lookup caído no se confunde con "sin candidatos"
+        caido = MotorBusqueda(onto, DBpediaConnector(servidor.endpoint_sparql, "http://127.0.0.1:9/api/search"),
+                              enlaces=tabla, offline=DBpediaOffline(backend=CacheMemoria()))
+        assert caido.enriquecer("tether") is None and "tether" not in tabla
+        # Una URI que rompería la consulta no llega a DBpedia
+        assert motor.conector.obtener_por_uri("http://dbpedia.org/resource/A> ?p ?o . <x") is None
+        assert servidor.solicitudes == solicitudes
+        assert motor.buscar("bitcoin", modo="local")["locales"][0]["dbpedia_uri"].endswith("/Bitcoin")
+    finally:
+        servidor.detener()
+
+
+def test_fallos_de_enriquecimiento_se_recuerdan_poco_tiempo(onto):
+    reloj = [0.0]
+    tabla = TablaEnlaces(None)
+    tabla.registrar("bitcoin", "http://dbpedia.org/resource/Bitcoin", "Bitcoin", 1.0, "prueba")
+    caido = DBpediaConnector("http://127.0.0.1:9/sparql", "http://127.0.0.1:9/api/search")
+    llamadas = []
+    for metodo in ("obtener_por_uri", "buscar_con_api_rest"):
+        original = getattr(caido, metodo)
+        setattr(caido, metodo, lambda *a, original=original, metodo=metodo, **k: llamadas.append(metodo)
+                or original(*a, **k))
+    motor = MotorBusqueda(onto, caido, enlaces=tabla, offline=DBpediaOffline(backend=CacheMemoria()),
+                          resultados=CacheResultados(reloj=lambda: reloj[0]))
+
+    for _ in range(3):  # reruns que muestran los mismos individuos
+        assert motor.enriquecer("bitcoin") is None and motor.enriquecer("tether") is None
+    assert llamadas == ["obtener_por_uri", "buscar_con_api_rest"]
+    assert "tether" not in tabla
+    reloj[0] = TTL_ERRORES
+    motor.enriquecer("bitcoin")
+    motor.enriquecer("tether")
+    assert len(llamadas) == 4
@@ -0,0 +1,97 @@
+"""
+Pruebas del enriquecimiento por lotes: consultas VALUES por URI y por
+etiqueta contra el servidor DBpedia simulado, salida Parquet y reanudación
+de una ejecución interrumpida.
+"""
+
+import os
+
+import pyarrow.parquet as pq
+import pytest
+
+from benchmarks.servidor_simulado import iniciar_servidor
+from dbpedia_connector import DBpediaConnector
+from enlaces_dbpedia import TablaEnlaces
+from enriquecimiento_lotes import EnriquecedorLotes, dividir_lotes, etiquetas_candidatas, id_lote
+from limitador_salida import LimitadorSalida
+from transporte import TransporteHTTP
+
+NOMBRES = ["bitcoin", "bitcoinCash", "ethereum", "cardano", "monedaInexistente"]
+
+
+@pytest.fixture(scope="module")
+def servidor():
+    servidor = iniciar_servidor()
+    yield servidor
+    servidor.detener()
+
+
+class ConectorQueFalla(DBpediaConnector):
+    """Falla en las consultas por etiqueta que incluyen cierto nombre"""
+
+    def __init__(self, servidor, etiqueta_fallida):
+        super().__init__(servidor.endpoint_sparql, servidor.endpoint_lookup)
+        self.etiqueta_fallida = etiqueta_fallida
+
+    def buscar_etiquetas_lote(self, etiquetas):
+        if self.etiqueta_fallida in etiquetas:
+            raise ConnectionError("DBpedia no responde")
+        return super().buscar_etiquetas_lote(etiquetas)
+
+
+def test_etiquetas_y_lotes_estables():
+    assert etiquetas_candidatas("bitcoinCash") == ["Bitcoin Cash", "Bitcoin cash"]
+    assert etiquetas_candidatas("monero") == ["Monero"]
+    lotes = dividir_lotes(["c", "a", "b", "a"], 2)
+    assert lotes == [["a", "b"], ["c"]]
+    assert id_lote(lotes[0]) == id_lote(["a", "b"]) != id_lote(["a", "c"])
+
+
+def test_lotes_por_uri_y_por_etiqueta(servidor, tmp_path):
+    enlaces = TablaEnlaces(str(tmp_path / "enlaces.json"))
+    enlaces.registrar("cardano", "http://dbpedia.org/resource/Cardano_(blockchain_platform)",
+                      "Cardano", 0.9, "lookup")
+    enriquecedor = EnriquecedorLotes(
+        DBpediaConnector(servidor.endpoint_sparql, servidor.endpoint_lookup), enlaces,
+        tamano_lote=2, hilos=2
+    )
+    salida = str(tmp_path / "enriquecimiento.parquet")
+    resumen = enriquecedor.ejecutar(NOMBRES, salida)
+    assert resumen["lotes"] == 3 and resumen["fallidos"] == 0
+    assert resumen["encontrados"] == 4 and not os.path.exists(f"{salida}.progreso")
+
+    filas = {f["nombre"]: f for f in pq.read_table(salida).to_pylist()}
+    assert filas["cardano"]["metodo"] == "uri"
+    assert filas["bitcoinCash"] == dict(filas["bitcoinCash"], metodo="etiqueta", etiqueta="Bitcoin Cash",
+                                        uri="http://dbpedia.org/resource/Bitcoin_Cash", confianza=1.0)
+    assert filas["monedaInexistente"]["uri"] is None
+    # Los enlaces encontrados por etiqueta quedan en la tabla
+    assert TablaEnlaces(enlaces.ruta).obtener("ethereum")["uri"] == "http://dbpedia.org/resource/Ethereum"
+
+
+def test_ejecucion_interrumpida_se_retoma(servidor, tmp_path):
+    salida = str(tmp_path / "enriquecimiento.parquet")
+    fallido = EnriquecedorLotes(ConectorQueFalla(servidor, "Moneda Inexistente"), tamano_lote=2,
+                                hilos=2, reintentos=0)
+    resumen = fallido.ejecutar(NOMBRES, salida)
+    assert resumen["fallidos"] == 1 and resumen["salida"] is None
+    assert not os.path.exists(salida)
+    assert len(os.listdir(f"{salida}.progreso")) == 2
+
+    antes = servidor.solicitudes
+    enriquecedor = EnriquecedorLotes(DBpediaConnector(servidor.endpoint_sparql, servidor.endpoint_lookup),
+                                     tamano_lote=2)
+    resumen = enriquecedor.ejecutar(NOMBRES, salida)
+    assert resumen["reanudados"] == 2 and resumen["fallidos"] == 0
+    assert servidor.solicitudes - antes == 1  # solo el lote pendiente
+    assert pq.read_table(salida).num_rows == len(NOMBRES)
+
+
+def test_los_lotes_salen_por_el_limitador_del_transporte_como_lote(servidor, tmp_path):
+    limitador = LimitadorSalida({"sparql": (1000.0, 1000.0)})
+    conector = DBpediaConnector(servidor.endpoint_sparql, servidor.endpoint_lookup,
+                                transporte=TransporteHTTP(limitador=limitador))
+    EnriquecedorLotes(conector, tamano_lote=2, hilos=2).ejecutar(NOMBRES, str(tmp_path / "salida.parquet"))
+    filas = limitador.resumen()
+    assert [(f["tipo"], f["clase"]) for f in filas] == [("sparql", "lote")]
+    assert filas[0]["atendidas"] == 3  # una consulta por etiqueta por lote (sin enlaces)
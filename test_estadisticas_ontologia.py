@@ -0,0 +1,102 @@
+"""
+Pruebas de las estadísticas de la ontología: conteos por clase y propiedad,
+actualización incremental al importar y recargar, y uso en las facetas.
+"""
+
+import shutil
+
+import pytest
+from owlready2 import World, destroy_entity
+
+from busqueda_local import cargar_ontologia_archivo
+from enlaces_dbpedia import TablaEnlaces
+from estadisticas_ontologia import EstadisticasOntologia
+from motor_busqueda import MotorBusqueda
+
+
+@pytest.fixture
+def onto():
+    return cargar_ontologia_archivo("criptomonedas.owl", mundo=World())
+
+
+def test_conteos_por_clase_y_propiedad(onto):
+    estadisticas = EstadisticasOntologia.desde_ontologia(onto)
+    resumen = estadisticas.resumen()
+    assert resumen["clases"] == len(list(onto.classes()))
+    assert resumen["individuos"] == len(list(onto.individuals()))
+    assert resumen["lista_clases"] == sorted(c.name for c in onto.classes())
+
+    def afirmadas(nombres):
+        return {i.name for i in onto.individuals() if {c.name for c in i.is_a if hasattr(c, "name")} & nombres}
+
+    assert estadisticas.instancias("Criptomoneda", incluir_subclases=False) == len(afirmadas({"Criptomoneda"}))
+    # Las subclases suman sus instancias, sin contar dos veces las afirmadas en ambas
+    subclases = {"Tipos_de_criptomonedas", "Criptomoneda", "Altcoin", "Stablecoin", "Token", "Blockchain", "Nodo"}
+    assert estadisticas.instancias("Tipos_de_criptomonedas") == len(afirmadas(subclases))
+
+    volatilidad = resumen["uso_propiedades"]["volatilidad"]
+    assert volatilidad["tipo"] == "datos"
+    assert volatilidad["individuos"] == sum(1 for i in onto.individuals() if i.volatilidad)
+    assert volatilidad["valores_distintos"] == len({v for i in onto.individuals() for v in i.volatilidad})
+
+
+def test_agregar_y_quitar_fichas_se_compensan():
+    ficha = {"nombre": "x", "tipos": ["Token"], "propiedades": {"tipoToken": ["ERC-20"]}}
+    estadisticas = EstadisticasOntologia({"Token": []}, {"tipoToken": "datos"}, [])
+    estadisticas.agregar([ficha, dict(ficha, nombre="y")])
+    assert estadisticas.instancias("Token") == 2
+    assert estadisticas.estimar("tipoToken", ["ERC-20", "otro"]) == 2
+    assert estadisticas.cardinalidad("tipoToken") == 1
+    estadisticas.quitar([ficha, dict(ficha, nombre="y")])
+    assert estadisticas.cantidad_individuos == 0
+    assert estadisticas.cardinalidad("tipoToken") == 0 and estadisticas.estimar("tipoToken") == 0
+
+
+def test_importacion_actualiza_sin_recalcular(onto):
+    motor = MotorBusqueda(onto)
+    estadisticas = motor.estadisticas_ontologia()
+    antes = motor.estadisticas()
+
+    criptomoneda = onto.search_one(iri="*#Criptomoneda")
+    nueva = criptomoneda("monedaImportada", namespace=criptomoneda.namespace)
+    nueva.volatilidad = ["baja"]
+    motor.registrar_importacion([nueva])
+
+    assert motor.estadisticas_ontologia() is estadisticas
+    despues = motor.estadisticas()
+    assert despues["individuos"] == antes["individuos"] + 1
+    assert despues["instancias_por_clase"]["Criptomoneda"] == antes["instancias_por_clase"]["Criptomoneda"] + 1
+    assert despues == dict(EstadisticasOntologia.desde_ontologia(onto).resumen(), version=motor.version)
+    assert motor.facetas_disponibles()["volatilidad"]["baja"] >= 1
+
+
+def test_recarga_actualiza_y_coincide_con_recalcular(tmp_path):
+    ruta = str(tmp_path / "criptomonedas.owl")
+    shutil.copy("criptomonedas.owl", ruta)
+    motor = MotorBusqueda(cargar_ontologia_archivo(ruta, mundo=World()), enlaces=TablaEnlaces(None))
+    estadisticas = motor.estadisticas_ontologia()
+
+    # Edición externa del archivo: un valor cambiado, un individuo nuevo y uno eliminado
+    externa = cargar_ontologia_archivo(ruta, mundo=World())
+    bitcoin = externa.search_one(iri="*#bitcoin")
+    bitcoin.volatilidad = ["extrema"]
+    externa.search_one(iri="*#Criptomoneda")("nuevaMoneda", namespace=bitcoin.namespace)
+    destroy_entity(externa.search_one(iri="*#litecoin"))
+    externa.save(file=ruta)
+
+    assert not motor.recargar_desde_archivo(ruta)["completa"]
+    assert motor.estadisticas_ontologia() is estadisticas
+    assert estadisticas.resumen() == EstadisticasOntologia.desde_ontologia(motor.onto).resumen()
+    assert estadisticas.frecuencias("volatilidad")["extrema"] == 1
+
+
+def test_facetas_disponibles_y_plan_and(onto):
+    motor = MotorBusqueda(onto)
+    conteos = motor.buscar_facetado({}, limite=0)["conteos"]
+    assert motor.facetas_disponibles() == {
+        faceta: {valor: n for valor, n in por_valor.items() if n} for faceta, por_valor in conteos.items()
+    }
+    # El orden de las facetas no cambia el resultado del AND
+    selecciones = {"volatilidad": ["extrema", "alta"], "nivelDeRiesgo": ["alto"]}
+    invertidas = dict(reversed(list(selecciones.items())))
+    assert motor.buscar_facetado(selecciones)["total"] == motor.buscar_facetado(invertidas)["total"]
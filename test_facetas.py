@@ -0,0 +1,64 @@
+"""
+Pruebas de la búsqueda facetada: combinación AND/OR de mapas de bits,
+conteos por valor y equivalencia con un filtrado directo de la ontología.
+"""
+
+import pytest
+from owlready2 import World
+
+from busqueda_local import cargar_ontologia_archivo, individuo_a_dict
+from facetas import IndiceFacetas, bits_a_ids, ids_a_bits
+from motor_busqueda import ErrorBusqueda, MotorBusqueda
+
+
+@pytest.fixture
+def indice():
+    valores = [
+        {"color": ["rojo"], "talla": ["S"]},
+        {"color": ["azul"], "talla": ["M"]},
+        {"color": ["rojo"], "talla": ["M"]},
+        {"color": ["verde", "rojo"]},
+        {},
+    ]
+    return IndiceFacetas(["a", "b", "c", "d", "e"], valores, ["color", "talla"])
+
+
+def test_conversion_bits():
+    assert bits_a_ids(ids_a_bits([0, 3, 70], 100)) == [0, 3, 70]
+    assert bits_a_ids(0) == []
+
+
+def test_filtros_and_or(indice):
+    assert indice.buscar({}) == [0, 1, 2, 3, 4]
+    assert indice.buscar({"color": ["rojo"]}) == [0, 2, 3]
+    assert indice.buscar({"color": ["rojo", "azul"]}) == [0, 1, 2, 3]
+    assert indice.buscar({"color": ["rojo"], "talla": ["M"]}) == [2]
+    assert indice.buscar({"color": ["verde"], "talla": ["M"]}, operador="OR") == [1, 2, 3]
+    assert indice.buscar({"color": ["rojo"]}, candidatos=[2, 4]) == [2]
+    with pytest.raises(KeyError):
+        indice.buscar({"forma": ["redonda"]})
+
+
+def test_conteos_excluyen_la_propia_faceta(indice):
+    conteos = indice.conteos({"color": ["rojo"], "talla": ["M"]})
+    assert conteos["color"] == {"rojo": 1, "azul": 1, "verde": 0}
+    assert conteos["talla"] == {"S": 1, "M": 1}
+    assert indice.conteos({"color": ["verde"]}, operador="OR")["talla"] == {"S": 2, "M": 3}
+
+
+def test_motor_igual_que_filtrar_la_ontologia():
+    onto = cargar_ontologia_archivo("criptomonedas.owl", mundo=World())
+    motor = MotorBusqueda(onto)
+    resultado = motor.buscar_facetado({"tipoToken": ["fungible", "LP pair"]})
+
+    esperados = [
+        individuo_a_dict(ind)["nombre"] for ind in onto.individuals()
+        if {"fungible", "LP pair"} & set(individuo_a_dict(ind)["propiedades"].get("tipoToken", []))
+    ]
+    assert [r["nombre"] for r in resultado["resultados"]] == esperados
+    assert resultado["total"] == sum(resultado["conteos"]["tipoToken"][v] for v in ["fungible", "LP pair"])
+
+    restringido = motor.buscar_facetado({"tipoToken": ["fungible"]}, termino="gobernanza")
+    assert [r["nombre"] for r in restringido["resultados"]] == ["tokenGobernanza"]
+    with pytest.raises(ErrorBusqueda):
+        motor.buscar_facetado({"tipoToken": ["fungible"]}, operador="XOR")
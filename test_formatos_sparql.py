@@ -0,0 +1,67 @@
+"""
+Pruebas de los formatos de resultados SPARQL y del modo de carga compacta:
+lectura de TSV y CSV con la estructura del JSON, recorte en el servidor y
+mismos resultados con menos bytes contra el servidor DBpedia simulado.
+"""
+
+import pytest
+
+from benchmarks.servidor_simulado import iniciar_servidor
+from dbpedia_connector import DBpediaConnector, buscar_en_dbpedia
+from formatos_sparql import analizar_resultados, serializar_csv, serializar_tsv
+from metricas import metricas
+
+RESULTADOS = {
+    "head": {"vars": ["resource", "label", "abstract", "year"]},
+    "results": {"bindings": [
+        {
+            "resource": {"type": "uri", "value": "http://dbpedia.org/resource/Bitcoin"},
+            "label": {"type": "literal", "xml:lang": "en", "value": "Bitcoin"},
+            "abstract": {"type": "literal", "xml:lang": "en", "value": 'Dice "hola"\tcon\\barra\ny salto'},
+            "year": {"type": "literal", "datatype": "http://www.w3.org/2001/XMLSchema#integer", "value": "2009"},
+        },
+        {"resource": {"type": "uri", "value": "http://dbpedia.org/resource/Monero"}},
+    ]},
+}
+
+
+@pytest.fixture(scope="module")
+def servidor():
+    servidor = iniciar_servidor()
+    yield servidor
+    servidor.detener()
+
+
+def test_tsv_conserva_tipos_y_escapes():
+    leidos = analizar_resultados(serializar_tsv(RESULTADOS), "tsv")
+    assert leidos == RESULTADOS
+
+
+def test_csv_conserva_los_valores():
+    leidos = analizar_resultados(serializar_csv(RESULTADOS), "csv")
+    assert leidos["head"]["vars"] == RESULTADOS["head"]["vars"]
+    for leida, original in zip(leidos["results"]["bindings"], RESULTADOS["results"]["bindings"]):
+        assert {v: c["value"] for v, c in leida.items()} == {v: c["value"] for v, c in original.items()}
+
+
+def _bytes(operacion):
+    return next(f["bytes"] for f in metricas.resumen() if f["operacion"] == operacion)
+
+
+@pytest.mark.parametrize("formato", ["json", "tsv", "csv"])
+def test_carga_compacta_mismos_resultados_con_menos_bytes(servidor, formato):
+    completo = DBpediaConnector(servidor.endpoint_sparql, servidor.endpoint_lookup, formato="json")
+    compacto = DBpediaConnector(servidor.endpoint_sparql, servidor.endpoint_lookup, compacto=True,
+                                formato=formato)
+    metricas.reiniciar()
+    esperados = completo.buscar_relacionados("bitcoin")
+    bytes_completos = _bytes("buscar_relacionados")
+    metricas.reiniciar()
+    assert compacto.buscar_relacionados("bitcoin") == esperados
+    assert _bytes("buscar_relacionados") < bytes_completos
+
+    entidades, error = buscar_en_dbpedia("bitcoin", endpoint=servidor.endpoint_sparql, compacto=True,
+                                         formato=formato)
+    assert error is None
+    assert entidades == buscar_en_dbpedia("bitcoin", endpoint=servidor.endpoint_sparql)[0]
+    assert all(len(e["comment"]) <= 303 for e in entidades)
@@ -0,0 +1,70 @@
+"""
+Pruebas del generador de ontologías sintéticas y del benchmark de escalado:
+mismo esquema que la base, cantidad pedida de individuos, resultado
+reproducible y relaciones que apuntan a individuos existentes.
+"""
+
+import os
+
+import pytest
+from owlready2 import World
+
+from benchmarks import benchmark_escalado
+from benchmarks.benchmark_escalado import agregar_pendientes, medir_en_proceso, medir_tamano
+from benchmarks.generador_ontologia import generar_ontologia
+from busqueda_local import buscar_instancias_de_clase, cargar_ontologia_archivo
+
+
+@pytest.fixture(scope="module")
+def base():
+    return cargar_ontologia_archivo("criptomonedas.owl", mundo=World())
+
+
+@pytest.mark.parametrize("formato,extension", [("rdfxml", "owl"), ("ntriples", "nt")])
+def test_genera_el_esquema_con_los_individuos_pedidos(base, tmp_path, formato, extension):
+    ruta = str(tmp_path / f"sintetica.{extension}")
+    resumen = generar_ontologia(600, ruta, formato=formato)
+    assert resumen["individuos"] == 600 and resumen["plantillas"] == len(list(base.individuals()))
+
+    onto = cargar_ontologia_archivo(ruta, mundo=World())
+    individuos = list(onto.individuals())
+    assert len(individuos) == 600
+    for listar in ("classes", "object_properties", "data_properties"):
+        assert {e.iri for e in getattr(onto, listar)()} == {e.iri for e in getattr(base, listar)()}
+
+    # Los sintéticos llevan los tipos y propiedades de su plantilla
+    bitcoin = onto.search_one(iri="*#bitcoin_*")
+    assert {c.name for c in bitcoin.is_a} == {c.name for c in base.search_one(iri="*#bitcoin").is_a}
+    assert len(buscar_instancias_de_clase(onto, "Criptomoneda")) > \
+        len(buscar_instancias_de_clase(base, "Criptomoneda"))
+    # Las relaciones apuntan a individuos que están en la ontología generada
+    iris = {i.iri for i in individuos}
+    destinos = [valor for propiedad in onto.object_properties()
+                for _, valor in propiedad.get_relations()]
+    assert destinos and all(destino.iri in iris for destino in destinos)
+
+
+def test_misma_semilla_mismo_archivo(tmp_path):
+    rutas = [str(tmp_path / f"{i}.owl") for i in range(3)]
+    generar_ontologia(300, rutas[0], semilla=7)
+    generar_ontologia(300, rutas[1], semilla=7)
+    generar_ontologia(300, rutas[2], semilla=8)
+    contenidos = [open(r, "rb").read() for r in rutas]
+    assert contenidos[0] == contenidos[1] != contenidos[2]
+
+
+def test_medidas_y_pendientes(tmp_path):
+    ruta = str(tmp_path / "sintetica.owl")
+    generar_ontologia(400, ruta)
+    medidas = medir_tamano(ruta, repeticiones=2)
+    assert medidas["resultados_nombre"] > 0 and medidas["carga_s"] > 0
+
+    filas = [{"individuos": 1000, "carga_s": 1.0}, {"individuos": 10000, "carga_s": 10.0}]
+    agregar_pendientes(filas)
+    assert filas[1]["pendiente_carga_s"] == 1.0
+
+
+def test_proceso_de_medicion_que_muere_deja_una_fila_con_error(monkeypatch):
+    # Como si el sistema matara al proceso por falta de memoria antes de responder
+    monkeypatch.setattr(benchmark_escalado, "_trabajador", lambda ruta, repeticiones, salida: os._exit(9))
+    assert medir_en_proceso("no_importa.owl", 1) == {"error": "el proceso de medición terminó con código 9"}
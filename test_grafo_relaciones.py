@@ -0,0 +1,62 @@
+"""
+Pruebas del grafo de relaciones CSR: vecindario de k saltos, filtros por
+propiedad y dirección, camino más corto y su uso desde el motor y la API.
+"""
+
+import pytest
+from owlready2 import World
+
+from busqueda_local import cargar_ontologia_archivo
+from grafo_relaciones import GrafoRelaciones
+from motor_busqueda import ErrorBusqueda, MotorBusqueda
+
+
+@pytest.fixture
+def grafo():
+    # a -p-> b -p-> c -q-> d ; e -q-> a
+    nombres = ["a", "b", "c", "d", "e"]
+    return GrafoRelaciones(nombres, ["p", "q"], [(0, 0, 1), (1, 0, 2), (2, 1, 3), (4, 1, 0)])
+
+
+def test_vecindario_k_saltos(grafo):
+    assert grafo.vecindario("a", k=1) == [{"nombre": "b", "distancia": 1}]
+    assert [v["nombre"] for v in grafo.vecindario("a", k=3)] == ["b", "c", "d"]
+    assert [v["nombre"] for v in grafo.vecindario("a", k=3, propiedades=["p"])] == ["b", "c"]
+    assert grafo.vecindario("a", k=1, direccion="entrada") == [{"nombre": "e", "distancia": 1}]
+    assert [v["nombre"] for v in grafo.vecindario("b", k=1, direccion="ambas")] == ["a", "c"]
+
+
+def test_camino_mas_corto(grafo):
+    camino = grafo.camino_mas_corto("a", "d")
+    assert [(p["desde"], p["propiedad"], p["hasta"]) for p in camino] == [
+        ("a", "p", "b"), ("b", "p", "c"), ("c", "q", "d")
+    ]
+    assert grafo.camino_mas_corto("a", "a") == []
+    assert grafo.camino_mas_corto("d", "a") is None
+    assert grafo.camino_mas_corto("a", "d", propiedades=["p"]) is None
+
+    invertido = grafo.camino_mas_corto("d", "e", direccion="ambas")
+    assert [p["hasta"] for p in invertido] == ["c", "b", "a", "e"]
+    assert all(p["invertida"] for p in invertido)
+
+    with pytest.raises(KeyError):
+        grafo.camino_mas_corto("a", "no_existe")
+
+
+def test_motor_usa_relaciones_inferidas():
+    onto = cargar_ontologia_archivo("criptomonedas.owl", mundo=World())
+    ns = onto.get_namespace("http://www.semanticweb.org/cristian/ontologies/2025/8/untitled-ontology-4#")
+    motor = MotorBusqueda(onto)
+    with onto:
+        mercado = ns.Mercado("mercado_grafo")
+        moneda = ns.Criptomoneda("moneda_grafo")
+        mercado.opera = [moneda]
+    motor.registrar_importacion([mercado, moneda])
+
+    assert "opera" in motor.propiedades_grafo()
+    assert motor.vecindario("moneda_grafo", k=1) == [{"nombre": "mercado_grafo", "distancia": 1}]  # simétrica
+    assert motor.camino("mercado_grafo", "moneda_grafo")[0]["propiedad"] == "opera"
+    with pytest.raises(ErrorBusqueda):
+        motor.vecindario("no_existe")
+    with pytest.raises(ErrorBusqueda):
+        motor.vecindario("moneda_grafo", direccion="diagonal")
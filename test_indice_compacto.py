@@ -0,0 +1,37 @@
+"""
+Pruebas del índice compacto: mismos resultados que recorrer la ontología y
+menos memoria que el índice de diccionarios de listas.
+"""
+
+import pytest
+from owlready2 import World
+
+from busqueda_local import buscar_individuos_por_nombre, buscar_texto_completo, cargar_ontologia_archivo
+from indice_compacto import IndiceCompacto, codificar_deltas, decodificar_deltas, reporte_memoria
+
+
+@pytest.fixture(scope="module")
+def onto():
+    return cargar_ontologia_archivo("criptomonedas.owl", mundo=World())
+
+
+def test_deltas_ida_y_vuelta():
+    ids = [0, 1, 5, 127, 128, 300, 70000, 70001]
+    assert decodificar_deltas(codificar_deltas(ids)) == ids
+    assert len(codificar_deltas([0, 1, 2, 3])) == 4
+
+
+def test_mismos_resultados_que_la_ontologia(onto):
+    indice = IndiceCompacto(onto)
+    for termino in ["bit", "COIN", "a", "alto", "zzz", ""]:
+        assert [indice.individuos[i] for i in indice.buscar_por_nombre(termino)] == \
+            buscar_individuos_por_nombre(onto, termino)
+        assert [indice.individuos[i] for i in indice.buscar_texto_completo(termino)] == \
+            buscar_texto_completo(onto, termino)
+
+
+def test_reporte_memoria(onto):
+    reporte = reporte_memoria(onto)
+    assert reporte["individuos"] == len(list(onto.individuals()))
+    assert reporte["bytes_compacto"] < reporte["bytes_ingenuo"]
+    assert reporte["reduccion"] > 1
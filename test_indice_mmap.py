@@ -0,0 +1,76 @@
+"""
+Pruebas del índice mmap: debe responder igual que las búsquedas sobre
+owlready2 y poder servirse desde varios procesos trabajadores.
+"""
+
+import time
+
+import pytest
+import requests
+from owlready2 import World
+
+from api_busqueda import ClienteBusqueda, servir_trabajadores
+from busqueda_local import (
+    buscar_individuos_por_nombre, buscar_instancias_de_clase, buscar_texto_completo,
+    cargar_ontologia_archivo, individuo_a_dict, listar_clases
+)
+from indice_mmap import ErrorIndice, IndiceMmap, construir_indice
+
+
+@pytest.fixture(scope="module")
+def onto():
+    return cargar_ontologia_archivo("criptomonedas.owl", mundo=World())
+
+
+@pytest.fixture(scope="module")
+def ruta_indice(onto, tmp_path_factory):
+    ruta = str(tmp_path_factory.mktemp("indice") / "onto.bsidx")
+    construir_indice(onto, ruta)
+    return ruta
+
+
+def test_indice_equivale_a_owlready(onto, ruta_indice):
+    indice = IndiceMmap(ruta_indice)
+    individuos = list(onto.individuals())
+    try:
+        for termino in ["bit", "COIN", "a", "zzz"]:
+            assert [individuos[i] for i in indice.buscar_por_nombre(termino)] == \
+                buscar_individuos_por_nombre(onto, termino)
+            assert [individuos[i] for i in indice.buscar_texto_completo(termino)] == \
+                buscar_texto_completo(onto, termino)
+
+        assert indice.listar_clases() == listar_clases(onto)
+        for clase in indice.listar_clases():
+            esperadas = set(buscar_instancias_de_clase(onto, clase))
+            assert {individuos[i] for i in indice.instancias_de_clase(clase)} == esperadas
+
+        for i, individuo in enumerate(individuos):
+            assert indice.individuo(i) == individuo_a_dict(individuo)
+    finally:
+        indice.cerrar()
+
+
+def test_archivo_invalido(tmp_path):
+    ruta = tmp_path / "roto.bsidx"
+    ruta.write_bytes(b"no es un indice")
+    with pytest.raises(ErrorIndice):
+        IndiceMmap(str(ruta))
+
+
+def test_trabajadores_comparten_indice(ruta_indice):
+    procesos, puerto = servir_trabajadores(ruta_indice, puerto=0, trabajadores=2)
+    try:
+        cliente = ClienteBusqueda(f"http://127.0.0.1:{puerto}", timeout=5)
+        for _ in range(50):
+            try:
+                cliente.version
+                break
+            except requests.ConnectionError:
+                time.sleep(0.1)
+        resultado = cliente.buscar("bit", modo="local")
+        assert resultado["locales"] and all("bit" in r["nombre"].lower() for r in resultado["locales"])
+        assert cliente.listar_clases()
+    finally:
+        for proceso in procesos:
+            proceso.terminate()
+            proceso.join()
@@ -0,0 +1,66 @@
+"""
+Pruebas de los índices numéricos: conversión de literales, rangos por
+búsqueda binaria y top-N, comparados con un recorrido de la ontología.
+"""
+
+import pytest
+from owlready2 import World
+
+from busqueda_local import cargar_ontologia_archivo
+from indice_numerico import IndiceNumerico, convertir_numero
+from motor_busqueda import ErrorBusqueda, MotorBusqueda
+
+
+@pytest.fixture(scope="module")
+def onto():
+    return cargar_ontologia_archivo("criptomonedas.owl", mundo=World())
+
+
+def test_convertir_numero():
+    assert convertir_numero(7) == 7.0
+    assert convertir_numero("2.5M") == 2_500_000.0
+    assert convertir_numero("$1,200") == 1200.0
+    assert convertir_numero("100 millones") == 100_000_000.0
+    assert convertir_numero("3 millardos") == 3e9
+    assert convertir_numero("1.5bn") == 1.5e9
+    assert convertir_numero("2 billones") == 2e12
+    assert convertir_numero("2014-04-18") == 2014.0
+    assert convertir_numero(True) is None
+    assert convertir_numero("alto") is None
+
+
+def test_rango_y_top():
+    valores = [{"monto": [5]}, {"monto": ["1k"]}, {}, {"monto": [20, "n/d"]}, {"monto": [5.0]}]
+    indice = IndiceNumerico(["a", "b", "c", "d", "e"], valores, ["monto"])
+    assert indice.rango("monto", 5, 20) == [(0, 5.0), (4, 5.0), (3, 20.0)]
+    assert indice.rango("monto", 5, 20, incluir_minimo=False, incluir_maximo=False) == []
+    assert indice.rango("monto", minimo=100) == [(1, 1000.0)]
+    assert indice.top("monto", 2) == [(1, 1000.0), (3, 20.0)]
+    assert indice.top("monto", 1, descendente=False) == [(0, 5.0)]
+    with pytest.raises(KeyError):
+        indice.rango("otra")
+
+
+def test_igual_que_recorrer_la_ontologia(onto):
+    indice = IndiceNumerico.desde_ontologia(onto)
+    for propiedad in ["añoCreación", "montoRobado", "volumenTransacciones"]:
+        esperados = sorted(
+            (convertir_numero(v), ind.name) for ind in onto.individuals()
+            for v in getattr(ind, propiedad, [])
+        )
+        rango = indice.rango(propiedad)
+        assert [(v, indice.nombres[i]) for i, v in rango] == esperados
+
+    anios = indice.rango("añoCreación", 2010, 2015)
+    assert {indice.nombres[i] for i, _ in anios} == {"litecoin", "monero"}
+
+
+def test_motor(onto):
+    motor = MotorBusqueda(onto)
+    resultado = motor.buscar_por_rango("montoRobado", minimo=1_000_000)
+    assert resultado["total"] == 2
+    assert [r["valor"] for r in resultado["resultados"]] == [2_500_000.0, 50_000_000.0]
+    assert motor.top_numerico("volumenTransacciones", 1)[0]["nombre"] == "mercadoBTCUSDT"
+    assert motor.propiedades_numericas()["añoCreación"]["minimo"] == 1976.0
+    with pytest.raises(ErrorBusqueda):
+        motor.buscar_por_rango("noExiste")
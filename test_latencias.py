@@ -0,0 +1,117 @@
+"""
+Pruebas de los tiempos límite adaptativos y de las solicitudes cubiertas:
+percentiles por operación, recuperación tras los vencimientos, alternativa
+lanzada solo en la cola lenta y búsqueda Lookup/SPARQL contra el servidor
+DBpedia simulado.
+"""
+
+import time
+
+import pytest
+import requests
+
+from benchmarks.servidor_simulado import iniciar_servidor
+from dbpedia_connector import DBpediaConnector, consultar_adaptativo
+from latencias import HistorialLatencias, solicitud_cubierta
+from transporte import TransporteHTTP
+
+
+def _demorada(segundos, resultado):
+    def consulta():
+        time.sleep(segundos)
+        return resultado
+    return consulta
+
+
+def _falla():
+    raise ConnectionError("sin respuesta")
+
+
+def test_timeout_sale_del_p99_acotado_por_el_respaldo():
+    historial = HistorialLatencias(minimo_muestras=5, factor_timeout=3.0, timeout_minimo=0.5)
+    assert historial.timeout("sparql", 30) == 30  # sin muestras: el valor fijo
+    for segundos in (0.2, 0.3, 0.25, 0.4, 0.3):
+        historial.registrar("sparql", segundos)
+    assert historial.percentil("sparql", 99) == 0.4
+    assert historial.timeout("sparql", 30) == pytest.approx(1.2)
+    assert historial.timeout("sparql", 1.0) == 1.0
+    assert historial.umbral_cobertura("sparql", 5.0) == 0.4
+    assert historial.umbral_cobertura("lookup", 5.0) == 5.0
+
+
+def test_alternativa_solo_si_la_principal_se_demora():
+    historial = HistorialLatencias()
+    assert solicitud_cubierta(_demorada(0.0, ["rapida"]), _demorada(0.0, ["alternativa"]), 0.5,
+                              historial=historial) == (["rapida"], 0)
+    assert historial.coberturas == 0
+
+    inicio = time.perf_counter()
+    resultado = solicitud_cubierta(_demorada(1.0, ["lenta"]), _demorada(0.05, ["alternativa"]), 0.1,
+                                   historial=historial)
+    assert resultado == (["alternativa"], 1) and time.perf_counter() - inicio < 0.5
+    assert historial.coberturas == 1 and historial.ganadas_alternativa == 1
+
+    # Un fallo o una respuesta vacía lanzan la alternativa sin esperar el umbral
+    assert solicitud_cubierta(_falla, _demorada(0.0, ["alternativa"]), 10, historial=historial)[1] == 1
+    assert solicitud_cubierta(_demorada(0.0, []), _demorada(0.0, []), 10, historial=historial) == ([], None)
+    with pytest.raises(ConnectionError):
+        solicitud_cubierta(_falla, _falla, 10, historial=historial)
+
+
+def test_las_consultas_rezagadas_no_hacen_esperar_a_las_siguientes():
+    # Cada principal perdedora sigue 1 s en vuelo; con hilos compartidos las
+    # siguientes harían cola detrás de ellas
+    historial = HistorialLatencias()
+    inicio = time.perf_counter()
+    for _ in range(12):
+        assert solicitud_cubierta(_demorada(1.0, ["lenta"]), _demorada(0.0, ["alternativa"]), 0.01,
+                                  historial=historial) == (["alternativa"], 1)
+    assert time.perf_counter() - inicio < 0.8
+
+
+def test_conector_cubre_el_lookup_lento_con_sparql():
+    servidor = iniciar_servidor(latencia_lookup_ms=0)
+    try:
+        historial = HistorialLatencias(minimo_muestras=5)
+        conector = DBpediaConnector(servidor.endpoint_sparql, servidor.endpoint_lookup, latencias=historial)
+        for _ in range(5):
+            resultados, fuente = conector.buscar_cubierta("Ethereum")
+            assert fuente == "lookup" and resultados[0]["label"] == "Ethereum"
+        assert historial.coberturas == 0
+        assert historial.timeout("lookup", 10) == historial.timeout_minimo
+
+        servidor.latencia_lookup_ms = 1500
+        inicio = time.perf_counter()
+        resultados, fuente = conector.buscar_cubierta("Ethereum")
+        assert fuente == "sparql" and time.perf_counter() - inicio < 1.0
+        assert resultados[0]["uri"] == "http://dbpedia.org/resource/Ethereum"
+        assert historial.ganadas_alternativa == 1
+    finally:
+        servidor.detener()
+
+
+def test_los_vencimientos_suben_el_timeout_hasta_la_nueva_latencia():
+    servidor = iniciar_servidor(latencia_ms=50)
+    try:
+        historial = HistorialLatencias(minimo_muestras=5)
+        transporte = TransporteHTTP()
+        consulta = "SELECT ?s WHERE { ?s ?p ?o } LIMIT 1"
+
+        def consultar():
+            return consultar_adaptativo(transporte, consulta, servidor.endpoint_sparql, "sparql",
+                                        respaldo=30, historial=historial)
+
+        for _ in range(5):
+            consultar()
+        assert historial.timeout("sparql", 30) == historial.timeout_minimo
+
+        # DBpedia pasa a tardar 2 s: la primera vence, pero cuenta como muestra
+        # censurada y el tiempo límite siguiente ya alcanza
+        servidor.latencia_ms = 2000
+        with pytest.raises(requests.exceptions.Timeout):
+            consultar()
+        assert historial.timeout("sparql", 30) == pytest.approx(3 * historial.timeout_minimo)
+        consultar()
+        consultar()
+    finally:
+        servidor.detener()
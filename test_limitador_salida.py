@@ -0,0 +1,93 @@
+"""
+Pruebas del limitador de salida: tasa de la cubeta de tokens, prioridad de
+las solicitudes interactivas sobre las de lote, reserva interactiva y su uso
+desde el transporte contra el servidor DBpedia simulado.
+"""
+
+import threading
+import time
+
+import pytest
+
+from benchmarks.servidor_simulado import iniciar_servidor
+from latencias import solicitud_cubierta
+from limitador_salida import LimitadorSalida, LimiteAgotado, crear_limitador, prioridad
+from metricas import metricas
+from transporte import TransporteHTTP
+
+
+def test_la_cubeta_respeta_la_tasa_tras_la_rafaga():
+    limitador = LimitadorSalida({"sparql": (20.0, 2.0)}, reserva_interactiva=0.0)
+    inicio = time.monotonic()
+    esperas = [limitador.adquirir("sparql") for _ in range(6)]
+    assert esperas[:2] == [pytest.approx(0.0, abs=0.01)] * 2  # la ráfaga sale sin esperar
+    assert time.monotonic() - inicio >= 0.18  # los otros 4 a 20 por segundo
+    assert limitador.adquirir("ping") == 0.0  # sin presupuesto: no se limita
+
+
+def test_interactiva_pasa_delante_de_los_lotes():
+    limitador = LimitadorSalida({"sparql": (10.0, 1.0)})
+    limitador.adquirir("sparql")  # vacía la cubeta
+    orden = []
+
+    def solicitar(clase):
+        limitador.adquirir("sparql", clase=clase)
+        orden.append(clase)
+
+    hilos = [threading.Thread(target=solicitar, args=("lote",)) for _ in range(3)]
+    for hilo in hilos:
+        hilo.start()
+    time.sleep(0.03)  # los lotes ya están en la cola cuando llega la interactiva
+    hilos.append(threading.Thread(target=solicitar, args=("interactiva",)))
+    hilos[-1].start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert orden == ["interactiva", "lote", "lote", "lote"]
+    filas = {fila["clase"]: fila for fila in limitador.resumen()}
+    assert filas["lote"]["max_en_cola"] == 3 and filas["lote"]["en_cola"] == 0
+    assert filas["interactiva"]["espera_max_ms"] < filas["lote"]["espera_max_ms"]
+
+
+def test_los_lotes_no_vacian_la_reserva_interactiva():
+    limitador = LimitadorSalida({"lookup": (0.5, 4.0)}, reserva_interactiva=0.5)
+    limitador.adquirir("lookup", clase="lote")
+    limitador.adquirir("lookup", clase="lote")
+    with pytest.raises(LimiteAgotado):
+        limitador.adquirir("lookup", clase="lote", timeout=0.05)
+    assert limitador.adquirir("lookup", clase="interactiva", timeout=0) == pytest.approx(0.0, abs=0.01)
+    assert limitador.resumen()[-1]["agotadas"] == 1
+
+
+def test_transporte_espera_turno_con_la_prioridad_del_contexto():
+    servidor = iniciar_servidor()
+    metricas.reiniciar()
+    try:
+        transporte = TransporteHTTP(limitador=LimitadorSalida({"sparql": (20.0, 1.0)}))
+        consulta = "SELECT ?s WHERE { ?s ?p ?o } LIMIT 1"
+        inicio = time.monotonic()
+        for _ in range(3):
+            transporte.consultar_sparql(consulta, servidor.endpoint_sparql)
+        assert time.monotonic() - inicio >= 0.09
+        assert transporte.ultima_espera() > 0
+
+        # La prioridad llega también a los hilos de las solicitudes cubiertas
+        with prioridad("lote"):
+            solicitud_cubierta(lambda: transporte.consultar_sparql(consulta, servidor.endpoint_sparql),
+                               None, umbral=5.0, valida=lambda r: True)
+    finally:
+        servidor.detener()
+
+    operaciones = {f["operacion"]: f for f in metricas.resumen() if f["categoria"] == "limitador"}
+    assert operaciones["sparql/normal"]["llamadas"] == 3
+    assert operaciones["sparql/lote"]["llamadas"] == 1
+    assert {"nombre": "buscador_limitador_en_cola", "clase": "lote", "tipo": "sparql", "valor": 0} \
+        in metricas.indicadores()
+    assert 'buscador_limitador_en_cola{clase="normal",tipo="sparql"} 0' in metricas.exportar_prometheus()
+
+
+def test_crear_limitador_desde_el_entorno():
+    assert crear_limitador({}) is None
+    limitador = crear_limitador({"DBPEDIA_LIMITE_SPARQL": "5/10", "DBPEDIA_LIMITE_LOOKUP": "2"})
+    assert limitador.cubetas["sparql"].tasa == 5.0 and limitador.cubetas["sparql"].rafaga == 10.0
+    assert limitador.cubetas["lookup"].rafaga == 2.0
@@ -0,0 +1,43 @@
+"""
+Pruebas del registro de métricas y de la exportación en formato Prometheus.
+"""
+
+import os
+import tempfile
+
+from metricas import RegistroMetricas
+
+
+def test_medir_registra_filas_bytes_cache_y_errores():
+    registro = RegistroMetricas()
+    with registro.medir("dbpedia", "sparql") as medicion:
+        medicion.bytes = 1200
+        medicion.filas = 7
+    with registro.medir("cache", "obtener") as medicion:
+        medicion.cache = "hit"
+    try:
+        with registro.medir("dbpedia", "sparql"):
+            raise TimeoutError("simulado")
+    except TimeoutError:
+        pass
+
+    filas = {(f["categoria"], f["operacion"]): f for f in registro.resumen()}
+    sparql = filas[("dbpedia", "sparql")]
+    assert sparql["llamadas"] == 2
+    assert sparql["errores"] == 1
+    assert sparql["bytes"] == 1200 and sparql["filas"] == 7
+    assert filas[("cache", "obtener")]["cache_hit"] == 1
+
+
+def test_exportacion_prometheus():
+    registro = RegistroMetricas()
+    registro.registrar("ontologia", "cargar", 0.02)
+    texto = registro.exportar_prometheus()
+    assert '# TYPE buscador_operacion_duracion_segundos histogram' in texto
+    assert 'buscador_operacion_duracion_segundos_bucket{categoria="ontologia",operacion="cargar",le="0.025"} 1' in texto
+    assert 'buscador_operacion_duracion_segundos_count{categoria="ontologia",operacion="cargar"} 1' in texto
+
+    ruta = os.path.join(tempfile.mkdtemp(), "metricas", "buscador.prom")
+    registro.escribir_prometheus(ruta)
+    with open(ruta, encoding="utf-8") as f:
+        assert f.read() == texto
@@ -0,0 +1,132 @@
+"""
+Pruebas del motor de búsqueda sin interfaz y de su API JSON, usando la
+ontología del proyecto y el servidor DBpedia simulado.
+"""
+
+import threading
+import time
+
+import pytest
+from owlready2 import World
+
+from api_busqueda import ClienteBusqueda, crear_servidor
+from benchmarks.servidor_simulado import iniciar_servidor
+from busqueda_local import cargar_ontologia_archivo
+from dbpedia_connector import CATEGORIAS_EXPLORAR, DBpediaConnector, explorar_categorias
+from motor_busqueda import ErrorBusqueda, MotorBusqueda
+
+
+@pytest.fixture(scope="module")
+def motor():
+    servidor = iniciar_servidor()
+    onto = cargar_ontologia_archivo("criptomonedas.owl", mundo=World())
+    yield MotorBusqueda(onto, DBpediaConnector(servidor.endpoint_sparql, servidor.endpoint_lookup))
+    servidor.detener()
+
+
+def test_busqueda_local_e_hibrida(motor):
+    local = motor.buscar("bit", modo="local")
+    assert local["locales"] and not local["dbpedia"]
+    assert all("bit" in r["nombre"].lower() for r in local["locales"])
+
+    hibrido = motor.buscar("bitcoin", modo="hibrido")
+    assert hibrido["error_dbpedia"] is None
+    assert hibrido["dbpedia"]
+
+    texto = motor.buscar("bit", modo="local", tipo="texto")
+    assert len(texto["locales"]) >= len(local["locales"])
+
+    with pytest.raises(ErrorBusqueda):
+        motor.buscar("bit", modo="otro")
+
+
+def test_api_json_ida_y_vuelta(motor):
+    servidor = crear_servidor(motor, puerto=0)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    try:
+        cliente = ClienteBusqueda(f"http://127.0.0.1:{servidor.server_address[1]}")
+        assert cliente.version == motor.version
+        assert cliente.buscar("bit", modo="local")["locales"] == motor.buscar("bit", modo="local")["locales"]
+
+        clases = cliente.listar_clases()
+        assert clases == motor.listar_clases()
+        assert cliente.buscar_por_clase(clases[0]) == motor.buscar_por_clase(clases[0])
+        assert cliente.explorar_dbpedia(["Blockchain"]) == motor.explorar_dbpedia(["Blockchain"])
+
+        with pytest.raises(ErrorBusqueda):
+            cliente.buscar("", modo="local")
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+def test_api_rechaza_parametros_que_alterarian_la_consulta_a_dbpedia(motor):
+    servidor = crear_servidor(motor, puerto=0)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    try:
+        cliente = ClienteBusqueda(f"http://127.0.0.1:{servidor.server_address[1]}")
+        invalidos = [
+            lambda: cliente.buscar_dbpedia_por_tipo("Company . ?s ?p ?o"),
+            lambda: cliente.buscar_dbpedia_por_tipo("Company", limite=100000),
+            lambda: cliente.explorar_dbpedia(["Bank", "Company} UNION {?s ?p ?o"]),
+            lambda: cliente.explorar_dbpedia([f"Tipo{i}" for i in range(50)]),
+            lambda: cliente.explorar_dbpedia(["Bank"], limite=0),
+            lambda: cliente.detalles_dbpedia("http://dbpedia.org/resource/X> ?p ?o . <http://x"),
+            lambda: cliente.detalles_dbpedia("javascript:alert(1)"),
+        ]
+        for invalido in invalidos:
+            with pytest.raises(ErrorBusqueda):
+                invalido()
+        entidades, error = cliente.buscar_dbpedia_por_tipo("Cryptocurrency", limite=5)
+        assert error is None and entidades
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+def test_explorar_todas_las_categorias_en_una_ronda():
+    servidor = iniciar_servidor(latencia_ms=200)
+    try:
+        onto = cargar_ontologia_archivo("criptomonedas.owl", mundo=World())
+        motor = MotorBusqueda(onto, DBpediaConnector(servidor.endpoint_sparql, servidor.endpoint_lookup))
+        inicio = time.monotonic()
+        categorias = motor.explorar_dbpedia()
+        # Seis categorías y el conteo salen en paralelo: ~una latencia, no siete
+        assert time.monotonic() - inicio < 0.2 * 4
+        assert list(categorias) == list(CATEGORIAS_EXPLORAR)
+        for categoria in categorias.values():
+            assert categoria["error"] is None and categoria["entidades"]
+            assert categoria["total"] == len(categoria["entidades"])
+        solicitudes = servidor.solicitudes
+        assert solicitudes == len(CATEGORIAS_EXPLORAR) + 1
+
+        # La segunda exploración sale de la caché; una categoría nueva consulta solo esa
+        assert motor.explorar_dbpedia() == categorias
+        assert servidor.solicitudes == solicitudes
+        motor.explorar_dbpedia(["Cryptocurrency", "Bank"])
+        assert servidor.solicitudes == solicitudes + 2
+    finally:
+        servidor.detener()
+
+
+def test_exploraciones_simultaneas_no_hacen_cola():
+    servidor = iniciar_servidor(latencia_ms=200)
+    try:
+        tipos = list(CATEGORIAS_EXPLORAR)
+        resultados = []
+
+        def explorar():
+            resultados.append(explorar_categorias(tipos, endpoint=servidor.endpoint_sparql))
+
+        hilos = [threading.Thread(target=explorar) for _ in range(3)]
+        inicio = time.monotonic()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        # Cada llamada tiene sus propios hilos: tres exploraciones tardan ~una
+        # latencia (con hilos compartidos por las tres harían cola en tres tandas)
+        assert time.monotonic() - inicio < 0.2 * 2.5
+        assert len(resultados) == 3 and all(c["error"] is None for r in resultados for c in r.values())
+    finally:
+        servidor.detener()
@@ -0,0 +1,116 @@
+"""
+Pruebas de la exportación e importación Parquet/Arrow: la ida y vuelta
+reproduce las mismas tripletas (con idiomas, números y booleanos), trae las
+relaciones entre individuos y el enriquecimiento de DBpedia, y una
+importación fallida no deja nada a medias.
+"""
+
+import pytest
+from owlready2 import World, destroy_entity, locstr
+
+from benchmarks.generador_ontologia import generar_ontologia
+from busqueda_local import buscar_instancias_de_clase, cargar_ontologia_archivo
+from cache_compartida import CacheMemoria
+from dbpedia_connector import DBpediaOffline
+import parquet_ontologia
+from motor_busqueda import MotorBusqueda
+from parquet_ontologia import exportar, importar, leer_tablas
+
+
+def tripletas(onto):
+    """Tripletas de objetos y de datos con IRIs (comparables entre mundos)"""
+    mundo = onto.world
+    iri = mundo._unabbreviate
+    objetos = {(iri(s), iri(p), iri(o)) for s, p, o in onto._get_obj_triples_spo_spo(None, None, None)
+               if s > 0 and o > 0}
+    datos = {(iri(s), iri(p), o, d if isinstance(d, str) else iri(d))
+             for s, p, o, d in onto._get_data_triples_spod_spod(None, None, None, None)}
+    return objetos, datos
+
+
+def solo_esquema(ruta):
+    onto = cargar_ontologia_archivo(ruta, mundo=World())
+    for individuo in list(onto.individuals()):
+        destroy_entity(individuo)
+    return onto
+
+
+@pytest.mark.parametrize("formato", ["parquet", "arrow"])
+def test_ida_y_vuelta_reproduce_las_tripletas(tmp_path, formato):
+    origen = cargar_ontologia_archivo("criptomonedas.owl", mundo=World())
+    bitcoin = origen.search_one(iri="*#bitcoin")
+    bitcoin.label.append("Bitcoin")  # texto sin idioma
+    bitcoin.comment.append(locstr("Moneda digital", lang="es"))
+
+    resumen = exportar(origen, str(tmp_path), formato=formato)
+    assert resumen["individuos"] == len(list(origen.individuals()))
+    tablas = leer_tablas(str(tmp_path))
+    numeros = [n for n in tablas["datos"].column("numero").to_pylist() if n is not None]
+    assert numeros  # las propiedades numéricas quedan también como float64
+    assert "es" in tablas["datos"].column("idioma").to_pylist()
+
+    destino = solo_esquema("criptomonedas.owl")
+    assert not list(destino.individuals())
+    importado = importar(destino, tablas)
+    assert importado["individuos"] == resumen["individuos"]
+    assert importado["datos"] == tablas["datos"].num_rows
+    assert tripletas(destino) == tripletas(origen)
+    # Los individuos se ven desde owlready2 con sus tipos
+    assert {i.name for i in buscar_instancias_de_clase(destino, "Criptomoneda")} == \
+        {i.name for i in buscar_instancias_de_clase(origen, "Criptomoneda")}
+    assert "es" in [c.lang for c in destino.search_one(iri="*#bitcoin").comment if isinstance(c, locstr)]
+
+    # Importar dos veces no duplica, y el resumen cuenta solo lo insertado
+    repetido = importar(destino, tablas)
+    assert repetido["individuos"] == repetido["datos"] == repetido["relaciones"] == 0
+    assert tripletas(destino) == tripletas(origen)
+
+
+def test_relaciones_entre_individuos(tmp_path):
+    ruta = str(tmp_path / "sintetica.owl")
+    generar_ontologia(300, ruta)
+    origen = cargar_ontologia_archivo(ruta, mundo=World())
+    resumen = exportar(origen, str(tmp_path / "exportacion"))
+    assert resumen["relaciones"] > 0
+
+    destino = solo_esquema(ruta)
+    importado = importar(destino, leer_tablas(str(tmp_path / "exportacion")))
+    assert importado["relaciones"] == resumen["relaciones"]
+    assert tripletas(destino) == tripletas(origen)
+
+
+def test_enriquecimiento_y_motor(tmp_path):
+    offline = DBpediaOffline(backend=CacheMemoria())
+    offline.agregar_varios({"bitcoin": {"uri": "http://dbpedia.org/resource/Bitcoin", "label": "Bitcoin",
+                                        "abstract": "Criptomoneda", "categories": ["Cryptocurrencies"],
+                                        "confianza": 0.9}})
+    motor = MotorBusqueda(cargar_ontologia_archivo("criptomonedas.owl", mundo=World()), offline=offline)
+    resumen = motor.exportar_tablas(str(tmp_path))
+    assert resumen["enriquecimiento"] == 1
+    fila = leer_tablas(str(tmp_path))["enriquecimiento"].to_pylist()[0]
+    assert fila["etiqueta"] == "Bitcoin" and fila["categorias"] == ["Cryptocurrencies"]
+
+    otro = MotorBusqueda(solo_esquema("criptomonedas.owl"), offline=DBpediaOffline(backend=CacheMemoria()))
+    version = otro.version
+    importado = otro.importar_tablas(str(tmp_path))
+    assert importado["enriquecimiento"] == 1 and otro.version > version
+    assert otro.offline.obtener_del_cache("bitcoin")["confianza"] == 0.9
+    assert otro.estadisticas_ontologia().resumen()["individuos"] == resumen["individuos"]
+
+
+def test_importacion_fallida_no_deja_nada(tmp_path, monkeypatch):
+    origen = cargar_ontologia_archivo("criptomonedas.owl", mundo=World())
+    exportar(origen, str(tmp_path))
+    tablas = leer_tablas(str(tmp_path))
+    destino = solo_esquema("criptomonedas.owl")
+    antes = tripletas(destino)
+
+    # Un valor que sqlite no puede guardar hace fallar la inserción de datos,
+    # después de haber insertado los tipos de los individuos
+    valor_crudo = parquet_ontologia._valor_crudo
+    monkeypatch.setattr(parquet_ontologia, "_valor_crudo",
+                        lambda valor, numero: [valor] if valor == "false" else valor_crudo(valor, numero))
+    with pytest.raises(Exception):
+        importar(destino, tablas)
+    assert tripletas(destino) == antes
+    assert not list(destino.individuals())
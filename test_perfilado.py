@@ -0,0 +1,36 @@
+"""
+Pruebas del perfilado opcional (cProfile + tracemalloc).
+"""
+
+import os
+import tempfile
+import tracemalloc
+
+from perfilado import Perfilador, perfilar
+
+
+@perfilar("prueba.ruta")
+def _ruta_de_busqueda(n):
+    return [str(i) for i in range(n)]
+
+
+def test_perfilador_escribe_archivos_y_desglosa_rutas():
+    directorio = tempfile.mkdtemp()
+    perfilador = Perfilador(directorio=directorio, top=5).iniciar()
+    _ruta_de_busqueda(20000)
+    resumen = perfilador.finalizar()
+
+    assert os.path.exists(resumen["archivo_prof"])
+    assert os.path.exists(resumen["archivo_memoria"])
+    assert len(resumen["hotspots"]) <= 5
+    assert [fila["ruta"] for fila in resumen["funciones_busqueda"]] == ["prueba.ruta"]
+    assert not tracemalloc.is_tracing()
+
+
+def test_decorador_perfila_fuera_de_un_rerun(monkeypatch):
+    directorio = tempfile.mkdtemp()
+    monkeypatch.setenv("BUSCADOR_PERFILADO", "1")
+    monkeypatch.setenv("BUSCADOR_PERFILADO_DIR", directorio)
+    assert len(_ruta_de_busqueda(10)) == 10
+    archivos = os.listdir(directorio)
+    assert any(a.startswith("prueba.ruta-") and a.endswith(".prof") for a in archivos)
@@ -0,0 +1,72 @@
+"""
+Pruebas del motor de reglas: subclase, dominio/rango, inversa, simétrica,
+transitiva y actualización incremental al importar individuos.
+"""
+
+import pytest
+from owlready2 import ObjectProperty, TransitiveProperty, World
+
+from busqueda_local import buscar_instancias_de_clase, cargar_ontologia_archivo, listar_clases
+from razonador import Materializacion
+
+
+@pytest.fixture
+def onto():
+    return cargar_ontologia_archivo("criptomonedas.owl", mundo=World())
+
+
+@pytest.fixture
+def ns(onto):
+    # Las clases están en el espacio de nombres original de Protégé, no en el base_iri
+    return onto.get_namespace("http://www.semanticweb.org/cristian/ontologies/2025/8/untitled-ontology-4#")
+
+
+def test_subclases_igual_que_owlready(onto):
+    materializacion = Materializacion(onto)
+    for clase in listar_clases(onto):
+        assert set(materializacion.instancias_de(clase)) == set(buscar_instancias_de_clase(onto, clase))
+    # Las instancias salen de los índices, en el orden de la ontología
+    orden = list(onto.individuals())
+    instancias = materializacion.instancias_de("Criptomoneda")
+    assert instancias and instancias == sorted(instancias, key=orden.index)
+    assert materializacion.instancias_de("NoExiste") == []
+
+
+def test_reglas_de_propiedades(onto, ns):
+    with onto:
+        mercado = ns.Mercado("mercado_prueba")
+        moneda = ns.Criptomoneda("moneda_prueba")
+        mercado.opera = [moneda]  # opera: simétrica, dominio Mercado, rango Criptomoneda y Token
+
+        class conectaCon(ObjectProperty, TransitiveProperty):
+            pass
+
+        class conectadoDesde(ObjectProperty):
+            inverse_property = conectaCon
+
+        a, b, c = ns.Nodo("nodo_a"), ns.Nodo("nodo_b"), ns.Nodo("nodo_c")
+        a.conectaCon = [b]
+        b.conectaCon = [c]
+
+    materializacion = Materializacion(onto)
+    assert moneda in materializacion.instancias_de("Token")  # rango
+    assert "Tipos_de_criptomonedas" in materializacion.tipos_inferidos(moneda)
+    assert materializacion.relaciones_inferidas(moneda)["opera"] == ["mercado_prueba"]  # simétrica
+    assert "nodo_c" in materializacion.relaciones_inferidas(a)["conectaCon"]  # transitiva
+    assert materializacion.relaciones_inferidas(c)["conectadoDesde"] == ["nodo_a", "nodo_b"]  # inversa
+    assert a in materializacion.instancias_de("Tipos_de_criptomonedas")  # Nodo ⊑ Blockchain ⊑ ...
+
+
+def test_actualizacion_incremental(onto, ns):
+    materializacion = Materializacion(onto)
+    with onto:
+        mercado = ns.Mercado("mercado_nuevo")
+        moneda = ns.Stablecoin("stable_nueva")
+        mercado.opera = [moneda]
+    inferidos = materializacion.agregar_individuos([mercado, moneda])
+    assert inferidos > 0
+    assert moneda in materializacion.instancias_de("Criptomoneda")
+
+    completa = Materializacion(onto)
+    for clase in listar_clases(onto):
+        assert set(materializacion.instancias_de(clase)) == set(completa.instancias_de(clase))
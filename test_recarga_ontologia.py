@@ -0,0 +1,120 @@
+"""
+Pruebas de la recarga en caliente: diferencia de tripletas, aplicación
+incremental al World cargado, recarga completa ante cambios de esquema y
+el vigilante de archivos.
+"""
+
+import shutil
+import time
+import types
+
+import pytest
+from owlready2 import World, destroy_entity, owl_equivalentindividual
+
+from busqueda_local import cargar_ontologia_archivo
+from enlaces_dbpedia import TablaEnlaces
+from motor_busqueda import ErrorBusqueda, MotorBusqueda
+from recarga_ontologia import VigilanteOntologia, calcular_diferencia
+
+
+@pytest.fixture
+def ruta(tmp_path):
+    destino = tmp_path / "criptomonedas.owl"
+    shutil.copy("criptomonedas.owl", destino)
+    return str(destino)
+
+
+@pytest.fixture
+def motor(ruta):
+    return MotorBusqueda(cargar_ontologia_archivo(ruta, mundo=World()), enlaces=TablaEnlaces(None))
+
+
+def _editar(ruta, cambio):
+    """Modifica el archivo desde otro World, como lo haría un editor externo"""
+    onto = cargar_ontologia_archivo(ruta, mundo=World())
+    cambio(onto)
+    onto.save(file=ruta)
+
+
+def _cambiar_individuos(onto):
+    bitcoin = onto.search_one(iri="*#bitcoin")
+    bitcoin.volatilidad = ["extrema"]
+    nueva = onto.search_one(iri="*#Criptomoneda")("nuevaMoneda", namespace=bitcoin.namespace)
+    nueva.volatilidad = ["baja"]
+    destroy_entity(onto.search_one(iri="*#litecoin"))
+
+
+def test_sin_cambios_la_diferencia_es_vacia(motor, ruta):
+    diferencia, _ = calcular_diferencia(motor.onto, ruta)
+    assert diferencia.vacia
+    assert motor.recargar_desde_archivo(ruta)["cambios"] is False
+    assert motor.version == 1
+
+
+def test_cambios_de_individuos_se_aplican_sobre_el_mismo_world(motor, ruta):
+    onto, conector, offline = motor.onto, motor.conector, motor.offline
+    assert motor.buscar_por_nombre("litecoin")
+    _editar(ruta, _cambiar_individuos)
+
+    resumen = motor.recargar_desde_archivo(ruta)
+    assert resumen["cambios"] and not resumen["completa"]
+    assert resumen["individuos_nuevos"] == 1 and resumen["individuos_eliminados"] == 1
+    assert motor.onto is onto and motor.conector is conector and motor.offline is offline
+    assert motor.version == 2
+
+    assert motor.buscar_por_nombre("bitcoin")[0]["propiedades"]["volatilidad"] == ["extrema"]
+    assert motor.buscar_por_nombre("litecoin") == []
+    assert "nuevaMoneda" in {r["nombre"] for r in motor.buscar_por_clase("Criptomoneda")}
+    assert motor.buscar_facetado({"volatilidad": ["baja"]})["total"] >= 1
+    # El archivo y la ontología quedaron iguales
+    assert motor.recargar_desde_archivo(ruta)["cambios"] is False
+
+
+def test_cambio_de_esquema_recarga_completa(motor, ruta):
+    def agregar_clase(onto):
+        criptomoneda = onto.search_one(iri="*#Criptomoneda")
+        with criptomoneda.namespace:
+            memecoin = types.new_class("Memecoin", (criptomoneda,))
+        memecoin("dogeX", namespace=criptomoneda.namespace)
+
+    onto = motor.onto
+    # Un enlace confiable hallado por búsqueda (no importado) sigue como owl:sameAs tras la recarga
+    motor.enlaces.registrar("bitcoin", "http://dbpedia.org/resource/Bitcoin", "Bitcoin", 0.95,
+                            "lookup", guardar=False)
+    _editar(ruta, agregar_clase)
+    resumen = motor.recargar_desde_archivo(ruta)
+    assert resumen["completa"] and motor.onto is not onto
+    assert [r["nombre"] for r in motor.buscar_por_clase("Memecoin")] == ["dogeX"]
+    assert "dogeX" in {r["nombre"] for r in motor.buscar_por_clase("Criptomoneda")}
+    bitcoin = motor.onto.search_one(iri="*#bitcoin")
+    assert motor.onto._has_obj_triple_spo(bitcoin.storid, owl_equivalentindividual,
+                                          motor.onto.world._abbreviate("http://dbpedia.org/resource/Bitcoin"))
+
+
+def test_importar_entidad_guarda_bajo_el_lock_sin_dejar_diferencias(motor, ruta):
+    version = motor.version
+    entidad = {"uri": "http://dbpedia.org/resource/Nano_(cryptocurrency)", "label": "Nano Coin",
+               "comment": "Criptomoneda"}
+    assert motor.importar_entidad(entidad, ruta) == {"nombre": "nano_coin", "clase": "Criptomoneda"}
+    assert motor.version > version
+    assert "nano_coin" in motor.nombres_individuos()
+    nano = next(i for i in motor.listar_individuos() if i["nombre"] == "nano_coin")
+    assert "Criptomoneda" in nano["tipos"] and motor.enlace_dbpedia("nano_coin")["uri"] == entidad["uri"]
+    # El archivo guardado ya tiene el individuo y su owl:sameAs: la recarga que dispara no cambia nada
+    assert motor.recargar_desde_archivo(ruta)["cambios"] is False
+    with pytest.raises(ErrorBusqueda):
+        motor.importar_entidad(entidad, ruta)
+
+
+def test_vigilante_aplica_los_cambios_del_archivo(motor, ruta):
+    recargas = []
+    vigilante = VigilanteOntologia(motor, ruta, recargas.append, espera=0.1).iniciar()
+    try:
+        _editar(ruta, lambda onto: setattr(onto.search_one(iri="*#bitcoin"), "volatilidad", ["extrema"]))
+        limite = time.monotonic() + 10
+        while not recargas and time.monotonic() < limite:
+            time.sleep(0.05)
+    finally:
+        vigilante.detener()
+    assert recargas and recargas[0]["tripletas_agregadas"] == 1
+    assert motor.buscar_por_nombre("bitcoin")[0]["propiedades"]["volatilidad"] == ["extrema"]
@@ -0,0 +1,82 @@
+"""
+Pruebas del modo SPARQL local: equivalencia con las búsquedas en Python,
+caché de consultas preparadas, rechazo de modificaciones y lectura de filas
+en streaming.
+"""
+
+import pytest
+from owlready2 import World
+
+from busqueda_local import buscar_individuos_por_nombre, buscar_instancias_de_clase, cargar_ontologia_archivo
+import motor_busqueda
+from motor_busqueda import ErrorBusqueda, MotorBusqueda
+from sparql_local import ConsultorSPARQL, ErrorSPARQL
+
+
+@pytest.fixture(scope="module")
+def onto():
+    return cargar_ontologia_archivo("criptomonedas.owl", mundo=World())
+
+
+def test_plantillas_equivalentes_a_busquedas_locales(onto):
+    consultor = ConsultorSPARQL(onto)
+    for termino in ["BIT", "coin", "zzz"]:
+        esperado = sorted(ind.name for ind in buscar_individuos_por_nombre(onto, termino))
+        assert sorted(f[0] for f in consultor.ejecutar_plantilla("individuos_por_nombre", termino)) == esperado
+    esperado = sorted(ind.name for ind in buscar_instancias_de_clase(onto, "Tipos_de_criptomonedas"))
+    assert esperado
+    assert sorted(f[0] for f in consultor.ejecutar_plantilla("instancias_de_clase", "Tipos_de_criptomonedas")) == esperado
+
+
+def test_cache_de_consultas_preparadas(onto):
+    consultor = ConsultorSPARQL(onto, capacidad=2)
+    consultas = ["SELECT ?c WHERE { ?c rdf:type owl:Class . }",
+                 "SELECT ?i WHERE { ?i rdf:type owl:NamedIndividual . }",
+                 "SELECT ?p WHERE { ?p rdf:type owl:DatatypeProperty . }"]
+    consultor.preparar(consultas[0])
+    consultor.preparar(consultas[0])
+    assert consultor.estadisticas_cache()["aciertos"] == 1
+    for consulta in consultas[1:]:
+        consultor.preparar(consulta)
+    estadisticas = consultor.estadisticas_cache()
+    assert estadisticas["preparadas"] == 2 and estadisticas["fallos"] == 3
+    # La más antigua salió de la caché
+    consultor.preparar(consultas[0])
+    assert consultor.estadisticas_cache()["fallos"] == 4
+
+
+def test_rechaza_consultas_invalidas_y_de_modificacion(onto):
+    consultor = ConsultorSPARQL(onto)
+    with pytest.raises(ErrorSPARQL):
+        consultor.ejecutar("SELEC ?x")
+    with pytest.raises(ErrorSPARQL):
+        consultor.ejecutar("INSERT { cripto:bitcoin rdfs:label \"x\" } WHERE { }")
+    with pytest.raises(ErrorSPARQL):
+        consultor.ejecutar_plantilla("instancias_de_clase", "ClaseInexistente")
+    with pytest.raises(ErrorSPARQL):
+        consultor.ejecutar_plantilla("clases", "sobra")
+
+
+def test_motor_entrega_filas_en_streaming(onto):
+    motor = MotorBusqueda(onto)
+    columnas, filas = motor.consultar_sparql("SELECT ?i WHERE { ?i rdf:type owl:NamedIndividual . }", limite=5)
+    assert columnas == ["i"]
+    primera = next(filas)
+    assert isinstance(primera[0], str)
+    assert len(list(filas)) == 4
+
+    columnas, filas = motor.plantilla_sparql("individuos_por_nombre", ["bitcoin"])
+    assert columnas == ["individuo"] and "bitcoin" in {f[0] for f in filas}
+    with pytest.raises(ErrorBusqueda):
+        motor.consultar_sparql("DELETE { ?s ?p ?o } WHERE { ?s ?p ?o }")
+
+
+def test_el_flujo_se_corta_si_la_ontologia_cambia(onto, monkeypatch):
+    monkeypatch.setattr(motor_busqueda, "FILAS_POR_BLOQUE", 10)
+    motor = MotorBusqueda(onto)
+    _, filas = motor.consultar_sparql("SELECT ?i WHERE { ?i rdf:type owl:NamedIndividual . }")
+    primeras = [next(filas) for _ in range(10)]
+    assert len(primeras) == 10
+    motor.notificar_cambio()  # p. ej. una recarga mientras se consume el flujo
+    with pytest.raises(ErrorBusqueda):
+        list(filas)
@@ -0,0 +1,51 @@
+"""
+Pruebas del modo grabación/reproducción del transporte de DBpedia.
+"""
+
+import os
+import tempfile
+
+from benchmarks.servidor_simulado import iniciar_servidor
+from dbpedia_connector import DBpediaConnector, buscar_en_dbpedia
+from transporte import (
+    ErrorCasete, TransporteGrabador, TransporteReproductor, clave_solicitud, leer_casete
+)
+
+
+def test_clave_ignora_espacios_de_la_consulta():
+    a = clave_solicitud("sparql", {"query": "SELECT ?s\n   WHERE { ?s ?p ?o }"})
+    b = clave_solicitud("sparql", {"query": "SELECT ?s WHERE { ?s ?p ?o }"})
+    assert a == b
+    assert a != clave_solicitud("lookup", {"query": "SELECT ?s WHERE { ?s ?p ?o }"})
+
+
+def test_grabar_y_reproducir_sin_red():
+    ruta = os.path.join(tempfile.mkdtemp(), "casete.jsonl.gz")
+
+    servidor = iniciar_servidor(latencia_ms=30)
+    try:
+        grabador = TransporteGrabador(ruta)
+        conector = DBpediaConnector(servidor.endpoint_sparql, servidor.endpoint_lookup, grabador)
+        original = conector.buscar_con_api_rest("Bitcoin")
+        entidades, _ = buscar_en_dbpedia("bitcoin", endpoint=servidor.endpoint_sparql,
+                                         transporte=grabador)
+    finally:
+        servidor.detener()
+
+    entradas = leer_casete(ruta)
+    assert len(entradas) == 2
+    assert all(entrada["duracion_ms"] >= 30 for entrada in entradas)
+
+    # El servidor ya está detenido: todo sale del casete
+    reproductor = TransporteReproductor(ruta)
+    conector = DBpediaConnector("http://otro-host/sparql", "http://otro-host/api/search", reproductor)
+    assert conector.buscar_con_api_rest("Bitcoin") == original
+    reproducidas, error = buscar_en_dbpedia("bitcoin", endpoint="http://otro-host/sparql",
+                                            transporte=reproductor)
+    assert error is None and reproducidas == entidades
+
+    try:
+        reproductor.solicitar("lookup", "http://otro-host", {"query": "no grabado"})
+        assert False, "debería fallar en modo estricto"
+    except ErrorCasete:
+        pass
@@ -0,0 +1,310 @@
+"""
+Capa de transporte HTTP para las consultas a DBpedia.
+
+Todas las solicitudes salientes (SPARQL, Lookup API y comprobación de
+conexión) pasan por un transporte. Además del transporte HTTP normal hay un
+modo de grabación, que guarda cada par solicitud→respuesta con su duración en
+un "casete" comprimido (JSON Lines + gzip), y un modo de reproducción que
+sirve esas respuestas sin red, opcionalmente respetando los tiempos originales.
+
+Configuración por variables de entorno:
+    DBPEDIA_TRANSPORTE=grabar|reproducir
+    DBPEDIA_CASETE=casetes/dbpedia.jsonl.gz
+    DBPEDIA_REPRODUCIR_TIEMPOS=1
+
+Con DBPEDIA_LIMITE_SPARQL / DBPEDIA_LIMITE_LOOKUP, las solicitudes esperan
+turno en un limitador con prioridades antes de salir (ver limitador_salida.py).
+"""
+
+import base64
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+import requests
+
+from formatos_sparql import analizar_resultados, tipo_contenido
+from limitador_salida import LimitadorSalida, LimiteAgotado, crear_limitador
+from metricas import metricas
+
+CASETE_POR_DEFECTO = "casetes/dbpedia.jsonl.gz"
+FORMATO_SPARQL_JSON = "application/sparql-results+json"
+
+
+class ErrorTransporte(Exception):
+    """Error HTTP o de red en una solicitud a DBpedia"""
+
+
+class ErrorCasete(ErrorTransporte):
+    """La solicitud no está grabada en el casete de reproducción"""
+
+
+class RespuestaHTTP:
+    """Respuesta mínima independiente de la librería HTTP"""
+
+    def __init__(self, estado: int, cuerpo: bytes, tipo_contenido: str = "", duracion: float = 0.0):
+        self.estado = estado
+        self.cuerpo = cuerpo
+        self.tipo_contenido = tipo_contenido
+        self.duracion = duracion
+
+    @property
+    def status_code(self) -> int:
+        return self.estado
+
+    def json(self):
+        return json.loads(self.cuerpo.decode("utf-8"))
+
+
+def normalizar_consulta(consulta: str) -> str:
+    """Colapsa espacios para que la misma consulta genere la misma clave"""
+    return re.sub(r"\s+", " ", consulta).strip()
+
+
+def clave_solicitud(tipo: str, params: Optional[Dict]) -> str:
+    """
+    Clave estable de una solicitud, independiente del host
+
+    Args:
+        tipo: Tipo de solicitud ("sparql", "lookup", "ping")
+        params: Parámetros de la solicitud
+
+    Returns:
+        Hash hexadecimal de la solicitud
+    """
+    normalizados = {
+        k: normalizar_consulta(v) if isinstance(v, str) else v
+        for k, v in sorted((params or {}).items())
+    }
+    texto = tipo + "\n" + json.dumps(normalizados, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+
+class TransporteHTTP:
+    """Transporte HTTP real basado en requests"""
+
+    def __init__(self, user_agent: str = "Mozilla/5.0", limitador: Optional[LimitadorSalida] = None):
+        self.sesion = requests.Session()
+        self.sesion.headers["User-Agent"] = user_agent
+        self.limitador = limitador
+        self._local = threading.local()
+
+    def _esperar_turno(self, tipo: str, timeout: float):
+        """Espera el turno en el limitador (si hay uno); la espera no cuenta como latencia"""
+        self._local.espera = 0.0
+        if self.limitador is None:
+            return
+        try:
+            self._local.espera = self.limitador.adquirir(tipo, timeout=timeout)
+        except LimiteAgotado as e:
+            raise ErrorTransporte(str(e)) from e
+
+    def ultima_espera(self) -> float:
+        """Segundos que la última solicitud de este hilo esperó turno en el limitador"""
+        return getattr(self._local, "espera", 0.0)
+
+    def solicitar(self, tipo: str, url: str, params: Optional[Dict] = None,
+                  timeout: float = 30, encabezados: Optional[Dict] = None) -> RespuestaHTTP:
+        """
+        Ejecuta una solicitud GET instrumentada
+
+        Args:
+            tipo: Tipo de solicitud ("sparql", "lookup", "ping")
+            url: URL del endpoint
+            params: Parámetros de la query string
+            timeout: Tiempo máximo en segundos
+            encabezados: Encabezados HTTP adicionales
+
+        Returns:
+            RespuestaHTTP con estado, cuerpo y duración
+        """
+        self._esperar_turno(tipo, timeout)
+        with metricas.medir("dbpedia", tipo) as medicion:
+            respuesta = self._ejecutar(tipo, url, params, timeout, encabezados)
+            medicion.bytes = len(respuesta.cuerpo)
+            medicion.error = respuesta.estado >= 400
+        return respuesta
+
+    def _ejecutar(self, tipo: str, url: str, params: Optional[Dict] = None,
+                  timeout: float = 30, encabezados: Optional[Dict] = None) -> RespuestaHTTP:
+        """Solicitud GET real (sin instrumentar); los subtransportes la redefinen"""
+        inicio = time.perf_counter()
+        respuesta = self.sesion.get(url, params=params, timeout=timeout, headers=encabezados)
+        return RespuestaHTTP(
+            respuesta.status_code,
+            respuesta.content,
+            respuesta.headers.get("Content-Type", ""),
+            time.perf_counter() - inicio
+        )
+
+    def consultar_sparql(self, consulta: str, endpoint: str, timeout: float = 30,
+                         operacion: str = "sparql", formato: str = "json") -> Dict:
+        """
+        Ejecuta una consulta SPARQL y devuelve el JSON de resultados
+
+        Args:
+            consulta: Texto de la consulta SPARQL
+            endpoint: URL del endpoint SPARQL
+            timeout: Tiempo máximo en segundos
+            operacion: Nombre con el que se registra en las métricas
+            formato: Formato pedido al endpoint ("json", "tsv" o "csv", ver formatos_sparql.py)
+
+        Returns:
+            Diccionario con el formato SPARQL JSON (head/results), sea cual sea el formato pedido
+        """
+        mime = tipo_contenido(formato)
+        self._esperar_turno("sparql", timeout)
+        with metricas.medir("dbpedia", operacion) as medicion:
+            respuesta = self._ejecutar(
+                "sparql",
+                endpoint,
+                params={"query": consulta, "format": mime},
+                timeout=timeout,
+                encabezados={"Accept": mime}
+            )
+            medicion.bytes = len(respuesta.cuerpo)
+            if respuesta.estado != 200:
+                raise ErrorTransporte(f"SPARQL respondió HTTP {respuesta.estado}")
+            with metricas.medir("sparql_analisis", formato) as analisis:
+                resultados = analizar_resultados(respuesta.cuerpo, formato)
+                analisis.bytes = len(respuesta.cuerpo)
+                analisis.filas = len(resultados.get("results", {}).get("bindings", []))
+            medicion.filas = analisis.filas
+        return resultados
+
+
+class TransporteGrabador(TransporteHTTP):
+    """Transporte que graba cada solicitud→respuesta en un casete"""
+
+    def __init__(self, ruta_casete: str = CASETE_POR_DEFECTO, base: Optional[TransporteHTTP] = None):
+        super().__init__()
+        self.base = base or TransporteHTTP()
+        self.ruta_casete = ruta_casete
+        self._lock = threading.Lock()
+        directorio = os.path.dirname(os.path.abspath(ruta_casete))
+        os.makedirs(directorio, exist_ok=True)
+
+    def _ejecutar(self, tipo, url, params=None, timeout=30, encabezados=None):
+        respuesta = self.base._ejecutar(tipo, url, params, timeout, encabezados)
+        self._grabar(tipo, url, params, respuesta)
+        return respuesta
+
+    def _grabar(self, tipo: str, url: str, params: Optional[Dict], respuesta: RespuestaHTTP):
+        """Añade una entrada al casete (cada escritura es un miembro gzip)"""
+        entrada = {
+            "clave": clave_solicitud(tipo, params),
+            "tipo": tipo,
+            "url": url,
+            "params": params or {},
+            "estado": respuesta.estado,
+            "tipo_contenido": respuesta.tipo_contenido,
+            "duracion_ms": round(respuesta.duracion * 1000.0, 2),
+            "cuerpo": base64.b64encode(respuesta.cuerpo).decode("ascii"),
+            "grabado": time.time(),
+        }
+        linea = json.dumps(entrada, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            with gzip.open(self.ruta_casete, "at", encoding="utf-8") as f:
+                f.write(linea)
+
+
+def leer_casete(ruta_casete: str) -> List[Dict]:
+    """Lee todas las entradas de un casete"""
+    entradas = []
+    with gzip.open(ruta_casete, "rt", encoding="utf-8") as f:
+        for linea in f:
+            if linea.strip():
+                entradas.append(json.loads(linea))
+    return entradas
+
+
+class TransporteReproductor(TransporteHTTP):
+    """Transporte que sirve respuestas grabadas sin acceder a la red"""
+
+    def __init__(self, ruta_casete: str = CASETE_POR_DEFECTO, respetar_tiempos: bool = False,
+                 factor_tiempo: float = 1.0, estricto: bool = True):
+        super().__init__()
+        self.respetar_tiempos = respetar_tiempos
+        self.factor_tiempo = factor_tiempo
+        self.estricto = estricto
+        self._lock = threading.Lock()
+        self._posiciones: Dict[str, int] = {}
+        self.entradas: Dict[str, List[Dict]] = {}
+        for entrada in leer_casete(ruta_casete):
+            self.entradas.setdefault(entrada["clave"], []).append(entrada)
+
+    def buscar_entrada(self, tipo: str, params: Optional[Dict]) -> Optional[Dict]:
+        """Devuelve la siguiente grabación de la solicitud (rota si hay varias)"""
+        clave = clave_solicitud(tipo, params)
+        grabaciones = self.entradas.get(clave)
+        if not grabaciones:
+            return None
+        with self._lock:
+            posicion = self._posiciones.get(clave, 0)
+            self._posiciones[clave] = posicion + 1
+        return grabaciones[posicion % len(grabaciones)]
+
+    def _ejecutar(self, tipo, url, params=None, timeout=30, encabezados=None):
+        entrada = self.buscar_entrada(tipo, params)
+        if entrada is None:
+            if self.estricto:
+                raise ErrorCasete(f"Solicitud '{tipo}' no grabada en el casete")
+            return RespuestaHTTP(404, b"{}", "application/json")
+
+        duracion = entrada["duracion_ms"] / 1000.0
+        if self.respetar_tiempos:
+            espera = duracion * self.factor_tiempo
+            if espera > timeout:
+                time.sleep(timeout)
+                raise requests.exceptions.Timeout(f"Tiempo grabado {duracion:.2f}s excede el timeout")
+            time.sleep(espera)
+
+        return RespuestaHTTP(
+            entrada["estado"],
+            base64.b64decode(entrada["cuerpo"]),
+            entrada.get("tipo_contenido", ""),
+            duracion
+        )
+
+
+def crear_transporte(modo: Optional[str] = None, ruta_casete: Optional[str] = None) -> TransporteHTTP:
+    """
+    Crea el transporte según el modo indicado o las variables de entorno
+
+    Args:
+        modo: "grabar", "reproducir" o None/"http" para el transporte normal
+        ruta_casete: Ruta del casete a usar
+
+    Returns:
+        Transporte configurado
+    """
+    modo = (modo or os.environ.get("DBPEDIA_TRANSPORTE", "http")).lower()
+    ruta_casete = ruta_casete or os.environ.get("DBPEDIA_CASETE", CASETE_POR_DEFECTO)
+
+    if modo == "reproducir":
+        return TransporteReproductor(
+            ruta_casete,
+            respetar_tiempos=os.environ.get("DBPEDIA_REPRODUCIR_TIEMPOS", "0") == "1"
+        )
+    # El limitador solo tiene sentido cuando las solicitudes salen a la red
+    transporte = TransporteGrabador(ruta_casete) if modo == "grabar" else TransporteHTTP()
+    transporte.limitador = crear_limitador()
+    return transporte
+
+
+_transporte_global = None
+_lock_global = threading.Lock()
+
+
+def transporte_por_defecto() -> TransporteHTTP:
+    """Transporte compartido del proceso (se crea la primera vez que se usa)"""
+    global _transporte_global
+    with _lock_global:
+        if _transporte_global is None:
+            _transporte_global = crear_transporte()
+        return _transporte_global